@@ -0,0 +1,67 @@
+/**
+ * 분석 레코드 리더 - analyze_sql_query의 압축 출력(output_format 'jsonl' / 'binary') 읽기
+ *
+ * 역할:
+ * - mcp-sql-query-analyzer.py의 read_analysis_records()와 같은 형식을 Node에서 읽음
+ *   (pretty-printed JSON 리포트를 다시 파싱하지 않고 필요한 종류의 레코드만 사용)
+ * - 형식은 파일 앞의 매직 헤더로 판별
+ *
+ * 형식:
+ *   jsonl  - 한 줄에 레코드 하나 (공백 없는 JSON, 'kind'가 첫 키)
+ *   binary - 매직 헤더(SQLAREC1) + 레코드 반복
+ *            (종류 번호 1바이트, 본문 길이 4바이트 little-endian, 'kind'를 뺀 JSON 본문)
+ */
+
+import { readFileSync } from 'fs';
+
+// 레코드 종류 (mcp-sql-query-analyzer.py의 ANALYSIS_RECORD_KINDS와 같은 순서: 바이너리 형식의 종류 번호)
+export const ANALYSIS_RECORD_KINDS = [
+  'metadata', 'score', 'performance_issue', 'security_vulnerability', 'optimization_suggestion',
+  'join', 'cte_dependency', 'subquery', 'column_edge', 'column_output', 'worst_statement'
+];
+
+export const PACKED_RECORDS_MAGIC = Buffer.from('SQLAREC1', 'latin1');
+const FRAME_HEADER_SIZE = 5;
+
+/**
+ * JSONL 또는 바이너리 레코드 파일 읽기
+ *
+ * @param {string} filePath - 레코드 파일 경로 (*.jsonl / *.sqlrec)
+ * @param {string[]|null} kinds - 읽을 레코드 종류 (null이면 전체). 나머지는 JSON 파싱 없이 건너뜀
+ * @returns {object[]} 레코드 목록 ('kind' 키에 종류)
+ */
+export function readAnalysisRecords(filePath, kinds = null) {
+  const data = readFileSync(filePath);
+  const wanted = kinds ? new Set(kinds) : null;
+  const records = [];
+
+  if (data.length >= PACKED_RECORDS_MAGIC.length &&
+      data.subarray(0, PACKED_RECORDS_MAGIC.length).equals(PACKED_RECORDS_MAGIC)) {
+    let offset = PACKED_RECORDS_MAGIC.length;
+    while (offset + FRAME_HEADER_SIZE <= data.length) {
+      const code = data.readUInt8(offset);
+      const length = data.readUInt32LE(offset + 1);
+      offset += FRAME_HEADER_SIZE;
+      if (offset + length > data.length) {
+        throw new Error(`레코드 파일이 잘렸습니다: ${filePath}`);
+      }
+      const kind = ANALYSIS_RECORD_KINDS[code];
+      if (kind && (!wanted || wanted.has(kind))) {
+        records.push({ kind, ...JSON.parse(data.toString('utf8', offset, offset + length)) });
+      }
+      offset += length;
+    }
+    return records;
+  }
+
+  // 'kind'가 항상 첫 키이므로 줄 앞부분만 보고 필요 없는 종류를 건너뜀
+  const prefixes = wanted ? [...wanted].map(kind => `{"kind":${JSON.stringify(kind)}`) : null;
+  for (const line of data.toString('utf8').split('\n')) {
+    const trimmed = line.trim();
+    if (!trimmed || (prefixes && !prefixes.some(prefix => trimmed.startsWith(prefix)))) {
+      continue;
+    }
+    records.push(JSON.parse(trimmed));
+  }
+  return records;
+}
@@ -0,0 +1,287 @@
+/**
+ * 분석기 워커 클라이언트 - analyzer-worker-server.py 상주 프로세스 관리 및 JSON-RPC 호출
+ *
+ * 역할:
+ * - 분석기 워커 서버(Python)를 한 번 띄워 두고 Unix 소켓(Windows는 127.0.0.1 TCP)으로 요청 전달
+ * - 요청마다 python 프로세스를 새로 띄우는 비용(인터프리터 시작, sqlparse/mcp import, 정규식 컴파일) 제거
+ * - 워커 서버가 종료되면 다음 요청 때 자동으로 다시 시작
+ *
+ * 환경 변수:
+ *   ANALYZER_WORKER=off            - 워커 사용 안 함 (기존처럼 요청마다 python 실행)
+ *   ANALYZER_WORKER_COUNT=2        - 워커 프로세스 수
+ *   ANALYZER_WORKER_SOCKET=경로    - Unix 소켓 경로
+ *   ANALYZER_WORKER_PORT=3003      - TCP 포트 (Windows 또는 지정 시)
+ *   ANALYZER_WORKER_PYTHON=python  - python 실행 파일
+ */
+
+import { spawn } from 'child_process';
+import net from 'net';
+import { join } from 'path';
+
+const READY_TIMEOUT = 120000; // 워커 예열(모듈 로드) 대기 시간
+const RESTART_BACKOFF = 5000; // 비정상 종료 후 재시작까지 최소 간격
+
+export class AnalyzerWorkerClient {
+  constructor(options = {}) {
+    const rootDir = options.rootDir || process.cwd();
+    this.rootDir = rootDir;
+    this.scriptPath = options.scriptPath || join(rootDir, 'analyzer-worker-server.py');
+    this.pythonCommand = options.pythonCommand || process.env.ANALYZER_WORKER_PYTHON || 'python';
+    this.workers = Number(options.workers || process.env.ANALYZER_WORKER_COUNT || 2);
+    this.socketPath = options.socketPath || process.env.ANALYZER_WORKER_SOCKET || join(rootDir, 'logs', 'analyzer-worker.sock');
+    this.port = options.port || process.env.ANALYZER_WORKER_PORT || (process.platform === 'win32' ? 3003 : null);
+
+    this.process = null;
+    this.address = null;
+    this.socket = null;
+    this.buffer = '';
+    this.nextId = 1;
+    this.pending = new Map();
+    this.starting = null;
+    this.lastExitAt = 0;
+  }
+
+  /**
+   * 워커 서버 시작 (이미 실행 중이면 그대로 사용)
+   * - 서버가 stdout으로 {"ready": true, ...} 한 줄을 출력하면 연결
+   */
+  start() {
+    if (this.isReady()) {
+      return Promise.resolve(this);
+    }
+    if (this.starting) {
+      return this.starting;
+    }
+
+    this.starting = new Promise((resolve, reject) => {
+      const args = [this.scriptPath, '--workers', String(this.workers)];
+      if (this.port) {
+        args.push('--port', String(this.port));
+      } else {
+        args.push('--socket', this.socketPath);
+      }
+
+      const env = process.platform === 'win32'
+        ? { ...process.env, PYTHONIOENCODING: 'utf-8', PYTHONLEGACYWINDOWSSTDIO: '0' }
+        : process.env;
+      const child = spawn(this.pythonCommand, args, { cwd: this.rootDir, env, stdio: ['ignore', 'pipe', 'pipe'] });
+      this.process = child;
+
+      const readyTimer = setTimeout(() => {
+        reject(new Error('분석기 워커 시작 타임아웃'));
+        child.kill();
+      }, READY_TIMEOUT);
+
+      let stdoutBuffer = '';
+      let ready = false;
+      child.stdout.on('data', (chunk) => {
+        stdoutBuffer += chunk.toString('utf-8');
+        let newline;
+        while ((newline = stdoutBuffer.indexOf('\n')) >= 0) {
+          const line = stdoutBuffer.slice(0, newline).trim();
+          stdoutBuffer = stdoutBuffer.slice(newline + 1);
+          if (!line) continue;
+
+          if (!ready) {
+            try {
+              const message = JSON.parse(line);
+              if (message.ready) {
+                ready = true;
+                clearTimeout(readyTimer);
+                this.address = message.unix ? { path: message.address } : { host: '127.0.0.1', port: Number(this.port) };
+                console.log(`[분석기 워커] 준비 완료 (주소: ${message.address}, 워커 ${message.workers}개, PID ${message.pid})`);
+                this._connect().then(() => resolve(this), reject);
+                continue;
+              }
+            } catch (e) {
+              // 준비 메시지가 아닌 일반 출력
+            }
+          }
+          console.log('[분석기 워커]', line);
+        }
+      });
+
+      child.stderr.on('data', (chunk) => {
+        console.error('[분석기 워커 stderr]', chunk.toString('utf-8').trim());
+      });
+
+      child.on('error', (error) => {
+        clearTimeout(readyTimer);
+        reject(error);
+      });
+
+      child.on('exit', (code, signal) => {
+        clearTimeout(readyTimer);
+        console.warn(`[분석기 워커] 종료됨 (코드: ${code}, 시그널: ${signal})`);
+        this.lastExitAt = Date.now();
+        this.process = null;
+        this._teardown(new Error('분석기 워커 프로세스가 종료되었습니다.'));
+        if (!ready) {
+          reject(new Error(`분석기 워커 시작 실패 (코드: ${code})`));
+        }
+      });
+    }).finally(() => {
+      this.starting = null;
+    });
+
+    return this.starting;
+  }
+
+  _connect() {
+    return new Promise((resolve, reject) => {
+      const socket = net.createConnection(this.address);
+      socket.setEncoding('utf-8');
+      socket.once('connect', () => {
+        this.socket = socket;
+        resolve();
+      });
+      socket.once('error', reject);
+      socket.on('data', (data) => this._onData(data));
+      socket.on('close', () => {
+        if (this.socket === socket) {
+          this.socket = null;
+          this._failPending(new Error('분석기 워커 연결이 끊어졌습니다.'));
+        }
+      });
+    });
+  }
+
+  _onData(data) {
+    this.buffer += data;
+    let newline;
+    while ((newline = this.buffer.indexOf('\n')) >= 0) {
+      const line = this.buffer.slice(0, newline);
+      this.buffer = this.buffer.slice(newline + 1);
+      if (!line.trim()) continue;
+
+      let response;
+      try {
+        response = JSON.parse(line);
+      } catch (e) {
+        console.error('[분석기 워커] 응답 파싱 실패:', e.message);
+        continue;
+      }
+
+      const request = this.pending.get(response.id);
+      if (!request) continue;
+      this.pending.delete(response.id);
+      clearTimeout(request.timer);
+
+      if (response.error) {
+        const error = new Error(response.error.message);
+        error.rpcCode = response.error.code;
+        request.reject(error);
+      } else {
+        request.resolve(response.result);
+      }
+    }
+  }
+
+  _failPending(error) {
+    for (const request of this.pending.values()) {
+      clearTimeout(request.timer);
+      request.reject(error);
+    }
+    this.pending.clear();
+  }
+
+  _teardown(error) {
+    if (this.socket) {
+      this.socket.destroy();
+      this.socket = null;
+    }
+    this.buffer = '';
+    this._failPending(error);
+  }
+
+  isReady() {
+    return !!(this.process && this.socket);
+  }
+
+  /**
+   * JSON-RPC 호출
+   * @param {string} method - 메서드명 (health, sql.analyze, sql.impact, ...)
+   * @param {object} params - 파라미터
+   * @param {object} options - { timeout: 밀리초 } (서버 측 분석 타임아웃에도 전달)
+   */
+  async call(method, params = {}, options = {}) {
+    if (!this.isReady()) {
+      if (Date.now() - this.lastExitAt < RESTART_BACKOFF) {
+        throw new Error('분석기 워커를 사용할 수 없습니다. (재시작 대기 중)');
+      }
+      await this.start();
+    }
+
+    const id = this.nextId++;
+    const timeout = options.timeout || 300000;
+    const payload = { ...params };
+    if (method !== 'health') {
+      payload.timeout = timeout / 1000;
+    }
+
+    return new Promise((resolve, reject) => {
+      // 서버 측 타임아웃 응답을 받을 수 있도록 클라이언트 타임아웃은 약간 길게 설정
+      const timer = setTimeout(() => {
+        this.pending.delete(id);
+        const error = new Error(`분석기 워커 응답 타임아웃 (${timeout / 1000}초 초과)`);
+        error.rpcCode = -32000;
+        reject(error);
+      }, timeout + 5000);
+
+      this.pending.set(id, { resolve, reject, timer });
+      this.socket.write(JSON.stringify({ jsonrpc: '2.0', id, method, params: payload }) + '\n');
+    });
+  }
+
+  /**
+   * 상태 확인
+   * @param {boolean} deep - true 이면 워커 프로세스까지 응답 확인
+   */
+  health(deep = false) {
+    return this.call('health', { deep }, { timeout: 30000 });
+  }
+
+  stop() {
+    this._teardown(new Error('분석기 워커가 중지되었습니다.'));
+    if (this.process) {
+      this.process.kill();
+      this.process = null;
+    }
+  }
+}
+
+/**
+ * 워커가 있으면 워커로, 없으면 기존처럼 python 명령어를 실행하여 { stdout, stderr } 반환
+ * - 분석 결과가 실패(종료 코드 != 0)이거나 타임아웃이면 execAsync와 같은 형태의 오류를 던짐
+ *   (error.stdout, error.stderr, error.code, error.signal)
+ * - 워커 자체를 사용할 수 없으면 execAsync로 대체 실행
+ */
+export async function runAnalyzer(worker, execAsync, command, method, params, execOptions = {}) {
+  if (worker) {
+    let result;
+    try {
+      result = await worker.call(method, params, { timeout: execOptions.timeout });
+    } catch (error) {
+      if (error.rpcCode === -32000) {
+        const timeoutError = new Error(`Command timed out: ${command}`);
+        timeoutError.code = 'TIMEOUT';
+        timeoutError.signal = 'SIGTERM';
+        timeoutError.stdout = '';
+        timeoutError.stderr = error.message;
+        throw timeoutError;
+      }
+      console.warn(`[분석기 워커] ${method} 호출 실패, python 프로세스로 대체 실행:`, error.message);
+      return execAsync(command, execOptions);
+    }
+
+    if (result.exit_code !== 0) {
+      const error = new Error(`Command failed: ${command}\n${result.stderr}`);
+      error.code = result.exit_code;
+      error.stdout = result.stdout;
+      error.stderr = result.stderr;
+      throw error;
+    }
+    return { stdout: result.stdout, stderr: result.stderr };
+  }
+  return execAsync(command, execOptions);
+}
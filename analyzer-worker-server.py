@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+분석기 워커 서버 - SQL/영향도/에러 로그 분석기를 상주 프로세스로 제공
+
+역할:
+- api-server.js가 요청마다 python 프로세스를 새로 띄우지 않도록,
+  분석기 모듈(sqlparse, mcp 포함)을 미리 로드해 둔 워커 프로세스 풀을 유지
+- 컴파일된 정규식, 파싱/결과 캐시가 요청 사이에 유지됨
+- 로컬 Unix 소켓(Windows 등 미지원 환경은 127.0.0.1 TCP)에서
+  줄 단위 JSON-RPC 2.0 요청을 처리
+
+실행 방법:
+  python analyzer-worker-server.py [--socket 경로 | --port 포트] [--workers N] [--timeout 초]
+
+요청/응답 (한 줄에 JSON 하나):
+  {"jsonrpc": "2.0", "id": 1, "method": "sql.impact", "params": {"query_file": "...", "target_table": "users"}}
+  {"jsonrpc": "2.0", "id": 1, "result": {"stdout": "...", "stderr": "", "exit_code": 0}}
+
+메서드:
+  health              - 상태 확인 (params.deep=true 이면 워커 프로세스까지 응답 확인)
+  sql.analyze         - test-sql-query-analyzer.py <query_file> 와 동일
+  sql.impact          - test-sql-query-analyzer.py --impact <query_file> <table> [column] 와 동일
+  sql.impact_batch    - test-sql-query-analyzer.py --impact-batch <query_file> <table[:column]>... 와 동일
+  impact.analyze      - mcp-impact-analyzer.py --table ... [--workspace 경로] 와 동일
+                        (params.workspace 생략 시 워커 작업 디렉토리 = 이 파일이 있는 디렉토리)
+  error_log.analyze   - mcp-error-log-analyzer.py --log-file ... 와 동일
+
+분석 메서드의 결과는 명령줄 실행 시의 stdout/stderr/종료 코드이므로,
+호출 측은 기존 명령줄 출력 처리 로직을 그대로 사용할 수 있습니다.
+
+타임아웃된 요청은 워커 프로세스에서 계속 실행되므로 워커 풀을 종료하고 새로 만듭니다.
+같은 풀에서 실행 중이던 다른 요청은 남은 시간 안에서 새 풀에 다시 제출됩니다.
+params.timeout(초, 생략 시 --timeout)은 0보다 큰 숫자여야 하며, 아니면 INVALID_PARAMS로 응답합니다.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import importlib.util
+import io
+import json
+import math
+import os
+import socket
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Windows 콘솔 인코딩 설정
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+WORKSPACE_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_SOCKET_PATH = os.path.join(WORKSPACE_ROOT, 'logs', 'analyzer-worker.sock')
+DEFAULT_TCP_PORT = 3003
+DEFAULT_TIMEOUT = 300
+
+# JSON-RPC 오류 코드
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+TIMEOUT_ERROR = -32000
+
+class InvalidParamsError(ValueError):
+    """요청 파라미터 오류 (JSON-RPC INVALID_PARAMS로 응답)"""
+
+# ============================================
+# 워커 프로세스 (분석 실행)
+# ============================================
+
+# 워커 프로세스별로 한 번만 로드하는 분석기 모듈
+_modules = {}
+
+def _load_module(name: str, file_name: str):
+    """하이픈이 포함된 파일명의 분석기 모듈 로드 (프로세스당 한 번)"""
+    if name not in _modules:
+        spec = importlib.util.spec_from_file_location(name, os.path.join(WORKSPACE_ROOT, file_name))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _modules[name] = module
+    return _modules[name]
+
+def _sql_cli():
+    # test-sql-query-analyzer.py가 mcp-sql-query-analyzer.py를 상대 경로로 로드하므로 작업 디렉토리 고정
+    return _load_module('test_sql_query_analyzer', 'test-sql-query-analyzer.py')
+
+def _impact_module():
+    return _load_module('mcp_impact_analyzer', 'mcp-impact-analyzer.py')
+
+def _error_log_module():
+    return _load_module('mcp_error_log_analyzer', 'mcp-error-log-analyzer.py')
+
+def _watch_parent(parent_pid: int):
+    """서버 프로세스가 강제 종료되면 워커도 종료 (고아 프로세스 방지)"""
+    while True:
+        time.sleep(2)
+        if os.getppid() != parent_pid:
+            os._exit(0)
+
+def _init_worker():
+    """워커 프로세스 초기화: 모듈 로드 및 작은 쿼리로 정규식/파서 예열"""
+    threading.Thread(target=_watch_parent, args=(os.getppid(),), daemon=True).start()
+    os.chdir(WORKSPACE_ROOT)
+    sql_cli = _sql_cli()
+    _impact_module()
+    _error_log_module()
+
+    warm_up_query = "SELECT u.id FROM users u JOIN orders o ON o.user_id = u.id WHERE u.id = 1"
+    parser = sql_cli.SQLQueryParser(warm_up_query)
+    context = sql_cli.AnalysisContext.for_parser(parser)
+    structure_analyzer = sql_cli.QueryStructureAnalyzer(parser, context)
+    structure_result = structure_analyzer.analyze()
+    sql_cli.PerformanceAnalyzer(parser, context=context).analyze()
+    sql_cli.SecurityAnalyzer(parser, context).analyze()
+    lineage_analyzer = sql_cli.DataLineageAnalyzer(parser, structure_result, context)
+    sql_cli.ImpactAnalyzer(parser, lineage_analyzer, structure_analyzer, context).analyze('users', 'id')
+
+def _require(params: dict, *names: str):
+    missing = [name for name in names if not params.get(name)]
+    if missing:
+        raise InvalidParamsError(f"필수 파라미터가 없습니다: {', '.join(missing)}")
+
+def _run_sql_analyze(params: dict):
+    _require(params, 'query_file')
+    sql_cli = _sql_cli()
+    saved_argv = sys.argv
+    sys.argv = ['test-sql-query-analyzer.py', params['query_file']]
+    try:
+        sql_cli.main()
+    finally:
+        sys.argv = saved_argv
+
+def _run_sql_impact(params: dict):
+    _require(params, 'query_file', 'target_table')
+    result = _sql_cli().analyze_impact(params['query_file'], params['target_table'], params.get('target_column'))
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+def _run_sql_impact_batch(params: dict):
+    _require(params, 'query_file', 'targets')
+    targets = [(target['table'], target.get('column')) for target in params['targets'] if target.get('table')]
+    if not targets:
+        raise InvalidParamsError("필수 파라미터가 없습니다: targets")
+    result = _sql_cli().analyze_impact_batch(params['query_file'], targets)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+def _run_impact_analyze(params: dict):
+    _require(params, 'table_name')
+    impact_module = _impact_module()
+    try:
+        analyzer = impact_module.ImpactAnalyzer(params.get('workspace'))
+        result = analyzer.analyze(params['table_name'], params.get('column_name'), params.get('special_notes'))
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    except Exception as e:
+        # mcp-impact-analyzer.py 명령줄 실행과 같은 오류 출력
+        print(json.dumps({
+            "error": str(e),
+            "error_type": type(e).__name__,
+            "traceback": traceback.format_exc() if sys.platform != 'win32' else None
+        }, ensure_ascii=False, indent=2))
+        sys.exit(1)
+
+def _run_error_log_analyze(params: dict):
+    if not (params.get('log_file') or params.get('log_content') or params.get('workspace')):
+        raise InvalidParamsError("필수 파라미터가 없습니다: log_file, log_content, workspace 중 하나")
+    _error_log_module().run_direct_analysis(params.get('log_file'), params.get('workspace'), params.get('log_content'))
+
+WORKER_METHODS = {
+    'sql.analyze': _run_sql_analyze,
+    'sql.impact': _run_sql_impact,
+    'sql.impact_batch': _run_sql_impact_batch,
+    'impact.analyze': _run_impact_analyze,
+    'error_log.analyze': _run_error_log_analyze,
+}
+
+def run_method(method: str, params: dict) -> dict:
+    """
+    워커 프로세스에서 분석 메서드 실행
+
+    Returns:
+        dict: {'stdout', 'stderr', 'exit_code', 'elapsed_ms'} (명령줄 실행 결과와 동일한 형태)
+    """
+    started = time.perf_counter()
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    exit_code = 0
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        try:
+            WORKER_METHODS[method](params)
+        except SystemExit as e:
+            exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            if e.code is not None and not isinstance(e.code, int):
+                print(e.code, file=sys.stderr)
+        except InvalidParamsError:
+            raise
+        except Exception:
+            traceback.print_exc()
+            exit_code = 1
+    return {
+        'stdout': stdout.getvalue(),
+        'stderr': stderr.getvalue(),
+        'exit_code': exit_code,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+    }
+
+def ping_worker() -> dict:
+    """워커 프로세스 응답 확인용"""
+    return {'pid': os.getpid(), 'modules': sorted(_modules)}
+
+# ============================================
+# 소켓 서버 (요청 수신 및 워커 풀 분배)
+# ============================================
+
+class AnalyzerWorkerServer:
+    """줄 단위 JSON-RPC 요청을 받아 워커 프로세스 풀에 분배하는 서버"""
+
+    def __init__(self, workers: int = 2, timeout: float = DEFAULT_TIMEOUT):
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.started_at = time.time()
+        self.stats = {'total': 0, 'failed': 0, 'timeouts': 0, 'in_flight': 0, 'pool_restarts': 0}
+        self.executor = self._create_executor()
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+
+    def _restart_executor(self, terminate: bool = False):
+        """
+        워커 풀을 새로 생성
+
+        Args:
+            terminate: 실행 중인 워커 프로세스를 강제 종료 (타임아웃된 작업이 슬롯을 계속 점유하지 않도록)
+        """
+        executor = self.executor
+        self.executor = self._create_executor()
+        self.stats['pool_restarts'] += 1
+        if terminate:
+            # ProcessPoolExecutor는 개별 작업을 중단하는 API가 없으므로 워커 프로세스를 직접 종료
+            for process in list((getattr(executor, '_processes', None) or {}).values()):
+                if process.is_alive():
+                    process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _submit(self, func, *args, timeout: float, kill_on_timeout: bool = True):
+        """
+        워커 풀에서 함수 실행
+
+        Args:
+            timeout: 제한 시간(초). 초과하면 asyncio.TimeoutError
+            kill_on_timeout: 타임아웃 시 워커 풀을 종료하고 새로 생성 (상태 확인처럼 대기만 한 경우 False)
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            executor = self.executor
+            try:
+                return await asyncio.wait_for(loop.run_in_executor(executor, func, *args),
+                                              max(0.0, deadline - loop.time()))
+            except asyncio.TimeoutError:
+                if kill_on_timeout and executor is self.executor:
+                    self._restart_executor(terminate=True)
+                raise
+            except BrokenProcessPool:
+                if executor is self.executor:
+                    self._restart_executor()
+                    raise
+                # 다른 요청의 타임아웃(또는 비정상 종료)으로 풀을 새로 만든 경우: 새 풀에서 다시 실행
+                if loop.time() >= deadline:
+                    raise asyncio.TimeoutError()
+
+    async def health(self, params: dict) -> dict:
+        result = {
+            'status': 'ok',
+            'pid': os.getpid(),
+            'workers': self.workers,
+            'uptime_seconds': round(time.time() - self.started_at, 1),
+            'requests': dict(self.stats),
+            'methods': ['health'] + sorted(WORKER_METHODS),
+        }
+        if params.get('deep'):
+            # 모든 워커가 유휴 상태일 때만 의미 있는 확인이므로 짧은 타임아웃 사용
+            try:
+                result['worker'] = await self._submit(ping_worker, timeout=self._timeout_param(params, 30),
+                                                      kill_on_timeout=False)
+            except Exception as e:
+                result['status'] = 'degraded'
+                result['error'] = f"{type(e).__name__}: {e}"
+        return result
+
+    async def dispatch(self, request: dict) -> dict:
+        """JSON-RPC 요청 하나 처리"""
+        request_id = request.get('id')
+        method = request.get('method')
+        params = request.get('params') or {}
+
+        if not isinstance(method, str) or not isinstance(params, dict):
+            return self._error(request_id, INVALID_REQUEST, 'method(문자열)와 params(객체)가 필요합니다.')
+
+        if method == 'health':
+            return {'jsonrpc': '2.0', 'id': request_id, 'result': await self.health(params)}
+
+        if method not in WORKER_METHODS:
+            return self._error(request_id, METHOD_NOT_FOUND, f'알 수 없는 메서드: {method}')
+
+        try:
+            timeout = self._timeout_param(params, self.timeout)
+        except InvalidParamsError as e:
+            return self._error(request_id, INVALID_PARAMS, str(e))
+        params.pop('timeout', None)
+        self.stats['total'] += 1
+        self.stats['in_flight'] += 1
+        try:
+            result = await self._submit(run_method, method, params, timeout=timeout)
+            return {'jsonrpc': '2.0', 'id': request_id, 'result': result}
+        except asyncio.TimeoutError:
+            self.stats['failed'] += 1
+            self.stats['timeouts'] += 1
+            return self._error(request_id, TIMEOUT_ERROR, f'분석 타임아웃 ({timeout:g}초 초과)')
+        except InvalidParamsError as e:
+            self.stats['failed'] += 1
+            return self._error(request_id, INVALID_PARAMS, str(e))
+        except Exception as e:
+            self.stats['failed'] += 1
+            return self._error(request_id, INTERNAL_ERROR, f"{type(e).__name__}: {e}")
+        finally:
+            self.stats['in_flight'] -= 1
+
+    @staticmethod
+    def _timeout_param(params: dict, default: float) -> float:
+        """
+        요청의 timeout(초) 파라미터 검증
+
+        0 이하/NaN은 곧바로 타임아웃되어 워커 풀 전체(다른 요청의 작업 포함)를 재시작시키므로 거부합니다.
+
+        Raises:
+            InvalidParamsError: 숫자가 아니거나 0 이하/무한대/NaN인 경우
+        """
+        value = params.get('timeout', default)
+        try:
+            if isinstance(value, bool):
+                raise TypeError
+            timeout = float(value)
+        except (TypeError, ValueError):
+            raise InvalidParamsError(f'timeout은 숫자여야 합니다: {value!r}') from None
+        if not (math.isfinite(timeout) and timeout > 0):
+            raise InvalidParamsError(f'timeout은 0보다 큰 유한한 숫자여야 합니다: {value!r}')
+        return timeout
+
+    @staticmethod
+    def _error(request_id, code: int, message: str) -> dict:
+        return {'jsonrpc': '2.0', 'id': request_id, 'error': {'code': code, 'message': message}}
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """연결 하나에서 들어오는 요청을 동시에 처리하고, 끝나는 순서대로 응답"""
+        write_lock = asyncio.Lock()
+        pending = set()
+
+        async def respond(line: bytes):
+            try:
+                request = json.loads(line)
+                response = await self.dispatch(request) if isinstance(request, dict) else \
+                    self._error(None, INVALID_REQUEST, '요청은 JSON 객체여야 합니다.')
+            except ValueError as e:
+                response = self._error(None, PARSE_ERROR, f'JSON 파싱 오류: {e}')
+            async with write_lock:
+                writer.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+                await writer.drain()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                task = asyncio.create_task(respond(line))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+async def serve(args):
+    worker_server = AnalyzerWorkerServer(args.workers, args.timeout)
+
+    use_unix = hasattr(socket, 'AF_UNIX') and args.port is None
+    if use_unix:
+        socket_path = args.socket
+        os.makedirs(os.path.dirname(os.path.abspath(socket_path)), exist_ok=True)
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        # 큰 JSON 응답(분석 결과)도 한 줄로 읽을 수 있도록 버퍼 한도 상향
+        server = await asyncio.start_unix_server(worker_server.handle_connection, path=socket_path,
+                                                 limit=64 * 1024 * 1024)
+        address = socket_path
+    else:
+        port = args.port or DEFAULT_TCP_PORT
+        server = await asyncio.start_server(worker_server.handle_connection, host='127.0.0.1', port=port,
+                                            limit=64 * 1024 * 1024)
+        address = f'127.0.0.1:{port}'
+
+    # 서버 시작 직후 워커를 미리 띄워 첫 요청부터 예열된 상태로 처리
+    await asyncio.gather(*(worker_server.health({'deep': True, 'timeout': 120}) for _ in range(worker_server.workers)))
+
+    # 준비 완료 알림 (api-server.js가 이 줄을 기다림)
+    print(json.dumps({'ready': True, 'address': address, 'unix': use_unix, 'workers': worker_server.workers,
+                      'pid': os.getpid()}), flush=True)
+
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        worker_server.shutdown()
+        if use_unix and os.path.exists(address):
+            os.remove(address)
+
+def main():
+    parser = argparse.ArgumentParser(description='분석기 워커 서버 (Unix 소켓/TCP JSON-RPC)')
+    parser.add_argument('--socket', default=os.environ.get('ANALYZER_WORKER_SOCKET', DEFAULT_SOCKET_PATH),
+                        help='Unix 소켓 경로')
+    parser.add_argument('--port', type=int, default=None,
+                        help='TCP 포트 (지정하거나 Unix 소켓 미지원 환경이면 127.0.0.1 TCP 사용)')
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('ANALYZER_WORKER_COUNT', '2')),
+                        help='워커 프로세스 수')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help='요청별 기본 타임아웃(초)')
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
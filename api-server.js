@@ -29,13 +29,14 @@
  *   - 에러 로그 분석: mcp-error-log-analyzer.py 사용
  *   - SQL 쿼리 분석: mcp-sql-query-analyzer.py 사용
  *   - 영향도 분석: mcp-impact-analyzer.py 사용
+ *   - 위 Python 분석기는 상주 워커(analyzer-worker-server.py)로 실행 (ANALYZER_WORKER=off 이면 요청마다 python 실행)
  */
 
 import http from 'http';
 import https from 'https';
 import { URL } from 'url';
 import { HttpsProxyAgent } from 'https-proxy-agent';
-import { readFileSync, readdirSync, statSync } from 'fs';
+import { existsSync, readFileSync, readdirSync, statSync } from 'fs';
 import { fileURLToPath } from 'url';
 import { dirname, join } from 'path';
 import dotenv from 'dotenv';
@@ -45,6 +46,8 @@ import { userDB, newsDB, radioSongsDB, booksDB, apiKeysDB, apiKeyUsageDB, errorL
 import { exec } from 'child_process';
 import { promisify } from 'util';
 import { searchNewsArticles } from './mcp-server.js';
+import { AnalyzerWorkerClient, runAnalyzer } from './analyzer-worker-client.js';
+import { ANALYSIS_RECORD_KINDS, readAnalysisRecords } from './analysis-records.js';
 
 const execAsync = promisify(exec);
 
@@ -74,6 +77,13 @@ const LASTFM_API_BASE_URL = 'https://ws.audioscrobbler.com/2.0';
 // 서버 포트 설정
 const PORT = process.env.API_SERVER_PORT || 3001;
 
+// Python 분석기 상주 워커 설정
+// - ANALYZER_WORKER=off 이면 사용하지 않음 (요청마다 python 프로세스 실행)
+// - 워커 수: ANALYZER_WORKER_COUNT (기본 2)
+const analyzerWorker = process.env.ANALYZER_WORKER === 'off'
+  ? null
+  : new AnalyzerWorkerClient({ rootDir: __dirname });
+
 // JWT 설정
 const JWT_SECRET = process.env.JWT_SECRET || 'your-secret-key-change-this-in-production';
 const JWT_EXPIRES_IN = process.env.JWT_EXPIRES_IN || '7d';
@@ -2799,6 +2809,47 @@ const server = http.createServer(async (req, res) => {
     });
   }
   
+  // SQL 분석 레코드 조회 API
+  // 엔드포인트: GET /api/sql/analysis-records?file=<파일명>&kinds=<종류,종류>
+  // 기능: analyze_sql_query의 압축 출력(output_format 'jsonl' / 'binary')을 읽어 레코드 목록 반환
+  //       (logs/sql_analysis, logs 디렉토리의 *.jsonl / *.sqlrec 파일명만 허용)
+  else if (req.url && req.url.startsWith('/api/sql/analysis-records') && req.method === 'GET') {
+    const url = new URL(req.url, `http://localhost:${PORT}`);
+    const fileName = url.searchParams.get('file') || '';
+    const kinds = url.searchParams.get('kinds');
+    
+    // 보안: 경로 구분자 없이 레코드 파일명만 허용
+    if (!/^[\w.-]+\.(jsonl|sqlrec)$/.test(fileName)) {
+      return sendJSON(res, 400, {
+        success: false,
+        error: 'file에는 *.jsonl 또는 *.sqlrec 레코드 파일명만 지정할 수 있습니다.'
+      });
+    }
+    const requestedKinds = kinds ? kinds.split(',').map(kind => kind.trim()).filter(Boolean) : null;
+    const unknownKinds = (requestedKinds || []).filter(kind => !ANALYSIS_RECORD_KINDS.includes(kind));
+    if (unknownKinds.length > 0) {
+      return sendJSON(res, 400, {
+        success: false,
+        error: `알 수 없는 레코드 종류: ${unknownKinds.join(', ')} (선택 가능: ${ANALYSIS_RECORD_KINDS.join(', ')})`
+      });
+    }
+    
+    const recordPath = [join(__dirname, 'logs', 'sql_analysis'), join(__dirname, 'logs')]
+      .map(dir => join(dir, fileName))
+      .find(candidate => existsSync(candidate));
+    if (!recordPath) {
+      return sendJSON(res, 404, { success: false, error: `레코드 파일을 찾을 수 없습니다: ${fileName}` });
+    }
+    
+    try {
+      const records = readAnalysisRecords(recordPath, requestedKinds);
+      return sendJSON(res, 200, { success: true, file: fileName, count: records.length, records });
+    } catch (error) {
+      console.error('[API 서버] 분석 레코드 읽기 오류:', error.message);
+      return sendJSON(res, 500, { success: false, error: `레코드 파일을 읽을 수 없습니다: ${error.message}` });
+    }
+  }
+  
   // SQL 쿼리 분석 API
   // 엔드포인트: POST /api/sql/analyze
   // 기능: MCP SQL 쿼리 분석 서버를 통해 쿼리 분석 수행
@@ -2900,6 +2951,7 @@ const server = http.createServer(async (req, res) => {
         }
         
         let command = `python "${pythonScript}"`;
+        let analyzeFilePath = null;
         
         // 임시 SQL 파일 생성 (query_text가 있는 경우)
         let tempFile = null;
@@ -2923,6 +2975,7 @@ const server = http.createServer(async (req, res) => {
           }
           
           command += ` "${tempFile}"`;
+          analyzeFilePath = tempFile;
         } else if (query_file) {
           // 상대 경로를 절대 경로로 변환
           let filePath = query_file;
@@ -2952,6 +3005,7 @@ const server = http.createServer(async (req, res) => {
           }
           
           command += ` "${filePath}"`;
+          analyzeFilePath = filePath;
         }
         
         // Python 스크립트 실행
@@ -2963,7 +3017,9 @@ const server = http.createServer(async (req, res) => {
         let stdout, stderr;
         
         try {
-          const result = await execAsync(command, {
+          const result = await runAnalyzer(analyzerWorker, execAsync, command, 'sql.analyze', {
+            query_file: analyzeFilePath
+          }, {
             cwd: __dirname,
             maxBuffer: 50 * 1024 * 1024, // 50MB로 증가 (큰 파일 처리)
             timeout: 300000 // 5분 타임아웃
@@ -3457,6 +3513,22 @@ const server = http.createServer(async (req, res) => {
     return; // 요청 처리 완료
   }
   
+  // 분석기 워커 상태 확인 API
+  // 엔드포인트: GET /api/analyzer-worker/health?deep=true
+  // 기능: Python 분석기 상주 워커의 상태/요청 통계 확인 (deep=true 이면 워커 프로세스까지 응답 확인)
+  else if (req.url.startsWith('/api/analyzer-worker/health') && req.method === 'GET') {
+    if (!analyzerWorker) {
+      return sendJSON(res, 200, { success: true, enabled: false, status: 'disabled' });
+    }
+    try {
+      const deep = new URL(req.url, `http://localhost:${PORT}`).searchParams.get('deep') === 'true';
+      const health = await analyzerWorker.health(deep);
+      return sendJSON(res, health.status === 'ok' ? 200 : 503, { success: health.status === 'ok', enabled: true, ...health });
+    } catch (error) {
+      return sendJSON(res, 503, { success: false, enabled: true, status: 'unavailable', error: error.message });
+    }
+  }
+  
   // 영향도 분석 API
   // 엔드포인트: POST /api/sql/impact-analysis
   // 기능: 특정 테이블/컬럼에 이슈 발생 시 영향받는 쿼리 분석
@@ -3496,12 +3568,18 @@ const server = http.createServer(async (req, res) => {
     req.on('end', async () => {
       try {
         const requestData = JSON.parse(body);
-        const { query_file, query_text, target_table, target_column } = requestData;
+        const { query_file, query_text, target_table, target_column, targets } = requestData;
+        
+        // 다중 대상 모드: targets = [{ table, column }, ...] (한 번의 파싱으로 모든 대상 분석)
+        const batchTargets = Array.isArray(targets)
+          ? targets.filter(t => t && t.table).map(t => ({ table: String(t.table), column: t.column ? String(t.column) : null }))
+          : null;
+        const isBatch = !!(batchTargets && batchTargets.length > 0);
         
         console.log('[API 서버] 영향도 분석 요청');
-        console.log('[API 서버] 요청 데이터:', { query_file, has_query_text: !!query_text, target_table, target_column });
+        console.log('[API 서버] 요청 데이터:', { query_file, has_query_text: !!query_text, target_table, target_column, targets: isBatch ? batchTargets.length : 0 });
         
-        if (!target_table) {
+        if (!target_table && !isBatch) {
           return sendJSON(res, 400, {
             success: false,
             error: '분석 대상 테이블명을 제공해야 합니다.'
@@ -3515,6 +3593,18 @@ const server = http.createServer(async (req, res) => {
           });
         }
         
+        // 테이블/컬럼명은 셸 명령어 인자로 전달되므로 식별자 문자(영문/숫자/_ 및 스키마 구분 .)만 허용
+        const identifiers = isBatch
+          ? batchTargets.flatMap(t => (t.column ? [t.table, t.column] : [t.table]))
+          : [target_table, target_column].filter(Boolean).map(String);
+        const invalidIdentifier = identifiers.find(name => !/^[\w.]+$/.test(name));
+        if (invalidIdentifier !== undefined) {
+          return sendJSON(res, 400, {
+            success: false,
+            error: `테이블/컬럼명에 사용할 수 없는 문자가 있습니다: ${invalidIdentifier}`
+          });
+        }
+        
         // SQL 쿼리 읽기
         const fs = await import('fs');
         const path = await import('path');
@@ -3546,9 +3636,17 @@ const server = http.createServer(async (req, res) => {
         fs.writeFileSync(tempFile, sqlContent, 'utf-8');
         
         // 영향도 분석 모드로 실행
-        let command = `python "${pythonScript}" --impact "${tempFile}" "${target_table}"`;
-        if (target_column) {
-          command += ` "${target_column}"`;
+        let command;
+        if (isBatch) {
+          const targetArgs = batchTargets
+            .map(t => `"${t.column ? `${t.table}:${t.column}` : t.table}"`)
+            .join(' ');
+          command = `python "${pythonScript}" --impact-batch "${tempFile}" ${targetArgs}`;
+        } else {
+          command = `python "${pythonScript}" --impact "${tempFile}" "${target_table}"`;
+          if (target_column) {
+            command += ` "${target_column}"`;
+          }
         }
         
         console.log('[API 서버] 실행 명령어:', command);
@@ -3558,11 +3656,16 @@ const server = http.createServer(async (req, res) => {
         let stdout, stderr;
         
         try {
-          const result = await execAsync(command, {
-            cwd: __dirname,
-            maxBuffer: 50 * 1024 * 1024,
-            timeout: 120000
-          });
+          const result = isBatch
+            ? await runAnalyzer(analyzerWorker, execAsync, command, 'sql.impact_batch', {
+                query_file: tempFile,
+                targets: batchTargets
+              }, { cwd: __dirname, maxBuffer: 50 * 1024 * 1024, timeout: 120000 })
+            : await runAnalyzer(analyzerWorker, execAsync, command, 'sql.impact', {
+                query_file: tempFile,
+                target_table,
+                target_column: target_column || null
+              }, { cwd: __dirname, maxBuffer: 50 * 1024 * 1024, timeout: 120000 });
           stdout = result.stdout;
           stderr = result.stderr;
         } catch (execError) {
@@ -3628,6 +3731,20 @@ const server = http.createServer(async (req, res) => {
             });
           }
           
+          if (isBatch) {
+            if (!impactResult.batch_impact_analysis) {
+              return sendJSON(res, 500, {
+                success: false,
+                error: '영향도 분석 결과가 없습니다. Python 스크립트가 올바른 형식의 결과를 반환하지 않았습니다.'
+              });
+            }
+            
+            return sendJSON(res, 200, {
+              success: true,
+              batch_impact_analysis: impactResult.batch_impact_analysis
+            });
+          }
+          
           if (!impactResult.impact_analysis) {
             return sendJSON(res, 500, {
               success: false,
@@ -3746,8 +3863,11 @@ const server = http.createServer(async (req, res) => {
           });
         }
         
+        // 분석 대상 워크스페이스 (워커 경로에서도 명령줄 실행과 같은 디렉토리를 분석하도록 명시)
+        const impactWorkspace = __dirname;
         let command = `python "${pythonScript}"`;
         command += ` --table "${table_name}"`;
+        command += ` --workspace "${impactWorkspace}"`;
         if (column_name) {
           command += ` --column "${column_name}"`;
         }
@@ -3767,7 +3887,12 @@ const server = http.createServer(async (req, res) => {
             ? { ...process.env, PYTHONIOENCODING: 'utf-8', PYTHONLEGACYWINDOWSSTDIO: '0' }
             : process.env;
           
-          const result = await execAsync(command, {
+          const result = await runAnalyzer(analyzerWorker, execAsync, command, 'impact.analyze', {
+            table_name,
+            column_name: column_name || null,
+            special_notes: special_notes || null,
+            workspace: impactWorkspace
+          }, {
             cwd: __dirname,
             maxBuffer: 50 * 1024 * 1024, // 50MB
             timeout: 300000, // 5분
@@ -3918,6 +4043,7 @@ const server = http.createServer(async (req, res) => {
         }
         
         let command = `python "${pythonScript}"`;
+        let analyzeLogFile = null;
         if (log_content) {
           // 직접 입력된 로그는 임시 파일에 저장
           const tempFile = join(__dirname, 'temp_error_log.txt');
@@ -3925,8 +4051,10 @@ const server = http.createServer(async (req, res) => {
           const fsForCheck = fsCheck.default || fsCheck;
           fsForCheck.writeFileSync(tempFile, log_content, 'utf-8');
           command += ` --log-file "${tempFile}"`;
+          analyzeLogFile = tempFile;
         } else if (log_file_path) {
           command += ` --log-file "${log_file_path}"`;
+          analyzeLogFile = log_file_path;
         }
         if (workspace_path) {
           command += ` --workspace "${workspace_path}"`;
@@ -3944,7 +4072,10 @@ const server = http.createServer(async (req, res) => {
             ? { ...process.env, PYTHONIOENCODING: 'utf-8', PYTHONLEGACYWINDOWSSTDIO: '0' }
             : process.env;
           
-          const result = await execAsync(command, {
+          const result = await runAnalyzer(analyzerWorker, execAsync, command, 'error_log.analyze', {
+            log_file: analyzeLogFile,
+            workspace: workspace_path || null
+          }, {
             cwd: __dirname,
             maxBuffer: 50 * 1024 * 1024, // 50MB
             timeout: 300000, // 5분
@@ -4053,8 +4184,10 @@ const server = http.createServer(async (req, res) => {
             fsForCheck.writeFileSync(tempFile, log_content, 'utf-8');
             
             // Python 스크립트 실행하여 분석 (stderr도 함께 받기)
-            const { stdout, stderr } = await execAsync(
-              `python "${pythonScript}" --log-file "${tempFile}" --workspace "${workspace}"`
+            const { stdout, stderr } = await runAnalyzer(
+              analyzerWorker, execAsync,
+              `python "${pythonScript}" --log-file "${tempFile}" --workspace "${workspace}"`,
+              'error_log.analyze', { log_file: tempFile, workspace }
             ).catch(() => ({ stdout: '', stderr: '' }));
             
             // stderr도 stdout과 합쳐서 검색
@@ -4301,8 +4434,10 @@ const server = http.createServer(async (req, res) => {
         fsForCheck.writeFileSync(tempFile, logContent, 'utf-8');
         
         // Python 스크립트 실행
-        const { stdout, stderr } = await execAsync(
-          `python "${pythonScript}" --log-file "${tempFile}" --workspace "${workspace}"`
+        const { stdout, stderr } = await runAnalyzer(
+          analyzerWorker, execAsync,
+          `python "${pythonScript}" --log-file "${tempFile}" --workspace "${workspace}"`,
+          'error_log.analyze', { log_file: tempFile, workspace }
         );
         
         // 임시 파일 삭제
@@ -4739,6 +4874,20 @@ async function startServer() {
       console.log(`백엔드 API 서버가 http://localhost:${PORT} 에서 실행 중입니다.`);
     });
     
+    // Python 분석기 상주 워커 시작 (실패해도 요청마다 python 실행으로 동작)
+    if (analyzerWorker) {
+      analyzerWorker.start().catch((error) => {
+        console.warn('[분석기 워커] 시작 실패, 요청마다 python 프로세스로 실행합니다:', error.message);
+      });
+      process.on('exit', () => analyzerWorker.stop());
+      for (const signal of ['SIGINT', 'SIGTERM']) {
+        process.once(signal, () => {
+          analyzerWorker.stop();
+          process.exit(0);
+        });
+      }
+    }
+    
     // 포트 충돌 에러 처리
     server.on('error', (error) => {
       if (error.code === 'EADDRINUSE') {
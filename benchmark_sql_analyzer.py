@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQL 분석기 벤치마크 스크립트
+
+queries/complex_query_*.sql 코퍼스에 대해 analyze_sql_query 전체 파이프라인과
+단계별(파싱, 각 extract_*, 각 분석기, 리포트 생성, 리포트 스트리밍 저장) 성능을 측정합니다.
+
+측정 항목:
+- 실행 시간: 단계별 --repeat 회 반복 후 최소/중앙값 (ms)
+- 메모리: tracemalloc으로 측정한 단계별 최대 사용량 증가분 (KB)
+- 할당 블록: 단계 전후 sys.getallocatedblocks() 차이 (단계가 남긴 객체 블록 수)
+  (CPython은 누적 할당 횟수를 제공하지 않으므로 순증가 블록 수를 기록)
+
+시간과 메모리는 서로 영향을 주지 않도록 따로 측정합니다. (tracemalloc은 실행을 느리게 함)
+
+사용 방법:
+  python benchmark_sql_analyzer.py [SQL 파일 ...] [--repeat N] [--output 결과.json]
+                                   [--baseline 기준.json] [--update-baseline]
+                                   [--threshold 0.25] [--memory-threshold 0.25] [--min-ms 5]
+
+예시:
+  python benchmark_sql_analyzer.py --update-baseline       # 기준 결과 저장
+  python benchmark_sql_analyzer.py                         # 기준 대비 회귀 확인 (회귀 시 종료 코드 1)
+
+기준 결과:
+  benchmarks/sql_analyzer_baseline.json 이 저장소에 포함되어 있어 기본 실행에서 회귀를 확인합니다.
+  시간은 실행 환경에 따라 다르므로, 다른 머신(CI 등)에서는 먼저 --update-baseline 으로
+  그 환경의 기준 결과를 저장한 뒤 비교하세요. 분석 로직을 의도적으로 바꾼 경우에도 다시 저장합니다.
+"""
+
+import sys
+import os
+import gc
+import json
+import time
+import platform
+import argparse
+import tempfile
+import tracemalloc
+from statistics import median
+from collections import defaultdict
+from datetime import datetime
+
+# Windows 콘솔 인코딩 설정
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+WORKSPACE_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# MCP 서버 모듈에서 클래스 import
+try:
+    import importlib.util
+    spec = importlib.util.spec_from_file_location(
+        "mcp_sql_query_analyzer", os.path.join(WORKSPACE_ROOT, "mcp-sql-query-analyzer.py")
+    )
+    mcp_module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mcp_module)
+
+    SQLQueryParser = mcp_module.SQLQueryParser
+    QueryStructureAnalyzer = mcp_module.QueryStructureAnalyzer
+    PerformanceAnalyzer = mcp_module.PerformanceAnalyzer
+    OptimizationAdvisor = mcp_module.OptimizationAdvisor
+    ComplexityAnalyzer = mcp_module.ComplexityAnalyzer
+    SecurityAnalyzer = mcp_module.SecurityAnalyzer
+    DataLineageAnalyzer = mcp_module.DataLineageAnalyzer
+    AnalysisContext = mcp_module.AnalysisContext
+    ReportGenerator = mcp_module.ReportGenerator
+except Exception as e:
+    print(f"[오류] MCP 서버 모듈을 불러올 수 없습니다: {e}", file=sys.stderr)
+    sys.exit(1)
+
+DEFAULT_CORPUS = [
+    os.path.join('queries', f'complex_query_{size}.sql') for size in (500, 750, 1000, 2000)
+]
+DEFAULT_BASELINE = os.path.join('benchmarks', 'sql_analyzer_baseline.json')
+
+EXTRACT_STAGES = [
+    'extract_tables', 'extract_columns', 'extract_joins', 'extract_subqueries',
+    'extract_where_clauses', 'extract_group_by', 'extract_order_by', 'extract_ctes'
+]
+
+# ============================================
+# 단계 정의
+# ============================================
+
+def build_stages(sql_content: str, sql_file: str, pipeline_dir: str = None) -> list:
+    """
+    한 번의 반복에서 순서대로 실행할 (단계명, 함수) 목록 생성
+
+    단계는 앞 단계의 결과(state)를 이어서 사용하므로, 각 단계의 측정값은
+    파이프라인 순서에서의 증분 비용입니다.
+    - extract_* 단계는 별도 파서에서 개별 호출 (구조 메모이제이션/스팬 누적의 영향을 받지 않도록)
+    - structure 단계부터는 새 파서에서 analyze_sql_query와 같은 순서로 실행
+    """
+    state = {}
+
+    def parse():
+        state['extract_parser'] = SQLQueryParser(sql_content)
+
+    def token_index():
+        state['extract_parser']._get_token_index()
+
+    def query_tree():
+        state['extract_parser'].get_query_trees()
+
+    def make_extract(name):
+        def run():
+            getattr(state['extract_parser'], name)()
+        return run
+
+    def prepare():
+        # 측정하지 않는 준비 단계: 분석기용 파서와 공유 컨텍스트
+        parser = SQLQueryParser(sql_content)
+        parser.get_query_trees()
+        state['parser'] = parser
+        state['context'] = AnalysisContext.for_parser(parser)
+
+    def structure():
+        state['parser'].get_parsed_structure()
+
+    def structure_analyzer():
+        state['structure_analyzer'] = QueryStructureAnalyzer(state['parser'], state['context'])
+        state['structure_result'] = state['structure_analyzer'].analyze()
+
+    def performance_analyzer():
+        state['performance_analyzer'] = PerformanceAnalyzer(state['parser'], context=state['context'])
+        state['performance_analyzer'].analyze()
+
+    def optimization_advisor():
+        state['optimization_advisor'] = OptimizationAdvisor(state['parser'], state['performance_analyzer'], state['context'])
+        state['optimization_advisor'].analyze()
+
+    def complexity_analyzer():
+        state['complexity_analyzer'] = ComplexityAnalyzer(state['parser'], state['context'])
+        state['complexity_analyzer'].analyze()
+
+    def security_analyzer():
+        state['security_analyzer'] = SecurityAnalyzer(state['parser'], state['context'])
+        state['security_analyzer'].analyze()
+
+    def lineage_analyzer():
+        state['lineage_analyzer'] = DataLineageAnalyzer(state['parser'], state['structure_result'], state['context'])
+        state['lineage_analyzer'].analyze()
+
+    def report_generator():
+        state['report_generator'] = ReportGenerator(
+            state['parser'], state['structure_analyzer'], state['performance_analyzer'],
+            state['optimization_advisor'], state['complexity_analyzer'], state['security_analyzer'],
+            sql_file, state['lineage_analyzer']
+        )
+
+    # 리포트 저장 단계: analyze_sql_query와 같은 스트리밍 저장 경로(write_*)를 빈 출력 파일에 실행
+    def make_writer(method):
+        def run():
+            with open(os.devnull, 'w', encoding='utf-8') as f:
+                getattr(state['report_generator'], method)(f)
+        return run
+
+    stages = [('parse', parse), ('token_index', token_index), ('query_tree', query_tree)]
+    stages += [(name, make_extract(name)) for name in EXTRACT_STAGES]
+    stages += [
+        (None, prepare),
+        ('structure', structure),
+        ('structure_analyzer', structure_analyzer),
+        ('performance_analyzer', performance_analyzer),
+        ('optimization_advisor', optimization_advisor),
+        ('complexity_analyzer', complexity_analyzer),
+        ('security_analyzer', security_analyzer),
+        ('lineage_analyzer', lineage_analyzer),
+        ('report_generator', report_generator),
+        ('write_json', make_writer('write_json')),
+        ('write_markdown', make_writer('write_markdown')),
+        ('write_lineage_markdown', make_writer('write_lineage_markdown')),
+        ('write_lineage_json', make_writer('write_lineage_json')),
+    ]
+
+    if pipeline_dir:
+        # analyze_sql_query 도구 전체 (파일 저장 포함, 캐시 미사용)
+        def pipeline():
+            result = mcp_module.run_tool('analyze_sql_query', {
+                'query_file': sql_file,
+                'output_dir': pipeline_dir,
+                'use_cache': False
+            })
+            if not result[0].text.startswith('SQL 쿼리 분석 완료'):
+                raise RuntimeError(result[0].text[:500])
+        stages.append(('pipeline', pipeline))
+
+    return stages
+
+# ============================================
+# 측정
+# ============================================
+
+def measure_time(sql_content: str, sql_file: str, repeat: int, pipeline_dir: str) -> dict:
+    """단계별 실행 시간 측정 (ms 목록)"""
+    timings = defaultdict(list)
+    for _ in range(repeat):
+        gc.collect()
+        for name, func in build_stages(sql_content, sql_file, pipeline_dir):
+            started = time.perf_counter()
+            func()
+            elapsed = (time.perf_counter() - started) * 1000
+            if name:
+                timings[name].append(elapsed)
+    return timings
+
+def measure_memory(sql_content: str, sql_file: str, pipeline_dir: str) -> dict:
+    """단계별 최대 메모리 증가분(KB)과 순증가 할당 블록 수 측정"""
+    memory = {}
+    gc.collect()
+    tracemalloc.start()
+    try:
+        for name, func in build_stages(sql_content, sql_file, pipeline_dir):
+            current_before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            blocks_before = sys.getallocatedblocks()
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+            blocks_after = sys.getallocatedblocks()
+            if name:
+                memory[name] = {
+                    'peak_kb': round((peak - current_before) / 1024, 1),
+                    'net_blocks': blocks_after - blocks_before
+                }
+    finally:
+        tracemalloc.stop()
+    return memory
+
+def benchmark_file(sql_file: str, repeat: int, pipeline_dir: str) -> dict:
+    """SQL 파일 하나 벤치마크"""
+    with open(sql_file, 'r', encoding='utf-8', errors='ignore') as f:
+        sql_content = f.read()
+
+    timings = measure_time(sql_content, sql_file, repeat, pipeline_dir)
+    memory = measure_memory(sql_content, sql_file, pipeline_dir)
+
+    # 성능 규칙별 통계 (정보용, 회귀 비교 대상 아님)
+    performance_analyzer = PerformanceAnalyzer(SQLQueryParser(sql_content))
+    performance_analyzer.analyze()
+
+    stages = {}
+    for name, values in timings.items():
+        stages[name] = {
+            'wall_ms_min': round(min(values), 2),
+            'wall_ms_median': round(median(values), 2),
+            **memory.get(name, {})
+        }
+
+    return {
+        'bytes': len(sql_content.encode('utf-8')),
+        'lines': sql_content.count('\n') + 1,
+        'stages': stages,
+        'performance_rules': performance_analyzer.rule_stats
+    }
+
+# ============================================
+# 기준 대비 회귀 확인
+# ============================================
+
+def compare_with_baseline(result: dict, baseline: dict, threshold: float, memory_threshold: float,
+                          min_ms: float, min_kb: float = 64) -> list:
+    """
+    기준 결과와 비교하여 회귀 목록 반환
+
+    - 시간: wall_ms_min이 기준보다 threshold 비율 넘게 증가 (기준이 min_ms 미만인 단계는 잡음으로 보고 제외)
+    - 메모리: peak_kb가 기준보다 memory_threshold 비율 넘게 증가 (기준이 min_kb 미만인 단계는 제외)
+    """
+    regressions = []
+    for file_name, file_result in result['files'].items():
+        baseline_file = baseline.get('files', {}).get(file_name)
+        if not baseline_file:
+            continue
+        for stage, current in file_result['stages'].items():
+            base = baseline_file['stages'].get(stage)
+            if not base:
+                continue
+
+            base_ms = base.get('wall_ms_min', 0)
+            if base_ms >= min_ms and current['wall_ms_min'] > base_ms * (1 + threshold):
+                regressions.append({
+                    'file': file_name, 'stage': stage, 'metric': 'wall_ms_min',
+                    'baseline': base_ms, 'current': current['wall_ms_min'],
+                    'change_pct': round((current['wall_ms_min'] / base_ms - 1) * 100, 1)
+                })
+
+            base_kb = base.get('peak_kb', 0)
+            if 'peak_kb' in current and base_kb >= min_kb and current['peak_kb'] > base_kb * (1 + memory_threshold):
+                regressions.append({
+                    'file': file_name, 'stage': stage, 'metric': 'peak_kb',
+                    'baseline': base_kb, 'current': current['peak_kb'],
+                    'change_pct': round((current['peak_kb'] / base_kb - 1) * 100, 1)
+                })
+    return regressions
+
+def print_result(result: dict):
+    """벤치마크 결과 표 출력"""
+    for file_name, file_result in result['files'].items():
+        print("=" * 100)
+        print(f"[{file_name}] {file_result['lines']} 라인, {file_result['bytes']} bytes")
+        print("=" * 100)
+        print(f"{'단계':<28}{'최소(ms)':>12}{'중앙값(ms)':>14}{'최대 메모리(KB)':>18}{'할당 블록':>14}")
+        for stage, values in file_result['stages'].items():
+            print(f"{stage:<28}{values['wall_ms_min']:>12.2f}{values['wall_ms_median']:>14.2f}"
+                  f"{values.get('peak_kb', 0):>18.1f}{values.get('net_blocks', 0):>14}")
+        print()
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='SQL 분석기 벤치마크')
+    arg_parser.add_argument('files', nargs='*', help='SQL 파일 (기본값: queries/complex_query_{500,750,1000,2000}.sql)')
+    arg_parser.add_argument('--repeat', type=int, default=3, help='시간 측정 반복 횟수 (기본값: 3)')
+    arg_parser.add_argument('--output', help='결과 JSON 경로 (기본값: logs/benchmarks/sql_analyzer_<시각>.json)')
+    arg_parser.add_argument('--baseline', default=DEFAULT_BASELINE, help=f'기준 결과 JSON (기본값: {DEFAULT_BASELINE})')
+    arg_parser.add_argument('--update-baseline', action='store_true', help='이번 결과를 기준 결과로 저장')
+    arg_parser.add_argument('--threshold', type=float, default=0.25, help='시간 회귀 허용 비율 (기본값: 0.25 = 25%%)')
+    arg_parser.add_argument('--memory-threshold', type=float, default=0.25, help='메모리 회귀 허용 비율 (기본값: 0.25)')
+    arg_parser.add_argument('--min-ms', type=float, default=5.0, help='회귀 판정에서 제외할 짧은 단계 기준(ms) (기본값: 5)')
+    arg_parser.add_argument('--no-pipeline', action='store_true', help='analyze_sql_query 전체 파이프라인 측정 생략')
+    args = arg_parser.parse_args()
+
+    # 사용자가 준 상대 경로는 실행한 디렉토리 기준 (기본 코퍼스/기준 결과는 저장소 루트 기준)
+    args.files = [os.path.abspath(f) for f in args.files]
+    if args.output:
+        args.output = os.path.abspath(args.output)
+    if args.baseline != DEFAULT_BASELINE:
+        args.baseline = os.path.abspath(args.baseline)
+    os.chdir(WORKSPACE_ROOT)
+    sql_files = args.files or DEFAULT_CORPUS
+    missing = [f for f in sql_files if not os.path.isfile(f)]
+    if missing:
+        print(f"[오류] SQL 파일을 찾을 수 없습니다: {', '.join(missing)}", file=sys.stderr)
+        sys.exit(2)
+
+    result = {
+        'analyzer_version': mcp_module.ANALYZER_VERSION,
+        'created_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'files': {}
+    }
+
+    with tempfile.TemporaryDirectory(prefix='sql_benchmark_') as pipeline_dir:
+        for sql_file in sql_files:
+            print(f"[벤치마크] {sql_file} ...", file=sys.stderr)
+            file_key = os.path.basename(sql_file)
+            result['files'][file_key] = benchmark_file(
+                sql_file, max(1, args.repeat), None if args.no_pipeline else pipeline_dir
+            )
+
+    print_result(result)
+
+    # 기준 결과와 비교
+    exit_code = 0
+    if os.path.isfile(args.baseline) and not args.update_baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(result, baseline, args.threshold, args.memory_threshold, args.min_ms)
+        result['baseline'] = {
+            'path': args.baseline,
+            'analyzer_version': baseline.get('analyzer_version'),
+            'created_at': baseline.get('created_at'),
+            'threshold': args.threshold,
+            'memory_threshold': args.memory_threshold,
+            'regressions': regressions
+        }
+        if regressions:
+            exit_code = 1
+            print(f"[회귀 발견] 기준({args.baseline}) 대비 {len(regressions)}건")
+            for item in regressions:
+                print(f"- {item['file']} / {item['stage']} / {item['metric']}: "
+                      f"{item['baseline']} -> {item['current']} (+{item['change_pct']}%)")
+        else:
+            print(f"[회귀 없음] 기준({args.baseline}) 대비 허용 범위 이내")
+    elif not args.update_baseline:
+        print(f"[참고] 기준 결과가 없습니다: {args.baseline} (--update-baseline 으로 저장)")
+
+    # 결과 저장
+    output_path = args.output or os.path.join(
+        'logs', 'benchmarks', f"sql_analyzer_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"[결과 저장] {output_path}")
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"[기준 결과 저장] {args.baseline}")
+
+    sys.exit(exit_code)
+
+if __name__ == "__main__":
+    main()
@@ -4,19 +4,30 @@
 SQL 분석기 비교 스크립트
 
 현재 구현과 업계 표준 도구(PostgreSQL EXPLAIN ANALYZE)를 비교 분석합니다.
+통계 파일(pg_class/pg_stats를 내보낸 CSV 또는 JSON)을 주면 데이터베이스 연결 없이
+쿼리 블록별 예상 행 수와 비용을 추정합니다.
+저장된 EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) 출력 파일을 주면 실행 계획을 스트리밍으로 읽어
+비용이 큰 노드를 찾고, 정적 분석 성능 이슈가 실제 계획에서 확인되는지 대조합니다.
 
 사용 방법:
-  python compare_sql_analyzers.py <SQL 파일>
+  python compare_sql_analyzers.py <SQL 파일> [--stats <통계 파일 또는 디렉토리>] [--explain <EXPLAIN JSON 파일>]
   
 예시:
   python compare_sql_analyzers.py queries/complex_query_500.sql
+  python compare_sql_analyzers.py queries/complex_query_500.sql --stats stats/pg_stats.csv
+  python compare_sql_analyzers.py queries/complex_query_500.sql --explain plans/complex_query_500.json
 """
 
 import sys
 import os
+import re
 import json
+import heapq
+from collections import defaultdict
+from json.decoder import scanstring
 from pathlib import Path
 from datetime import datetime
+from typing import Any, Iterator, List, Set, Tuple
 
 # Windows 콘솔 인코딩 설정
 if sys.platform == 'win32':
@@ -32,6 +43,7 @@ try:
     spec.loader.exec_module(mcp_module)
     
     SQLQueryParser = mcp_module.SQLQueryParser
+    AnalysisContext = mcp_module.AnalysisContext
     QueryStructureAnalyzer = mcp_module.QueryStructureAnalyzer
     PerformanceAnalyzer = mcp_module.PerformanceAnalyzer
     OptimizationAdvisor = mcp_module.OptimizationAdvisor
@@ -39,12 +51,421 @@ try:
     SecurityAnalyzer = mcp_module.SecurityAnalyzer
     DataLineageAnalyzer = mcp_module.DataLineageAnalyzer
     ReportGenerator = mcp_module.ReportGenerator
+    CostEstimator = mcp_module.CostEstimator
+    load_statistics_catalog = mcp_module.load_statistics_catalog
 except Exception as e:
     print(f"[오류] MCP 서버 모듈을 불러올 수 없습니다: {e}", file=sys.stderr)
     sys.exit(1)
 
-def analyze_with_current_implementation(sql_file: str) -> dict:
-    """현재 구현으로 분석"""
+# ============================================
+# EXPLAIN JSON 실행 계획 읽기
+# ============================================
+
+class JSONEventReader:
+    """
+    JSON 파일을 청크 단위로 읽으며 이벤트를 내보내는 스트리밍 파서 (표준 라이브러리만 사용)
+    
+    이벤트: ('start_map' | 'end_map' | 'start_array' | 'end_array', None), ('key', 이름), ('value', 값)
+    최상위 값 밖의 텍스트(psql의 "QUERY PLAN" 헤더, "(1 row)" 등)와 psql 줄 이음 표시(+)는 건너뜁니다.
+    """
+    
+    CHUNK_SIZE = 1 << 16
+    NUMBER_PATTERN = re.compile(r'-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?')
+    WHITESPACE_PATTERN = re.compile(r'[ \t\r\n]*')
+    SCALAR_END_PATTERN = re.compile(r'[\s,\]}]|(?<![eE])\+')
+    LITERALS = {'true': True, 'false': False, 'null': None}
+    
+    def __init__(self, f):
+        self.f = f
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+    
+    def _more(self) -> bool:
+        """다음 청크를 버퍼에 추가 (이미 읽은 부분은 버림)"""
+        if self.eof:
+            return False
+        chunk = self.f.read(self.CHUNK_SIZE)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+    
+    def _peek(self) -> str:
+        """공백을 건너뛴 다음 문자 (파일 끝이면 '')"""
+        while True:
+            self.pos = self.WHITESPACE_PATTERN.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._more():
+                return ''
+    
+    def _read_string(self) -> str:
+        while True:
+            try:
+                value, end = scanstring(self.buffer, self.pos + 1)
+            except json.JSONDecodeError:
+                # 문자열이 청크 경계에서 잘림
+                if not self._more():
+                    raise
+                continue
+            self.pos = end
+            return value
+    
+    def _read_scalar(self) -> Any:
+        # 숫자/true/false/null 토큰이 청크 경계에서 잘리지 않도록 구분자가 나올 때까지 읽음
+        match = self.SCALAR_END_PATTERN.search(self.buffer, self.pos)
+        while not match and self._more():
+            match = self.SCALAR_END_PATTERN.search(self.buffer, self.pos)
+        end = match.start() if match else len(self.buffer)
+        text = self.buffer[self.pos:end]
+        self.pos = end
+        if text in self.LITERALS:
+            return self.LITERALS[text]
+        if not self.NUMBER_PATTERN.fullmatch(text):
+            raise ValueError(f"JSON 형식 오류: {text[:20]!r}")
+        return float(text) if any(ch in text for ch in '.eE') else int(text)
+    
+    def events(self) -> Iterator[Tuple[str, Any]]:
+        stack = []
+        expect_key = False
+        while True:
+            ch = self._peek()
+            if not ch:
+                return
+            if ch in '{[':
+                self.pos += 1
+                stack.append(ch)
+                expect_key = ch == '{'
+                yield ('start_map' if ch == '{' else 'start_array'), None
+            elif not stack or ch == '+':
+                self.pos += 1
+            elif ch in '}]':
+                self.pos += 1
+                stack.pop()
+                yield ('end_map' if ch == '}' else 'end_array'), None
+            elif ch == ',':
+                self.pos += 1
+                expect_key = stack[-1] == '{'
+            elif ch == ':':
+                self.pos += 1
+            elif ch == '"':
+                value = self._read_string()
+                if expect_key:
+                    expect_key = False
+                    yield 'key', value
+                else:
+                    yield 'value', value
+            else:
+                yield 'value', self._read_scalar()
+
+# 실행 계획 노드에서 보관하는 값 (VERBOSE의 Output 같은 큰 배열은 버림)
+PLAN_NODE_KEYS = {
+    'Node Type', 'Parent Relationship', 'Subplan Name', 'Relation Name', 'Schema', 'Alias', 'CTE Name',
+    'Function Name', 'Index Name', 'Join Type', 'Startup Cost', 'Total Cost', 'Plan Rows',
+    'Actual Total Time', 'Actual Rows', 'Actual Loops', 'Rows Removed by Filter',
+    'Rows Removed by Join Filter', 'Shared Hit Blocks', 'Shared Read Blocks', 'Temp Read Blocks',
+    'Temp Written Blocks', 'Sort Method', 'Sort Space Type', 'Hash Batches'
+}
+PLAN_CONDITION_KEYS = ('Filter', 'Index Cond', 'Recheck Cond', 'Hash Cond', 'Merge Cond', 'Join Filter')
+PLAN_LIST_KEYS = ('Sort Key', 'Group Key')
+_PLAN_VALUE_KEYS = PLAN_NODE_KEYS | set(PLAN_CONDITION_KEYS)
+# 전체 실행 시간(또는 비용)에서 이 비율 이상을 차지하는 노드를 비용이 큰 노드로 봄
+SIGNIFICANT_SHARE = 0.05
+HOT_NODE_COUNT = 10
+
+def _finish_plan_node(node: dict) -> dict:
+    """계획 노드 값으로 요약 레코드 생성 (시간/행 수는 반복 횟수를 곱한 전체 값, exclusive는 자식 제외)"""
+    loops = node.get('Actual Loops') or 1
+    analyzed = 'Actual Total Time' in node
+    total_time = node.get('Actual Total Time', 0.0) * loops
+    plan_rows = node.get('Plan Rows', 0) * loops
+    actual_rows = node.get('Actual Rows', 0) * loops if analyzed else None
+    read_blocks = node.get('Shared Read Blocks', 0) + node.get('Temp Read Blocks', 0)
+    record = {
+        'id': node['id'],
+        'parent': node['parent'],
+        'depth': node['depth'],
+        'node_type': node.get('Node Type'),
+        'relation': node.get('Relation Name') or node.get('CTE Name') or node.get('Function Name'),
+        'alias': node.get('Alias'),
+        'index': node.get('Index Name'),
+        'join_type': node.get('Join Type'),
+        'parent_relationship': node.get('Parent Relationship'),
+        'conditions': {key: node[key] for key in PLAN_CONDITION_KEYS if key in node},
+        'sort_key': node.get('Sort Key') or node.get('Group Key'),
+        'loops': loops,
+        'plan_rows': round(plan_rows),
+        'actual_rows': round(actual_rows) if actual_rows is not None else None,
+        'rows_removed': round((node.get('Rows Removed by Filter', 0) + node.get('Rows Removed by Join Filter', 0))
+                              * loops),
+        'total_cost': node.get('Total Cost', 0.0),
+        'exclusive_cost': max(0.0, node.get('Total Cost', 0.0) - node['child_cost']),
+        'total_time': round(total_time, 3),
+        'exclusive_time': round(max(0.0, total_time - node['child_time']), 3),
+        'shared_hit_blocks': node.get('Shared Hit Blocks', 0),
+        'read_blocks': read_blocks,
+        'spilled': node.get('Sort Space Type') == 'Disk' or (node.get('Hash Batches') or 1) > 1,
+        'misestimate': round(max(actual_rows, plan_rows, 1) / max(min(actual_rows, plan_rows), 1), 1)
+                       if actual_rows is not None else None
+    }
+    return record
+
+def read_explain_plans(explain_file: str) -> List[dict]:
+    """
+    EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) 출력 파일을 스트리밍으로 읽어 계획별 노드 요약 목록 반환
+    
+    파일 전체를 JSON 트리로 만들지 않고, 노드마다 PLAN_NODE_KEYS 값만 모아 요약 레코드로 바꿉니다.
+    한 파일에 여러 EXPLAIN 결과가 이어져 있으면 각각 하나의 계획으로 반환합니다.
+    """
+    plans = []
+    frames = []
+    nodes = []
+    plan = None
+    next_id = 0
+    
+    with open(explain_file, 'r', encoding='utf-8', errors='ignore') as f:
+        for event, value in JSONEventReader(f).events():
+            frame = frames[-1] if frames else None
+            if event == 'key':
+                frame['key'] = value
+                if value == 'Plan' and plan is None and frame['role'] == 'other':
+                    plan = {'planning_time': None, 'execution_time': None, 'nodes': []}
+                    frame['role'] = 'explain'
+            elif event == 'value':
+                if frame is None:
+                    continue
+                if frame['role'] == 'node' and frame['key'] in _PLAN_VALUE_KEYS:
+                    frame['node'][frame['key']] = value
+                elif frame['role'] == 'explain' and frame['key'] in ('Planning Time', 'Execution Time'):
+                    plan['planning_time' if frame['key'] == 'Planning Time' else 'execution_time'] = value
+                elif frame['role'] == 'list':
+                    frame['node'].setdefault(frame['key'], []).append(value)
+            elif event in ('start_map', 'start_array'):
+                role = 'other'
+                node = None
+                if frame is not None and frame['role'] in ('explain', 'node') and frame['key'] in ('Plan', 'Plans'):
+                    # 노드 자체(Plan) 또는 자식 노드 배열(Plans)
+                    role = 'node' if event == 'start_map' else 'plans'
+                elif frame is not None and frame['role'] == 'plans' and event == 'start_map':
+                    role = 'node'
+                elif frame is not None and frame['role'] == 'node' and frame['key'] in PLAN_LIST_KEYS:
+                    # Sort Key / Group Key 문자열 배열
+                    role = 'list'
+                    node = frame['node']
+                if role == 'node':
+                    parent = nodes[-1] if nodes else None
+                    node = {'id': next_id, 'parent': parent['id'] if parent else None,
+                            'depth': len(nodes), 'child_time': 0.0, 'child_cost': 0.0}
+                    next_id += 1
+                    nodes.append(node)
+                frames.append({'role': role, 'key': frame['key'] if role == 'list' else None, 'node': node})
+            else:
+                frame = frames.pop()
+                if frame['role'] == 'node' and event == 'end_map':
+                    node = nodes.pop()
+                    record = _finish_plan_node(node)
+                    if nodes:
+                        nodes[-1]['child_time'] += record['total_time']
+                        nodes[-1]['child_cost'] += record['total_cost']
+                    plan['nodes'].append(record)
+                elif frame['role'] == 'explain':
+                    plans.append(plan)
+                    plan = None
+    
+    return plans
+
+def analyze_explain_file(explain_file: str) -> dict:
+    """EXPLAIN JSON 파일 분석: 계획 요약, 비용이 큰 노드, 추정/실제 행 수 차이가 큰 노드"""
+    plans = read_explain_plans(explain_file)
+    nodes = [node for plan in plans for node in plan['nodes']]
+    analyzed = any(node['actual_rows'] is not None for node in nodes)
+    # ANALYZE 결과가 있으면 실제 시간, 없으면 플래너 비용 기준
+    metric = 'exclusive_time' if analyzed else 'exclusive_cost'
+    total = sum(node[metric] for node in nodes)
+    for node in nodes:
+        node['share'] = round(node[metric] / total, 4) if total > 0 else 0.0
+    
+    hot_nodes = heapq.nlargest(HOT_NODE_COUNT, nodes, key=lambda node: node[metric])
+    misestimates = heapq.nlargest(5, (node for node in nodes if (node['misestimate'] or 0) >= 10),
+                                  key=lambda node: node['misestimate'])
+    
+    return {
+        'analysis_method': 'postgresql_explain_json',
+        'simulation': False,
+        'explain_file': explain_file,
+        'analyzed': analyzed,
+        'metric': metric,
+        'total': round(total, 3),
+        'plans': [{
+            'planning_time': plan['planning_time'],
+            'execution_time': plan['execution_time'],
+            'node_count': len(plan['nodes']),
+            'root_node': plan['nodes'][-1]['node_type'] if plan['nodes'] else None
+        } for plan in plans],
+        'hot_nodes': hot_nodes,
+        'misestimates': misestimates,
+        # 정적 분석 결과와 대조할 때 사용 (리포트 JSON에는 저장하지 않음)
+        '_nodes': nodes
+    }
+
+def _issue_tables(parser, issues: list) -> List[List[str]]:
+    """이슈 위치(span)가 속한 가장 안쪽 쿼리 블록의 테이블 목록 (위치가 없거나 블록에 테이블이 없으면 전체 테이블)"""
+    blocks = []
+    for tree, scope in parser.iter_scopes():
+        span = parser.node_span(tree, scope.first, scope.last)
+        if span:
+            tables = [ref.name for ref in scope.table_refs() if ref.ref_type == 'table' and ref.name]
+            blocks.append(((span['start_line'], span['start_column']), (span['end_line'], span['end_column']), tables))
+    all_tables = parser.extract_tables()
+    
+    result = []
+    for issue in issues:
+        tables = []
+        for span in issue.get('spans') or []:
+            if not span:
+                continue
+            position = (span['start_line'], span['start_column'])
+            inner = None
+            for start, end, block_tables in blocks:
+                if start <= position <= end:
+                    inner = block_tables
+            tables.extend(inner or [])
+        result.append(sorted(set(tables)) or all_tables)
+    return result
+
+def _issue_functions(issue: dict) -> Set[str]:
+    """이슈 메시지에 나온 함수 이름 (소문자, CAST는 계획의 :: 표기 포함)"""
+    message = issue.get('message', '')
+    names = {name.lower() for name in re.findall(r'([A-Za-z_]\w*)\s*\(', message)}
+    names.update(name.lower() for name in re.findall(r'([A-Za-z_]\w*) 함수', message))
+    names -= {'in', 'exists', 'and', 'or', 'not', 'select', 'any', 'all', 'values'}
+    if 'cast' in names:
+        names.add('::')
+    return names
+
+def _plan_evidence(issue: dict, tables: List[str], nodes: List[dict], children: dict) -> Tuple[List[dict], bool]:
+    """
+    정적 이슈를 뒷받침하는 계획 노드 찾기
+    
+    Returns:
+        (비용이 큰 근거 노드 목록, 이슈와 관련된 노드가 계획에 있는지 여부)
+    """
+    issue_type = issue['type']
+    table_keys = {table.split('.')[-1].lower() for table in tables}
+    functions = _issue_functions(issue)
+    
+    def related(node):
+        return (node['relation'] or '').lower() in table_keys
+    
+    def condition_text(node):
+        return ' '.join(node['conditions'].values()).lower()
+    
+    def calls_function(node):
+        text = condition_text(node) + ' ' + ' '.join(node['sort_key'] or []).lower()
+        return any(f'{name}(' in text if name != '::' else '::' in text for name in functions)
+    
+    if issue_type in ('FUNCTION_IN_WHERE', 'FUNCTION_USAGE'):
+        candidates = [node for node in nodes if related(node) and node['node_type'].endswith('Scan')
+                      and (node['node_type'] == 'Seq Scan' or calls_function(node))]
+    elif issue_type == 'FUNCTION_IN_JOIN':
+        candidates = [node for node in nodes if node['node_type'] in ('Nested Loop', 'Hash Join', 'Merge Join')
+                      and (calls_function(node) or node['node_type'] == 'Nested Loop')]
+    elif issue_type == 'FUNCTION_IN_ORDER_BY':
+        candidates = [node for node in nodes if node['node_type'] in ('Sort', 'Incremental Sort')]
+    elif issue_type == 'NO_WHERE_CLAUSE':
+        candidates = [node for node in nodes if related(node) and node['node_type'] == 'Seq Scan'
+                      and 'Filter' not in node['conditions']]
+    elif issue_type in ('CROSS_JOIN', 'JOIN_WITHOUT_CONDITION'):
+        candidates = [node for node in nodes if node['node_type'] == 'Nested Loop' and not node['conditions']]
+    elif issue_type in ('DEEP_NESTED_SUBQUERY', 'TOO_MANY_SUBQUERIES'):
+        candidates = [node for node in nodes if node['parent_relationship'] in ('SubPlan', 'InitPlan')
+                      or node['node_type'] == 'Subquery Scan']
+    elif issue_type == 'TOO_MANY_DISTINCT':
+        candidates = [node for node in nodes if node['node_type'] in ('Unique', 'Aggregate', 'HashAggregate', 'Sort')]
+    elif issue_type == 'LARGE_OFFSET':
+        # OFFSET으로 버려지는 행: Limit 출력보다 훨씬 많은 행을 만드는 자식 노드
+        candidates = [child for node in nodes if node['node_type'] == 'Limit'
+                      for child in children.get(node['id'], [])
+                      if (child['actual_rows'] or child['plan_rows'])
+                      >= 10 * max(node['actual_rows'] or node['plan_rows'], 1)]
+    else:
+        candidates = [node for node in nodes if related(node)]
+    
+    evidence = [node for node in candidates if node['share'] >= SIGNIFICANT_SHARE or node['spilled']]
+    has_related = bool(candidates) or any(related(node) for node in nodes)
+    return evidence, has_related
+
+def correlate_plan_with_findings(issues: list, issue_tables: List[List[str]], plan_result: dict) -> dict:
+    """
+    정적 분석 성능 이슈와 실제 실행 계획 대조
+    
+    - confirmed: 계획에서 해당 패턴의 노드가 비용이 큰 노드(전체의 SIGNIFICANT_SHARE 이상)이거나 디스크로 넘침
+    - false_alarm: 관련 노드는 계획에 있지만 비용이 작음
+    - unmatched: 이슈의 테이블/패턴에 해당하는 노드를 계획에서 찾지 못함
+    비용이 큰 노드 중 어떤 이슈의 근거도 아닌 노드는 unexplained_hot_nodes로 보고합니다.
+    """
+    nodes = plan_result['_nodes']
+    children = defaultdict(list)
+    for node in nodes:
+        if node['parent'] is not None:
+            children[node['parent']].append(node)
+    
+    verdicts = {'confirmed': [], 'false_alarm': [], 'unmatched': []}
+    explained = set()
+    for index, (issue, tables) in enumerate(zip(issues, issue_tables)):
+        evidence, has_related = _plan_evidence(issue, tables, nodes, children)
+        if evidence:
+            verdict = 'confirmed'
+        elif has_related:
+            verdict = 'false_alarm'
+        else:
+            verdict = 'unmatched'
+        explained.update(node['id'] for node in evidence)
+        verdicts[verdict].append({
+            'issue_index': index,
+            'type': issue['type'],
+            'severity': issue['severity'],
+            'message': issue['message'],
+            'tables': tables,
+            'evidence': [_plan_node_label(node) for node in sorted(evidence, key=lambda n: -n['share'])[:3]]
+        })
+    
+    unexplained = [_plan_node_label(node) for node in plan_result['hot_nodes']
+                   if node['id'] not in explained and node['share'] >= SIGNIFICANT_SHARE]
+    return {
+        'confirmed': verdicts['confirmed'],
+        'false_alarms': verdicts['false_alarm'],
+        'unmatched': verdicts['unmatched'],
+        'unexplained_hot_nodes': unexplained
+    }
+
+def _plan_node_label(node: dict) -> dict:
+    """리포트용 계획 노드 요약"""
+    label = node['node_type']
+    if node['relation']:
+        label += f" on {node['relation']}"
+        if node['alias'] and node['alias'] != node['relation']:
+            label += f" {node['alias']}"
+    if node['index']:
+        label += f" using {node['index']}"
+    return {
+        'node': label,
+        'share': node['share'],
+        'exclusive_time': node['exclusive_time'],
+        'exclusive_cost': round(node['exclusive_cost'], 2),
+        'actual_rows': node['actual_rows'],
+        'plan_rows': node['plan_rows'],
+        'loops': node['loops'],
+        'rows_removed': node['rows_removed'],
+        'read_blocks': node['read_blocks'],
+        'conditions': node['conditions']
+    }
+
+def analyze_with_current_implementation(sql_file: str, statistics=None) -> dict:
+    """현재 구현으로 분석 (statistics가 있으면 성능 이슈를 예상 비용 순으로 정렬)"""
     print(f"\n[1/2] 현재 구현으로 분석 중...")
     
     with open(sql_file, 'r', encoding='utf-8', errors='ignore') as f:
@@ -54,7 +475,7 @@ def analyze_with_current_implementation(sql_file: str) -> dict:
     parser = SQLQueryParser(sql_content)
     structure_analyzer = QueryStructureAnalyzer(parser)
     structure_result = structure_analyzer.analyze()
-    performance_analyzer = PerformanceAnalyzer(parser)
+    performance_analyzer = PerformanceAnalyzer(parser, statistics=statistics)
     optimization_advisor = OptimizationAdvisor(parser, performance_analyzer)
     complexity_analyzer = ComplexityAnalyzer(parser)
     security_analyzer = SecurityAnalyzer(parser)
@@ -82,6 +503,8 @@ def analyze_with_current_implementation(sql_file: str) -> dict:
         'security': security_result,
         'optimization': optimization_result,
         'lineage': lineage_result,
+        # 성능 이슈별 관련 테이블 (실행 계획 대조용)
+        'issue_tables': _issue_tables(parser, performance_result['issues']),
         'metadata': {
             'query_length': structure_result.get('query_length', 0),
             'query_lines': structure_result.get('query_lines', 0),
@@ -100,8 +523,19 @@ def analyze_with_current_implementation(sql_file: str) -> dict:
     
     return result
 
-def analyze_with_postgresql_explain(sql_file: str) -> dict:
-    """PostgreSQL EXPLAIN ANALYZE로 분석 (시뮬레이션)"""
+def analyze_with_postgresql_explain(sql_file: str, statistics=None, explain_file: str = None) -> dict:
+    """
+    PostgreSQL EXPLAIN ANALYZE 대응 분석
+    
+    explain_file(EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) 출력)이 있으면 실제 실행 계획을 분석하고,
+    statistics(StatisticsCatalog)가 있으면 통계 기반 오프라인 비용 추정을 수행하며,
+    둘 다 없으면 실제 데이터베이스에서 실행하는 방법만 안내합니다. (시뮬레이션)
+    """
+    if explain_file is not None:
+        return analyze_with_explain_file(explain_file)
+    if statistics is not None:
+        return analyze_with_offline_estimator(sql_file, statistics)
+    
     print(f"\n[2/2] PostgreSQL EXPLAIN ANALYZE 분석 (시뮬레이션)...")
     
     # 실제 PostgreSQL 연결 없이 시뮬레이션
@@ -131,6 +565,49 @@ def analyze_with_postgresql_explain(sql_file: str) -> dict:
     print(f"  1. PostgreSQL 데이터베이스에 테이블 생성")
     print(f"  2. EXPLAIN (ANALYZE, BUFFERS, VERBOSE) <쿼리> 실행")
     print(f"  3. 결과를 JSON 형식으로 저장")
+    print(f"  (또는 --stats 옵션으로 pg_stats 통계 파일을 지정하면 오프라인 비용 추정)")
+    
+    return result
+
+def analyze_with_offline_estimator(sql_file: str, statistics) -> dict:
+    """pg_class/pg_stats 통계 기반 오프라인 비용/카디널리티 추정"""
+    print(f"\n[2/2] 통계 기반 오프라인 비용 추정 중... ({statistics.source})")
+    
+    with open(sql_file, 'r', encoding='utf-8', errors='ignore') as f:
+        sql_content = f.read()
+    
+    parser = SQLQueryParser(sql_content)
+    estimate = CostEstimator(AnalysisContext.for_parser(parser), statistics).estimate()
+    
+    result = {
+        'analysis_method': 'offline_cost_estimate',
+        'note': '통계 파일 기반 추정값입니다. 실제 실행 계획/실행 시간은 EXPLAIN ANALYZE로 확인해야 합니다.',
+        'simulation': False,
+        'estimate': estimate
+    }
+    
+    print(f"✓ 추정 완료")
+    print(f"  - 예상 비용: {estimate['total_cost']:,}")
+    print(f"  - 예상 결과 행 수: {estimate['estimated_rows']:,}")
+    print(f"  - 쿼리 블록 수: {len(estimate['blocks'])}개")
+    if estimate['missing_statistics']:
+        print(f"  - 통계 없는 테이블: {', '.join(estimate['missing_statistics'][:10])}")
+    
+    return result
+
+def analyze_with_explain_file(explain_file: str) -> dict:
+    """저장된 EXPLAIN JSON 실행 계획 분석"""
+    print(f"\n[2/2] EXPLAIN 실행 계획 분석 중... ({explain_file})")
+    
+    result = analyze_explain_file(explain_file)
+    
+    print(f"✓ 실행 계획 분석 완료")
+    for plan in result['plans']:
+        print(f"  - 계획 노드: {plan['node_count']}개 (최상위: {plan['root_node']})")
+        if plan['execution_time'] is not None:
+            print(f"  - 계획 시간: {plan['planning_time']}ms, 실행 시간: {plan['execution_time']}ms")
+    if not result['analyzed']:
+        print(f"  ⚠ ANALYZE 없이 생성된 계획입니다. 실제 시간 대신 플래너 비용으로 비교합니다.")
     
     return result
 
@@ -206,6 +683,25 @@ def compare_results(current_result: dict, postgresql_result: dict) -> dict:
         }
     }
     
+    estimate = postgresql_result.get('estimate')
+    if estimate:
+        issues = current_result.get('performance', {}).get('issues', [])
+        comparison['offline_estimate_summary'] = {
+            'total_cost': estimate['total_cost'],
+            'estimated_rows': estimate['estimated_rows'],
+            'missing_statistics': estimate['missing_statistics'],
+            'costliest_blocks': sorted(estimate['blocks'], key=lambda b: -b['total_cost'])[:5],
+            'costliest_issues': [
+                {'type': issue['type'], 'severity': issue['severity'], 'estimated_cost': issue.get('estimated_cost')}
+                for issue in issues[:5]
+            ]
+        }
+    
+    if postgresql_result.get('analysis_method') == 'postgresql_explain_json':
+        issues = current_result.get('performance', {}).get('issues', [])
+        issue_tables = current_result.get('issue_tables') or [[] for _ in issues]
+        comparison['plan_correlation'] = correlate_plan_with_findings(issues, issue_tables, postgresql_result)
+    
     print(f"✓ 비교 완료")
     print(f"\n현재 구현 분석 결과:")
     print(f"  - 성능 점수: {comparison['current_analysis_summary']['performance_score']}/100 ({comparison['current_analysis_summary']['performance_level']})")
@@ -213,6 +709,15 @@ def compare_results(current_result: dict, postgresql_result: dict) -> dict:
     print(f"  - 보안 점수: {comparison['current_analysis_summary']['security_score']}/100 ({comparison['current_analysis_summary']['security_level']})")
     print(f"  - 발견된 이슈: {comparison['current_analysis_summary']['total_issues']}개")
     print(f"  - 최적화 제안: {comparison['current_analysis_summary']['optimization_suggestions']}개")
+    if estimate:
+        print(f"  - 예상 비용: {estimate['total_cost']:,} (비용이 큰 이슈 순으로 정렬)")
+    correlation = comparison.get('plan_correlation')
+    if correlation:
+        print(f"\n실행 계획 대조 결과:")
+        print(f"  - 실행 계획으로 확인된 이슈: {len(correlation['confirmed'])}개")
+        print(f"  - 오탐으로 보이는 이슈: {len(correlation['false_alarms'])}개")
+        print(f"  - 계획에서 찾지 못한 이슈: {len(correlation['unmatched'])}개")
+        print(f"  - 정적 분석이 놓친 비용이 큰 노드: {len(correlation['unexplained_hot_nodes'])}개")
     
     return comparison
 
@@ -228,10 +733,81 @@ def generate_comparison_report(current_result: dict, postgresql_result: dict, co
     with open(json_file, 'w', encoding='utf-8') as f:
         json.dump({
             'current_result': current_result,
-            'postgresql_result': postgresql_result,
+            'postgresql_result': {key: value for key, value in postgresql_result.items() if not key.startswith('_')},
             'comparison': comparison
         }, f, ensure_ascii=False, indent=2)
     
+    # 오프라인 비용 추정 결과 (통계 파일을 지정한 경우)
+    estimate_summary = comparison.get('offline_estimate_summary')
+    if estimate_summary:
+        estimate_lines = [
+            '### 2.5 오프라인 비용 추정',
+            '',
+            f"- **예상 비용**: {estimate_summary['total_cost']:,}",
+            f"- **예상 결과 행 수**: {estimate_summary['estimated_rows']:,}",
+            f"- **통계 없는 테이블**: {', '.join(estimate_summary['missing_statistics'][:10]) or '없음'}",
+            '',
+            '| 쿼리 블록 | 예상 행 수 | 반복 | 누적 비용 |',
+            '|----------|-----------|------|----------|'
+        ]
+        for block in estimate_summary['costliest_blocks']:
+            estimate_lines.append(f"| {block['kind']} ({block['location']}) | {block['rows']:,} | "
+                                  f"{block['loops']:,} | {block['total_cost']:,} |")
+        estimate_lines.append('')
+        estimate_lines.append('**비용이 큰 성능 이슈**:')
+        for issue in estimate_summary['costliest_issues']:
+            estimate_lines.append(f"- {issue['type']} ({issue['severity']}): 예상 비용 {issue['estimated_cost']:,}")
+        estimate_section = '\n'.join(estimate_lines) + '\n\n'
+    else:
+        estimate_section = ''
+    
+    # 실행 계획 대조 결과 (EXPLAIN 파일을 지정한 경우)
+    correlation = comparison.get('plan_correlation')
+    if correlation:
+        unit = 'ms' if postgresql_result['analyzed'] else ''
+        basis = '실제 실행 시간' if postgresql_result['analyzed'] else '플래너 비용 (ANALYZE 없음)'
+        plan_lines = [
+            '### 2.6 실행 계획 대조',
+            '',
+            f"- **계획 파일**: {postgresql_result['explain_file']}",
+            f"- **비교 기준**: {basis}",
+            f"- **실행 계획으로 확인된 이슈**: {len(correlation['confirmed'])}개",
+            f"- **오탐으로 보이는 이슈**: {len(correlation['false_alarms'])}개",
+            f"- **계획에서 찾지 못한 이슈**: {len(correlation['unmatched'])}개",
+            '',
+            '| 계획 노드 | 비중 | 자체 시간/비용 | 실제 행 수 | 추정 행 수 | 반복 |',
+            '|----------|------|---------------|-----------|-----------|------|'
+        ]
+        for node in postgresql_result['hot_nodes']:
+            label = _plan_node_label(node)
+            own = node['exclusive_time'] if postgresql_result['analyzed'] else label['exclusive_cost']
+            actual_rows = f"{node['actual_rows']:,}" if node['actual_rows'] is not None else '-'
+            plan_lines.append(f"| {label['node']} | {node['share']:.1%} | {own:,}{unit} | {actual_rows} | "
+                              f"{node['plan_rows']:,} | {node['loops']:,} |")
+        for title, key in (('확인된 이슈', 'confirmed'), ('오탐으로 보이는 이슈', 'false_alarms'),
+                           ('계획에서 찾지 못한 이슈', 'unmatched')):
+            if correlation[key]:
+                plan_lines.append('')
+                plan_lines.append(f'**{title}**:')
+                for item in correlation[key]:
+                    evidence = ', '.join(f"{e['node']} ({e['share']:.1%})" for e in item['evidence'])
+                    plan_lines.append(f"- {item['type']} ({item['severity']}): {item['message']}"
+                                      + (f" → {evidence}" if evidence else ''))
+        if correlation['unexplained_hot_nodes']:
+            plan_lines.append('')
+            plan_lines.append('**정적 분석이 놓친 비용이 큰 노드**:')
+            for node in correlation['unexplained_hot_nodes']:
+                plan_lines.append(f"- {node['node']} ({node['share']:.1%})")
+        if postgresql_result['misestimates']:
+            plan_lines.append('')
+            plan_lines.append('**추정 행 수 오차가 큰 노드** (통계 갱신 필요 가능성):')
+            for node in postgresql_result['misestimates']:
+                plan_lines.append(f"- {_plan_node_label(node)['node']}: 추정 {node['plan_rows']:,}행 / "
+                                  f"실제 {node['actual_rows']:,}행 ({node['misestimate']}배)")
+        plan_section = '\n'.join(plan_lines) + '\n\n'
+    else:
+        plan_section = ''
+    
     # 마크다운 리포트 생성
     md_file = os.path.join(output_dir, f"{base_name}_comparison_{timestamp}.md")
     md_content = f"""# SQL 분석기 비교 리포트
@@ -295,7 +871,7 @@ def generate_comparison_report(current_result: dict, postgresql_result: dict, co
 ### 2.4 최적화 제안
 - **제안 수**: {comparison['current_analysis_summary']['optimization_suggestions']}개
 
-## 3. 비교 분석
+{estimate_section}{plan_section}## 3. 비교 분석
 
 ### 3.1 분석 방식 차이
 
@@ -357,26 +933,56 @@ def generate_comparison_report(current_result: dict, postgresql_result: dict, co
 
 def main():
     """메인 함수"""
-    if len(sys.argv) < 2:
-        print("사용 방법: python compare_sql_analyzers.py <SQL 파일>", file=sys.stderr)
+    args = sys.argv[1:]
+    stats_path = None
+    if '--stats' in args:
+        index = args.index('--stats')
+        if index + 1 >= len(args):
+            print("[오류] --stats 다음에 통계 파일 경로를 지정하세요.", file=sys.stderr)
+            sys.exit(1)
+        stats_path = args[index + 1]
+        del args[index:index + 2]
+    explain_file = None
+    if '--explain' in args:
+        index = args.index('--explain')
+        if index + 1 >= len(args):
+            print("[오류] --explain 다음에 EXPLAIN JSON 파일 경로를 지정하세요.", file=sys.stderr)
+            sys.exit(1)
+        explain_file = args[index + 1]
+        del args[index:index + 2]
+        if not os.path.exists(explain_file):
+            print(f"[오류] EXPLAIN 파일을 찾을 수 없습니다: {explain_file}", file=sys.stderr)
+            sys.exit(1)
+    
+    if not args:
+        print("사용 방법: python compare_sql_analyzers.py <SQL 파일> [--stats <통계 파일>] [--explain <EXPLAIN JSON 파일>]",
+              file=sys.stderr)
         sys.exit(1)
     
-    sql_file = sys.argv[1]
+    sql_file = args[0]
     
     if not os.path.exists(sql_file):
         print(f"[오류] SQL 파일을 찾을 수 없습니다: {sql_file}", file=sys.stderr)
         sys.exit(1)
     
+    statistics = None
+    if stats_path:
+        try:
+            statistics = load_statistics_catalog(stats_path)
+        except Exception as e:
+            print(f"[오류] 통계 파일을 불러올 수 없습니다: {stats_path} ({e})", file=sys.stderr)
+            sys.exit(1)
+    
     try:
         print("=" * 80)
         print("SQL 분석기 비교 분석")
         print("=" * 80)
         
         # 현재 구현으로 분석
-        current_result = analyze_with_current_implementation(sql_file)
+        current_result = analyze_with_current_implementation(sql_file, statistics)
         
-        # PostgreSQL EXPLAIN ANALYZE 분석 (시뮬레이션)
-        postgresql_result = analyze_with_postgresql_explain(sql_file)
+        # PostgreSQL EXPLAIN ANALYZE 분석 (EXPLAIN 파일, 통계 파일 순으로 사용하고 둘 다 없으면 시뮬레이션)
+        postgresql_result = analyze_with_postgresql_explain(sql_file, statistics, explain_file)
         
         # 결과 비교
         comparison = compare_results(current_result, postgresql_result)
@@ -26,6 +26,7 @@ import sys
 import os
 import re
 import argparse
+import importlib.util
 from typing import Any, Sequence, List, Dict, Optional
 from datetime import datetime
 from pathlib import Path
@@ -53,6 +54,25 @@ except ImportError:
     print("pip install mcp", file=sys.stderr)
     sys.exit(1)
 
+# ============================================
+# 도구 실행기 (분석을 이벤트 루프 밖에서 실행)
+# ============================================
+
+# 도구 실행기와 취소 확인은 분석 서버들이 공유 (mcp-tool-executor.py, 프로세스당 한 번 로드)
+if 'mcp_tool_executor' not in sys.modules:
+    _spec = importlib.util.spec_from_file_location(
+        'mcp_tool_executor', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mcp-tool-executor.py'))
+    sys.modules['mcp_tool_executor'] = importlib.util.module_from_spec(_spec)
+    _spec.loader.exec_module(sys.modules['mcp_tool_executor'])
+_tool_executor_module = sys.modules['mcp_tool_executor']
+ANALYSIS_TIMEOUT = _tool_executor_module.ANALYSIS_TIMEOUT
+AnalysisCancelled = _tool_executor_module.AnalysisCancelled
+ToolExecutor = _tool_executor_module.ToolExecutor
+check_cancelled = _tool_executor_module.check_cancelled
+parse_timeout_seconds = _tool_executor_module.parse_timeout_seconds
+
+tool_executor = ToolExecutor()
+
 # ============================================
 # 로그 파서 클래스
 # ============================================
@@ -1122,6 +1142,7 @@ class WorkspaceSearcher:
         # 2. 파일명만으로 검색
         filename = os.path.basename(file_path)
         for root, dirs, files in os.walk(self.workspace_path):
+            check_cancelled()
             # 제외 디렉토리 필터링
             dirs[:] = [d for d in dirs if d not in self.exclude_dirs]
             
@@ -1138,6 +1159,7 @@ class WorkspaceSearcher:
         workspace = Path(self.workspace_path)
         
         for root, dirs, files in os.walk(self.workspace_path):
+            check_cancelled()
             # 제외 디렉토리 필터링
             dirs[:] = [d for d in dirs if d not in self.exclude_dirs]
             
@@ -1246,6 +1268,11 @@ async def list_tools() -> list[Tool]:
                     "workspace_path": {
                         "type": "string",
                         "description": "워크스페이스 경로 (선택사항, 기본값: 현재 작업 디렉토리)"
+                    },
+                    "timeout_seconds": {
+                        "type": "number",
+                        "exclusiveMinimum": 0,
+                        "description": f"분석 타임아웃(초) (기본값: {ANALYSIS_TIMEOUT:g})"
                     }
                 }
             }
@@ -1480,6 +1507,9 @@ async def call_tool(name: str, arguments: dict) -> Sequence[TextContent]:
     """
     도구 실행 핸들러
     
+    분석은 tool_executor의 스레드에서 실행되므로, 분석 중에도 이벤트 루프가
+    다른 요청(list_tools, 다른 도구 호출, 취소 알림)을 처리할 수 있습니다.
+    
     Args:
         name: 도구 이름
         arguments: 도구 인자
@@ -1487,6 +1517,22 @@ async def call_tool(name: str, arguments: dict) -> Sequence[TextContent]:
     Returns:
         Sequence[TextContent]: 실행 결과
     """
+    try:
+        timeout = parse_timeout_seconds(arguments.get("timeout_seconds"))
+    except ValueError as e:
+        return [TextContent(type="text", text=f"오류: {e}")]
+    
+    try:
+        return await tool_executor.run(run_tool, name, arguments, timeout=timeout)
+    except asyncio.TimeoutError:
+        return [TextContent(
+            type="text",
+            text=f"오류: 분석 타임아웃 ({timeout if timeout is not None else tool_executor.timeout:g}초 초과). "
+                 f"log_file_path로 분석할 로그 파일을 지정하거나 timeout_seconds 값을 늘려 다시 시도하세요."
+        )]
+
+def run_tool(name: str, arguments: dict) -> Sequence[TextContent]:
+    """도구 실행 (동기, tool_executor 스레드에서 실행)"""
     try:
         if name == "analyze_error_logs":
             log_file_path = arguments.get("log_file_path")
@@ -1524,6 +1570,7 @@ async def call_tool(name: str, arguments: dict) -> Sequence[TextContent]:
             
             # 각 로그 파일 분석
             for log_file in log_files[:5]:  # 최대 5개 파일만 분석
+                check_cancelled()
                 try:
                     # 로그 내용 가져오기
                     if log_file is None:
@@ -1600,6 +1647,7 @@ async def call_tool(name: str, arguments: dict) -> Sequence[TextContent]:
                     }
                     
                     for error in errors:
+                        check_cancelled()
                         error_msg = error.get('message', '')
                         locations = workspace_searcher.find_error_location(error_msg)
                         
@@ -1641,6 +1689,7 @@ async def call_tool(name: str, arguments: dict) -> Sequence[TextContent]:
                     # 4. 상세 에러 내역
                     result_parts.append("\n## 4. 상세 에러 내역")
                     for i, error in enumerate(errors, 1):
+                        check_cancelled()
                         result_parts.append(f"\n### 에러 #{i}")
                         result_parts.append(f"- **발생일시**: {error.get('timestamp', 'N/A')}")
                         result_parts.append(f"- **심각도**: {error.get('severity', 'N/A')}")
@@ -25,6 +25,8 @@ import sys
 import os
 import re
 import argparse
+import importlib.util
+import threading
 from typing import Any, Sequence, List, Dict, Optional, Set, Tuple
 from datetime import datetime
 from pathlib import Path
@@ -56,6 +58,51 @@ except ImportError:
     print("pip install sqlparse", file=sys.stderr)
     sys.exit(1)
 
+# ============================================
+# 도구 실행기 (분석을 이벤트 루프 밖에서 실행)
+# ============================================
+
+# 도구 실행기와 취소 확인은 분석 서버들이 공유 (mcp-tool-executor.py, 프로세스당 한 번 로드)
+if 'mcp_tool_executor' not in sys.modules:
+    _spec = importlib.util.spec_from_file_location(
+        'mcp_tool_executor', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mcp-tool-executor.py'))
+    sys.modules['mcp_tool_executor'] = importlib.util.module_from_spec(_spec)
+    _spec.loader.exec_module(sys.modules['mcp_tool_executor'])
+_tool_executor_module = sys.modules['mcp_tool_executor']
+ANALYSIS_TIMEOUT = _tool_executor_module.ANALYSIS_TIMEOUT
+AnalysisCancelled = _tool_executor_module.AnalysisCancelled
+ToolExecutor = _tool_executor_module.ToolExecutor
+check_cancelled = _tool_executor_module.check_cancelled
+parse_timeout_seconds = _tool_executor_module.parse_timeout_seconds
+
+tool_executor = ToolExecutor()
+
+# ============================================
+# 워크스페이스 SQL 카탈로그 (mcp-sql-query-analyzer.py)
+# ============================================
+
+# SQL 카탈로그를 제공하는 SQL 쿼리 분석기 모듈 로드를 직렬화 (처음 사용할 때 한 번 로드)
+_sql_analyzer_lock = threading.Lock()
+
+def open_sql_catalog(workspace_path: str):
+    """
+    워크스페이스 SQL 카탈로그(SQLite)를 열고 갱신 (바뀐 SQL 파일만 다시 파싱)
+    
+    SQL 쿼리 분석기 모듈은 import 시 MCP 서버나 도구 실행기를 만들지 않으므로 카탈로그만 가져다 쓰며,
+    파일 단위 갱신 사이의 취소 확인은 이 서버의 check_cancelled를 명시적으로 넘깁니다.
+    모듈을 불러올 수 없거나 카탈로그를 만들 수 없으면 None을 반환하며,
+    호출자는 정규식 기반 스캔으로 대체합니다.
+    """
+    try:
+        with _sql_analyzer_lock:
+            sql_analyzer = _tool_executor_module.load_local_module('mcp_sql_query_analyzer', 'mcp-sql-query-analyzer.py')
+        catalog = sql_analyzer.WorkspaceSQLCatalog(workspace_path, cancel_check=check_cancelled)
+        catalog.refresh()
+        return catalog
+    except Exception as e:
+        print(f"[SQL 카탈로그 오류] {e}", file=sys.stderr)
+        return None
+
 # ============================================
 # 워크스페이스 스캐너 클래스
 # ============================================
@@ -85,6 +132,7 @@ class WorkspaceScanner:
         exclude_extensions = {'.pyc', '.pyo', '.pyd', '.db', '.sqlite', '.log'}
         
         for root, dirs, files in os.walk(self.workspace_path):
+            check_cancelled()
             # 제외 디렉토리 필터링
             dirs[:] = [d for d in dirs if d not in exclude_dirs]
             
@@ -113,6 +161,7 @@ class WorkspaceScanner:
         pattern = re.compile(rf'\b{re.escape(table_name)}\b', re.IGNORECASE)
         
         for file_path in self.code_files + self.sql_files + self.vue_files:
+            check_cancelled()
             try:
                 with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
                     for line_num, line in enumerate(f, 1):
@@ -139,6 +188,7 @@ class WorkspaceScanner:
             )
         
         for file_path in self.code_files + self.sql_files + self.vue_files:
+            check_cancelled()
             try:
                 with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
                     for line_num, line in enumerate(f, 1):
@@ -214,6 +264,7 @@ class SchemaExtractor:
         """SQL 파일에서 스키마 추출"""
         sql_files = []
         for root, dirs, files in os.walk(self.workspace_path):
+            check_cancelled()
             for file in files:
                 if file.endswith('.sql'):
                     sql_files.append(os.path.join(root, file))
@@ -269,6 +320,8 @@ class ImpactAnalyzer:
         self.workspace_path = workspace_path or os.getcwd()
         self.scanner = WorkspaceScanner(workspace_path)
         self.schema_extractor = SchemaExtractor(workspace_path)
+        # 워크스페이스 SQL 카탈로그 (analyze()에서 갱신, 없으면 정규식 기반 스캔 사용)
+        self.sql_catalog = None
     
     def analyze(self, table_name: str, column_name: str = None, special_notes: str = None):
         """영향도 분석 수행"""
@@ -276,6 +329,7 @@ class ImpactAnalyzer:
         
         # 워크스페이스 스캔
         self.scanner.scan_workspace()
+        self.sql_catalog = open_sql_catalog(self.workspace_path)
         
         # 스키마 추출
         schema = self.schema_extractor.extract_from_database_js()
@@ -298,7 +352,8 @@ class ImpactAnalyzer:
             'program_column_correlation': self._analyze_program_column_correlation(column_name, table_name) if column_name else {},
             'ui_impact': self._analyze_ui_impact(table_name, column_name),
             'batch_procedure_impact': self._analyze_batch_procedure_impact(table_name, column_name),
-            'postgresql_lineage': self._analyze_postgresql_lineage(table_name, schema)
+            'postgresql_lineage': self._analyze_postgresql_lineage(table_name, schema),
+            'sql_catalog': self._analyze_sql_catalog(table_name, column_name)
         }
         
         return result
@@ -308,26 +363,41 @@ class ImpactAnalyzer:
         # SQL 파일에서 JOIN 관계 분석
         join_relations = []
         
-        for sql_file in self.scanner.sql_files:
-            try:
-                with open(sql_file, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                
-                # JOIN 패턴 찾기
-                join_pattern = re.compile(
-                    rf'{re.escape(table_name)}\s+(?:INNER|LEFT|RIGHT|FULL)?\s*JOIN\s+(\w+)',
-                    re.IGNORECASE
-                )
-                
-                for match in join_pattern.finditer(content):
-                    related_table = match.group(1)
+        if self.sql_catalog is not None:
+            # SQL 카탈로그의 파싱된 JOIN (별칭과 ON 조건으로 연결된 테이블)
+            for join in self.sql_catalog.joins(table_name):
+                for related_table in join['tables']:
+                    if related_table.lower().rsplit('.', 1)[-1] == table_name.lower():
+                        continue
                     join_relations.append({
                         'related_table': related_table,
-                        'join_type': 'JOIN',
-                        'source_file': os.path.relpath(sql_file, self.workspace_path)
+                        'join_type': join['join_type'],
+                        'source_file': join['file'],
+                        'line': join['line']
                     })
-            except Exception as e:
-                print(f"[테이블 상관도 오류] {sql_file}: {e}", file=sys.stderr)
+        else:
+            # 정규식 기반 스캔 (카탈로그를 사용할 수 없는 경우)
+            for sql_file in self.scanner.sql_files:
+                check_cancelled()
+                try:
+                    with open(sql_file, 'r', encoding='utf-8', errors='ignore') as f:
+                        content = f.read()
+                    
+                    # JOIN 패턴 찾기
+                    join_pattern = re.compile(
+                        rf'{re.escape(table_name)}\s+(?:INNER|LEFT|RIGHT|FULL)?\s*JOIN\s+(\w+)',
+                        re.IGNORECASE
+                    )
+                    
+                    for match in join_pattern.finditer(content):
+                        related_table = match.group(1)
+                        join_relations.append({
+                            'related_table': related_table,
+                            'join_type': 'JOIN',
+                            'source_file': os.path.relpath(sql_file, self.workspace_path)
+                        })
+                except Exception as e:
+                    print(f"[테이블 상관도 오류] {sql_file}: {e}", file=sys.stderr)
         
         direct_refs = len(self.scanner.table_references[table_name])
         join_count = len(join_relations)
@@ -419,6 +489,7 @@ class ImpactAnalyzer:
         vue_impacts = []
         
         for vue_file in self.scanner.vue_files:
+            check_cancelled()
             try:
                 with open(vue_file, 'r', encoding='utf-8', errors='ignore') as f:
                     content = f.read()
@@ -455,6 +526,7 @@ class ImpactAnalyzer:
         procedure_impacts = []
         
         for sql_file in self.scanner.sql_files:
+            check_cancelled()
             try:
                 with open(sql_file, 'r', encoding='utf-8', errors='ignore') as f:
                     content = f.read()
@@ -548,6 +620,26 @@ class ImpactAnalyzer:
         
         return lineage
     
+    def _analyze_sql_catalog(self, table_name: str, column_name: str = None):
+        """SQL 카탈로그 기반 SQL 파일 사용 현황 (파싱 결과 기준, 주석/문자열 속 이름은 제외)"""
+        if self.sql_catalog is None:
+            return {'summary': 'SQL 카탈로그 없음', 'available': False}
+        
+        table_usage = self.sql_catalog.tables(table_name)
+        result = {
+            'available': True,
+            'catalog': self.sql_catalog.db_path,
+            'table_usage': table_usage
+        }
+        summary_parts = [f"{len(table_usage)}개 SQL 파일에서 사용"] if table_usage else []
+        if column_name:
+            column_files = self.sql_catalog.column_files(table_name, column_name)
+            result['column_files'] = column_files
+            if column_files:
+                summary_parts.append(f"컬럼 참조 {len(column_files)}개 파일")
+        result['summary'] = " | ".join(summary_parts) if summary_parts else "SQL 파일 참조 없음"
+        return result
+    
     def _convert_to_postgresql_type(self, sqlite_type: str):
         """SQLite 타입을 PostgreSQL 타입으로 변환"""
         type_mapping = {
@@ -593,6 +685,11 @@ async def list_tools() -> List[Tool]:
                     "workspace_path": {
                         "type": "string",
                         "description": "워크스페이스 경로 (선택사항, 기본값: 현재 디렉토리)"
+                    },
+                    "timeout_seconds": {
+                        "type": "number",
+                        "exclusiveMinimum": 0,
+                        "description": f"분석 타임아웃(초) (기본값: {ANALYSIS_TIMEOUT:g})"
                     }
                 },
                 "required": ["table_name"]
@@ -602,7 +699,25 @@ async def list_tools() -> List[Tool]:
 
 @server.call_tool()
 async def call_tool(name: str, arguments: Any) -> List[TextContent]:
-    """도구 호출 처리"""
+    """도구 호출 처리 (분석은 tool_executor 스레드에서 실행하여 이벤트 루프를 막지 않음)"""
+    try:
+        timeout = parse_timeout_seconds(arguments.get("timeout_seconds"))
+    except ValueError as e:
+        return [TextContent(type="text", text=f"오류: {e}")]
+    
+    try:
+        return await tool_executor.run(run_tool, name, arguments, timeout=timeout)
+    except asyncio.TimeoutError:
+        return [TextContent(
+            type="text",
+            text=json.dumps({
+                "error": f"분석 타임아웃 ({timeout if timeout is not None else tool_executor.timeout:g}초 초과)",
+                "error_type": "TimeoutError"
+            }, ensure_ascii=False, indent=2)
+        )]
+
+def run_tool(name: str, arguments: Any) -> List[TextContent]:
+    """도구 실행 (동기, tool_executor 스레드에서 실행)"""
     if name == "analyze_impact":
         table_name = arguments.get("table_name")
         column_name = arguments.get("column_name")
@@ -20,14 +20,29 @@ SQL 쿼리 분석 MCP 서버
 """
 
 import asyncio
+import importlib.util
+import csv
+import io
 import json
+import math
 import sys
 import os
 import re
-from typing import Any, Sequence, List, Dict, Optional, Set, Tuple
+import hashlib
+import heapq
+import shutil
+import sqlite3
+import struct
+import tempfile
+import threading
+import time
+import contextlib
+from typing import Any, Callable, Sequence, List, Dict, Optional, Set, Tuple, Iterable, Iterator
 from datetime import datetime
 from pathlib import Path
 from collections import defaultdict, Counter
+from bisect import bisect_right
+from functools import lru_cache
 
 # MCP SDK import
 try:
@@ -44,11 +59,538 @@ try:
     import sqlparse
     from sqlparse import sql, tokens as T
     from sqlparse.sql import Statement, TokenList
+    from sqlparse.engine import FilterStack, grouping
 except ImportError:
     print("sqlparse 라이브러리가 설치되지 않았습니다. 다음 명령어로 설치하세요:", file=sys.stderr)
     print("pip install sqlparse", file=sys.stderr)
     sys.exit(1)
 
+# ============================================
+# 쿼리 트리 (Scoped AST)
+# ============================================
+
+# 연속 공백 (절 텍스트 정규화용)
+_WHITESPACE_RUN = re.compile(r'\s+')
+
+# 집합 연산 키워드 (첫 단어 기준)
+SET_OPERATORS = ('UNION', 'INTERSECT', 'EXCEPT', 'MINUS')
+
+# 쿼리 블록 안에서 절(clause)을 시작하는 일반 키워드
+SCOPE_CLAUSES = ('FROM', 'WHERE', 'GROUP BY', 'HAVING', 'ORDER BY', 'LIMIT', 'OFFSET', 'FETCH',
+                 'WINDOW', 'QUALIFY', 'RETURNING', 'SET', 'VALUES', 'INTO')
+
+class TableRef:
+    """FROM/JOIN 항목 또는 INSERT/UPDATE 대상 (테이블, CTE 참조, 파생 테이블, 테이블 함수)"""
+    
+    def __init__(self, first: int, last: int, name: Optional[str] = None, alias: Optional[str] = None,
+                 subquery: Optional['QueryScope'] = None, is_function: bool = False):
+        self.first = first
+        self.last = last
+        self.name = name
+        self.alias = alias
+        self.subquery = subquery
+        self.is_function = is_function
+        # 같은 이름의 CTE가 보이는 범위에 있으면 해당 CTENode (트리 생성 후 해석)
+        self.cte = None
+    
+    @property
+    def display_name(self) -> Optional[str]:
+        """리포트에 표시할 이름 (파생 테이블은 별칭)"""
+        return self.name or self.alias
+    
+    @property
+    def ref_type(self) -> str:
+        """참조 유형: table, cte, subquery, function"""
+        if self.subquery is not None:
+            return 'subquery'
+        if self.is_function:
+            return 'function'
+        if self.cte is not None:
+            return 'cte'
+        return 'table'
+
+class ClauseItem:
+    """SELECT 목록 / GROUP BY / ORDER BY 항목"""
+    
+    def __init__(self, first: int, last: int, name: Optional[str] = None, alias: Optional[str] = None):
+        self.first = first
+        self.last = last
+        self.name = name
+        self.alias = alias
+
+class Predicate:
+    """WHERE / HAVING / ON / USING 조건 (keyword: 절 키워드 위치, first~last: 조건 토큰 범위)"""
+    
+    def __init__(self, clause: str, keyword: int, first: int, last: int):
+        self.clause = clause
+        self.keyword = keyword
+        self.first = first
+        self.last = last
+
+class JoinNode:
+    """JOIN 항목 (조인 대상과 ON/USING 조건)"""
+    
+    def __init__(self, join_type: str, keyword: int, item: Optional[TableRef]):
+        self.join_type = join_type
+        self.keyword = keyword
+        self.item = item
+        self.condition = None
+        self.last = item.last if item else keyword
+
+class CTENode:
+    """WITH 절의 CTE 하나 (query: CTE 본문 쿼리 블록, columns: name (c1, c2) 형태의 컬럼 목록)"""
+    
+    def __init__(self, name: str, first: int, last: int, query: 'QueryScope',
+                 columns: Optional[List[str]] = None):
+        self.name = name
+        self.first = first
+        self.last = last
+        self.query = query
+        self.columns = columns
+
+class QueryScope:
+    """
+    쿼리 블록 노드 (SELECT/INSERT/UPDATE/DELETE 하나)
+    
+    CTE 본문, 서브쿼리, 집합 연산(UNION 등) 분기는 각각 별도의 QueryScope이며,
+    절 키워드는 자기 블록의 괄호 깊이 0에서만 인식합니다.
+    따라서 중첩 서브쿼리의 WHERE/GROUP BY/ORDER BY가 바깥 블록에 섞이지 않습니다.
+    
+    kind: query(Statement 최상위), cte, subquery, set_branch(집합 연산의 두 번째 이후 분기)
+    depth: 서브쿼리 중첩 깊이 (최상위와 CTE 본문은 0)
+    first/last: Statement 토큰 인덱스 (last 포함)
+    """
+    
+    def __init__(self, kind: str, depth: int, location: str, parent: Optional['QueryScope'], first: int):
+        self.kind = kind
+        self.depth = depth
+        self.location = location
+        self.parent = parent
+        self.first = first
+        self.last = first
+        self.statement_type = None
+        self.target = None
+        self.ctes = []
+        self.columns = []
+        self.from_items = []
+        self.joins = []
+        self.where = None
+        self.having = None
+        self.group_by = []
+        self.order_by = []
+        self.subqueries = []
+        self.set_operations = []
+    
+    def table_refs(self) -> List[TableRef]:
+        """블록이 직접 참조하는 FROM/JOIN 항목 (대상 테이블 포함)"""
+        refs = list(self.from_items)
+        refs.extend(join.item for join in self.joins if join.item is not None)
+        if self.target is not None:
+            refs.append(self.target)
+        return refs
+    
+    def find_cte(self, name: str) -> Optional[CTENode]:
+        """이 블록에서 보이는 CTE 찾기 (바깥 블록 방향으로 탐색, 대소문자 무시)"""
+        key = name.lower()
+        scope = self
+        while scope is not None:
+            for cte in scope.ctes:
+                if cte.name.lower() == key:
+                    return cte
+            scope = scope.parent
+        return None
+    
+    def resolve_qualifier(self, qualifier: str) -> Optional[TableRef]:
+        """컬럼 한정자(별칭 또는 테이블명)가 가리키는 FROM/JOIN 항목 (바깥 블록 방향으로 탐색)"""
+        key = qualifier.lower()
+        scope = self
+        while scope is not None:
+            for ref in scope.table_refs():
+                if (ref.alias and ref.alias.lower() == key) or (ref.name and ref.name.lower() == key):
+                    return ref
+            scope = scope.parent
+        return None
+
+class QueryTree:
+    """
+    Statement 하나의 쿼리 트리
+    
+    root: 최상위 쿼리 블록, scopes: 모든 쿼리 블록 (등장 순서 = 전위 순회 순서)
+    노드는 토큰 인덱스만 가지며, 텍스트는 text()/compact_text()로 필요할 때 만듭니다.
+    """
+    
+    def __init__(self, tokens: List[Any], offsets: Optional[List[int]]):
+        self.tokens = tokens
+        self.offsets = offsets
+        self.root = None
+        self.scopes = []
+    
+    @property
+    def statement_type(self) -> str:
+        """Statement 타입 (WITH ... SELECT 는 SELECT)"""
+        if self.root is None or not self.root.statement_type:
+            return 'UNKNOWN'
+        return self.root.statement_type
+    
+    def subtree(self, scope: QueryScope) -> List[QueryScope]:
+        """scope와 그 안에 중첩된 모든 쿼리 블록 (전위 순회 순서이므로 scopes의 연속 구간)"""
+        start = self.scopes.index(scope)
+        members = {scope}
+        for child in self.scopes[start + 1:]:
+            if child.parent not in members:
+                break
+            members.add(child)
+        return self.scopes[start:start + len(members)]
+    
+    def text(self, first: int, last: int) -> str:
+        """토큰 first~last(포함)의 원문 텍스트 (주석 제외)"""
+        return ''.join(token.value for token in self.tokens[first:last + 1])
+    
+    def compact_text(self, first: int, last: int) -> str:
+        """토큰 first~last(포함)의 텍스트 (연속 공백을 한 칸으로)"""
+        return _WHITESPACE_RUN.sub(' ', self.text(first, last)).strip()
+
+class QueryTreeBuilder:
+    """
+    평탄화된 토큰 리스트에서 QueryTree를 만드는 클래스
+    
+    괄호 짝을 한 번에 계산한 뒤, 각 쿼리 블록은 자기 범위의 토큰만 한 번 스캔하고
+    서브쿼리 괄호는 자식 블록에 넘기고 건너뜁니다. 모든 토큰은 정확히 한 블록에서만
+    스캔되므로 전체 비용은 토큰 수에 비례합니다.
+    """
+    
+    def __init__(self, tokens: List[Any], offsets: Optional[List[int]] = None):
+        self.tokens = tokens
+        self.tree = QueryTree(tokens, offsets)
+        self.match = self._match_parentheses(tokens)
+        # 서브쿼리 여는 괄호 위치 -> 자식 쿼리 블록
+        self.paren_scopes = {}
+    
+    @staticmethod
+    def _match_parentheses(tokens: List[Any]) -> Dict[int, int]:
+        """여는 괄호 위치 -> 닫는 괄호 위치 (짝이 없으면 마지막 토큰)"""
+        match = {}
+        stack = []
+        for i, token in enumerate(tokens):
+            if token.ttype is T.Punctuation:
+                if token.value == '(':
+                    stack.append(i)
+                elif token.value == ')' and stack:
+                    match[stack.pop()] = i
+        for i in stack:
+            match[i] = len(tokens) - 1
+        return match
+    
+    def build(self) -> QueryTree:
+        """트리 생성 및 CTE 참조 해석"""
+        self.tree.root = self._build_query(0, len(self.tokens), 'query', 0, 'ROOT', None)
+        for scope in self.tree.scopes:
+            for ref in scope.table_refs():
+                if ref.name and ref.subquery is None and not ref.is_function and '.' not in ref.name:
+                    ref.cte = scope.find_cte(ref.name)
+        return self.tree
+    
+    def _build_query(self, start: int, end: int, kind: str, depth: int, location: str,
+                     parent: Optional[QueryScope]) -> QueryScope:
+        """start~end(미포함) 범위의 쿼리 블록 생성 (집합 연산 분기 포함)"""
+        scope = self._new_scope(kind, depth, location, parent, start)
+        stop = self._scan(scope, start, end)
+        while stop < end:
+            # 집합 연산 키워드에서 멈춤: 나머지는 같은 깊이의 분기
+            operator = ' '.join(self.tokens[stop].value.upper().split())
+            branch = self._new_scope('set_branch', depth, operator, scope, stop + 1)
+            scope.set_operations.append((operator, branch))
+            stop = self._scan(branch, stop + 1, end)
+        return scope
+    
+    def _new_scope(self, kind: str, depth: int, location: str, parent: Optional[QueryScope],
+                   start: int) -> QueryScope:
+        scope = QueryScope(kind, depth, location, parent, start)
+        self.tree.scopes.append(scope)
+        return scope
+    
+    def _opens_query(self, open_pos: int, close_pos: int) -> bool:
+        """괄호 안이 SELECT 또는 WITH로 시작하는 쿼리인지 여부"""
+        j = open_pos + 1
+        while j < close_pos and self.tokens[j].is_whitespace:
+            j += 1
+        if j >= close_pos:
+            return False
+        token = self.tokens[j]
+        return token.ttype is T.Keyword.CTE or (token.ttype is T.Keyword.DML and token.value.upper() == 'SELECT')
+    
+    def _clause_of(self, token: Any, previous: Any, scope: QueryScope, clause: Optional[str]) -> Optional[str]:
+        """깊이 0의 키워드가 새 절을 시작하면 절 이름 반환 (집합 연산은 'SET_OPERATION')"""
+        word = ' '.join(token.value.upper().split())
+        ttype = token.ttype
+        if ttype is T.Keyword.CTE:
+            return 'WITH' if clause is None else None
+        if ttype is T.Keyword.DML:
+            if word == 'SELECT':
+                if scope.statement_type is None:
+                    scope.statement_type = 'SELECT'
+                return 'SELECT'
+            if scope.statement_type is None:
+                scope.statement_type = word
+                return word
+            return 'OTHER'
+        if ttype is T.Keyword.DDL:
+            if scope.statement_type is None:
+                scope.statement_type = word
+            return 'OTHER'
+        if ttype is not T.Keyword:
+            return None
+        if word.split()[0] in SET_OPERATORS:
+            return 'SET_OPERATION'
+        if word == 'FROM' and previous is not None and previous.value.upper() == 'DISTINCT':
+            # IS [NOT] DISTINCT FROM
+            return None
+        if word.endswith('JOIN'):
+            return 'JOIN'
+        if word == 'ON':
+            return 'ON' if clause == 'JOIN' else None
+        if word == 'USING':
+            if clause == 'JOIN':
+                return 'USING'
+            return 'FROM' if scope.statement_type == 'DELETE' else None
+        if word in SCOPE_CLAUSES:
+            return word
+        return None
+    
+    def _scan(self, scope: QueryScope, start: int, end: int) -> int:
+        """
+        쿼리 블록 범위를 스캔하여 절별 세그먼트로 나누고 노드를 채움
+        
+        Returns:
+            int: 집합 연산 키워드 위치 (없으면 end)
+        """
+        tokens = self.tokens
+        punctuation = T.Punctuation
+        level = 0
+        segment = {'clause': None, 'keyword': None, 'elems': []}
+        last_significant = None
+        i = start
+        while i < end:
+            token = tokens[i]
+            ttype = token.ttype
+            
+            if ttype is punctuation:
+                value = token.value
+                if value == '(':
+                    close = min(self.match[i], end - 1)
+                    if level == 0:
+                        segment['elems'].append(i)
+                    if self._opens_query(i, close):
+                        clause = segment['clause']
+                        if clause == 'WITH':
+                            child = self._build_query(i + 1, close, 'cte', scope.depth, 'WITH', scope)
+                        else:
+                            child = self._build_query(i + 1, close, 'subquery', scope.depth + 1, clause or 'UNKNOWN', scope)
+                            scope.subqueries.append(child)
+                        self.paren_scopes[i] = child
+                        last_significant = close
+                        i = close + 1
+                        continue
+                    level += 1
+                elif value == ')':
+                    level = max(0, level - 1)
+                elif level == 0 and value == ',' and segment['clause'] in ('JOIN', 'ON', 'USING'):
+                    # ... JOIN b ON ..., c : 쉼표 뒤는 FROM 항목
+                    self._finish_segment(scope, segment)
+                    segment = {'clause': 'FROM', 'keyword': None, 'elems': []}
+                elif level == 0 and value != ';':
+                    segment['elems'].append(i)
+            elif token.is_whitespace:
+                i += 1
+                continue
+            elif level == 0:
+                clause = None
+                if ttype is T.Keyword or ttype.parent is T.Keyword:
+                    previous = tokens[last_significant] if last_significant is not None else None
+                    clause = self._clause_of(token, previous, scope, segment['clause'])
+                if clause == 'SET_OPERATION':
+                    self._finish_segment(scope, segment)
+                    if last_significant is not None:
+                        scope.last = last_significant
+                    return i
+                if clause:
+                    self._finish_segment(scope, segment)
+                    segment = {'clause': clause, 'keyword': i, 'elems': []}
+                else:
+                    segment['elems'].append(i)
+            last_significant = i
+            i += 1
+        
+        self._finish_segment(scope, segment)
+        if last_significant is not None:
+            scope.last = last_significant
+        return end
+    
+    # ----- 세그먼트 -> 노드 -----
+    
+    def _split_items(self, elems: List[int]) -> List[List[int]]:
+        """깊이 0 쉼표로 항목 분리"""
+        items = [[]]
+        for pos in elems:
+            token = self.tokens[pos]
+            if token.ttype is T.Punctuation and token.value == ',':
+                items.append([])
+            else:
+                items[-1].append(pos)
+        return [item for item in items if item]
+    
+    def _item_last(self, pos: int) -> int:
+        """항목의 마지막 토큰 위치 (괄호면 닫는 괄호)"""
+        token = self.tokens[pos]
+        if token.ttype is T.Punctuation and token.value == '(':
+            return self.match[pos]
+        return pos
+    
+    def _finish_segment(self, scope: QueryScope, segment: Dict[str, Any]):
+        """세그먼트를 절 종류에 맞는 노드로 변환하여 블록에 추가"""
+        clause = segment['clause']
+        elems = segment['elems']
+        keyword = segment['keyword']
+        
+        if clause == 'JOIN':
+            join_type = ' '.join(self.tokens[keyword].value.upper().split())
+            scope.joins.append(JoinNode(join_type, keyword, self._table_ref(elems) if elems else None))
+            return
+        if not elems:
+            return
+        last = self._item_last(elems[-1])
+        
+        if clause == 'WITH':
+            for item in self._split_items(elems):
+                cte = self._cte(item)
+                if cte:
+                    scope.ctes.append(cte)
+        elif clause == 'SELECT':
+            scope.columns.extend(self._select_item(item) for item in self._split_items(self._skip_distinct(elems)))
+        elif clause == 'FROM':
+            scope.from_items.extend(self._table_ref(item) for item in self._split_items(elems))
+        elif clause in ('ON', 'USING'):
+            if scope.joins:
+                join = scope.joins[-1]
+                join.condition = Predicate(clause, keyword, elems[0], last)
+                join.last = last
+        elif clause == 'WHERE':
+            scope.where = Predicate('WHERE', keyword, elems[0], last)
+        elif clause == 'HAVING':
+            scope.having = Predicate('HAVING', keyword, elems[0], last)
+        elif clause in ('GROUP BY', 'ORDER BY'):
+            items = []
+            for item in self._split_items(elems):
+                item_last = self._item_last(item[-1])
+                items.append(ClauseItem(item[0], item_last, self.tree.compact_text(item[0], item_last)))
+            if clause == 'GROUP BY':
+                scope.group_by.extend(items)
+            else:
+                scope.order_by.extend(items)
+        elif clause in ('INTO', 'UPDATE') and scope.statement_type in ('INSERT', 'UPDATE'):
+            target = self._table_ref(elems)
+            target.is_function = False
+            scope.target = target
+    
+    def _skip_distinct(self, elems: List[int]) -> List[int]:
+        """SELECT 목록 앞의 DISTINCT / ALL / DISTINCT ON (...) 제외"""
+        i = 0
+        while i < len(elems) and self.tokens[elems[i]].ttype is T.Keyword \
+                and self.tokens[elems[i]].value.upper() in ('DISTINCT', 'ALL', 'ON'):
+            i += 1
+            if i < len(elems) and self.tokens[elems[i]].value == '(' and self.tokens[elems[i - 1]].value.upper() == 'ON':
+                i += 1
+        return elems[i:]
+    
+    @staticmethod
+    def _unquote(value: str) -> str:
+        return value.strip().strip('"\'`')
+    
+    def _is_name(self, pos: int) -> bool:
+        ttype = self.tokens[pos].ttype
+        return ttype in T.Name or ttype is T.String.Symbol
+    
+    def _dotted_name(self, item: List[int], i: int) -> Tuple[Optional[str], int]:
+        """item[i]부터 schema.table 형태의 이름을 읽고 (이름, 다음 위치) 반환"""
+        parts = [self._unquote(self.tokens[item[i]].value)]
+        i += 1
+        while i + 1 < len(item) and self.tokens[item[i]].value == '.':
+            parts.append(self._unquote(self.tokens[item[i + 1]].value))
+            i += 2
+        name = '.'.join(part for part in parts if part)
+        return name or None, i
+    
+    def _table_ref(self, item: List[int]) -> TableRef:
+        """FROM/JOIN 항목 토큰으로 TableRef 생성"""
+        tokens = self.tokens
+        i = 0
+        while i < len(item) - 1 and tokens[item[i]].ttype is T.Keyword \
+                and tokens[item[i]].value.upper() in ('LATERAL', 'ONLY'):
+            i += 1
+        ref = TableRef(item[i], self._item_last(item[-1]))
+        
+        if tokens[item[i]].value == '(':
+            ref.subquery = self.paren_scopes.get(item[i])
+            i += 1
+        else:
+            ref.name, i = self._dotted_name(item, i)
+            if i < len(item) and tokens[item[i]].value == '(':
+                ref.is_function = True
+                i += 1
+        
+        # 별칭: [AS] alias
+        if i < len(item) and tokens[item[i]].ttype is T.Keyword and tokens[item[i]].value.upper() == 'AS':
+            if i + 1 < len(item):
+                ref.alias = self._unquote(tokens[item[i + 1]].value)
+        elif i < len(item) and self._is_name(item[i]):
+            ref.alias = self._unquote(tokens[item[i]].value)
+        elif i == len(item) - 1 and tokens[item[i]].ttype is T.Keyword:
+            # 키워드로 토큰화되는 비예약어 별칭 (예: ada, source)
+            ref.alias = self._unquote(tokens[item[i]].value)
+        return ref
+    
+    def _select_item(self, item: List[int]) -> ClauseItem:
+        """SELECT 목록 항목: 출력 이름은 별칭, 없으면 컬럼명(a.b -> b) 또는 식 텍스트"""
+        tokens = self.tokens
+        last = self._item_last(item[-1])
+        node = ClauseItem(item[0], last)
+        
+        if len(item) >= 2:
+            previous = tokens[item[-2]]
+            final = tokens[item[-1]]
+            if previous.ttype is T.Keyword and previous.value.upper() == 'AS':
+                node.alias = self._unquote(final.value)
+            elif self._is_name(item[-1]) and previous.value not in ('.', '::') \
+                    and previous.ttype not in T.Operator \
+                    and (previous.ttype not in T.Keyword or previous.value.upper() == 'END'):
+                node.alias = self._unquote(final.value)
+        
+        if node.alias:
+            node.name = node.alias
+        elif all(self._is_name(pos) or tokens[pos].value in ('.', '*') for pos in item):
+            node.name = self._unquote(tokens[item[-1]].value) if tokens[item[-1]].value != '*' \
+                else self.tree.compact_text(item[0], last)
+        else:
+            node.name = self.tree.compact_text(item[0], last)
+        return node
+    
+    def _cte(self, item: List[int]) -> Optional[CTENode]:
+        """WITH 항목 토큰으로 CTENode 생성: name [(컬럼...)] AS [NOT] [MATERIALIZED] (쿼리)"""
+        tokens = self.tokens
+        i = 0
+        if tokens[item[0]].ttype is T.Keyword and tokens[item[0]].value.upper() == 'RECURSIVE':
+            i = 1
+        body = next((pos for pos in reversed(item) if pos in self.paren_scopes), None)
+        if i >= len(item) or body is None:
+            return None
+        name = self._unquote(tokens[item[i]].value)
+        columns = None
+        if i + 1 < len(item) and tokens[item[i + 1]].value == '(' and item[i + 1] != body:
+            close = self.match[item[i + 1]]
+            columns = [self._unquote(tokens[pos].value) for pos in range(item[i + 1] + 1, close)
+                       if self._is_name(pos)]
+        return CTENode(name, item[i], self.match[body], self.paren_scopes[body], columns)
+
 # ============================================
 # SQL 쿼리 파서 클래스
 # ============================================
@@ -56,311 +598,473 @@ except ImportError:
 class SQLQueryParser:
     """PostgreSQL 쿼리 파싱 및 구조 추출 클래스"""
     
-    def __init__(self, query_text: str):
+    # 파싱 모드
+    # - fast: 원본 텍스트를 그대로 파싱하고 주석 토큰은 인덱스에서만 제외 (토큰 위치 = 원본 위치)
+    # - reindent: sqlparse.format(reindent=True, strip_comments=True)로 정규화 후 파싱 (이전 방식)
+    PARSE_MODES = ('fast', 'reindent')
+    
+    def __init__(self, query_text: str, parse_mode: str = 'fast',
+                 previous_statements: Optional[Dict[str, Statement]] = None):
+        """
+        Args:
+            query_text: 분석할 쿼리 텍스트
+            parse_mode: 파싱 모드 (PARSE_MODES)
+            previous_statements: 이전 버전의 Statement 텍스트 -> 파싱된 Statement (statement_map() 결과).
+                                 텍스트가 같은 Statement는 다시 그룹화(파싱)하지 않고 재사용합니다.
+        """
+        if parse_mode not in self.PARSE_MODES:
+            raise ValueError(f"지원하지 않는 파싱 모드입니다: {parse_mode}")
+        self.parse_mode = parse_mode
         self.query_text = query_text.strip()
+        # strip()으로 제거된 앞부분을 반영하여 원본 기준 (라인, 컬럼)을 계산하기 위한 값
+        leading = query_text[:len(query_text) - len(query_text.lstrip())]
+        self._source_line_base = leading.count('\n')
+        self._source_column_base = len(leading) - (leading.rfind('\n') + 1)
+        # 라인 시작 오프셋 테이블 (위치 -> 라인 변환용)
+        self.line_starts = [0] + [m.end() for m in re.finditer('\n', self.query_text)]
         self.parsed_statements = []
+        # Statement별 파싱 대상 텍스트 및 이전 버전에서 재사용했는지 여부
+        self.statement_texts = []
+        self.reused_statements = []
+        self._previous_statements = previous_statements or {}
+        # Statement별 query_text 내 시작 오프셋 (fast 모드에서만 의미 있음)
+        self.statement_offsets = []
+        # Statement별 평탄화 토큰 인덱스 및 쿼리 트리 (최초 접근 시 1회 생성)
+        self._token_index = None
+        self._query_trees = None
+        # query_text 내 주석 범위 (start, end) 리스트 (find_spans가 주석 안의 일치를 제외할 때 사용)
+        # fast 모드에서는 주석만 있는 Statement 범위를 파싱 중에, 주석 토큰 범위를 토큰 인덱스 생성 시 수집
+        self._comment_ranges = None
+        self._comment_statement_ranges = []
+        # extract_* 결과 항목별 원본 소스 범위 (결과 리스트와 같은 순서)
+        self.spans = defaultdict(list)
+        # get_parsed_structure() 결과 메모이제이션
+        self._structure = None
+        # 분석기들이 공유하는 AnalysisContext (AnalysisContext.for_parser()가 연결)
+        self.analysis_context = None
         self._parse()
+        self._previous_statements = None
+    
+    @property
+    def preserves_offsets(self) -> bool:
+        """토큰 위치가 원본 텍스트 위치와 일치하는지 여부"""
+        return self.parse_mode == 'fast'
+    
+    def _add_statement(self, text: str, parse: Callable[[], Statement]) -> Statement:
+        """이전 버전에 같은 텍스트의 Statement가 있으면 재사용하고, 없으면 parse()로 파싱하여 추가"""
+        parsed = self._previous_statements.get(text)
+        self.reused_statements.append(parsed is not None)
+        if parsed is None:
+            parsed = parse()
+        self.parsed_statements.append(parsed)
+        self.statement_texts.append(text)
+        return parsed
     
     def _parse(self):
         """쿼리를 파싱하여 Statement 리스트 생성"""
-        # 주석 제거 및 정규화
-        normalized = sqlparse.format(self.query_text, reindent=True, strip_comments=True)
-        # 여러 쿼리 분리
-        statements = sqlparse.split(normalized)
-        for stmt in statements:
-            if stmt.strip():
-                parsed = sqlparse.parse(stmt)[0]
-                self.parsed_statements.append(parsed)
+        if self.parse_mode == 'reindent':
+            # 주석 제거 및 정규화
+            normalized = sqlparse.format(self.query_text, reindent=True, strip_comments=True)
+            # 여러 쿼리 분리
+            statements = sqlparse.split(normalized)
+            for stmt in statements:
+                if stmt.strip():
+                    self._add_statement(stmt, lambda: sqlparse.parse(stmt)[0])
+            return
+        
+        # 원본을 그대로 파싱: Statement 문자열을 이어 붙이면 원본과 같으므로 오프셋이 보존됨
+        # (sqlparse.parse와 같은 단계: 토큰화/Statement 분리 후 Statement별 그룹화.
+        #  그룹화가 파싱 비용의 대부분이므로 이전 버전과 텍스트가 같은 Statement는 그룹화를 생략)
+        offset = 0
+        for raw in FilterStack().run(self.query_text):
+            text = str(raw)
+            if raw.token_first(skip_ws=True, skip_cm=True) is not None:
+                self._add_statement(text, lambda: grouping.group(raw))
+                self.statement_offsets.append(offset)
+            else:
+                self._comment_statement_ranges.append((offset, offset + len(text)))
+            offset += len(text)
+    
+    def statement_map(self) -> Dict[str, Statement]:
+        """Statement 텍스트 -> 파싱된 Statement (다음 버전 파싱 시 previous_statements로 전달)"""
+        return dict(zip(self.statement_texts, self.parsed_statements))
+    
+    def _get_token_index(self) -> List[Dict[str, Any]]:
+        """
+        Statement별 토큰 인덱스 반환
+        
+        각 Statement를 한 번만 평탄화(flatten)합니다. 쿼리 트리는 이 인덱스로 만들어집니다.
+        fast 모드에서는 주석 토큰을 제외하고, 각 토큰의 원본 시작 오프셋을 기록합니다.
+        
+        Returns:
+            List[Dict]: {'tokens': 평탄화된 토큰 리스트,
+                         'offsets': 토큰별 query_text 내 시작 오프셋 (reindent 모드에서는 None)}
+        """
+        if self._token_index is not None:
+            return self._token_index
+        
+        index = []
+        comments = list(self._comment_statement_ranges)
+        for stmt_idx, stmt in enumerate(self.parsed_statements):
+            if self.preserves_offsets:
+                tokens = []
+                offsets = []
+                offset = self.statement_offsets[stmt_idx]
+                for token in stmt.flatten():
+                    if token.ttype not in T.Comment:
+                        tokens.append(token)
+                        offsets.append(offset)
+                    else:
+                        comments.append((offset, offset + len(token.value)))
+                    offset += len(token.value)
+            else:
+                tokens = list(stmt.flatten())
+                offsets = None
+            index.append({'tokens': tokens, 'offsets': offsets})
+        
+        self._token_index = index
+        if self.preserves_offsets:
+            self._comment_ranges = sorted(comments)
+        return index
+    
+    def _get_comment_ranges(self) -> List[Tuple[int, int]]:
+        """
+        query_text 내 주석 범위 [start, end) 리스트 (시작 오프셋 순, 최초 접근 시 1회 생성)
+        
+        fast 모드에서는 토큰 인덱스에서 제외한 주석 토큰을 그대로 쓰고,
+        reindent 모드에서는 파싱한 텍스트가 원본과 다르므로 원본을 다시 토큰화합니다.
+        """
+        if self._comment_ranges is None:
+            if self.preserves_offsets:
+                self._get_token_index()
+            else:
+                ranges = []
+                offset = 0
+                for ttype, value in sqlparse.lexer.tokenize(self.query_text):
+                    if ttype in T.Comment:
+                        ranges.append((offset, offset + len(value)))
+                    offset += len(value)
+                self._comment_ranges = ranges
+        return self._comment_ranges
+    
+    def get_query_trees(self) -> List[QueryTree]:
+        """
+        Statement별 쿼리 트리 반환 (최초 접근 시 1회 생성)
+        
+        모든 extract_* 메서드와 분석기는 이 트리를 순회합니다.
+        """
+        if self._query_trees is None:
+            self._query_trees = [
+                QueryTreeBuilder(entry['tokens'], entry['offsets']).build()
+                for entry in self._get_token_index()
+            ]
+        return self._query_trees
+    
+    def get_position(self, offset: int) -> Tuple[int, int]:
+        """query_text 내 오프셋을 원본 소스 기준 (라인, 컬럼)으로 변환 (1부터 시작)"""
+        line_idx = bisect_right(self.line_starts, offset) - 1
+        column = offset - self.line_starts[line_idx] + 1
+        if line_idx == 0:
+            column += self._source_column_base
+        return line_idx + 1 + self._source_line_base, column
+    
+    def get_span(self, start: int, end: int) -> Dict[str, int]:
+        """query_text 내 [start, end) 범위를 원본 소스 범위로 변환 (끝 컬럼 포함)"""
+        start_line, start_column = self.get_position(start)
+        end_line, end_column = self.get_position(max(start, end - 1))
+        return {
+            'start_line': start_line,
+            'start_column': start_column,
+            'end_line': end_line,
+            'end_column': end_column
+        }
+    
+    def node_span(self, tree: QueryTree, first: int, last: int) -> Optional[Dict[str, int]]:
+        """쿼리 트리 토큰 first~last(포함) 범위의 원본 소스 범위 (오프셋 미보존 시 None)"""
+        if tree.offsets is None or first > last or last >= len(tree.tokens):
+            return None
+        end = tree.offsets[last] + len(tree.tokens[last].value)
+        return self.get_span(tree.offsets[first], end)
+    
+    def find_spans(self, pattern: Any, flags: int = re.IGNORECASE) -> List[Dict[str, int]]:
+        """
+        query_text에서 정규식(문자열 또는 컴파일된 패턴)이 일치하는 모든 위치의 원본 소스 범위 반환
+        
+        주석 안에서 시작하는 일치는 제외합니다.
+        """
+        if not isinstance(pattern, re.Pattern):
+            pattern = compile_pattern(pattern, flags)
+        comments = self._get_comment_ranges()
+        spans = []
+        for m in pattern.finditer(self.query_text):
+            i = bisect_right(comments, (m.start(), math.inf)) - 1
+            if i >= 0 and m.start() < comments[i][1]:
+                continue
+            spans.append(self.get_span(m.start(), m.end()))
+        return spans
+    
+    def iter_scopes(self) -> Iterator[Tuple[QueryTree, QueryScope]]:
+        """모든 Statement의 모든 쿼리 블록을 (트리, 블록) 순서쌍으로 순회"""
+        for tree in self.get_query_trees():
+            for scope in tree.scopes:
+                yield tree, scope
     
     def get_query_type(self) -> str:
-        """쿼리 타입 반환 (SELECT, INSERT, UPDATE, DELETE 등)"""
-        if not self.parsed_statements:
+        """쿼리 타입 반환 (SELECT, INSERT, UPDATE, DELETE 등 / WITH ... SELECT 는 SELECT)"""
+        trees = self.get_query_trees()
+        if not trees:
             return "UNKNOWN"
-        
-        first_token = self.parsed_statements[0].token_first()
-        if first_token and first_token.ttype in (T.Keyword.DML, T.Keyword.DDL):
-            return str(first_token).upper()
-        return "UNKNOWN"
+        return trees[0].statement_type
     
     def extract_tables(self) -> List[str]:
-        """FROM 절과 JOIN 절에서 테이블명 추출"""
+        """FROM/JOIN 절 및 INSERT/UPDATE 대상의 테이블명 추출 (CTE 참조, 파생 테이블, 테이블 함수 제외)"""
         tables = set()
-        
-        for stmt in self.parsed_statements:
-            # FROM 절 찾기
-            from_seen = False
-            for token in stmt.flatten():
-                if token.ttype is T.Keyword and token.value.upper() == 'FROM':
-                    from_seen = True
-                    continue
-                if from_seen:
-                    if token.ttype is None and token.value.strip():
-                        # 테이블명 또는 별칭
-                        table_name = token.value.strip().split()[0].strip('"\'`')
-                        if table_name and table_name.upper() not in ['SELECT', 'WHERE', 'JOIN', 'INNER', 'LEFT', 'RIGHT', 'FULL', 'OUTER', 'ON', 'GROUP', 'ORDER', 'HAVING', 'LIMIT', 'UNION', 'INTERSECT', 'EXCEPT']:
-                            tables.add(table_name)
-                    if token.ttype is T.Keyword and token.value.upper() in ['WHERE', 'GROUP', 'ORDER', 'HAVING', 'LIMIT', 'UNION', 'INTERSECT', 'EXCEPT']:
-                        from_seen = False
-            
-            # JOIN 절 찾기
-            tokens = list(stmt.flatten())
-            for i, token in enumerate(tokens):
-                if token.ttype is T.Keyword and 'JOIN' in token.value.upper():
-                    # JOIN 다음 토큰 찾기
-                    j = i + 1
-                    while j < len(tokens) and tokens[j].ttype in (T.Whitespace, T.Newline):
-                        j += 1
-                    if j < len(tokens) and tokens[j].ttype is None:
-                        table_name = tokens[j].value.strip().split()[0].strip('"\'`')
-                        if table_name:
-                            tables.add(table_name)
-        
-        return sorted(list(tables))
+        for _, scope in self.iter_scopes():
+            for ref in scope.table_refs():
+                if ref.ref_type == 'table' and ref.name:
+                    tables.add(ref.name)
+        return sorted(tables)
     
     def extract_columns(self) -> List[str]:
-        """SELECT 절에서 컬럼명 추출"""
+        """최상위 쿼리 블록의 SELECT 목록 출력 컬럼명 추출 (별칭 우선)"""
         columns = []
-        
-        for stmt in self.parsed_statements:
-            select_seen = False
-            select_tokens = []
-            
-            for token in stmt.flatten():
-                if token.ttype is T.Keyword and token.value.upper() == 'SELECT':
-                    select_seen = True
-                    continue
-                if select_seen:
-                    if token.ttype is T.Keyword and token.value.upper() == 'FROM':
-                        break
-                    if token.ttype is None and token.value.strip() and token.value != ',':
-                        # 컬럼명 추출 (별칭 제거)
-                        col = token.value.strip().split()[-1].strip('"\'`')
-                        if col and col.upper() not in ['AS', 'SELECT', 'FROM']:
-                            columns.append(col)
-            
-            # SELECT 절 전체를 파싱하여 더 정확하게 추출
-            if select_seen:
-                select_part = str(stmt).upper()
-                if 'SELECT' in select_part and 'FROM' in select_part:
-                    select_clause = select_part.split('FROM')[0]
-                    # 쉼표로 분리
-                    for col in select_clause.replace('SELECT', '').split(','):
-                        col_clean = col.strip().split()[-1].strip('"\'`')
-                        if col_clean and col_clean not in columns:
-                            columns.append(col_clean)
-        
+        seen = set()
+        for tree in self.get_query_trees():
+            for item in tree.root.columns:
+                if item.name and item.name not in seen:
+                    seen.add(item.name)
+                    columns.append(item.name)
         return columns
     
     def extract_joins(self) -> List[Dict[str, Any]]:
-        """JOIN 정보 추출"""
+        """JOIN 정보 추출 (쿼리 블록별, 블록 안에서는 등장 순서)"""
         joins = []
+        self.spans['joins'] = []
         
-        for stmt in self.parsed_statements:
-            tokens = list(stmt.flatten())
-            i = 0
-            while i < len(tokens):
-                token = tokens[i]
-                if token.ttype is T.Keyword and 'JOIN' in token.value.upper():
-                    join_type = token.value.upper()
-                    join_info = {
-                        'type': join_type,
-                        'table': None,
-                        'condition': None
-                    }
-                    
-                    # JOIN 다음 테이블 찾기
-                    j = i + 1
-                    while j < len(tokens) and tokens[j].ttype in (T.Whitespace, T.Newline):
-                        j += 1
-                    if j < len(tokens):
-                        join_info['table'] = tokens[j].value.strip().split()[0].strip('"\'`')
-                    
-                    # ON 조건 찾기
-                    k = j + 1
-                    while k < len(tokens):
-                        if tokens[k].ttype is T.Keyword and tokens[k].value.upper() == 'ON':
-                            # ON 다음 조건 추출
-                            condition_tokens = []
-                            k += 1
-                            while k < len(tokens) and tokens[k].ttype is not T.Keyword:
-                                if tokens[k].ttype not in (T.Whitespace, T.Newline):
-                                    condition_tokens.append(tokens[k].value)
-                                k += 1
-                            join_info['condition'] = ' '.join(condition_tokens).strip()
-                            break
-                        k += 1
-                    
-                    if join_info['table']:
-                        joins.append(join_info)
-                
-                i += 1
+        for tree, scope in self.iter_scopes():
+            for join in scope.joins:
+                if join.item is None or not join.item.display_name:
+                    continue
+                joins.append({
+                    'type': join.join_type,
+                    'table': join.item.display_name,
+                    'condition': self.join_condition_text(tree, join)
+                })
+                self.spans['joins'].append(self.node_span(tree, join.keyword, join.last))
         
         return joins
     
+    def join_condition_text(self, tree: QueryTree, join: JoinNode) -> Optional[str]:
+        """JOIN 조건 텍스트 (ON 조건, USING은 'USING (...)' 형태, 조건이 없으면 None)"""
+        if join.condition is None:
+            return None
+        condition = tree.compact_text(join.condition.first, join.condition.last)
+        if join.condition.clause == 'USING':
+            condition = f'USING {condition}'
+        return condition
+    
     def extract_subqueries(self) -> List[Dict[str, Any]]:
-        """서브쿼리 추출"""
+        """서브쿼리 추출 (depth: 0 = 최상위 또는 CTE 본문 바로 아래, location: 서브쿼리가 있는 절)"""
         subqueries = []
+        self.spans['subqueries'] = []
         
-        for stmt in self.parsed_statements:
-            self._extract_subqueries_recursive(stmt, subqueries, depth=0)
+        for tree, scope in self.iter_scopes():
+            if scope.kind != 'subquery':
+                continue
+            subqueries.append({
+                'depth': scope.depth - 1,
+                'query': tree.text(scope.first, scope.last),
+                'location': scope.location
+            })
+            self.spans['subqueries'].append(self.node_span(tree, scope.first, scope.last))
         
         return subqueries
     
-    def _extract_subqueries_recursive(self, token_list: TokenList, subqueries: List[Dict], depth: int):
-        """재귀적으로 서브쿼리 추출"""
-        for token in token_list.tokens:
-            if isinstance(token, Statement):
-                # SELECT로 시작하는 서브쿼리인지 확인
-                first_token = token.token_first()
-                if first_token and first_token.ttype is T.Keyword and first_token.value.upper() == 'SELECT':
-                    subqueries.append({
-                        'depth': depth,
-                        'query': str(token),
-                        'location': self._get_subquery_location(token)
-                    })
-                    # 중첩된 서브쿼리 찾기
-                    self._extract_subqueries_recursive(token, subqueries, depth + 1)
-            elif isinstance(token, TokenList):
-                self._extract_subqueries_recursive(token, subqueries, depth)
-    
-    def _get_subquery_location(self, subquery: Statement) -> str:
-        """서브쿼리 위치 반환 (WHERE, FROM, SELECT 등)"""
-        # 간단한 위치 추정
-        query_str = str(subquery).upper()
-        if 'WHERE' in query_str:
-            return 'WHERE'
-        elif 'FROM' in query_str:
-            return 'FROM'
-        elif 'SELECT' in query_str:
-            return 'SELECT'
-        return 'UNKNOWN'
-    
     def extract_where_clauses(self) -> List[str]:
-        """WHERE 절 조건 추출"""
+        """WHERE 절 조건 추출 (쿼리 블록마다 하나, 중첩 서브쿼리의 WHERE는 별도 항목)"""
         where_clauses = []
+        self.spans['where_clauses'] = []
         
-        for stmt in self.parsed_statements:
-            where_seen = False
-            where_tokens = []
-            
-            for token in stmt.flatten():
-                if token.ttype is T.Keyword and token.value.upper() == 'WHERE':
-                    where_seen = True
-                    continue
-                if where_seen:
-                    if token.ttype is T.Keyword and token.value.upper() in ['GROUP', 'ORDER', 'HAVING', 'LIMIT']:
-                        break
-                    if token.ttype not in (T.Whitespace, T.Newline):
-                        where_tokens.append(token.value)
-            
-            if where_tokens:
-                where_clauses.append(' '.join(where_tokens))
+        for tree, scope in self.iter_scopes():
+            where = scope.where
+            if where is None:
+                continue
+            where_clauses.append(tree.compact_text(where.first, where.last))
+            self.spans['where_clauses'].append(self.node_span(tree, where.keyword, where.last))
         
         return where_clauses
     
-    def extract_group_by(self) -> List[str]:
-        """GROUP BY 절 추출"""
-        group_by = []
+    def _extract_by_clause(self, attribute: str, span_key: str) -> List[str]:
+        """GROUP BY / ORDER BY 절의 항목 추출"""
+        items = []
+        self.spans[span_key] = []
         
-        for stmt in self.parsed_statements:
-            group_seen = False
-            
-            for token in stmt.flatten():
-                if token.ttype is T.Keyword and token.value.upper() == 'GROUP':
-                    group_seen = True
-                    continue
-                if group_seen:
-                    if token.ttype is T.Keyword and token.value.upper() == 'BY':
-                        continue
-                    if token.ttype is T.Keyword and token.value.upper() in ['ORDER', 'HAVING', 'LIMIT']:
-                        break
-                    if token.ttype is None and token.value.strip() and token.value != ',':
-                        group_by.append(token.value.strip().strip('"\'`'))
+        for tree, scope in self.iter_scopes():
+            for item in getattr(scope, attribute):
+                items.append(item.name)
+                self.spans[span_key].append(self.node_span(tree, item.first, item.last))
         
-        return group_by
+        return items
+    
+    def extract_group_by(self) -> List[str]:
+        """GROUP BY 절 추출"""
+        return self._extract_by_clause('group_by', 'group_by')
     
     def extract_order_by(self) -> List[str]:
         """ORDER BY 절 추출"""
-        order_by = []
-        
-        for stmt in self.parsed_statements:
-            order_seen = False
-            
-            for token in stmt.flatten():
-                if token.ttype is T.Keyword and token.value.upper() == 'ORDER':
-                    order_seen = True
-                    continue
-                if order_seen:
-                    if token.ttype is T.Keyword and token.value.upper() == 'BY':
-                        continue
-                    if token.ttype is T.Keyword and token.value.upper() in ['LIMIT', 'OFFSET']:
-                        break
-                    if token.ttype is None and token.value.strip() and token.value != ',':
-                        order_by.append(token.value.strip().strip('"\'`'))
-        
-        return order_by
+        return self._extract_by_clause('order_by', 'order_by')
     
     def extract_ctes(self) -> List[Dict[str, Any]]:
-        """CTE (WITH 절) 추출"""
+        """CTE (WITH 절) 추출 (query: 괄호를 제외한 CTE 본문)"""
         ctes = []
+        self.spans['ctes'] = []
         
-        for stmt in self.parsed_statements:
-            with_seen = False
-            cte_name = None
-            cte_query = None
-            
-            tokens = list(stmt.flatten())
-            i = 0
-            while i < len(tokens):
-                token = tokens[i]
-                if token.ttype is T.Keyword and token.value.upper() == 'WITH':
-                    with_seen = True
-                    i += 1
-                    continue
-                if with_seen:
-                    # CTE 이름 추출
-                    if token.ttype is None and token.value.strip():
-                        cte_name = token.value.strip().split()[0].strip('"\'`')
-                        # AS 키워드 찾기
-                        j = i + 1
-                        while j < len(tokens) and tokens[j].ttype in (T.Whitespace, T.Newline):
-                            j += 1
-                        if j < len(tokens) and tokens[j].ttype is T.Keyword and tokens[j].value.upper() == 'AS':
-                            # CTE 쿼리 추출
-                            k = j + 1
-                            query_tokens = []
-                            paren_count = 0
-                            while k < len(tokens):
-                                if tokens[k].value == '(':
-                                    paren_count += 1
-                                elif tokens[k].value == ')':
-                                    paren_count -= 1
-                                    if paren_count < 0:
-                                        break
-                                query_tokens.append(tokens[k].value)
-                                k += 1
-                            cte_query = ' '.join(query_tokens)
-                            ctes.append({'name': cte_name, 'query': cte_query})
-                            with_seen = False
-                i += 1
+        for tree, scope in self.iter_scopes():
+            for cte in scope.ctes:
+                ctes.append({'name': cte.name, 'query': tree.text(cte.query.first, cte.query.last)})
+                self.spans['ctes'].append(self.node_span(tree, cte.first, cte.last))
         
         return ctes
     
+    def extract_set_operations(self) -> List[str]:
+        """집합 연산자(UNION, UNION ALL, INTERSECT, EXCEPT) 추출"""
+        return [operator for _, scope in self.iter_scopes() for operator, _ in scope.set_operations]
+    
     def get_parsed_structure(self) -> Dict[str, Any]:
-        """파싱된 구조 반환"""
-        return {
-            'query_type': self.get_query_type(),
-            'tables': self.extract_tables(),
-            'columns': self.extract_columns(),
-            'joins': self.extract_joins(),
-            'subqueries': self.extract_subqueries(),
-            'where_clauses': self.extract_where_clauses(),
-            'group_by': self.extract_group_by(),
-            'order_by': self.extract_order_by(),
-            'ctes': self.extract_ctes(),
-            'query_length': len(self.query_text),
-            'query_lines': self.query_text.count('\n') + 1
-        }
+        """
+        파싱된 구조 반환
+        
+        결과는 최초 호출 시 한 번만 계산되며, 이후에는 모든 분석기가
+        같은 구조를 공유합니다. (반환값을 수정하지 마세요)
+        'spans'에는 joins/subqueries/where_clauses/group_by/order_by/ctes/statements 항목별
+        원본 소스 범위가 같은 순서로 들어 있습니다. (reindent 모드에서는 None)
+        """
+        if self._structure is None:
+            self.spans['statements'] = [
+                self._statement_span(tree) for tree in self.get_query_trees()
+            ]
+            self._structure = {
+                'query_type': self.get_query_type(),
+                'tables': self.extract_tables(),
+                'columns': self.extract_columns(),
+                'joins': self.extract_joins(),
+                'subqueries': self.extract_subqueries(),
+                'where_clauses': self.extract_where_clauses(),
+                'group_by': self.extract_group_by(),
+                'order_by': self.extract_order_by(),
+                'ctes': self.extract_ctes(),
+                'set_operations': self.extract_set_operations(),
+                'query_length': len(self.query_text),
+                'query_lines': self.query_text.count('\n') + 1,
+                'spans': self.spans
+            }
+        return self._structure
+    
+    def _statement_span(self, tree: QueryTree) -> Optional[Dict[str, int]]:
+        """Statement의 첫 토큰부터 마지막 토큰까지(공백 제외)의 원본 소스 범위"""
+        tokens = tree.tokens
+        first = 0
+        while first < len(tokens) and tokens[first].is_whitespace:
+            first += 1
+        last = len(tokens) - 1
+        while last > first and tokens[last].is_whitespace:
+            last -= 1
+        return self.node_span(tree, first, last)
+
+# ============================================
+# 분석 컨텍스트
+# ============================================
+
+@lru_cache(maxsize=512)
+def compile_pattern(pattern: str, flags: int = 0) -> re.Pattern:
+    """정규식 컴파일 레지스트리 (같은 패턴/플래그는 프로세스 전체에서 한 번만 컴파일)"""
+    return re.compile(pattern, flags)
+
+class AnalysisContext:
+    """
+    분석 1회 동안 모든 분석기가 공유하는 파생 데이터
+    
+    대문자 텍스트, 라인 오프셋 테이블, 토큰 인덱스, 쿼리 트리, 파싱 구조를
+    처음 접근할 때 한 번만 만들고, 정규식은 compile_pattern() 레지스트리에서 가져옵니다.
+    파서마다 컨텍스트는 하나이므로 for_parser()로 얻어서 각 분석기에 전달하세요.
+    (분석기에 context를 넘기지 않으면 같은 파서의 컨텍스트를 자동으로 사용합니다)
+    """
+    
+    def __init__(self, parser: SQLQueryParser):
+        self.parser = parser
+        self.query_text = parser.query_text
+        self._upper_text = None
+        self._lines = None
+    
+    @classmethod
+    def for_parser(cls, parser: SQLQueryParser) -> 'AnalysisContext':
+        """파서에 연결된 컨텍스트 반환 (없으면 생성하여 연결)"""
+        if parser.analysis_context is None:
+            parser.analysis_context = cls(parser)
+        return parser.analysis_context
+    
+    @property
+    def upper_text(self) -> str:
+        """대문자 쿼리 텍스트"""
+        if self._upper_text is None:
+            self._upper_text = self.query_text.upper()
+        return self._upper_text
+    
+    @property
+    def upper_preserves_offsets(self) -> bool:
+        """대문자 텍스트의 위치가 원본 위치와 같은지 여부 (예: 'ß' -> 'SS' 가 있으면 False)"""
+        return len(self.upper_text) == len(self.query_text)
+    
+    def upper_slice(self, start: int, end: int) -> str:
+        """query_text[start:end]의 대문자 텍스트 (가능하면 공유 대문자 텍스트를 잘라서 반환)"""
+        if self.upper_preserves_offsets:
+            return self.upper_text[start:end]
+        return self.query_text[start:end].upper()
+    
+    @property
+    def line_starts(self) -> List[int]:
+        """라인 시작 오프셋 테이블"""
+        return self.parser.line_starts
+    
+    @property
+    def lines(self) -> List[str]:
+        """라인 리스트"""
+        if self._lines is None:
+            self._lines = self.query_text.split('\n')
+        return self._lines
+    
+    @property
+    def token_index(self) -> List[Dict[str, Any]]:
+        """Statement별 토큰 인덱스"""
+        return self.parser._get_token_index()
+    
+    @property
+    def query_trees(self) -> List[QueryTree]:
+        """Statement별 쿼리 트리"""
+        return self.parser.get_query_trees()
+    
+    @property
+    def structure(self) -> Dict[str, Any]:
+        """파싱된 구조 (메모이제이션된 get_parsed_structure() 결과)"""
+        return self.parser.get_parsed_structure()
+    
+    @staticmethod
+    def pattern(pattern: str, flags: int = 0) -> re.Pattern:
+        """컴파일된 정규식 (compile_pattern 레지스트리)"""
+        return compile_pattern(pattern, flags)
+    
+    def search(self, pattern: str, flags: int = 0, upper: bool = False) -> Optional[re.Match]:
+        """원본(upper=True면 대문자) 텍스트에서 정규식 검색"""
+        return compile_pattern(pattern, flags).search(self.upper_text if upper else self.query_text)
+    
+    def find_spans(self, pattern: Any, flags: int = re.IGNORECASE) -> List[Dict[str, int]]:
+        """정규식이 일치하는 모든 위치의 원본 소스 범위"""
+        return self.parser.find_spans(pattern, flags)
+    
+    def statement_spans(self) -> List[Dict[str, int]]:
+        """첫 Statement의 원본 소스 범위 리스트"""
+        spans = self.structure['spans'].get('statements', [])
+        return [spans[0]] if spans and spans[0] else []
 
 # ============================================
 # 쿼리 구조 분석기 클래스
@@ -369,9 +1073,10 @@ class SQLQueryParser:
 class QueryStructureAnalyzer:
     """쿼리 구조 분석 클래스"""
     
-    def __init__(self, parser: SQLQueryParser):
+    def __init__(self, parser: SQLQueryParser, context: Optional[AnalysisContext] = None):
         self.parser = parser
-        self.structure = parser.get_parsed_structure()
+        self.context = context or AnalysisContext.for_parser(parser)
+        self.structure = self.context.structure
     
     def analyze(self) -> Dict[str, Any]:
         """구조 분석 수행"""
@@ -393,1682 +1098,6198 @@ class QueryStructureAnalyzer:
         }
 
 # ============================================
-# 성능 분석기 클래스
+# 성능 규칙 엔진
 # ============================================
 
-class PerformanceAnalyzer:
-    """성능 분석 클래스"""
+# 규칙이 방문할 수 있는 노드 종류
+# - query: 쿼리 전체 텍스트 (분석당 1회)
+# - scope: 쿼리 블록 (QueryScope)
+# - subquery: 서브쿼리 쿼리 블록
+# - where: 쿼리 블록의 WHERE 조건
+# - join: JOIN 항목 (조인 대상 이름이 있는 것만, structure['joins']와 같은 순서)
+# - order_by: ORDER BY 항목
+RULE_NODE_TYPES = ('query', 'scope', 'subquery', 'where', 'join', 'order_by')
+
+# 등록된 규칙 클래스 (등록 순서 = 결과 순서)
+PERFORMANCE_RULES = []
+
+def performance_rule(rule_class: type) -> type:
+    """규칙 클래스를 PERFORMANCE_RULES에 등록하는 데코레이터"""
+    unknown = set(rule_class.node_types) - set(RULE_NODE_TYPES)
+    if unknown:
+        raise ValueError(f"{rule_class.__name__}: 알 수 없는 노드 종류 {sorted(unknown)}")
+    PERFORMANCE_RULES.append(rule_class)
+    return rule_class
+
+class RuleNode:
+    """규칙이 방문하는 노드 (텍스트와 소스 범위는 처음 접근할 때 한 번만 계산)"""
     
-    def __init__(self, parser: SQLQueryParser):
+    def __init__(self, kind: str, parser: SQLQueryParser, tree: Optional[QueryTree] = None,
+                 scope: Optional[QueryScope] = None, item: Any = None):
+        self.kind = kind
         self.parser = parser
-        self.structure = parser.get_parsed_structure()
-        self.issues = []
-        self.recommendations = []
+        self.tree = tree
+        self.scope = scope
+        self.item = item
+        self._text = None
     
-    def analyze(self) -> Dict[str, Any]:
-        """성능 분석 수행"""
+    @property
+    def text(self) -> str:
+        """노드 텍스트 (where: 조건, join: 조인 조건, order_by: 항목, query: 쿼리 전체)"""
+        if self._text is None:
+            if self.kind == 'query':
+                self._text = self.parser.query_text
+            elif self.kind == 'where':
+                self._text = self.tree.compact_text(self.item.first, self.item.last)
+            elif self.kind == 'join':
+                self._text = self.parser.join_condition_text(self.tree, self.item) or ''
+            elif self.kind == 'order_by':
+                self._text = self.item.name
+            else:
+                self._text = ''
+        return self._text
+    
+    @property
+    def spans(self) -> List[Dict[str, int]]:
+        """노드의 원본 소스 범위 리스트 (reindent 모드에서는 빈 리스트)"""
+        if self.kind in ('where', 'join'):
+            span = self.parser.node_span(self.tree, self.item.keyword, self.item.last)
+        elif self.kind == 'order_by':
+            span = self.parser.node_span(self.tree, self.item.first, self.item.last)
+        elif self.kind in ('scope', 'subquery'):
+            span = self.parser.node_span(self.tree, self.scope.first, self.scope.last)
+        else:
+            span = None
+        return [span] if span else []
+
+class PerformanceRule:
+    """
+    성능 규칙 기본 클래스
+    
+    node_types에 선언한 종류의 노드마다 visit()이 호출되고, 순회가 끝나면 finish()가
+    호출됩니다. 결과는 issues(성능 이슈), recommendations(성능 권장 사항),
+    suggestions(최적화 제안)에 추가하며, 각 항목에는 근거가 된 원본 소스 범위('spans')를
+    붙입니다. 규칙 인스턴스는 분석마다 새로 만들어지므로
+    집계용 상태를 인스턴스 속성에 두어도 됩니다. 정규식은 클래스 속성으로 미리 컴파일합니다.
+    """
+    
+    name = 'rule'
+    node_types = ()
+    
+    def __init__(self, context: AnalysisContext):
+        self.context = context
         self.issues = []
         self.recommendations = []
-        
-        # 인덱스 사용 가능성 검토
-        self._check_index_usage()
-        
-        # 풀 테이블 스캔 위험도
-        self._check_full_table_scan()
-        
-        # 비효율적인 JOIN 패턴
-        self._check_inefficient_joins()
-        
-        # 서브쿼리 성능 이슈
-        self._check_subquery_issues()
-        
-        # 집계 함수 최적화
-        self._check_aggregation_optimization()
-        
-        # LIMIT/OFFSET 효율성
-        self._check_limit_offset()
-        
-        # 함수 사용으로 인한 인덱스 미사용
-        self._check_function_usage()
-        
-        # 성능 점수 계산
-        score = self._calculate_performance_score()
-        level = self._get_performance_level(score)
-        
-        return {
-            'score': score,
-            'level': level,
-            'issues': self.issues,
-            'recommendations': self.recommendations
-        }
+        self.suggestions = []
     
-    def _check_index_usage(self):
-        """인덱스 사용 가능성 검토"""
-        where_clauses = self.structure['where_clauses']
-        joins = self.structure['joins']
-        order_by = self.structure['order_by']
-        
-        # WHERE 절 컬럼 분석
-        for clause in where_clauses:
-            # 함수 사용 감지
-            if re.search(r'\w+\s*\(', clause):
-                self.issues.append({
-                    'type': 'FUNCTION_IN_WHERE',
-                    'severity': 'MEDIUM',
-                    'message': f'WHERE 절에서 함수 사용: {clause[:50]}...',
-                    'impact': '인덱스 사용 불가능'
-                })
-                self.recommendations.append({
-                    'type': 'INDEX',
-                    'priority': 'MEDIUM',
-                    'message': '함수 사용을 피하고 컬럼 자체를 사용하도록 쿼리 수정'
-                })
-        
-        # JOIN 조건 분석
-        for join in joins:
-            if join.get('condition'):
-                condition = join['condition']
-                if re.search(r'\w+\s*\(', condition):
-                    self.issues.append({
-                        'type': 'FUNCTION_IN_JOIN',
-                        'severity': 'HIGH',
-                        'message': f'JOIN 조건에서 함수 사용: {condition[:50]}...',
-                        'impact': '인덱스 사용 불가능, 성능 저하'
-                    })
-        
-        # ORDER BY 컬럼 분석
-        for col in order_by:
-            if re.search(r'\w+\s*\(', col):
-                self.issues.append({
-                    'type': 'FUNCTION_IN_ORDER_BY',
-                    'severity': 'MEDIUM',
-                    'message': f'ORDER BY 절에서 함수 사용: {col}',
-                    'impact': '인덱스 사용 불가능'
-                })
+    def visit(self, node: RuleNode):
+        """노드 방문"""
     
-    def _check_full_table_scan(self):
-        """풀 테이블 스캔 위험도 검사"""
-        # WHERE 절이 없는 SELECT 쿼리
-        if self.structure['query_type'] == 'SELECT' and not self.structure['where_clauses']:
-            self.issues.append({
-                'type': 'NO_WHERE_CLAUSE',
-                'severity': 'HIGH',
-                'message': 'WHERE 절이 없는 SELECT 쿼리',
-                'impact': '전체 테이블 스캔 발생 가능성'
-            })
-            self.recommendations.append({
-                'type': 'QUERY_REFACTOR',
-                'priority': 'HIGH',
-                'message': '필요한 경우 WHERE 절 추가하여 데이터 범위 제한'
-            })
+    def finish(self):
+        """순회 종료 후 집계 결과 반영"""
+
+class PerformanceRuleEngine:
+    """
+    등록된 규칙을 쿼리 트리 한 번 순회로 실행하는 엔진
     
-    def _check_inefficient_joins(self):
-        """비효율적인 JOIN 패턴 감지"""
-        joins = self.structure['joins']
-        
-        for join in joins:
-            # CROSS JOIN 감지
-            if 'CROSS' in join['type']:
-                self.issues.append({
-                    'type': 'CROSS_JOIN',
-                    'severity': 'HIGH',
-                    'message': f'CROSS JOIN 사용: {join["table"]}',
-                    'impact': '카티션 곱 발생, 성능 저하'
-                })
-                self.recommendations.append({
-                    'type': 'JOIN_OPTIMIZATION',
-                    'priority': 'HIGH',
-                    'message': 'CROSS JOIN을 적절한 JOIN 조건이 있는 JOIN으로 변경'
-                })
-            
-            # JOIN 조건 없음
-            if not join.get('condition'):
-                self.issues.append({
-                    'type': 'JOIN_WITHOUT_CONDITION',
-                    'severity': 'HIGH',
-                    'message': f'JOIN 조건 없음: {join["table"]}',
-                    'impact': '의도치 않은 카티션 곱 발생 가능'
-                })
+    노드 종류별로 관심 있는 규칙만 호출하며, 아무 규칙도 방문하지 않는 종류의 노드는
+    만들지 않습니다. 규칙별 호출 횟수, 누적 실행 시간, 결과 수를 rule_stats로 반환합니다.
+    """
     
-    def _check_subquery_issues(self):
-        """서브쿼리 성능 이슈 검사"""
-        subqueries = self.structure['subqueries']
-        
-        # 중첩 서브쿼리
-        max_depth = max([sq['depth'] for sq in subqueries], default=0)
-        if max_depth > 2:
+    def __init__(self, rule_classes: Optional[Sequence[type]] = None):
+        self.rule_classes = list(PERFORMANCE_RULES if rule_classes is None else rule_classes)
+    
+    def run(self, context: AnalysisContext) -> Dict[str, Any]:
+        """
+        규칙 실행 (규칙들은 context의 대문자 텍스트/구조/정규식을 공유)
+        
+        Returns:
+            Dict: {'issues', 'recommendations', 'suggestions' (규칙 등록 순서),
+                   'rule_stats': 규칙명 -> {'calls', 'elapsed_ms', 'findings'}}
+        """
+        parser = context.parser
+        rules = [rule_class(context) for rule_class in self.rule_classes]
+        dispatch = defaultdict(list)
+        for rule in rules:
+            for node_type in rule.node_types:
+                dispatch[node_type].append(rule)
+        elapsed = {rule.name: 0.0 for rule in rules}
+        calls = Counter()
+        
+        def emit(node: RuleNode):
+            for rule in dispatch[node.kind]:
+                started = time.perf_counter()
+                rule.visit(node)
+                elapsed[rule.name] += time.perf_counter() - started
+                calls[rule.name] += 1
+        
+        if dispatch['query']:
+            emit(RuleNode('query', parser))
+        
+        wants_scope = bool(dispatch['scope'])
+        wants_subquery = bool(dispatch['subquery'])
+        wants_where = bool(dispatch['where'])
+        wants_join = bool(dispatch['join'])
+        wants_order_by = bool(dispatch['order_by'])
+        for tree, scope in parser.iter_scopes():
+            check_cancelled()
+            if wants_scope:
+                emit(RuleNode('scope', parser, tree, scope))
+            if wants_subquery and scope.kind == 'subquery':
+                emit(RuleNode('subquery', parser, tree, scope))
+            if wants_where and scope.where is not None:
+                emit(RuleNode('where', parser, tree, scope, scope.where))
+            if wants_join:
+                for join in scope.joins:
+                    if join.item is not None and join.item.display_name:
+                        emit(RuleNode('join', parser, tree, scope, join))
+            if wants_order_by:
+                for item in scope.order_by:
+                    emit(RuleNode('order_by', parser, tree, scope, item))
+        
+        for rule in rules:
+            started = time.perf_counter()
+            rule.finish()
+            elapsed[rule.name] += time.perf_counter() - started
+        
+        result = {'issues': [], 'recommendations': [], 'suggestions': [], 'rule_stats': {}}
+        for rule in rules:
+            result['issues'].extend(rule.issues)
+            result['recommendations'].extend(rule.recommendations)
+            result['suggestions'].extend(rule.suggestions)
+            result['rule_stats'][rule.name] = {
+                'calls': calls[rule.name],
+                'elapsed_ms': round(elapsed[rule.name] * 1000, 3),
+                'findings': len(rule.issues) + len(rule.recommendations) + len(rule.suggestions)
+            }
+        return result
+
+# 함수 호출 패턴 (이름 + 여는 괄호)
+_FUNCTION_CALL_PATTERN = re.compile(r'\w+\s*\(')
+
+# ----- 성능 이슈 규칙 (PerformanceAnalyzer) -----
+
+@performance_rule
+class FunctionInWhereRule(PerformanceRule):
+    """WHERE 절 함수 사용 (인덱스 사용 불가)"""
+    
+    name = 'function_in_where'
+    node_types = ('where',)
+    
+    def visit(self, node: RuleNode):
+        clause = node.text
+        if _FUNCTION_CALL_PATTERN.search(clause):
+            spans = node.spans
             self.issues.append({
-                'type': 'DEEP_NESTED_SUBQUERY',
+                'type': 'FUNCTION_IN_WHERE',
                 'severity': 'MEDIUM',
-                'message': f'깊은 중첩 서브쿼리 (최대 깊이: {max_depth})',
-                'impact': '성능 저하, 가독성 저하'
+                'message': f'WHERE 절에서 함수 사용: {clause[:50]}...',
+                'impact': '인덱스 사용 불가능',
+                'spans': spans
             })
             self.recommendations.append({
-                'type': 'QUERY_REFACTOR',
+                'type': 'INDEX',
                 'priority': 'MEDIUM',
-                'message': '서브쿼리를 JOIN이나 CTE로 변환 고려'
+                'message': '함수 사용을 피하고 컬럼 자체를 사용하도록 쿼리 수정',
+                'spans': spans
             })
-        
-        # 서브쿼리 개수
-        if len(subqueries) > 5:
-            self.issues.append({
+
+@performance_rule
+class FunctionInJoinRule(PerformanceRule):
+    """JOIN 조건 함수 사용"""
+    
+    name = 'function_in_join'
+    node_types = ('join',)
+    
+    def visit(self, node: RuleNode):
+        condition = node.text
+        if condition and _FUNCTION_CALL_PATTERN.search(condition):
+            self.issues.append({
+                'type': 'FUNCTION_IN_JOIN',
+                'severity': 'HIGH',
+                'message': f'JOIN 조건에서 함수 사용: {condition[:50]}...',
+                'impact': '인덱스 사용 불가능, 성능 저하',
+                'spans': node.spans
+            })
+
+@performance_rule
+class FunctionInOrderByRule(PerformanceRule):
+    """ORDER BY 항목 함수 사용"""
+    
+    name = 'function_in_order_by'
+    node_types = ('order_by',)
+    
+    def visit(self, node: RuleNode):
+        col = node.text
+        if _FUNCTION_CALL_PATTERN.search(col):
+            self.issues.append({
+                'type': 'FUNCTION_IN_ORDER_BY',
+                'severity': 'MEDIUM',
+                'message': f'ORDER BY 절에서 함수 사용: {col}',
+                'impact': '인덱스 사용 불가능',
+                'spans': node.spans
+            })
+
+@performance_rule
+class NoWhereClauseRule(PerformanceRule):
+    """WHERE 절이 하나도 없는 SELECT 쿼리 (풀 테이블 스캔 위험)"""
+    
+    name = 'no_where_clause'
+    node_types = ('where',)
+    
+    def __init__(self, context: AnalysisContext):
+        super().__init__(context)
+        self.where_seen = False
+    
+    def visit(self, node: RuleNode):
+        self.where_seen = True
+    
+    def finish(self):
+        if self.context.structure['query_type'] == 'SELECT' and not self.where_seen:
+            spans = self.context.statement_spans()
+            self.issues.append({
+                'type': 'NO_WHERE_CLAUSE',
+                'severity': 'HIGH',
+                'message': 'WHERE 절이 없는 SELECT 쿼리',
+                'impact': '전체 테이블 스캔 발생 가능성',
+                'spans': spans
+            })
+            self.recommendations.append({
+                'type': 'QUERY_REFACTOR',
+                'priority': 'HIGH',
+                'message': '필요한 경우 WHERE 절 추가하여 데이터 범위 제한',
+                'spans': spans
+            })
+
+@performance_rule
+class InefficientJoinRule(PerformanceRule):
+    """CROSS JOIN 및 조건 없는 JOIN (카티션 곱)"""
+    
+    name = 'inefficient_join'
+    node_types = ('join',)
+    
+    def visit(self, node: RuleNode):
+        join = node.item
+        table = join.item.display_name
+        spans = node.spans
+        if 'CROSS' in join.join_type:
+            self.issues.append({
+                'type': 'CROSS_JOIN',
+                'severity': 'HIGH',
+                'message': f'CROSS JOIN 사용: {table}',
+                'impact': '카티션 곱 발생, 성능 저하',
+                'spans': spans
+            })
+            self.recommendations.append({
+                'type': 'JOIN_OPTIMIZATION',
+                'priority': 'HIGH',
+                'message': 'CROSS JOIN을 적절한 JOIN 조건이 있는 JOIN으로 변경',
+                'spans': spans
+            })
+        if not node.text:
+            self.issues.append({
+                'type': 'JOIN_WITHOUT_CONDITION',
+                'severity': 'HIGH',
+                'message': f'JOIN 조건 없음: {table}',
+                'impact': '의도치 않은 카티션 곱 발생 가능',
+                'spans': spans
+            })
+
+@performance_rule
+class SubqueryNestingRule(PerformanceRule):
+    """깊은 중첩 서브쿼리 및 과도한 서브쿼리 수"""
+    
+    name = 'subquery_nesting'
+    node_types = ('subquery',)
+    
+    def __init__(self, context: AnalysisContext):
+        super().__init__(context)
+        self.count = 0
+        self.max_depth = 0
+    
+    def visit(self, node: RuleNode):
+        self.count += 1
+        self.max_depth = max(self.max_depth, node.scope.depth - 1)
+    
+    def finish(self):
+        if self.max_depth > 2:
+            spans = self.context.statement_spans()
+            self.issues.append({
+                'type': 'DEEP_NESTED_SUBQUERY',
+                'severity': 'MEDIUM',
+                'message': f'깊은 중첩 서브쿼리 (최대 깊이: {self.max_depth})',
+                'impact': '성능 저하, 가독성 저하',
+                'spans': spans
+            })
+            self.recommendations.append({
+                'type': 'QUERY_REFACTOR',
+                'priority': 'MEDIUM',
+                'message': '서브쿼리를 JOIN이나 CTE로 변환 고려',
+                'spans': spans
+            })
+        if self.count > 5:
+            self.issues.append({
                 'type': 'TOO_MANY_SUBQUERIES',
                 'severity': 'MEDIUM',
-                'message': f'과도한 서브쿼리 사용 ({len(subqueries)}개)',
-                'impact': '성능 저하 가능성'
+                'message': f'과도한 서브쿼리 사용 ({self.count}개)',
+                'impact': '성능 저하 가능성',
+                'spans': self.context.statement_spans()
             })
+
+@performance_rule
+class AggregationRule(PerformanceRule):
+    """COUNT(column) 검토 및 과도한 DISTINCT"""
     
-    def _check_aggregation_optimization(self):
-        """집계 함수 최적화 검사"""
-        query_text = self.parser.query_text.upper()
-        
-        # COUNT(column) vs COUNT(*)
-        if re.search(r'COUNT\s*\(\s*\w+\s*\)', query_text):
+    name = 'aggregation'
+    node_types = ('query',)
+    
+    COUNT_COLUMN_PATTERN = re.compile(r'COUNT\s*\(\s*\w+\s*\)')
+    DISTINCT_PATTERN = re.compile(r'DISTINCT', re.IGNORECASE)
+    
+    def visit(self, node: RuleNode):
+        query_text = self.context.upper_text
+        if self.COUNT_COLUMN_PATTERN.search(query_text):
             self.recommendations.append({
                 'type': 'AGGREGATION_OPTIMIZATION',
                 'priority': 'LOW',
-                'message': 'NULL 값을 고려하여 COUNT(*) 또는 COUNT(column) 선택 검토'
+                'message': 'NULL 값을 고려하여 COUNT(*) 또는 COUNT(column) 선택 검토',
+                'spans': self.context.parser.find_spans(self.COUNT_COLUMN_PATTERN.pattern)
             })
-        
-        # DISTINCT 사용
-        if 'DISTINCT' in query_text:
-            distinct_count = query_text.count('DISTINCT')
-            if distinct_count > 3:
-                self.issues.append({
-                    'type': 'TOO_MANY_DISTINCT',
-                    'severity': 'MEDIUM',
-                    'message': f'과도한 DISTINCT 사용 ({distinct_count}회)',
-                    'impact': '성능 저하'
-                })
+        distinct_count = query_text.count('DISTINCT')
+        if distinct_count > 3:
+            self.issues.append({
+                'type': 'TOO_MANY_DISTINCT',
+                'severity': 'MEDIUM',
+                'message': f'과도한 DISTINCT 사용 ({distinct_count}회)',
+                'impact': '성능 저하',
+                'spans': self.context.parser.find_spans(self.DISTINCT_PATTERN)
+            })
+
+@performance_rule
+class LargeOffsetRule(PerformanceRule):
+    """큰 OFFSET 값 (페이지네이션 비용)"""
     
-    def _check_limit_offset(self):
-        """LIMIT/OFFSET 효율성 검사"""
-        query_text = self.parser.query_text.upper()
-        
-        if 'OFFSET' in query_text and 'LIMIT' in query_text:
-            # OFFSET이 큰 경우
-            offset_match = re.search(r'OFFSET\s+(\d+)', query_text)
-            if offset_match:
-                offset_value = int(offset_match.group(1))
-                if offset_value > 1000:
-                    self.issues.append({
-                        'type': 'LARGE_OFFSET',
-                        'severity': 'MEDIUM',
-                        'message': f'큰 OFFSET 값 사용 ({offset_value})',
-                        'impact': 'OFFSET이 클수록 성능 저하'
-                    })
-                    self.recommendations.append({
-                        'type': 'PAGINATION_OPTIMIZATION',
-                        'priority': 'MEDIUM',
-                        'message': '커서 기반 페이지네이션 고려'
-                    })
+    name = 'large_offset'
+    node_types = ('query',)
     
-    def _check_function_usage(self):
-        """함수 사용으로 인한 인덱스 미사용 검사"""
-        query_text = self.parser.query_text
-        
-        # 일반적인 함수 패턴
-        function_patterns = [
-            (r'UPPER\s*\(', 'UPPER'),
-            (r'LOWER\s*\(', 'LOWER'),
-            (r'TRIM\s*\(', 'TRIM'),
-            (r'SUBSTRING\s*\(', 'SUBSTRING'),
-            (r'CAST\s*\(', 'CAST'),
-            (r'::\s*\w+', '타입 변환'),
-        ]
-        
-        for pattern, func_name in function_patterns:
-            matches = re.findall(pattern, query_text, re.IGNORECASE)
-            if matches:
-                count = len(matches)
-                if count > 3:
-                    self.issues.append({
-                        'type': 'FUNCTION_USAGE',
-                        'severity': 'MEDIUM',
-                        'message': f'{func_name} 함수 다수 사용 ({count}회)',
-                        'impact': '인덱스 사용 불가능 가능성'
-                    })
+    OFFSET_PATTERN = re.compile(r'OFFSET\s+(\d+)')
     
-    def _calculate_performance_score(self) -> int:
-        """성능 점수 계산 (0-100)"""
-        base_score = 100
-        
-        # 이슈별 점수 감점
-        for issue in self.issues:
-            if issue['severity'] == 'HIGH':
-                base_score -= 15
-            elif issue['severity'] == 'MEDIUM':
-                base_score -= 8
-            else:
-                base_score -= 3
-        
-        return max(0, min(100, base_score))
+    def visit(self, node: RuleNode):
+        query_text = self.context.upper_text
+        if 'OFFSET' not in query_text or 'LIMIT' not in query_text:
+            return
+        offset_match = self.OFFSET_PATTERN.search(query_text)
+        if offset_match and int(offset_match.group(1)) > 1000:
+            offset_value = int(offset_match.group(1))
+            spans = [self.context.parser.get_span(offset_match.start(), offset_match.end())]
+            self.issues.append({
+                'type': 'LARGE_OFFSET',
+                'severity': 'MEDIUM',
+                'message': f'큰 OFFSET 값 사용 ({offset_value})',
+                'impact': 'OFFSET이 클수록 성능 저하',
+                'spans': spans
+            })
+            self.recommendations.append({
+                'type': 'PAGINATION_OPTIMIZATION',
+                'priority': 'MEDIUM',
+                'message': '커서 기반 페이지네이션 고려',
+                'spans': spans
+            })
+
+@performance_rule
+class FunctionUsageRule(PerformanceRule):
+    """인덱스 사용을 막는 함수/타입 변환 다수 사용"""
     
-    def _get_performance_level(self, score: int) -> str:
-        """성능 레벨 반환"""
-        if score >= 80:
-            return 'LOW'
-        elif score >= 60:
-            return 'MEDIUM'
-        else:
-            return 'HIGH'
+    name = 'function_usage'
+    node_types = ('query',)
+    
+    FUNCTION_PATTERNS = [
+        (re.compile(r'UPPER\s*\(', re.IGNORECASE), 'UPPER'),
+        (re.compile(r'LOWER\s*\(', re.IGNORECASE), 'LOWER'),
+        (re.compile(r'TRIM\s*\(', re.IGNORECASE), 'TRIM'),
+        (re.compile(r'SUBSTRING\s*\(', re.IGNORECASE), 'SUBSTRING'),
+        (re.compile(r'CAST\s*\(', re.IGNORECASE), 'CAST'),
+        (re.compile(r'::\s*\w+', re.IGNORECASE), '타입 변환'),
+    ]
+    
+    def visit(self, node: RuleNode):
+        parser = self.context.parser
+        for pattern, func_name in self.FUNCTION_PATTERNS:
+            matches = list(pattern.finditer(node.text))
+            if len(matches) > 3:
+                self.issues.append({
+                    'type': 'FUNCTION_USAGE',
+                    'severity': 'MEDIUM',
+                    'message': f'{func_name} 함수 다수 사용 ({len(matches)}회)',
+                    'impact': '인덱스 사용 불가능 가능성',
+                    'spans': [parser.get_span(m.start(), m.end()) for m in matches]
+                })
 
-# ============================================
-# 최적화 제안기 클래스
-# ============================================
+# ----- 최적화 제안 규칙 (OptimizationAdvisor) -----
 
-class OptimizationAdvisor:
-    """최적화 제안 클래스"""
+@performance_rule
+class WhereIndexSuggestionRule(PerformanceRule):
+    """WHERE 절 비교 컬럼 인덱스 제안"""
     
-    def __init__(self, parser: SQLQueryParser, performance_analyzer: PerformanceAnalyzer):
-        self.parser = parser
-        self.performance_analyzer = performance_analyzer
-        self.structure = parser.get_parsed_structure()
-        self.suggestions = []
+    name = 'suggest_where_index'
+    node_types = ('where',)
     
-    def analyze(self) -> Dict[str, Any]:
-        """최적화 제안 생성"""
-        self.suggestions = []
-        
-        # 인덱스 제안
-        self._suggest_indexes()
-        
-        # 쿼리 리팩토링 제안
-        self._suggest_refactoring()
-        
-        # 조건 최적화 제안
-        self._suggest_condition_optimization()
-        
-        # JOIN 최적화 제안
-        self._suggest_join_optimization()
-        
-        # 집계 최적화 제안
-        self._suggest_aggregation_optimization()
-        
-        # 우선순위별 정렬
-        self.suggestions.sort(key=lambda x: {'HIGH': 3, 'MEDIUM': 2, 'LOW': 1}[x['priority']], reverse=True)
-        
-        return {
-            'suggestions': self.suggestions,
-            'total_count': len(self.suggestions),
-            'high_priority_count': len([s for s in self.suggestions if s['priority'] == 'HIGH']),
-            'medium_priority_count': len([s for s in self.suggestions if s['priority'] == 'MEDIUM']),
-            'low_priority_count': len([s for s in self.suggestions if s['priority'] == 'LOW'])
-        }
+    COLUMN_PATTERN = re.compile(r'\b(\w+)\s*[=<>!]')
+    EXCLUDED = {'AND', 'OR', 'NOT', 'IN', 'LIKE', 'BETWEEN'}
+    
+    def __init__(self, context: AnalysisContext):
+        super().__init__(context)
+        self.columns = {}
+        self.spans = []
     
-    def _suggest_indexes(self):
-        """인덱스 제안"""
-        where_clauses = self.structure['where_clauses']
-        joins = self.structure['joins']
-        order_by = self.structure['order_by']
-        
-        # WHERE 절 컬럼 인덱스 제안
-        indexed_columns = set()
-        for clause in where_clauses:
-            # 컬럼명 추출 (간단한 패턴)
-            col_matches = re.findall(r'\b(\w+)\s*[=<>!]', clause)
-            for col in col_matches:
-                if col.upper() not in ['AND', 'OR', 'NOT', 'IN', 'LIKE', 'BETWEEN']:
-                    indexed_columns.add(col)
-        
-        if indexed_columns:
+    def visit(self, node: RuleNode):
+        found = False
+        for col in self.COLUMN_PATTERN.findall(node.text):
+            if col.upper() not in self.EXCLUDED:
+                self.columns.setdefault(col, None)
+                found = True
+        if found:
+            self.spans.extend(node.spans)
+    
+    def finish(self):
+        if self.columns:
+            columns = list(self.columns)
             self.suggestions.append({
                 'type': 'INDEX',
                 'priority': 'HIGH',
-                'message': f'WHERE 절 컬럼에 인덱스 추가 고려: {", ".join(list(indexed_columns)[:5])}',
-                'example': f'CREATE INDEX idx_name ON table_name ({", ".join(list(indexed_columns)[:3])});',
-                'expected_improvement': '30-50%'
+                'message': f'WHERE 절 컬럼에 인덱스 추가 고려: {", ".join(columns[:5])}',
+                'example': f'CREATE INDEX idx_name ON table_name ({", ".join(columns[:3])});',
+                'expected_improvement': '30-50%',
+                'spans': self.spans
             })
-        
-        # JOIN 조건 인덱스 제안
-        join_columns = set()
-        for join in joins:
-            if join.get('condition'):
-                condition = join['condition']
-                col_matches = re.findall(r'\b(\w+)\s*=', condition)
-                for col in col_matches:
-                    if col.upper() not in ['AND', 'OR', 'ON']:
-                        join_columns.add(col)
-        
-        if join_columns:
+
+@performance_rule
+class JoinIndexSuggestionRule(PerformanceRule):
+    """JOIN 조건 컬럼 인덱스 제안"""
+    
+    name = 'suggest_join_index'
+    node_types = ('join',)
+    
+    COLUMN_PATTERN = re.compile(r'\b(\w+)\s*=')
+    EXCLUDED = {'AND', 'OR', 'ON'}
+    
+    def __init__(self, context: AnalysisContext):
+        super().__init__(context)
+        self.columns = {}
+        self.spans = []
+    
+    def visit(self, node: RuleNode):
+        found = False
+        for col in self.COLUMN_PATTERN.findall(node.text):
+            if col.upper() not in self.EXCLUDED:
+                self.columns.setdefault(col, None)
+                found = True
+        if found:
+            self.spans.extend(node.spans)
+    
+    def finish(self):
+        if self.columns:
+            columns = list(self.columns)
             self.suggestions.append({
                 'type': 'INDEX',
                 'priority': 'HIGH',
-                'message': f'JOIN 조건 컬럼에 인덱스 추가 고려: {", ".join(list(join_columns)[:5])}',
-                'example': f'CREATE INDEX idx_join ON table_name ({", ".join(list(join_columns)[:3])});',
-                'expected_improvement': '40-60%'
+                'message': f'JOIN 조건 컬럼에 인덱스 추가 고려: {", ".join(columns[:5])}',
+                'example': f'CREATE INDEX idx_join ON table_name ({", ".join(columns[:3])});',
+                'expected_improvement': '40-60%',
+                'spans': self.spans
             })
-        
-        # ORDER BY 컬럼 인덱스 제안
-        if order_by:
+
+@performance_rule
+class OrderByIndexSuggestionRule(PerformanceRule):
+    """ORDER BY 컬럼 인덱스 제안"""
+    
+    name = 'suggest_order_by_index'
+    node_types = ('order_by',)
+    
+    def __init__(self, context: AnalysisContext):
+        super().__init__(context)
+        self.items = []
+        self.spans = []
+    
+    def visit(self, node: RuleNode):
+        if len(self.items) < 3:
+            self.items.append(node.text)
+            self.spans.extend(node.spans)
+    
+    def finish(self):
+        if self.items:
             self.suggestions.append({
                 'type': 'INDEX',
                 'priority': 'MEDIUM',
-                'message': f'ORDER BY 컬럼에 인덱스 추가 고려: {", ".join(order_by[:3])}',
-                'example': f'CREATE INDEX idx_order ON table_name ({", ".join(order_by[:2])});',
-                'expected_improvement': '20-40%'
+                'message': f'ORDER BY 컬럼에 인덱스 추가 고려: {", ".join(self.items[:3])}',
+                'example': f'CREATE INDEX idx_order ON table_name ({", ".join(self.items[:2])});',
+                'expected_improvement': '20-40%',
+                'spans': self.spans
             })
+
+@performance_rule
+class SubqueryRefactorSuggestionRule(PerformanceRule):
+    """서브쿼리 -> JOIN 변환 제안"""
     
-    def _suggest_refactoring(self):
-        """쿼리 리팩토링 제안"""
-        subqueries = self.structure['subqueries']
-        
-        # 서브쿼리 → JOIN 변환 제안
-        if len(subqueries) > 0:
+    name = 'suggest_subquery_join'
+    node_types = ('subquery',)
+    
+    def __init__(self, context: AnalysisContext):
+        super().__init__(context)
+        self.count = 0
+        self.spans = []
+    
+    def visit(self, node: RuleNode):
+        self.count += 1
+        self.spans.extend(node.spans)
+    
+    def finish(self):
+        if self.count > 0:
             self.suggestions.append({
                 'type': 'QUERY_REFACTOR',
                 'priority': 'MEDIUM',
-                'message': f'서브쿼리({len(subqueries)}개)를 JOIN으로 변환 고려',
+                'message': f'서브쿼리({self.count}개)를 JOIN으로 변환 고려',
                 'example': '# 서브쿼리: SELECT * FROM table1 WHERE id IN (SELECT id FROM table2)\n# JOIN 변환: SELECT t1.* FROM table1 t1 INNER JOIN table2 t2 ON t1.id = t2.id',
-                'expected_improvement': '20-40%'
+                'expected_improvement': '20-40%',
+                'spans': self.spans
             })
-        
-        # IN → EXISTS 변환 제안
-        query_text = self.parser.query_text.upper()
+
+@performance_rule
+class QueryTextRefactorSuggestionRule(PerformanceRule):
+    """IN -> EXISTS 변환 및 DISTINCT 최소화 제안"""
+    
+    name = 'suggest_query_refactor'
+    node_types = ('query',)
+    
+    IN_PATTERN = re.compile(r'\bIN\s*\(', re.IGNORECASE)
+    DISTINCT_PATTERN = re.compile(r'DISTINCT', re.IGNORECASE)
+    
+    def visit(self, node: RuleNode):
+        query_text = self.context.upper_text
+        parser = self.context.parser
         if ' IN (' in query_text and 'SELECT' in query_text:
             self.suggestions.append({
                 'type': 'QUERY_REFACTOR',
                 'priority': 'LOW',
                 'message': 'IN 서브쿼리를 EXISTS로 변환 고려 (NULL 처리 개선)',
                 'example': '# IN: WHERE id IN (SELECT id FROM table)\n# EXISTS: WHERE EXISTS (SELECT 1 FROM table WHERE table.id = main.id)',
-                'expected_improvement': '10-20%'
+                'expected_improvement': '10-20%',
+                'spans': parser.find_spans(self.IN_PATTERN)
             })
-        
-        # DISTINCT 제거 가능 여부
-        if 'DISTINCT' in query_text:
-            distinct_count = query_text.count('DISTINCT')
-            if distinct_count > 2:
-                self.suggestions.append({
-                    'type': 'QUERY_REFACTOR',
-                    'priority': 'MEDIUM',
-                    'message': f'DISTINCT 사용({distinct_count}회) 최소화 고려',
-                    'example': 'GROUP BY를 사용하여 DISTINCT 대체 가능 여부 검토',
-                    'expected_improvement': '15-30%'
-                })
+        distinct_count = query_text.count('DISTINCT')
+        if distinct_count > 2:
+            self.suggestions.append({
+                'type': 'QUERY_REFACTOR',
+                'priority': 'MEDIUM',
+                'message': f'DISTINCT 사용({distinct_count}회) 최소화 고려',
+                'example': 'GROUP BY를 사용하여 DISTINCT 대체 가능 여부 검토',
+                'expected_improvement': '15-30%',
+                'spans': parser.find_spans(self.DISTINCT_PATTERN)
+            })
+
+@performance_rule
+class ConditionOrderSuggestionRule(PerformanceRule):
+    """WHERE 조건 순서 최적화 제안"""
     
-    def _suggest_condition_optimization(self):
-        """조건 최적화 제안"""
-        where_clauses = self.structure['where_clauses']
-        
-        if where_clauses:
-            # 인덱스 사용 가능한 조건 우선 배치
+    name = 'suggest_condition_order'
+    node_types = ('where',)
+    
+    def visit(self, node: RuleNode):
+        if not self.suggestions:
             self.suggestions.append({
                 'type': 'CONDITION_OPTIMIZATION',
                 'priority': 'LOW',
                 'message': 'WHERE 절 조건 순서 최적화: 인덱스 사용 가능한 조건을 앞에 배치',
                 'example': 'WHERE indexed_column = value AND function(column) = value',
-                'expected_improvement': '5-15%'
+                'expected_improvement': '5-15%',
+                'spans': node.spans
             })
+
+@performance_rule
+class JoinOrderSuggestionRule(PerformanceRule):
+    """다중 JOIN 순서 최적화 제안"""
     
-    def _suggest_join_optimization(self):
-        """JOIN 최적화 제안"""
-        joins = self.structure['joins']
-        
-        if len(joins) > 3:
+    name = 'suggest_join_order'
+    node_types = ('join',)
+    
+    def __init__(self, context: AnalysisContext):
+        super().__init__(context)
+        self.count = 0
+        self.spans = []
+    
+    def visit(self, node: RuleNode):
+        self.count += 1
+        self.spans.extend(node.spans)
+    
+    def finish(self):
+        if self.count > 3:
             self.suggestions.append({
                 'type': 'JOIN_OPTIMIZATION',
                 'priority': 'MEDIUM',
-                'message': f'다중 JOIN({len(joins)}개) 순서 최적화 고려: 작은 테이블을 먼저 JOIN',
+                'message': f'다중 JOIN({self.count}개) 순서 최적화 고려: 작은 테이블을 먼저 JOIN',
                 'example': '작은 테이블을 FROM 절에 배치하고 큰 테이블을 나중에 JOIN',
-                'expected_improvement': '10-25%'
+                'expected_improvement': '10-25%',
+                'spans': self.spans
             })
+
+@performance_rule
+class HavingSuggestionRule(PerformanceRule):
+    """HAVING 조건의 WHERE 이동 검토 제안"""
     
-    def _suggest_aggregation_optimization(self):
-        """집계 최적화 제안"""
-        query_text = self.parser.query_text.upper()
-        
-        # HAVING → WHERE 이동 가능 여부
+    name = 'suggest_having_to_where'
+    node_types = ('query',)
+    
+    HAVING_PATTERN = re.compile(r'\bHAVING\b', re.IGNORECASE)
+    
+    def visit(self, node: RuleNode):
+        query_text = self.context.upper_text
         if 'HAVING' in query_text and 'GROUP BY' in query_text:
             self.suggestions.append({
                 'type': 'AGGREGATION_OPTIMIZATION',
                 'priority': 'LOW',
                 'message': 'HAVING 절의 조건 중 WHERE 절로 이동 가능한 것 검토',
                 'example': '집계 함수를 사용하지 않는 조건은 WHERE 절로 이동',
-                'expected_improvement': '5-15%'
+                'expected_improvement': '5-15%',
+                'spans': self.context.parser.find_spans(self.HAVING_PATTERN)
             })
 
 # ============================================
-# 복잡도 분석기 클래스
+# 성능 분석기 클래스
 # ============================================
 
-class ComplexityAnalyzer:
-    """복잡도 분석 클래스"""
+class PerformanceAnalyzer:
+    """
+    성능 분석 클래스 (PERFORMANCE_RULES 규칙을 PerformanceRuleEngine으로 실행)
     
-    def __init__(self, parser: SQLQueryParser):
+    통계 카탈로그를 주면 CostEstimator로 쿼리 블록별 비용을 추정하고, 이슈마다 해당 블록의
+    예상 비용(estimated_cost)을 붙여 비용이 큰 순서로 정렬하며 점수 감점에도 비용 비중을 반영합니다.
+    """
+    
+    def __init__(self, parser: SQLQueryParser, engine: Optional[PerformanceRuleEngine] = None,
+                 context: Optional[AnalysisContext] = None, statistics: Optional['StatisticsCatalog'] = None):
         self.parser = parser
-        self.structure = parser.get_parsed_structure()
+        self.context = context or AnalysisContext.for_parser(parser)
+        self.structure = self.context.structure
+        self.engine = engine or PerformanceRuleEngine()
+        self.issues = []
+        self.recommendations = []
+        # 같은 순회에서 만들어진 최적화 제안 (OptimizationAdvisor가 사용)
+        self.suggestions = None
+        # 규칙별 실행 통계 (calls, elapsed_ms, findings)
+        self.rule_stats = {}
+        self.statistics = statistics
+        # 통계 기반 비용 추정 결과 (통계가 있을 때만)
+        self.cost_estimate = None
     
     def analyze(self) -> Dict[str, Any]:
-        """복잡도 분석 수행"""
-        metrics = {
-            'query_length': self.structure['query_length'],
-            'query_lines': self.structure['query_lines'],
-            'table_count': len(self.structure['tables']),
-            'join_count': len(self.structure['joins']),
-            'subquery_count': len(self.structure['subqueries']),
-            'max_subquery_depth': max([sq['depth'] for sq in self.structure['subqueries']], default=0),
-            'where_clause_count': len(self.structure['where_clauses']),
-            'column_count': len(self.structure['columns']),
-            'group_by_count': len(self.structure['group_by']),
-            'order_by_count': len(self.structure['order_by']),
-            'cte_count': len(self.structure['ctes']),
-            'union_count': self.parser.query_text.upper().count('UNION')
-        }
+        """성능 분석 수행"""
+        result = self.engine.run(self.context)
+        self.issues = result['issues']
+        self.recommendations = result['recommendations']
+        self.suggestions = result['suggestions']
+        self.rule_stats = result['rule_stats']
         
-        # 복잡도 점수 계산
-        score = self._calculate_complexity_score(metrics)
-        level = self._get_complexity_level(score)
+        if self.statistics is not None:
+            check_cancelled()
+            self.cost_estimate = CostEstimator(self.context, self.statistics).estimate()
+            self._rank_issues_by_cost()
         
-        return {
+        # 성능 점수 계산
+        score = self._calculate_performance_score()
+        level = self._get_performance_level(score)
+        
+        result = {
             'score': score,
             'level': level,
-            'metrics': metrics
+            'issues': self.issues,
+            'recommendations': self.recommendations
         }
+        if self.cost_estimate is not None:
+            result['cost_estimate'] = self.cost_estimate
+        return result
     
-    def _calculate_complexity_score(self, metrics: Dict[str, Any]) -> int:
-        """복잡도 점수 계산 (0-100, 높을수록 복잡)"""
-        score = 0
-        
-        # 쿼리 길이 (라인 수)
-        if metrics['query_lines'] > 3000:
-            score += 30
-        elif metrics['query_lines'] > 1000:
-            score += 20
-        elif metrics['query_lines'] > 500:
-            score += 10
-        
-        # 테이블 수
-        if metrics['table_count'] > 10:
-            score += 15
-        elif metrics['table_count'] > 5:
-            score += 10
-        elif metrics['table_count'] > 3:
-            score += 5
+    def _rank_issues_by_cost(self):
+        """
+        이슈마다 위치한 쿼리 블록(가장 안쪽)의 누적 예상 비용을 붙이고 비용이 큰 순서로 정렬
+        
+        위치가 여러 곳이면 블록 비용의 합, 위치가 없으면(reindent 모드) 전체 비용을 씁니다.
+        cost_share는 전체 예상 비용에서 차지하는 비율(0~1)입니다.
+        """
+        blocks = []
+        for block in self.cost_estimate['blocks']:
+            span = block['span']
+            if span:
+                blocks.append(((span['start_line'], span['start_column']), (span['end_line'], span['end_column']),
+                               block['total_cost']))
+        blocks.sort()
+        starts = [start for start, _, _ in blocks]
+        total = self.cost_estimate['total_cost']
         
-        # JOIN 수
-        if metrics['join_count'] > 10:
-            score += 15
-        elif metrics['join_count'] > 5:
-            score += 10
-        elif metrics['join_count'] > 3:
-            score += 5
+        for issue in self.issues:
+            matched = {}
+            for span in issue.get('spans') or []:
+                if not span:
+                    continue
+                position = (span['start_line'], span['start_column'])
+                i = bisect_right(starts, position) - 1
+                while i >= 0 and blocks[i][1] < position:
+                    i -= 1
+                if i >= 0:
+                    matched[i] = blocks[i][2]
+            cost = min(total, sum(matched.values())) if matched else total
+            issue['estimated_cost'] = round(cost, 2)
+            issue['cost_share'] = round(cost / total, 4) if total > 0 else 0.0
+        
+        # 같은 비용이면 기존(규칙) 순서 유지
+        self.issues.sort(key=lambda issue: -issue['estimated_cost'])
+    
+    def _calculate_performance_score(self) -> int:
+        """성능 점수 계산 (0-100, 비용 추정이 있으면 감점에 비용 비중 0.5~1.5배 반영)"""
+        base_score = 100
         
-        # 서브쿼리 수 및 깊이
-        if metrics['max_subquery_depth'] > 3:
-            score += 15
-        elif metrics['max_subquery_depth'] > 2:
-            score += 10
-        elif metrics['max_subquery_depth'] > 1:
-            score += 5
+        # 이슈별 점수 감점
+        for issue in self.issues:
+            if issue['severity'] == 'HIGH':
+                penalty = 15
+            elif issue['severity'] == 'MEDIUM':
+                penalty = 8
+            else:
+                penalty = 3
+            if 'cost_share' in issue:
+                penalty *= 0.5 + issue['cost_share']
+            base_score -= penalty
         
-        if metrics['subquery_count'] > 10:
-            score += 10
-        elif metrics['subquery_count'] > 5:
-            score += 5
-        
-        # WHERE 조건 수
-        if metrics['where_clause_count'] > 10:
-            score += 5
-        
-        # UNION 수
-        if metrics['union_count'] > 3:
-            score += 5
-        
-        return min(100, score)
+        return max(0, min(100, round(base_score)))
     
-    def _get_complexity_level(self, score: int) -> str:
-        """복잡도 레벨 반환"""
-        if score >= 70:
-            return 'VERY_HIGH'
-        elif score >= 50:
-            return 'HIGH'
-        elif score >= 30:
+    def _get_performance_level(self, score: int) -> str:
+        """성능 레벨 반환"""
+        if score >= 80:
+            return 'LOW'
+        elif score >= 60:
             return 'MEDIUM'
         else:
-            return 'LOW'
+            return 'HIGH'
 
 # ============================================
-# 보안 분석기 클래스
+# 스키마 카탈로그
 # ============================================
 
-class SecurityAnalyzer:
-    """보안 분석 클래스"""
+# 식별자 (스키마 한정 가능: schema.table, "Quoted"."Name")
+_DDL_IDENTIFIER = r'(?:"[^"]+"|\w+)(?:\s*\.\s*(?:"[^"]+"|\w+))*'
+
+_CREATE_TABLE_PATTERN = re.compile(
+    r'^\s*CREATE\s+(?:OR\s+REPLACE\s+)?(?:(?:GLOBAL|LOCAL)\s+)?(?:(?:TEMP|TEMPORARY|UNLOGGED)\s+)?'
+    r'TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(?P<name>' + _DDL_IDENTIFIER + r')\s*\(',
+    re.IGNORECASE
+)
+_CREATE_INDEX_PATTERN = re.compile(
+    r'^\s*CREATE\s+(?P<unique>UNIQUE\s+)?INDEX\s+(?:CONCURRENTLY\s+)?(?:IF\s+NOT\s+EXISTS\s+)?'
+    r'(?:(?P<name>' + _DDL_IDENTIFIER + r')\s+)?ON\s+(?:ONLY\s+)?(?P<table>' + _DDL_IDENTIFIER + r')\s*'
+    r'(?:USING\s+(?P<method>\w+)\s*)?\(',
+    re.IGNORECASE
+)
+_ALTER_TABLE_KEY_PATTERN = re.compile(
+    r'^\s*ALTER\s+TABLE\s+(?:IF\s+EXISTS\s+)?(?:ONLY\s+)?(?P<table>' + _DDL_IDENTIFIER + r')\s+'
+    r'ADD\s+(?:CONSTRAINT\s+(?P<name>' + _DDL_IDENTIFIER + r')\s+)?(?P<kind>PRIMARY\s+KEY|UNIQUE)\s*\(',
+    re.IGNORECASE
+)
+# 인덱스 항목 뒤의 정렬/연산자 클래스/콜레이션 수식어
+_INDEX_ELEMENT_SUFFIX = re.compile(
+    r'(?:\s+COLLATE\s+\S+|\s+\w+_ops|\s+(?:ASC|DESC)|\s+NULLS\s+(?:FIRST|LAST))+\s*$',
+    re.IGNORECASE
+)
+_SIMPLE_IDENTIFIER = re.compile(r'"[^"]+"|[A-Za-z_]\w*')
+_COLUMN_CONSTRAINT_KEYWORDS = ('CONSTRAINT', 'PRIMARY', 'UNIQUE', 'FOREIGN', 'CHECK', 'EXCLUDE', 'LIKE')
+
+def normalize_identifier(name: str) -> str:
+    """식별자 정규화 (PostgreSQL 규칙: 따옴표 없는 이름은 소문자, 따옴표 이름은 대소문자 유지)"""
+    parts = []
+    for part in name.split('.'):
+        part = part.strip()
+        parts.append(part[1:-1] if len(part) > 1 and part[0] == part[-1] == '"' else part.lower())
+    return '.'.join(parts)
+
+def quote_identifier(name: str) -> str:
+    """정규화된 식별자를 DDL용으로 표시 (소문자 단순 이름이 아니면 따옴표)"""
+    return '.'.join(part if re.fullmatch(r'[a-z_][a-z0-9_]*', part) else f'"{part}"' for part in name.split('.'))
+
+def _find_table_entry(tables: Dict[str, Any], key: str) -> Optional[Any]:
+    """
+    정규화된 테이블명으로 조회
     
-    def __init__(self, parser: SQLQueryParser):
-        self.parser = parser
-        self.query_text = parser.query_text
-        self.vulnerabilities = []
+    정확히 일치하지 않으면 스키마를 뺀 이름으로, 그래도 없으면 대소문자를 무시하고 조회합니다.
+    (여러 테이블이 일치하면 None)
+    """
+    if key in tables:
+        return tables[key]
+    bare = key.split('.')[-1]
+    for compare in (lambda k: k.split('.')[-1] == bare, lambda k: k.split('.')[-1].lower() == bare.lower()):
+        matches = [table for table_key, table in tables.items() if compare(table_key)]
+        if matches:
+            return matches[0] if len(matches) == 1 else None
+    return None
+
+def _split_top_level(text: str) -> List[str]:
+    """괄호 깊이 0의 쉼표로 분리 (문자열 안의 쉼표 무시)"""
+    parts = []
+    depth = 0
+    quote = None
+    start = 0
+    for i, ch in enumerate(text):
+        if quote:
+            if ch == quote:
+                quote = None
+        elif ch in ("'", '"'):
+            quote = ch
+        elif ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+        elif ch == ',' and depth == 0:
+            parts.append(text[start:i].strip())
+            start = i + 1
+    parts.append(text[start:].strip())
+    return [part for part in parts if part]
+
+def _paren_body(text: str, open_pos: int) -> Tuple[str, int]:
+    """open_pos의 여는 괄호와 짝이 맞는 괄호까지의 내용과 닫는 괄호 다음 위치"""
+    depth = 0
+    quote = None
+    for i in range(open_pos, len(text)):
+        ch = text[i]
+        if quote:
+            if ch == quote:
+                quote = None
+        elif ch in ("'", '"'):
+            quote = ch
+        elif ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+            if depth == 0:
+                return text[open_pos + 1:i], i + 1
+    return text[open_pos + 1:], len(text)
+
+def _index_element(element: str) -> str:
+    """인덱스 항목 정규화: 단순 컬럼이면 컬럼명, 식이면 소문자 식 텍스트"""
+    element = _INDEX_ELEMENT_SUFFIX.sub('', element.strip())
+    if _SIMPLE_IDENTIFIER.fullmatch(element):
+        return normalize_identifier(element)
+    return ' '.join(element.lower().split())
+
+class SchemaCatalog:
+    """
+    테이블/인덱스 스키마 카탈로그
     
-    def analyze(self) -> Dict[str, Any]:
-        """보안 분석 수행"""
-        self.vulnerabilities = []
-        
-        # SQL Injection 취약점 검사
-        self._check_sql_injection()
-        
-        # 권한 관련 이슈
-        self._check_permission_issues()
-        
-        # 데이터 노출 위험
-        self._check_data_exposure()
-        
-        # 인젝션 패턴 감지
-        self._check_injection_patterns()
-        
-        # 보안 점수 계산
-        score = self._calculate_security_score()
-        level = self._get_security_level(score)
-        
+    워크스페이스의 DDL(CREATE TABLE / CREATE INDEX / ALTER TABLE ... ADD PRIMARY KEY|UNIQUE)
+    또는 내보낸 JSON 카탈로그에서 만듭니다. PRIMARY KEY / UNIQUE 제약은 인덱스로 등록합니다.
+    
+    JSON 카탈로그 형식:
+        {"tables": {"users": {"columns": ["id", "email"], "primary_key": ["id"]}},
+         "indexes": [{"name": "idx_users_email", "table": "users", "columns": ["email"],
+                      "include": [], "unique": true, "method": "btree", "partial": false}]}
+    (tables는 {"name": ..., "columns": [...]} 리스트도 가능, 컬럼은 {"name": ...} 객체도 가능)
+    """
+    
+    def __init__(self, source: str = ''):
+        self.source = source
+        # 정규화된 테이블명 -> {'name', 'columns', 'primary_key'}
+        self.tables = {}
+        self.indexes = []
+        # 테이블명 -> 인덱스 목록 (indexes_for() 조회용, 등록 시 초기화)
+        self._indexes_by_table = None
+    
+    def add_table(self, name: str, columns: Iterable[str] = (), primary_key: Iterable[str] = ()):
+        """테이블 등록 (같은 이름이 있으면 컬럼을 합침)"""
+        key = normalize_identifier(name)
+        self._indexes_by_table = None
+        table = self.tables.setdefault(key, {'name': key, 'columns': [], 'primary_key': []})
+        for column in columns:
+            column = normalize_identifier(column)
+            if column not in table['columns']:
+                table['columns'].append(column)
+        if primary_key:
+            table['primary_key'] = [normalize_identifier(c) for c in primary_key]
+            self.add_index(f"{key.split('.')[-1]}_pkey", key, table['primary_key'], unique=True)
+    
+    def add_index(self, name: Optional[str], table: str, columns: Iterable[str], include: Iterable[str] = (),
+                  unique: bool = False, method: Optional[str] = None, partial: bool = False):
+        """인덱스 등록 (이름이 없으면 PostgreSQL 기본 규칙과 비슷하게 생성, 같은 이름은 대체)"""
+        table = normalize_identifier(table)
+        columns = [_index_element(c) for c in columns]
+        name = normalize_identifier(name) if name else \
+            f"{table.split('.')[-1]}_{'_'.join(_SIMPLE_IDENTIFIER.findall('_'.join(columns))) or 'expr'}_idx"
+        self.indexes = [index for index in self.indexes if index['name'] != name]
+        self._indexes_by_table = None
+        self.indexes.append({
+            'name': name,
+            'table': table,
+            'columns': columns,
+            'include': [normalize_identifier(c) for c in include],
+            'unique': unique,
+            'method': (method or 'btree').lower(),
+            'partial': partial
+        })
+    
+    def find_table(self, name: str) -> Optional[Dict[str, Any]]:
+        """
+        테이블 조회
+        
+        정확히 일치하지 않으면 스키마를 뺀 이름으로, 그래도 없으면 대소문자를 무시하고 조회합니다.
+        (쿼리 트리의 테이블명은 따옴표가 제거된 상태이므로 "apiKeys" 같은 이름도 찾을 수 있도록)
+        """
+        return _find_table_entry(self.tables, normalize_identifier(name))
+    
+    def indexes_for(self, table_name: str) -> List[Dict[str, Any]]:
+        """테이블의 인덱스 목록"""
+        if self._indexes_by_table is None:
+            # 인덱스 DDL은 스키마를 생략할 수 있으므로 테이블 조회 규칙으로 연결
+            self._indexes_by_table = defaultdict(list)
+            for index in self.indexes:
+                table = self.find_table(index['table'])
+                self._indexes_by_table[table['name'] if table else index['table']].append(index)
+        table = self.find_table(table_name)
+        return self._indexes_by_table.get(table['name'] if table else normalize_identifier(table_name), [])
+    
+    def has_column(self, table_name: str, column: str) -> Optional[bool]:
+        """테이블에 컬럼이 있는지 (테이블 또는 컬럼 목록을 모르면 None, 대소문자 무시)"""
+        table = self.find_table(table_name)
+        if not table or not table['columns']:
+            return None
+        return normalize_identifier(column).lower() in {c.lower() for c in table['columns']}
+    
+    def column_name(self, table_name: str, column: str) -> str:
+        """카탈로그에 등록된 컬럼 표기 (정확히 일치하는 표기 우선, 없으면 대소문자 무시, 모르면 그대로)"""
+        column = normalize_identifier(column)
+        table = self.find_table(table_name)
+        if not table or column in table['columns']:
+            return column
+        matches = [c for c in table['columns'] if c.lower() == column.lower()]
+        return matches[0] if len(matches) == 1 else column
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON 카탈로그 형식으로 변환"""
         return {
-            'score': score,
-            'level': level,
-            'vulnerabilities': self.vulnerabilities
+            'tables': {key: {'columns': table['columns'], 'primary_key': table['primary_key']}
+                       for key, table in sorted(self.tables.items())},
+            'indexes': sorted(self.indexes, key=lambda index: (index['table'], index['name']))
         }
     
-    def _check_sql_injection(self):
-        """SQL Injection 취약점 검사"""
-        # 문자열 연결 사용 감지
-        if re.search(r'\+\s*["\']', self.query_text) or re.search(r'["\']\s*\+', self.query_text):
-            self.vulnerabilities.append({
-                'type': 'STRING_CONCATENATION',
-                'severity': 'HIGH',
-                'message': '문자열 연결 연산자 사용 감지',
-                'impact': 'SQL Injection 취약점 가능성',
-                'recommendation': '파라미터화된 쿼리 사용'
-            })
-        
-        # 동적 쿼리 생성 감지 (간단한 패턴)
-        dynamic_patterns = [
-            r'EXEC\s*\(',
-            r'EXECUTE\s+IMMEDIATE',
-            r'PREPARE\s+\w+\s+FROM',
-        ]
-        for pattern in dynamic_patterns:
-            if re.search(pattern, self.query_text, re.IGNORECASE):
-                self.vulnerabilities.append({
-                    'type': 'DYNAMIC_QUERY',
-                    'severity': 'CRITICAL',
-                    'message': f'동적 쿼리 생성 패턴 감지: {pattern}',
-                    'impact': 'SQL Injection 취약점',
-                    'recommendation': '정적 쿼리 사용 또는 입력 검증 강화'
-                })
-        
-        # 사용자 입력 직접 사용 감지 (간단한 패턴)
-        # 주석 처리된 코드나 변수명 패턴
-        if re.search(r'\$\{?\w+\}?', self.query_text) or re.search(r'%s|%d', self.query_text):
-            self.vulnerabilities.append({
-                'type': 'DIRECT_INPUT',
-                'severity': 'HIGH',
-                'message': '변수 치환 패턴 감지',
-                'impact': 'SQL Injection 취약점 가능성',
-                'recommendation': '파라미터화된 쿼리 사용'
-            })
+    @property
+    def fingerprint(self) -> str:
+        """카탈로그 내용 해시 (분석 결과 캐시 키 구분용)"""
+        return hashlib.sha256(json.dumps(self.to_dict(), sort_keys=True).encode('utf-8')).hexdigest()[:16]
     
-    def _check_permission_issues(self):
-        """권한 관련 이슈 검사"""
-        query_upper = self.query_text.upper()
-        
-        # 과도한 권한 사용
-        if 'GRANT ALL' in query_upper:
-            self.vulnerabilities.append({
-                'type': 'EXCESSIVE_PERMISSION',
-                'severity': 'MEDIUM',
-                'message': 'GRANT ALL 사용 감지',
-                'impact': '과도한 권한 부여',
-                'recommendation': '최소 권한 원칙 적용'
-            })
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], source: str = '') -> 'SchemaCatalog':
+        """JSON 카탈로그에서 생성"""
+        catalog = cls(source)
+        tables = data.get('tables', {})
+        if isinstance(tables, dict):
+            tables = [dict(table, name=name) for name, table in tables.items()]
+        for table in tables:
+            columns = [c['name'] if isinstance(c, dict) else c for c in table.get('columns', [])]
+            catalog.add_table(table['name'], columns, table.get('primary_key') or ())
+            for index in table.get('indexes', []):
+                catalog._add_index_dict(dict(index, table=index.get('table', table['name'])))
+        for index in data.get('indexes', []):
+            catalog._add_index_dict(index)
+        return catalog
     
-    def _check_data_exposure(self):
-        """데이터 노출 위험 검사"""
-        query_upper = self.query_text.upper()
-        
-        # SELECT * 사용
-        if 'SELECT *' in query_upper:
-            count = query_upper.count('SELECT *')
-            if count > 2:
-                self.vulnerabilities.append({
-                    'type': 'SELECT_ALL',
-                    'severity': 'LOW',
-                    'message': f'SELECT * 다수 사용 ({count}회)',
-                    'impact': '불필요한 데이터 노출 가능성',
-                    'recommendation': '필요한 컬럼만 명시적으로 선택'
-                })
+    def _add_index_dict(self, index: Dict[str, Any]):
+        """JSON 인덱스 항목 등록"""
+        self.add_index(index.get('name'), index['table'], index.get('columns', []), index.get('include', []),
+                       bool(index.get('unique')), index.get('method'),
+                       bool(index.get('partial') or index.get('where')))
     
-    def _check_injection_patterns(self):
-        """인젝션 패턴 감지"""
-        query_upper = self.query_text.upper()
-        
-        # UNION 기반 인젝션 패턴
-        if 'UNION' in query_upper and 'SELECT' in query_upper:
-            # 의심스러운 패턴
-            if re.search(r'UNION\s+SELECT\s+NULL', query_upper):
-                self.vulnerabilities.append({
-                    'type': 'UNION_INJECTION_PATTERN',
-                    'severity': 'MEDIUM',
-                    'message': 'UNION SELECT NULL 패턴 감지',
-                    'impact': '인젝션 시도 가능성',
-                    'recommendation': '입력 검증 및 화이트리스트 적용'
-                })
+    @classmethod
+    def from_ddl(cls, ddl_text: str, source: str = '', catalog: Optional['SchemaCatalog'] = None) -> 'SchemaCatalog':
+        """DDL 스크립트에서 생성 (catalog를 주면 그 카탈로그에 추가)"""
+        catalog = catalog or cls(source)
+        for _, statement in iter_sql_statements(ddl_text.splitlines(keepends=True)):
+            statement = sqlparse.format(statement, strip_comments=True).strip()
+            match = _CREATE_TABLE_PATTERN.match(statement)
+            if match:
+                body, _ = _paren_body(statement, match.end() - 1)
+                catalog._add_table_ddl(match.group('name'), body)
+                continue
+            match = _CREATE_INDEX_PATTERN.match(statement)
+            if match:
+                body, end = _paren_body(statement, match.end() - 1)
+                rest = statement[end:]
+                include = []
+                include_match = re.match(r'\s*INCLUDE\s*\(', rest, re.IGNORECASE)
+                if include_match:
+                    include_body, include_end = _paren_body(rest, include_match.end() - 1)
+                    include = _split_top_level(include_body)
+                    rest = rest[include_end:]
+                catalog.add_index(match.group('name'), match.group('table'), _split_top_level(body), include,
+                                  bool(match.group('unique')), match.group('method'),
+                                  bool(re.search(r'\bWHERE\b', rest, re.IGNORECASE)))
+                continue
+            match = _ALTER_TABLE_KEY_PATTERN.match(statement)
+            if match:
+                body, _ = _paren_body(statement, match.end() - 1)
+                columns = _split_top_level(body)
+                if match.group('kind').upper().startswith('PRIMARY'):
+                    catalog.add_table(match.group('table'), primary_key=columns)
+                else:
+                    catalog.add_index(match.group('name'), match.group('table'), columns, unique=True)
+        return catalog
     
-    def _calculate_security_score(self) -> int:
-        """보안 점수 계산 (0-100, 높을수록 안전)"""
-        base_score = 100
-        
-        for vuln in self.vulnerabilities:
-            if vuln['severity'] == 'CRITICAL':
-                base_score -= 30
-            elif vuln['severity'] == 'HIGH':
-                base_score -= 20
-            elif vuln['severity'] == 'MEDIUM':
-                base_score -= 10
-            else:
-                base_score -= 5
-        
-        return max(0, min(100, base_score))
+    def _add_table_ddl(self, name: str, body: str):
+        """CREATE TABLE 본문(컬럼 정의/테이블 제약) 반영"""
+        columns = []
+        primary_key = []
+        unique_keys = []
+        for element in _split_top_level(body):
+            upper = element.upper()
+            if upper.startswith('CONSTRAINT'):
+                element = re.sub(r'^CONSTRAINT\s+' + _DDL_IDENTIFIER + r'\s+', '', element, flags=re.IGNORECASE)
+                upper = element.upper()
+            if upper.startswith('PRIMARY KEY') or upper.startswith('UNIQUE'):
+                open_pos = element.find('(')
+                if open_pos >= 0:
+                    key_columns = _split_top_level(_paren_body(element, open_pos)[0])
+                    if upper.startswith('PRIMARY KEY'):
+                        primary_key = key_columns
+                    else:
+                        unique_keys.append(key_columns)
+                continue
+            if upper.split(None, 1)[0] in _COLUMN_CONSTRAINT_KEYWORDS:
+                continue
+            column_match = _SIMPLE_IDENTIFIER.match(element)
+            if not column_match:
+                continue
+            column = column_match.group()
+            columns.append(column)
+            if re.search(r'\bPRIMARY\s+KEY\b', upper):
+                primary_key = [column]
+            elif re.search(r'\bUNIQUE\b', upper):
+                unique_keys.append([column])
+        self.add_table(name, columns, primary_key)
+        table = normalize_identifier(name).split('.')[-1]
+        for key_columns in unique_keys:
+            key_name = '_'.join(normalize_identifier(c) for c in key_columns)
+            self.add_index(f'{table}_{key_name}_key', name, key_columns, unique=True)
     
-    def _get_security_level(self, score: int) -> str:
-        """보안 레벨 반환"""
-        if score >= 90:
-            return 'SAFE'
-        elif score >= 70:
-            return 'LOW'
-        elif score >= 50:
-            return 'MEDIUM'
-        elif score >= 30:
-            return 'HIGH'
+    @classmethod
+    def load(cls, path: str) -> 'SchemaCatalog':
+        """
+        파일 또는 디렉토리에서 카탈로그 로드
+        
+        - .json: JSON 카탈로그
+        - 그 외 파일: DDL 스크립트
+        - 디렉토리: 하위의 *.sql(DDL)과 *.json(카탈로그)을 경로 순서대로 합침
+        """
+        catalog = cls(path)
+        if os.path.isdir(path):
+            files = sorted(str(p) for p in Path(path).rglob('*') if p.suffix.lower() in ('.sql', '.json'))
         else:
-            return 'CRITICAL'
+            files = [path]
+        for file_path in files:
+            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                content = f.read()
+            if file_path.lower().endswith('.json'):
+                part = cls.from_dict(json.loads(content), file_path)
+                for table in part.tables.values():
+                    catalog.add_table(table['name'], table['columns'], table['primary_key'])
+                for index in part.indexes:
+                    catalog.add_index(index['name'], index['table'], index['columns'], index['include'],
+                                      index['unique'], index['method'], index['partial'])
+            else:
+                cls.from_ddl(content, file_path, catalog)
+        return catalog
+
+# 스키마 경로를 지정하지 않았을 때 워크스페이스에서 찾는 위치 (앞쪽 우선)
+SCHEMA_CATALOG_CANDIDATES = ('schema.json', 'schema.sql', 'schema', os.path.join('db', 'schema.sql'), 'ddl')
+
+# (절대 경로, 파일 수정 시각 목록) -> SchemaCatalog
+_schema_catalogs: Dict[Tuple[str, Tuple], SchemaCatalog] = {}
+
+def find_workspace_schema(workspace_path: str) -> Optional[str]:
+    """워크스페이스의 기본 스키마 위치 반환 (없으면 None)"""
+    for candidate in SCHEMA_CATALOG_CANDIDATES:
+        path = os.path.join(workspace_path, candidate)
+        if os.path.exists(path):
+            return path
+    return None
+
+def load_schema_catalog(path: str) -> SchemaCatalog:
+    """스키마 카탈로그 로드 (파일이 바뀌지 않았으면 이전에 만든 카탈로그 재사용)"""
+    path = os.path.abspath(path)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"스키마 파일을 찾을 수 없습니다: {path}")
+    if os.path.isdir(path):
+        files = sorted(p for p in Path(path).rglob('*') if p.suffix.lower() in ('.sql', '.json'))
+    else:
+        files = [Path(path)]
+    key = (path, tuple((str(p), p.stat().st_mtime_ns, p.stat().st_size) for p in files))
+    if key not in _schema_catalogs:
+        for stale in [k for k in _schema_catalogs if k[0] == path]:
+            del _schema_catalogs[stale]
+        _schema_catalogs[key] = SchemaCatalog.load(path)
+    return _schema_catalogs[key]
 
 # ============================================
-# 데이터 리니지 분석기 클래스
+# 스키마 기반 인덱스 제안기 클래스
 # ============================================
 
-class DataLineageAnalyzer:
-    """데이터 리니지(Data Lineage) 분석 클래스 - 테이블 간 관계 시각화"""
+# 비교 조건: [한정자.]컬럼 연산자 (함수로 감싼 컬럼은 인덱스를 쓸 수 없으므로 제외)
+_INDEX_PREDICATE_PATTERN = re.compile(
+    r'(?<![\w."\':])(?:(?P<qualifier>"[^"]+"|[A-Za-z_]\w*)\s*\.\s*)?(?P<column>"[^"]+"|[A-Za-z_]\w*)\s*'
+    r'(?P<op><=|>=|<>|!=|=|<|>|\bNOT\s+IN\b|\bIN\b|\bNOT\s+LIKE\b|\bLIKE\b|\bBETWEEN\b'
+    r'|\bIS\s+NOT\s+NULL\b|\bIS\s+NULL\b)',
+    re.IGNORECASE
+)
+# 등가 조인 조건: [한정자.]컬럼 = [한정자.]컬럼
+_EQUI_JOIN_PATTERN = re.compile(
+    r'(?<![\w."\':])(?:(?P<lq>"[^"]+"|[A-Za-z_]\w*)\s*\.\s*)?(?P<lc>"[^"]+"|[A-Za-z_]\w*)\s*=\s*'
+    r'(?:(?P<rq>"[^"]+"|[A-Za-z_]\w*)\s*\.\s*)?(?P<rc>"[^"]+"|[A-Za-z_]\w*)(?![\w."(])'
+)
+# SELECT 항목의 단순 컬럼 참조 ([한정자.]컬럼 [[AS] 별칭])
+_SELECT_COLUMN_PATTERN = re.compile(
+    r'^(?:(?P<qualifier>"[^"]+"|[A-Za-z_]\w*)\s*\.\s*)?(?P<column>"[^"]+"|[A-Za-z_]\w*)'
+    r'(?:\s+(?:AS\s+)?(?:"[^"]+"|\w+))?$',
+    re.IGNORECASE
+)
+# ORDER BY 항목의 단순 컬럼 참조
+_COLUMN_REFERENCE_PATTERN = re.compile(
+    r'^(?:(?P<qualifier>"[^"]+"|[A-Za-z_]\w*)\s*\.\s*)?(?P<column>"[^"]+"|[A-Za-z_]\w*)'
+    r'(?:\s+(?:ASC|DESC))?(?:\s+NULLS\s+(?:FIRST|LAST))?$',
+    re.IGNORECASE
+)
+_PREDICATE_NON_COLUMNS = {'AND', 'OR', 'NOT', 'NULL', 'TRUE', 'FALSE', 'WHERE', 'ON', 'HAVING', 'WHEN', 'THEN',
+                          'ELSE', 'END', 'CASE', 'SELECT', 'EXISTS', 'ANY', 'ALL', 'SOME'}
+
+class SchemaIndexAdvisor:
+    """
+    스키마 카탈로그 기반 인덱스 제안 클래스
     
-    def __init__(self, parser: SQLQueryParser, structure_analysis: Dict[str, Any]):
-        self.parser = parser
-        self.structure = parser.get_parsed_structure()
-        self.structure_analysis = structure_analysis
-        self.join_relationships = []
-        self.cte_dependencies = []
-        self.subquery_relationships = []
-        self.all_tables = set()
-        self.all_ctes = set()
+    쿼리 트리의 블록마다 WHERE/JOIN 조건과 ORDER BY 컬럼을 카탈로그 테이블에 연결하고,
+    - 기존 인덱스의 선두 컬럼이 조건에 쓰이는지(사용 가능 여부) 확인하고
+    - 등가 조건 컬럼 + 범위 조건(또는 정렬) 컬럼 순서의 복합 인덱스 후보를 만들어
+      기존 인덱스가 이미 처리하는 후보는 제외하고, 처리하는 조건 가중치 합으로 순위를 매깁니다.
+    - SELECT 컬럼까지 포함할 수 있으면 INCLUDE 커버링 인덱스로 제안합니다.
+    """
+    
+    # 조건 종류별 가중치
+    PREDICATE_WEIGHTS = {'eq': 3, 'join': 3, 'range': 2, 'sort': 1}
+    # 커버링 인덱스 최대 컬럼 수 (키 + INCLUDE)
+    MAX_COVERING_COLUMNS = 5
+    
+    def __init__(self, context: AnalysisContext, catalog: SchemaCatalog):
+        self.context = context
+        self.catalog = catalog
     
     def analyze(self) -> Dict[str, Any]:
-        """리니지 분석 수행"""
-        # JOIN 관계 추출
-        self.join_relationships = self.extract_join_relationships()
-        
-        # CTE 의존성 추출
-        self.cte_dependencies = self.extract_cte_dependencies()
-        
-        # 서브쿼리 관계 추출
-        self.subquery_relationships = self.extract_subquery_relationships()
+        """스키마 기반 인덱스 분석 수행"""
+        groups = []
+        unknown_tables = set()
+        for tree, scope in self.context.parser.iter_scopes():
+            check_cancelled()
+            groups.extend(self._collect_scope(tree, scope, unknown_tables))
         
-        # 모든 테이블 및 CTE 수집
-        self.all_tables = set(self.structure['tables'])
-        
-        # JOIN 관계에서 테이블 추가
-        for join_rel in self.join_relationships:
-            left_table = join_rel.get('left_table')
-            right_table = join_rel.get('right_table')
-            if left_table and left_table != 'unknown':
-                self.all_tables.add(left_table)
-            if right_table and right_table != 'unknown':
-                self.all_tables.add(right_table)
-        
-        # CTE 의존성에서 테이블 추가
-        for cte_dep in self.cte_dependencies:
-            referenced_tables = cte_dep.get('referenced_tables', [])
-            self.all_tables.update(referenced_tables)
-        
-        # 서브쿼리 관계에서 테이블 추가
-        for subq_rel in self.subquery_relationships:
-            referenced_tables = subq_rel.get('referenced_tables', [])
-            self.all_tables.update(referenced_tables)
+        filtered = defaultdict(dict)
+        for group in groups:
+            for column, kind in group['columns'].items():
+                filtered[group['table']].setdefault(column, kind)
         
-        # CTE 처리
-        for cte in self.structure['ctes']:
-            self.all_ctes.add(cte['name'])
-            # CTE가 참조하는 테이블도 추가
-            cte_parser = SQLQueryParser(cte['query'])
-            self.all_tables.update(cte_parser.extract_tables())
+        usable, unusable = self._check_existing_indexes(filtered)
+        recommendations = self._rank_candidates(groups)
         
         return {
-            'tables': sorted(list(self.all_tables)),
-            'ctes': sorted(list(self.all_ctes)),
-            'join_relationships': self.join_relationships,
-            'cte_dependencies': self.cte_dependencies,
-            'subquery_relationships': self.subquery_relationships
+            'catalog': {
+                'source': self.catalog.source,
+                'table_count': len(self.catalog.tables),
+                'index_count': len(self.catalog.indexes)
+            },
+            'usable_indexes': usable,
+            'unusable_indexes': unusable,
+            'recommendations': recommendations,
+            'unknown_tables': sorted(unknown_tables)
         }
     
-    def extract_join_relationships(self) -> List[Dict[str, Any]]:
-        """JOIN 관계 추출"""
-        relationships = []
-        joins = self.structure['joins']
-        tables = self.structure['tables']
+    # ----- 조건 수집 -----
+    
+    def _collect_scope(self, tree: QueryTree, scope: QueryScope, unknown_tables: Set[str]) -> List[Dict[str, Any]]:
+        """쿼리 블록 하나의 테이블별 조건 그룹 수집"""
+        predicates = defaultdict(list)
         
-        # FROM 절의 첫 번째 테이블 찾기
-        main_table = None
-        if tables:
-            main_table = tables[0]
+        def add(table: Optional[str], column: str, kind: str, text: str):
+            if table is not None:
+                predicates[table].append((column, kind, text))
         
-        for join_info in joins:
-            join_table = join_info.get('table')
-            if not join_table:
+        if scope.where is not None:
+            where_text = tree.compact_text(scope.where.first, scope.where.last)
+            self._collect_predicates(scope, where_text, add, unknown_tables)
+        
+        for join in scope.joins:
+            if join.condition is None or join.item is None:
                 continue
-            
-            # JOIN 조건에서 테이블 추출 시도
-            condition = join_info.get('condition', '')
-            left_table = main_table
-            right_table = join_table
-            
-            # JOIN 조건에서 테이블명 추출
-            if condition:
-                # table1.column = table2.column 패턴 찾기
-                parts = re.split(r'[=<>!]+', condition)
-                for part in parts:
-                    part = part.strip()
-                    if '.' in part:
-                        table_name = part.split('.')[0].strip().strip('"\'`')
-                        if table_name in tables:
-                            if not left_table or left_table == main_table:
-                                left_table = table_name
-                            else:
-                                right_table = table_name
-            
-            relationships.append({
-                'left_table': left_table or 'unknown',
-                'right_table': right_table,
-                'join_type': join_info.get('type', 'JOIN'),
-                'condition': condition
+            condition = tree.compact_text(join.condition.first, join.condition.last)
+            if join.condition.clause == 'USING':
+                refs = [ref for ref in scope.table_refs() if ref.ref_type == 'table']
+                for column in _SIMPLE_IDENTIFIER.findall(condition):
+                    for ref in refs:
+                        table = self._catalog_table(ref, unknown_tables)
+                        if table and self.catalog.has_column(table, column) is not False:
+                            add(table, normalize_identifier(column), 'join', f'USING {condition}')
+                continue
+            self._collect_predicates(scope, condition, add, unknown_tables, join_only=True)
+        
+        for item in scope.order_by:
+            match = _COLUMN_REFERENCE_PATTERN.match(item.name or '')
+            if match:
+                table, column = self._resolve(scope, match.group('qualifier'), match.group('column'), unknown_tables)
+                add(table, column, 'sort', item.name)
+        
+        groups = []
+        for table, entries in predicates.items():
+            columns = {}
+            for column, kind, _ in entries:
+                # 같은 컬럼은 가장 강한 조건 종류로 집계 (eq/join > range > sort)
+                if column not in columns or self.PREDICATE_WEIGHTS[kind] > self.PREDICATE_WEIGHTS[columns[column]]:
+                    columns[column] = kind
+            groups.append({
+                'table': table,
+                'columns': columns,
+                'predicates': list(dict.fromkeys(text for _, _, text in entries)),
+                'select_columns': self._select_columns(tree, scope, table, unknown_tables)
             })
-            
-            # 다음 JOIN을 위한 메인 테이블 업데이트
-            main_table = right_table
-        
-        return relationships
+        return groups
     
-    def extract_cte_dependencies(self) -> List[Dict[str, Any]]:
-        """CTE 의존성 추출"""
-        dependencies = []
-        ctes = self.structure['ctes']
-        
-        for cte in ctes:
-            cte_name = cte['name']
-            cte_query = cte['query']
-            
-            # CTE 쿼리 파싱
-            try:
-                cte_parser = SQLQueryParser(cte_query)
-                referenced_tables = cte_parser.extract_tables()
-                referenced_ctes = []
-                
-                # 다른 CTE 참조 확인
-                for other_cte in ctes:
-                    if other_cte['name'] != cte_name:
-                        # CTE 쿼리에 다른 CTE 이름이 포함되어 있는지 확인
-                        if other_cte['name'].lower() in cte_query.lower():
-                            referenced_ctes.append(other_cte['name'])
-                
-                dependencies.append({
-                    'cte_name': cte_name,
+    def _collect_predicates(self, scope: QueryScope, text: str, add: Callable, unknown_tables: Set[str],
+                            join_only: bool = False):
+        """조건 텍스트에서 인덱스로 처리할 수 있는 비교 조건 수집"""
+        for match in _EQUI_JOIN_PATTERN.finditer(text):
+            left = self._resolve(scope, match.group('lq'), match.group('lc'), unknown_tables)
+            right = self._resolve(scope, match.group('rq'), match.group('rc'), unknown_tables)
+            if left[0] and right[0] and left[0] != right[0]:
+                add(left[0], left[1], 'join', match.group())
+                add(right[0], right[1], 'join', match.group())
+        if join_only:
+            return
+        for match in _INDEX_PREDICATE_PATTERN.finditer(text):
+            column = match.group('column')
+            if column.upper() in _PREDICATE_NON_COLUMNS:
+                continue
+            op = ' '.join(match.group('op').upper().split())
+            if op in ('=', 'IN', 'IS NULL'):
+                kind = 'eq'
+            elif op in ('<', '>', '<=', '>=', 'BETWEEN'):
+                kind = 'range'
+            elif op == 'LIKE' and not re.match(r"\s*'[%_]", text[match.end():]):
+                kind = 'range'
+            else:
+                # <>, !=, NOT IN, NOT LIKE, IS NOT NULL, '%...' LIKE: B-tree 인덱스 탐색 불가
+                continue
+            table, column = self._resolve(scope, match.group('qualifier'), column, unknown_tables)
+            add(table, column, kind, f'{match.group().strip()} ...')
+    
+    def _catalog_table(self, ref: TableRef, unknown_tables: Set[str]) -> Optional[str]:
+        """FROM/JOIN 항목의 카탈로그 테이블명 (카탈로그에 없으면 unknown_tables에 기록)"""
+        if ref.ref_type != 'table' or not ref.name:
+            return None
+        table = self.catalog.find_table(ref.name)
+        if table is None:
+            unknown_tables.add(ref.name)
+            return None
+        return table['name']
+    
+    def _resolve(self, scope: QueryScope, qualifier: Optional[str], column: str,
+                 unknown_tables: Set[str]) -> Tuple[Optional[str], str]:
+        """컬럼 참조를 (카탈로그 테이블명, 정규화된 컬럼명)으로 변환 (연결할 수 없으면 테이블 None)"""
+        column = normalize_identifier(column)
+        if qualifier:
+            ref = scope.resolve_qualifier(normalize_identifier(qualifier))
+            table = self._catalog_table(ref, unknown_tables) if ref is not None else None
+        else:
+            tables = [table for table in (self._catalog_table(ref, unknown_tables) for ref in scope.table_refs())
+                      if table]
+            owners = [table for table in tables if self.catalog.has_column(table, column)]
+            if len(owners) == 1:
+                table = owners[0]
+            elif len(tables) == 1:
+                table = tables[0]
+            else:
+                table = None
+        if table is None or self.catalog.has_column(table, column) is False:
+            return None, column
+        return table, self.catalog.column_name(table, column)
+    
+    def _select_columns(self, tree: QueryTree, scope: QueryScope, table: str,
+                        unknown_tables: Set[str]) -> Optional[List[str]]:
+        """블록의 SELECT 목록 중 table의 단순 컬럼 (* 또는 단순 컬럼이 아닌 식이 있으면 None)"""
+        columns = []
+        for item in scope.columns:
+            match = _SELECT_COLUMN_PATTERN.match(tree.compact_text(item.first, item.last))
+            if not match:
+                return None
+            owner, column = self._resolve(scope, match.group('qualifier'), match.group('column'), unknown_tables)
+            if owner == table and column not in columns:
+                columns.append(column)
+        return columns
+    
+    # ----- 기존 인덱스 확인 -----
+    
+    def _check_existing_indexes(self, filtered: Dict[str, Dict[str, str]]) -> Tuple[List, List]:
+        """조건이 걸린 테이블의 기존 인덱스별 선두 컬럼 사용 가능 여부"""
+        usable = []
+        unusable = []
+        for table, columns in filtered.items():
+            for index in self.catalog.indexes_for(table):
+                if index['method'] != 'btree' or not index['columns']:
+                    continue
+                touched = [column for column in index['columns'] if column in columns]
+                if not touched:
+                    continue
+                leading = index['columns'][0]
+                if leading in columns:
+                    matched = []
+                    for column in index['columns']:
+                        kind = columns.get(column)
+                        if kind is None:
+                            break
+                        matched.append(column)
+                        if kind in ('range', 'sort'):
+                            break
+                    usable.append({
+                        'index': index['name'],
+                        'table': table,
+                        'columns': index['columns'],
+                        'matched_columns': matched,
+                        'partial': index['partial']
+                    })
+                else:
+                    unusable.append({
+                        'index': index['name'],
+                        'table': table,
+                        'columns': index['columns'],
+                        'leading_column': leading,
+                        'filtered_columns': touched,
+                        'reason': f'선두 컬럼 {leading} 조건 없음'
+                    })
+        return usable, unusable
+    
+    @staticmethod
+    def _serves(columns: List[str], key: List[str], equality_count: int) -> bool:
+        """인덱스 컬럼 순서(columns)로 후보 키(앞의 equality_count개는 순서 무관)를 처리할 수 있는지"""
+        return len(columns) >= len(key) and \
+            set(columns[:equality_count]) == set(key[:equality_count]) and \
+            columns[equality_count:len(key)] == key[equality_count:]
+    
+    def _leading_indexed(self, table: str, column: str) -> bool:
+        """column이 기존 B-tree 인덱스(부분 인덱스 제외)의 선두 컬럼인지"""
+        return any(index['method'] == 'btree' and not index['partial'] and index['columns'][:1] == [column]
+                   for index in self.catalog.indexes_for(table))
+    
+    def _existing_index_for(self, table: str, key: List[str], equality_count: int) -> Optional[Dict[str, Any]]:
+        """후보 키를 이미 처리하는 기존 B-tree 인덱스 (부분 인덱스 제외)"""
+        for index in self.catalog.indexes_for(table):
+            if index['method'] == 'btree' and not index['partial'] and \
+                    self._serves(index['columns'], key, equality_count):
+                return index
+        return None
+    
+    # ----- 후보 생성 및 순위 -----
+    
+    def _rank_candidates(self, groups: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """조건 그룹별 인덱스 후보를 만들고 합쳐서 점수순으로 정렬"""
+        column_frequency = Counter((group['table'], column) for group in groups for column in group['columns'])
+        candidates = {}
+        
+        for group in groups:
+            table = group['table']
+            # 기존 인덱스의 선두 컬럼인 조인 컬럼(예: PK)은 이미 조인 탐색이 가능하므로 후보 키에서 제외
+            columns = {c: kind for c, kind in group['columns'].items()
+                       if kind != 'join' or not self._leading_indexed(table, c)}
+            equality = [c for c, kind in columns.items() if kind in ('eq', 'join')]
+            equality.sort(key=lambda c: -column_frequency[(table, c)])
+            ranges = [c for c, kind in columns.items() if kind == 'range']
+            sorts = [c for c, kind in columns.items() if kind == 'sort']
+            key = equality + (ranges[:1] if ranges else sorts)
+            if not key:
+                continue
+            
+            served = key[:len(equality) + 1] if ranges else key
+            score = sum(self.PREDICATE_WEIGHTS[columns[c]] for c in served)
+            candidate_key = (table, tuple(sorted(key[:len(equality)])) + tuple(key[len(equality):]))
+            candidate = candidates.setdefault(candidate_key, {
+                'table': table,
+                'columns': key,
+                'equality_count': len(equality),
+                'include': None,
+                'score': 0,
+                'serves': [],
+                'select_columns': group['select_columns']
+            })
+            candidate['score'] += score
+            candidate['serves'].extend(p for p in group['predicates'] if p not in candidate['serves'])
+            if candidate['select_columns'] is not None and group['select_columns'] is not None:
+                candidate['select_columns'] = list(dict.fromkeys(candidate['select_columns'] + group['select_columns']))
+            else:
+                candidate['select_columns'] = None
+        
+        # 다른 후보의 앞부분(선두 컬럼)과 같은 후보는 긴 후보에 합침
+        merged = sorted(candidates.values(), key=lambda c: -len(c['columns']))
+        result = []
+        for candidate in merged:
+            host = next((other for other in result if other['table'] == candidate['table']
+                         and self._serves(other['columns'], candidate['columns'], candidate['equality_count'])),
+                        None)
+            if host:
+                host['score'] += candidate['score']
+                host['serves'].extend(p for p in candidate['serves'] if p not in host['serves'])
+            else:
+                result.append(candidate)
+        
+        recommendations = []
+        for candidate in result:
+            table = candidate['table']
+            key = candidate['columns']
+            existing = self._existing_index_for(table, key, candidate['equality_count'])
+            extra = [c for c in (candidate['select_columns'] or []) if c not in key]
+            if extra and len(key) + len(extra) <= self.MAX_COVERING_COLUMNS:
+                if existing and set(extra) <= set(existing['columns']) | set(existing['include']):
+                    continue
+                kind = 'COVERING'
+                include = extra
+            elif existing:
+                # 이미 있는 인덱스는 제안하지 않음
+                continue
+            else:
+                kind = 'COMPOSITE' if len(key) > 1 else 'SINGLE'
+                include = []
+            recommendations.append({
+                'table': table,
+                'columns': key,
+                'include': include,
+                'kind': kind,
+                'score': candidate['score'],
+                'serves': candidate['serves'][:5],
+                'extends': existing['name'] if existing else None,
+                'ddl': self._index_ddl(table, key, include)
+            })
+        
+        recommendations.sort(key=lambda r: (-r['score'], r['table'], r['columns']))
+        return recommendations
+    
+    @staticmethod
+    def _index_ddl(table: str, columns: List[str], include: List[str]) -> str:
+        """CREATE INDEX 예시 DDL"""
+        name = f"idx_{table.split('.')[-1]}_{'_'.join(columns)}".lower()[:63]
+        ddl = f"CREATE INDEX {quote_identifier(name)} ON {quote_identifier(table)} " \
+              f"({', '.join(quote_identifier(c) for c in columns)})"
+        if include:
+            ddl += f" INCLUDE ({', '.join(quote_identifier(c) for c in include)})"
+        return ddl + ';'
+
+# ============================================
+# 테이블 통계
+# ============================================
+
+# PostgreSQL 배열 리터럴 ({a,"b c",NULL})의 요소
+_PG_ARRAY_ELEMENT = re.compile(r'"((?:[^"\\]|\\.)*)"|([^,{}]+)')
+
+def _parse_stats_array(value: Any) -> List[Any]:
+    """pg_stats 배열 값(JSON 리스트, PostgreSQL 배열 리터럴, JSON 배열 문자열)을 리스트로 변환"""
+    if value is None or value == '':
+        return []
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    text = str(value).strip()
+    if text.startswith('['):
+        return json.loads(text)
+    if text.startswith('{') and text.endswith('}'):
+        items = []
+        for match in _PG_ARRAY_ELEMENT.finditer(text[1:-1]):
+            if match.group(1) is not None:
+                items.append(re.sub(r'\\(.)', r'\1', match.group(1)))
+            else:
+                item = match.group(2).strip()
+                items.append(None if item.upper() == 'NULL' else item)
+        return items
+    return [text]
+
+def _stats_number(value: Any) -> Optional[float]:
+    """통계 수치 변환 (빈 값은 None)"""
+    if value is None or value == '':
+        return None
+    return float(value)
+
+class StatisticsCatalog:
+    """
+    테이블/컬럼 통계 카탈로그 (오프라인 비용 추정용)
+    
+    pg_class(reltuples, relpages)와 pg_stats(null_frac, n_distinct, most_common_vals,
+    most_common_freqs, histogram_bounds)를 CSV 또는 JSON으로 내보낸 파일에서 만듭니다.
+    n_distinct가 음수이면 PostgreSQL과 같이 행 수에 대한 비율로 해석합니다.
+    
+    JSON 형식:
+        {"tables": {"users": {"rows": 120000, "pages": 1500,
+                              "columns": {"status": {"n_distinct": 4, "null_frac": 0.0,
+                                                     "most_common_vals": ["active", "inactive"],
+                                                     "most_common_freqs": [0.82, 0.15]}}}}}
+    또는 내보낸 행 그대로: {"pg_class": [{"relname": ..., "reltuples": ...}], "pg_stats": [{...}]}
+    (최상위가 리스트이면 pg_stats 행 목록)
+    CSV: attname 열이 있으면 pg_stats 행, 없으면 relname(tablename) + reltuples(rows) 행
+    """
+    
+    def __init__(self, source: str = ''):
+        self.source = source
+        # 테이블명 -> {'name', 'rows', 'pages', 'columns': 컬럼명 -> 컬럼 통계}
+        self.tables = {}
+    
+    def set_table(self, name: str, rows: Optional[float] = None, pages: Optional[float] = None):
+        """테이블 행 수/페이지 수 등록 (name: 정규화된 테이블명, None인 값은 유지)"""
+        table = self.tables.setdefault(name, {'name': name, 'rows': None, 'pages': None, 'columns': {}})
+        if rows is not None:
+            table['rows'] = rows
+        if pages is not None:
+            table['pages'] = pages
+        return table
+    
+    def set_column(self, table_name: str, column: str, null_frac: Optional[float] = None,
+                   n_distinct: Optional[float] = None, most_common_vals: Sequence[Any] = (),
+                   most_common_freqs: Sequence[float] = (), histogram_bounds: Sequence[Any] = ()):
+        """컬럼 통계 등록 (table_name/column: 정규화된 이름)"""
+        table = self.set_table(table_name)
+        table['columns'][column] = {
+            'null_frac': null_frac or 0.0,
+            'n_distinct': n_distinct,
+            'most_common_vals': list(most_common_vals),
+            'most_common_freqs': [float(f) for f in most_common_freqs],
+            'histogram_bounds': list(histogram_bounds)
+        }
+    
+    def add_row(self, row: Dict[str, Any]):
+        """pg_class / pg_stats 내보내기 행 하나 반영 (열 이름 대소문자 무시, 이름은 카탈로그 표기 그대로)"""
+        row = {str(key).strip().lower(): value for key, value in row.items() if key is not None}
+        table = row.get('tablename') or row.get('relname') or row.get('table_name') or row.get('table')
+        if not table:
+            return
+        schema = row.get('schemaname') or row.get('nspname') or row.get('schema')
+        # public 스키마는 생략 (pg_class만 따로 내보내면 스키마 열이 없는 경우가 많으므로 같은 테이블로 합침)
+        name = f'{schema}.{table}' if schema and schema != 'public' else table
+        rows = _stats_number(row.get('reltuples', row.get('rows', row.get('row_count'))))
+        # reltuples = -1: 아직 ANALYZE되지 않은 테이블
+        self.set_table(name, rows if rows is not None and rows >= 0 else None,
+                       _stats_number(row.get('relpages', row.get('pages'))))
+        column = row.get('attname') or row.get('column_name') or row.get('column')
+        if column:
+            self.set_column(name, column, _stats_number(row.get('null_frac')), _stats_number(row.get('n_distinct')),
+                            _parse_stats_array(row.get('most_common_vals')),
+                            _parse_stats_array(row.get('most_common_freqs')),
+                            _parse_stats_array(row.get('histogram_bounds')))
+    
+    def find_table(self, name: str) -> Optional[Dict[str, Any]]:
+        """테이블 통계 조회 (SchemaCatalog.find_table과 같은 규칙)"""
+        return _find_table_entry(self.tables, normalize_identifier(name))
+    
+    @staticmethod
+    def column_stats(table: Optional[Dict[str, Any]], column: str) -> Optional[Dict[str, Any]]:
+        """테이블 통계에서 컬럼 통계 조회 (정확히 일치하는 이름 우선, 없으면 대소문자 무시)"""
+        if not table:
+            return None
+        column = normalize_identifier(column)
+        if column in table['columns']:
+            return table['columns'][column]
+        matches = [stats for name, stats in table['columns'].items() if name.lower() == column.lower()]
+        return matches[0] if len(matches) == 1 else None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON 통계 형식으로 변환"""
+        return {
+            'tables': {name: {'rows': table['rows'], 'pages': table['pages'], 'columns': table['columns']}
+                       for name, table in sorted(self.tables.items())}
+        }
+    
+    @property
+    def fingerprint(self) -> str:
+        """통계 내용 해시 (분석 결과 캐시 키 구분용)"""
+        return hashlib.sha256(json.dumps(self.to_dict(), sort_keys=True, default=str).encode('utf-8')).hexdigest()[:16]
+    
+    @classmethod
+    def from_dict(cls, data: Any, source: str = '', statistics: Optional['StatisticsCatalog'] = None
+                  ) -> 'StatisticsCatalog':
+        """JSON 통계에서 생성 (statistics를 주면 그 카탈로그에 추가)"""
+        statistics = statistics or cls(source)
+        if isinstance(data, list):
+            data = {'pg_stats': data}
+        for row in data.get('pg_class', []):
+            statistics.add_row(row)
+        for row in data.get('pg_stats', []):
+            statistics.add_row(row)
+        tables = data.get('tables', {})
+        if isinstance(tables, dict):
+            tables = [dict(table, name=name) for name, table in tables.items()]
+        for table in tables:
+            name = normalize_identifier(table['name'])
+            rows = _stats_number(table.get('rows', table.get('reltuples', table.get('row_count'))))
+            statistics.set_table(name, rows if rows is not None and rows >= 0 else None,
+                                 _stats_number(table.get('pages', table.get('relpages'))))
+            columns = table.get('columns', {})
+            if isinstance(columns, dict):
+                columns = [dict(column, name=column_name) for column_name, column in columns.items()]
+            for column in columns:
+                statistics.set_column(name, normalize_identifier(column.get('name') or column['attname']),
+                                      _stats_number(column.get('null_frac')),
+                                      _stats_number(column.get('n_distinct')),
+                                      _parse_stats_array(column.get('most_common_vals')),
+                                      _parse_stats_array(column.get('most_common_freqs')),
+                                      _parse_stats_array(column.get('histogram_bounds')))
+        return statistics
+    
+    @classmethod
+    def from_csv(cls, csv_text: str, source: str = '', statistics: Optional['StatisticsCatalog'] = None
+                 ) -> 'StatisticsCatalog':
+        """CSV 내보내기(헤더 포함)에서 생성 (statistics를 주면 그 카탈로그에 추가)"""
+        statistics = statistics or cls(source)
+        for row in csv.DictReader(io.StringIO(csv_text)):
+            statistics.add_row(row)
+        return statistics
+    
+    @classmethod
+    def load(cls, path: str) -> 'StatisticsCatalog':
+        """
+        파일 또는 디렉토리에서 통계 로드
+        
+        - .json: JSON 통계, 그 외 파일: CSV
+        - 디렉토리: 하위의 *.csv와 *.json을 경로 순서대로 합침 (pg_class/pg_stats를 따로 내보낸 경우)
+        """
+        statistics = cls(path)
+        for file_path in _statistics_files(path):
+            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                content = f.read()
+            if file_path.suffix.lower() == '.json':
+                cls.from_dict(json.loads(content), str(file_path), statistics)
+            else:
+                cls.from_csv(content, str(file_path), statistics)
+        return statistics
+
+# 통계 경로를 지정하지 않았을 때 워크스페이스에서 찾는 위치 (앞쪽 우선)
+STATISTICS_CANDIDATES = ('pg_stats.json', 'pg_stats.csv', 'table_stats.json', 'table_stats.csv', 'pg_stats')
+
+# (절대 경로, 파일 수정 시각 목록) -> StatisticsCatalog
+_statistics_catalogs: Dict[Tuple[str, Tuple], StatisticsCatalog] = {}
+
+def _statistics_files(path: str) -> List[Path]:
+    """통계 파일 목록 (디렉토리면 하위의 *.csv, *.json)"""
+    if os.path.isdir(path):
+        return sorted(p for p in Path(path).rglob('*') if p.suffix.lower() in ('.csv', '.json'))
+    return [Path(path)]
+
+def find_workspace_statistics(workspace_path: str) -> Optional[str]:
+    """워크스페이스의 기본 통계 파일 위치 반환 (없으면 None)"""
+    for candidate in STATISTICS_CANDIDATES:
+        path = os.path.join(workspace_path, candidate)
+        if os.path.exists(path):
+            return path
+    return None
+
+def load_statistics_catalog(path: str) -> StatisticsCatalog:
+    """통계 카탈로그 로드 (파일이 바뀌지 않았으면 이전에 만든 카탈로그 재사용)"""
+    path = os.path.abspath(path)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"통계 파일을 찾을 수 없습니다: {path}")
+    files = _statistics_files(path)
+    key = (path, tuple((str(p), p.stat().st_mtime_ns, p.stat().st_size) for p in files))
+    if key not in _statistics_catalogs:
+        for stale in [k for k in _statistics_catalogs if k[0] == path]:
+            del _statistics_catalogs[stale]
+        _statistics_catalogs[key] = StatisticsCatalog.load(path)
+    return _statistics_catalogs[key]
+
+# ============================================
+# 비용 추정기 클래스
+# ============================================
+
+# 비교 연산자 뒤의 상수 (문자열, 숫자, 불리언)
+_LITERAL_PATTERN = re.compile(r"\s*(?:'((?:[^']|'')*)'|(-?\d+(?:\.\d+)?)(?![\w.])|(TRUE|FALSE)\b)", re.IGNORECASE)
+# BETWEEN 상수 범위
+_BETWEEN_PATTERN = re.compile(
+    r"\s*('(?:[^']|'')*'|-?\d+(?:\.\d+)?)\s+AND\s+('(?:[^']|'')*'|-?\d+(?:\.\d+)?)", re.IGNORECASE
+)
+# IN 목록/서브쿼리의 여는 괄호
+_OPEN_PAREN_PATTERN = re.compile(r'\s*\(')
+# 집계 함수 (윈도 함수 제외는 호출부에서 OVER로 확인)
+_AGGREGATE_PATTERN = re.compile(r'\b(?:COUNT|SUM|AVG|MIN|MAX|ARRAY_AGG|STRING_AGG)\s*\(', re.IGNORECASE)
+
+def _literal_value(text: str, pos: int = 0) -> Optional[str]:
+    """text의 pos 위치(연산자 뒤)에 있는 상수 값 (상수가 아니면 None)"""
+    match = _LITERAL_PATTERN.match(text, pos)
+    if not match:
+        return None
+    if match.group(1) is not None:
+        return match.group(1).replace("''", "'")
+    return match.group(2) or match.group(3).lower()
+
+def _value_key(value: Any) -> Tuple[int, Any]:
+    """통계 값 비교 키 (숫자로 읽히면 숫자 비교, 아니면 문자열 비교)"""
+    try:
+        return 0, float(value)
+    except (TypeError, ValueError):
+        return 1, str(value)
+
+class CostEstimator:
+    """
+    통계 기반 오프라인 비용/카디널리티 추정 클래스
+    
+    PostgreSQL 플래너의 기본 가정을 단순화해 쿼리 블록마다 다음을 추정합니다.
+    - 테이블별 선택도: 등가 조건은 MCV 빈도 또는 나머지 값의 균등 분포, 범위 조건은
+      MCV + 히스토그램 (없으면 1/3), IS NULL은 null_frac. 조건끼리는 독립(AND)으로 가정
+    - 조인 출력 행 수: |A| x |B| / max(n_distinct(A.x), n_distinct(B.y))
+    - 대략적인 비용: 순차 스캔 + 해시 조인(등가 조건) 또는 중첩 루프 조인 + 정렬/집계.
+      상관 서브쿼리는 바깥 블록 행 수만큼 반복 실행하는 것으로 계산
+    통계가 없는 테이블은 기본 행 수를 쓰고 missing_statistics에 기록합니다.
+    비용 단위는 PostgreSQL과 같은 상대 단위(순차 페이지 읽기 1.0)입니다.
+    """
+    
+    # PostgreSQL 기본 비용 상수
+    SEQ_PAGE_COST = 1.0
+    CPU_TUPLE_COST = 0.01
+    CPU_OPERATOR_COST = 0.0025
+    # 통계가 없을 때의 가정 (PostgreSQL 선택도 기본값)
+    DEFAULT_ROWS = 1000
+    ROWS_PER_PAGE = 100
+    DEFAULT_NUM_DISTINCT = 200
+    DEFAULT_INEQ_SEL = 1 / 3
+    DEFAULT_RANGE_SEL = 0.005
+    DEFAULT_MATCH_SEL = 0.005
+    DEFAULT_NULL_SEL = 0.005
+    DEFAULT_SEMI_SEL = 0.5
+    
+    def __init__(self, context: AnalysisContext, statistics: StatisticsCatalog):
+        self.context = context
+        self.statistics = statistics
+        self._tables = {}
+        self._estimates = {}
+        self._missing = set()
+    
+    def estimate(self) -> Dict[str, Any]:
+        """
+        비용 추정 수행
+        
+        Returns:
+            Dict: {'statistics', 'total_cost', 'estimated_rows', 'missing_statistics',
+                   'blocks': 쿼리 블록별 추정 (Statement 순서, 블록은 전위 순회 순서)}
+        """
+        parser = self.context.parser
+        blocks = []
+        total_cost = 0.0
+        estimated_rows = 0.0
+        for statement_index, tree in enumerate(self.context.query_trees, 1):
+            check_cancelled()
+            children = defaultdict(list)
+            for scope in tree.scopes:
+                if scope.parent is not None:
+                    children[scope.parent].append(scope)
+            root = self._estimate(tree, tree.root, children)
+            root['loops'] = 1
+            root['total_cost'] = root['subtotal']
+            total_cost += root['total_cost']
+            estimated_rows += root['rows']
+            for scope in tree.scopes:
+                estimate = self._estimate(tree, scope, children)
+                blocks.append({
+                    'statement': statement_index,
+                    'kind': scope.kind,
+                    'location': scope.location,
+                    'depth': scope.depth,
+                    'tables': estimate['tables'],
+                    'rows': round(estimate['rows']),
+                    'loops': round(estimate['loops']),
+                    'correlated': estimate['correlated'],
+                    'cost': round(estimate['cost'], 2),
+                    'total_cost': round(estimate['total_cost'], 2),
+                    'span': parser.node_span(tree, scope.first, scope.last)
+                })
+        
+        return {
+            'statistics': {'source': self.statistics.source, 'table_count': len(self.statistics.tables)},
+            'total_cost': round(total_cost, 2),
+            'estimated_rows': round(estimated_rows),
+            'missing_statistics': sorted(self._missing),
+            'blocks': blocks
+        }
+    
+    # ----- 통계 조회 -----
+    
+    def _table_stats(self, ref: TableRef) -> Optional[Dict[str, Any]]:
+        """FROM/JOIN 테이블의 통계 (행 수를 모르면 missing_statistics에 기록)"""
+        if ref.ref_type != 'table' or not ref.name:
+            return None
+        if ref.name not in self._tables:
+            table = self.statistics.find_table(ref.name)
+            self._tables[ref.name] = table
+            if table is None or table['rows'] is None:
+                self._missing.add(ref.name)
+        return self._tables[ref.name]
+    
+    def _table_rows(self, table: Optional[Dict[str, Any]]) -> float:
+        """테이블 행 수 (모르면 기본값)"""
+        return table['rows'] if table and table['rows'] is not None else self.DEFAULT_ROWS
+    
+    def _column(self, relations: Dict[TableRef, Dict[str, Any]], ref: TableRef,
+                column: str) -> Tuple[Optional[Dict[str, Any]], float]:
+        """(컬럼 통계, 테이블 행 수) - 바깥 블록의 테이블이면 행 수는 통계 또는 기본값"""
+        relation = relations.get(ref)
+        if relation is not None:
+            return StatisticsCatalog.column_stats(relation['stats'], column), relation['rows']
+        table = self._table_stats(ref)
+        return StatisticsCatalog.column_stats(table, column), self._table_rows(table)
+    
+    def _distinct(self, column_stats: Optional[Dict[str, Any]], rows: float) -> float:
+        """컬럼의 고유 값 수 (음수 n_distinct는 행 수 비율, 통계가 없으면 min(행 수, 200))"""
+        n_distinct = column_stats['n_distinct'] if column_stats else None
+        if n_distinct is None or n_distinct == 0:
+            n_distinct = min(rows, self.DEFAULT_NUM_DISTINCT)
+        elif n_distinct < 0:
+            n_distinct = -n_distinct * rows
+        return max(1.0, n_distinct)
+    
+    # ----- 선택도 -----
+    
+    def _eq_selectivity(self, column_stats: Optional[Dict[str, Any]], rows: float, value: Optional[str]) -> float:
+        """등가 조건 선택도 (상수가 MCV에 있으면 그 빈도, 없으면 나머지 값에 균등 분포)"""
+        n_distinct = self._distinct(column_stats, rows)
+        if not column_stats or not column_stats['most_common_vals']:
+            return 1.0 / n_distinct
+        values = column_stats['most_common_vals']
+        freqs = column_stats['most_common_freqs']
+        if value is not None:
+            key = _value_key(value)
+            for mcv, freq in zip(values, freqs):
+                if _value_key(mcv) == key:
+                    return freq
+        if value is None:
+            # 값을 모르는 경우(파라미터, 식): 평균 빈도
+            return (1.0 - column_stats['null_frac']) / n_distinct
+        rest = max(0.0, 1.0 - sum(freqs) - column_stats['null_frac'])
+        others = n_distinct - len(values)
+        return max(rest / others if others >= 1 else 0.0, 1.0 / max(rows, 1.0))
+    
+    def _range_selectivity(self, column_stats: Optional[Dict[str, Any]], op: str, value: Optional[str]) -> float:
+        """범위 조건 선택도 (MCV 중 조건을 만족하는 빈도 + 히스토그램 비율)"""
+        if not column_stats or value is None:
+            return self.DEFAULT_INEQ_SEL
+        below = self._fraction_below(column_stats, value)
+        if below is None:
+            return self.DEFAULT_INEQ_SEL
+        non_null = 1.0 - column_stats['null_frac']
+        return max(0.0, non_null - below) if op in ('>', '>=') else below
+    
+    def _fraction_below(self, column_stats: Dict[str, Any], value: str) -> Optional[float]:
+        """value보다 작은 값의 비율 (MCV/히스토그램이 없으면 None)"""
+        key = _value_key(value)
+        values = column_stats['most_common_vals']
+        freqs = column_stats['most_common_freqs']
+        bounds = column_stats['histogram_bounds']
+        if not bounds and not values:
+            return None
+        below = sum(freq for mcv, freq in zip(values, freqs) if _value_key(mcv) < key)
+        if len(bounds) >= 2:
+            points = [_value_key(bound) for bound in bounds]
+            if key <= points[0]:
+                position = 0.0
+            elif key >= points[-1]:
+                position = 1.0
+            else:
+                i = bisect_right(points, key) - 1
+                low, high = points[i][1], points[i + 1][1]
+                if points[i][0] == points[i + 1][0] == key[0] == 0 and high > low:
+                    within = (key[1] - low) / (high - low)
+                else:
+                    within = 0.5
+                position = (i + within) / (len(points) - 1)
+            below += position * max(0.0, 1.0 - sum(freqs) - column_stats['null_frac'])
+        return min(1.0, below)
+    
+    def _predicate_selectivity(self, column_stats: Optional[Dict[str, Any]], rows: float, op: str,
+                               text: str, pos: int) -> float:
+        """비교 조건 하나의 선택도 (pos: 조건 텍스트에서 연산자 바로 뒤 위치)"""
+        null_frac = column_stats['null_frac'] if column_stats else None
+        if op == 'IS NULL':
+            return null_frac if null_frac is not None else self.DEFAULT_NULL_SEL
+        if op == 'IS NOT NULL':
+            return 1.0 - (null_frac if null_frac is not None else self.DEFAULT_NULL_SEL)
+        if op in ('=', '<>', '!='):
+            selectivity = self._eq_selectivity(column_stats, rows, _literal_value(text, pos))
+            return selectivity if op == '=' else max(0.0, 1.0 - selectivity - (null_frac or 0.0))
+        if op in ('IN', 'NOT IN'):
+            match = _OPEN_PAREN_PATTERN.match(text, pos)
+            if not match:
+                return 1.0
+            body, _ = _paren_body(text, match.end() - 1)
+            if re.match(r'\s*(?:SELECT|WITH)\b', body, re.IGNORECASE):
+                selectivity = self.DEFAULT_SEMI_SEL
+            else:
+                selectivity = min(1.0, sum(self._eq_selectivity(column_stats, rows, _literal_value(item))
+                                           for item in _split_top_level(body)))
+            return selectivity if op == 'IN' else 1.0 - selectivity
+        if op in ('<', '>', '<=', '>='):
+            return self._range_selectivity(column_stats, op, _literal_value(text, pos))
+        if op == 'BETWEEN':
+            match = _BETWEEN_PATTERN.match(text, pos)
+            if match and column_stats:
+                low = self._fraction_below(column_stats, _literal_value(match.group(1)))
+                high = self._fraction_below(column_stats, _literal_value(match.group(2)))
+                if low is not None and high is not None:
+                    return max(high - low, 1.0 / max(rows, 1.0))
+            return self.DEFAULT_RANGE_SEL
+        if op in ('LIKE', 'NOT LIKE'):
+            value = _literal_value(text, pos)
+            if value is not None and not re.search(r'[%_]', value):
+                selectivity = self._eq_selectivity(column_stats, rows, value)
+            else:
+                selectivity = self.DEFAULT_MATCH_SEL
+            return selectivity if op == 'LIKE' else 1.0 - selectivity
+        return 1.0
+    
+    # ----- 쿼리 블록 추정 -----
+    
+    def _resolve(self, scope: QueryScope, relations: Dict[TableRef, Dict[str, Any]], qualifier: Optional[str],
+                 column: str) -> Optional[TableRef]:
+        """컬럼 참조가 가리키는 FROM/JOIN 항목 (한정자가 없으면 이 블록에서 컬럼 통계로 결정)"""
+        if qualifier:
+            return scope.resolve_qualifier(normalize_identifier(qualifier))
+        if len(relations) == 1:
+            return next(iter(relations))
+        owners = [ref for ref, relation in relations.items()
+                  if StatisticsCatalog.column_stats(relation['stats'], column) is not None]
+        return owners[0] if len(owners) == 1 else None
+    
+    def _collect_conditions(self, scope: QueryScope, relations: Dict[TableRef, Dict[str, Any]], text: str,
+                            edges: List[Tuple], state: Dict[str, Any]):
+        """조건 텍스트의 조인 조건(edges)과 테이블별 필터 선택도(relations[ref]['selectivity']) 수집"""
+        join_starts = set()
+        for match in _EQUI_JOIN_PATTERN.finditer(text):
+            if match.group('lc').upper() in _PREDICATE_NON_COLUMNS or match.group('rc').upper() in _PREDICATE_NON_COLUMNS:
+                continue
+            left = self._resolve(scope, relations, match.group('lq'), match.group('lc'))
+            right = self._resolve(scope, relations, match.group('rq'), match.group('rc'))
+            if left is None or right is None or left is right:
+                continue
+            join_starts.add(match.start())
+            if left in relations and right in relations:
+                edges.append((left, match.group('lc'), right, match.group('rc')))
+                continue
+            # 바깥 블록 컬럼과의 등가 조건: 상관 서브쿼리, 안쪽 컬럼에는 값을 모르는 등가 조건
+            state['correlated'] = True
+            inner, column = (left, match.group('lc')) if left in relations else (right, match.group('rc'))
+            if inner in relations:
+                column_stats, rows = self._column(relations, inner, column)
+                relations[inner]['selectivity'] *= self._eq_selectivity(column_stats, rows, None)
+                relations[inner]['quals'] += 1
+        for match in _INDEX_PREDICATE_PATTERN.finditer(text):
+            column = match.group('column')
+            if match.start() in join_starts or column.upper() in _PREDICATE_NON_COLUMNS:
+                continue
+            ref = self._resolve(scope, relations, match.group('qualifier'), column)
+            if ref is None:
+                continue
+            if ref not in relations:
+                state['correlated'] = True
+                continue
+            op = ' '.join(match.group('op').upper().split())
+            column_stats, rows = self._column(relations, ref, column)
+            relations[ref]['selectivity'] *= self._predicate_selectivity(column_stats, rows, op, text, match.end())
+            relations[ref]['quals'] += 1
+    
+    def _estimate(self, tree: QueryTree, scope: QueryScope, children: Dict[QueryScope, List[QueryScope]]
+                  ) -> Dict[str, Any]:
+        """쿼리 블록 하나의 추정 (참조하는 CTE/파생 테이블과 자식 블록을 먼저 추정, 결과는 메모이제이션)"""
+        estimate = self._estimates.get(scope)
+        if estimate is not None:
+            return estimate
+        # 재귀 CTE가 자기 자신을 참조하면 기본 행 수를 사용
+        self._estimates[scope] = {'rows': self.DEFAULT_ROWS, 'subtotal': 0.0, 'correlated': False}
+        
+        refs = scope.from_items + [join.item for join in scope.joins if join.item is not None]
+        if scope.target is not None and scope.statement_type in ('UPDATE', 'DELETE'):
+            refs.append(scope.target)
+        join_types = {join.item: join.join_type for join in scope.joins if join.item is not None}
+        
+        relations = {}
+        cost = 0.0
+        for ref in refs:
+            stats = self._table_stats(ref)
+            if ref.ref_type == 'table':
+                rows = self._table_rows(stats)
+                pages = (stats or {}).get('pages') or rows / self.ROWS_PER_PAGE
+            elif ref.ref_type in ('cte', 'subquery'):
+                body = ref.cte.query if ref.ref_type == 'cte' else ref.subquery
+                rows = self._estimate(tree, body, children)['rows']
+                pages = 0.0
+            else:
+                rows = self.DEFAULT_ROWS
+                pages = 0.0
+            relations[ref] = {'stats': stats, 'rows': max(1.0, rows), 'pages': pages,
+                              'selectivity': 1.0, 'quals': 0}
+        
+        state = {'correlated': False}
+        edges = []
+        if scope.where is not None:
+            self._collect_conditions(scope, relations, tree.compact_text(scope.where.first, scope.where.last),
+                                     edges, state)
+        for join in scope.joins:
+            if join.condition is None or join.item is None:
+                continue
+            condition = tree.compact_text(join.condition.first, join.condition.last)
+            if join.condition.clause == 'USING':
+                for column in _SIMPLE_IDENTIFIER.findall(condition):
+                    other = next((ref for ref in refs if ref is not join.item and ref in relations), None)
+                    if other is not None:
+                        edges.append((other, column, join.item, column))
+                continue
+            self._collect_conditions(scope, relations, condition, edges, state)
+        
+        # 스캔 비용과 필터 후 행 수
+        tables = []
+        for ref, relation in relations.items():
+            cost += relation['pages'] * self.SEQ_PAGE_COST + relation['rows'] * (
+                self.CPU_TUPLE_COST + relation['quals'] * self.CPU_OPERATOR_COST)
+            relation['filtered'] = max(1.0, relation['rows'] * relation['selectivity'])
+            tables.append({
+                'name': ref.display_name,
+                'type': ref.ref_type,
+                'rows': round(relation['rows']),
+                'selectivity': round(relation['selectivity'], 6),
+                'estimated_rows': round(relation['filtered']),
+                'statistics': relation['stats'] is not None and relation['stats']['rows'] is not None
+            })
+        
+        # FROM 순서대로 조인
+        rows = 1.0
+        joined = []
+        for ref in refs:
+            if ref not in relations or ref in joined:
+                continue
+            relation = relations[ref]
+            if not joined:
+                rows = relation['filtered']
+                joined.append(ref)
+                continue
+            selectivity = 1.0
+            for left, left_column, right, right_column in edges:
+                if (left is ref and right in joined) or (right is ref and left in joined):
+                    selectivity /= max(self._distinct(*self._column(relations, left, left_column)),
+                                       self._distinct(*self._column(relations, right, right_column)))
+            output = rows * relation['filtered'] * selectivity
+            join_type = join_types.get(ref, '')
+            if 'LEFT' in join_type or 'FULL' in join_type:
+                output = max(output, rows)
+            if 'RIGHT' in join_type or 'FULL' in join_type:
+                output = max(output, relation['filtered'])
+            if selectivity < 1.0:
+                # 해시 조인: 안쪽 테이블로 해시 테이블을 만들고 바깥 행마다 탐색
+                cost += relation['filtered'] * self.CPU_TUPLE_COST + \
+                    (rows + relation['filtered']) * self.CPU_OPERATOR_COST
+            else:
+                # 등가 조건이 없으면 중첩 루프 조인
+                cost += rows * relation['filtered'] * self.CPU_OPERATOR_COST
+            rows = max(1.0, output)
+            cost += rows * self.CPU_TUPLE_COST
+            joined.append(ref)
+        input_rows = rows
+        
+        # 그룹화/집계/정렬
+        if scope.group_by:
+            groups = 1.0
+            for item in scope.group_by:
+                match = _COLUMN_REFERENCE_PATTERN.match(item.name or '')
+                ref = self._resolve(scope, relations, match.group('qualifier'), match.group('column')) \
+                    if match else None
+                if ref is not None and ref in relations:
+                    groups *= self._distinct(*self._column(relations, ref, match.group('column')))
+                else:
+                    groups *= self.DEFAULT_NUM_DISTINCT
+            cost += self._sort_cost(rows) + rows * self.CPU_OPERATOR_COST
+            rows = max(1.0, min(rows, groups))
+        elif any(_AGGREGATE_PATTERN.search(text) and 'OVER' not in text.upper()
+                 for text in (tree.compact_text(item.first, item.last) for item in scope.columns)):
+            cost += rows * self.CPU_OPERATOR_COST
+            rows = 1.0
+        if scope.order_by:
+            cost += self._sort_cost(rows)
+        output_rows = rows
+        for _, branch in scope.set_operations:
+            rows += self._estimate(tree, branch, children)['rows']
+        cost += rows * self.CPU_TUPLE_COST
+        
+        # 자식 블록 (CTE 본문, 서브쿼리, 집합 연산 분기) 비용: 상관 서브쿼리는 바깥 행마다 반복
+        # (SELECT 목록의 서브쿼리는 출력 행마다, 그 밖의 조건절 서브쿼리는 조인 결과 행마다)
+        subtotal = cost
+        for child in children.get(scope, []):
+            child_estimate = self._estimate(tree, child, children)
+            loops = 1
+            if child.kind == 'subquery' and child.location not in ('FROM', 'JOIN') and child_estimate['correlated']:
+                loops = output_rows if child.location == 'SELECT' else input_rows
+            child_estimate['loops'] = loops
+            child_estimate['total_cost'] = loops * child_estimate['subtotal']
+            subtotal += child_estimate['total_cost']
+        
+        estimate = {
+            'rows': rows,
+            'cost': cost,
+            'subtotal': subtotal,
+            'loops': 1,
+            'total_cost': subtotal,
+            'correlated': state['correlated'],
+            'tables': tables
+        }
+        self._estimates[scope] = estimate
+        return estimate
+    
+    def _sort_cost(self, rows: float) -> float:
+        """정렬 비용 (비교 2 x N log2 N 회)"""
+        return 2.0 * self.CPU_OPERATOR_COST * rows * math.log2(max(rows, 2.0))
+
+# ============================================
+# 최적화 제안기 클래스
+# ============================================
+
+class OptimizationAdvisor:
+    """
+    최적화 제안 클래스 (제안은 PerformanceAnalyzer와 같은 규칙 엔진 순회에서 만들어짐)
+    
+    스키마 카탈로그를 주면 조건 텍스트만 보고 만든 인덱스 제안 대신
+    SchemaIndexAdvisor의 제안(기존 인덱스 제외, 복합/커버링 인덱스)을 사용합니다.
+    """
+    
+    # 스키마 기반 인덱스 제안 종류별 표시 이름과 예상 개선율
+    SCHEMA_INDEX_KINDS = {
+        'SINGLE': ('인덱스', '30-50%'),
+        'COMPOSITE': ('복합 인덱스', '40-60%'),
+        'COVERING': ('커버링 인덱스', '50-70%')
+    }
+    # 이 점수 이상인 스키마 기반 인덱스 제안은 HIGH 우선순위 (등가/조인 조건 하나 = 3점)
+    PRIORITY_HIGH_SCORE = 3
+    
+    def __init__(self, parser: SQLQueryParser, performance_analyzer: PerformanceAnalyzer,
+                 context: Optional[AnalysisContext] = None, catalog: Optional[SchemaCatalog] = None):
+        self.parser = parser
+        self.performance_analyzer = performance_analyzer
+        self.context = context or performance_analyzer.context
+        self.structure = self.context.structure
+        self.catalog = catalog
+        self.suggestions = []
+        self.schema_index_advice = None
+    
+    def analyze(self) -> Dict[str, Any]:
+        """최적화 제안 생성"""
+        # 성능 분석이 아직 실행되지 않았으면 규칙 엔진을 먼저 실행
+        if self.performance_analyzer.suggestions is None:
+            self.performance_analyzer.analyze()
+        self.suggestions = list(self.performance_analyzer.suggestions)
+        
+        # 스키마 기반 인덱스 제안
+        if self.catalog is not None:
+            self.schema_index_advice = SchemaIndexAdvisor(self.context, self.catalog).analyze()
+            self.suggestions = [s for s in self.suggestions if s['type'] != 'INDEX']
+            self.suggestions.extend(self._schema_index_suggestions(self.schema_index_advice))
+        
+        # 우선순위별 정렬
+        self.suggestions.sort(key=lambda x: {'HIGH': 3, 'MEDIUM': 2, 'LOW': 1}[x['priority']], reverse=True)
+        
+        result = {
+            'suggestions': self.suggestions,
+            'total_count': len(self.suggestions),
+            'high_priority_count': len([s for s in self.suggestions if s['priority'] == 'HIGH']),
+            'medium_priority_count': len([s for s in self.suggestions if s['priority'] == 'MEDIUM']),
+            'low_priority_count': len([s for s in self.suggestions if s['priority'] == 'LOW'])
+        }
+        if self.schema_index_advice is not None:
+            result['schema_index_advice'] = self.schema_index_advice
+        return result
+    
+    def _schema_index_suggestions(self, advice: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """스키마 기반 인덱스 분석 결과를 제안 목록으로 변환"""
+        suggestions = []
+        for recommendation in advice['recommendations']:
+            label, improvement = self.SCHEMA_INDEX_KINDS[recommendation['kind']]
+            message = f'{recommendation["table"]} 테이블에 {label} 추가 고려: ({", ".join(recommendation["columns"])})'
+            if recommendation['include']:
+                message += f' INCLUDE ({", ".join(recommendation["include"])})'
+            if recommendation['extends']:
+                message += f' - 기존 인덱스 {recommendation["extends"]} 대체'
+            suggestions.append({
+                'type': 'INDEX',
+                'priority': 'HIGH' if recommendation['score'] >= self.PRIORITY_HIGH_SCORE else 'MEDIUM',
+                'message': message,
+                'example': recommendation['ddl'],
+                'expected_improvement': improvement
+            })
+        for index in advice['unusable_indexes']:
+            suggestions.append({
+                'type': 'INDEX',
+                'priority': 'MEDIUM',
+                'message': f'기존 인덱스 {index["index"]}({", ".join(index["columns"])})는 '
+                           f'선두 컬럼 {index["leading_column"]} 조건이 없어 사용되지 않음',
+                'example': f'{index["leading_column"]} 조건 추가 또는 '
+                           f'({", ".join(index["filtered_columns"])}) 선두 인덱스 검토',
+                'expected_improvement': '20-40%'
+            })
+        return suggestions
+
+# ============================================
+# 복잡도 분석기 클래스
+# ============================================
+
+class ComplexityAnalyzer:
+    """복잡도 분석 클래스"""
+    
+    def __init__(self, parser: SQLQueryParser, context: Optional[AnalysisContext] = None):
+        self.parser = parser
+        self.context = context or AnalysisContext.for_parser(parser)
+        self.structure = self.context.structure
+    
+    def analyze(self) -> Dict[str, Any]:
+        """복잡도 분석 수행"""
+        metrics = {
+            'query_length': self.structure['query_length'],
+            'query_lines': self.structure['query_lines'],
+            'table_count': len(self.structure['tables']),
+            'join_count': len(self.structure['joins']),
+            'subquery_count': len(self.structure['subqueries']),
+            'max_subquery_depth': max([sq['depth'] for sq in self.structure['subqueries']], default=0),
+            'where_clause_count': len(self.structure['where_clauses']),
+            'column_count': len(self.structure['columns']),
+            'group_by_count': len(self.structure['group_by']),
+            'order_by_count': len(self.structure['order_by']),
+            'cte_count': len(self.structure['ctes']),
+            'union_count': sum(1 for operator in self.structure['set_operations'] if operator.startswith('UNION'))
+        }
+        
+        # 복잡도 점수 계산
+        score = self._calculate_complexity_score(metrics)
+        level = self._get_complexity_level(score)
+        
+        return {
+            'score': score,
+            'level': level,
+            'metrics': metrics
+        }
+    
+    def _calculate_complexity_score(self, metrics: Dict[str, Any]) -> int:
+        """복잡도 점수 계산 (0-100, 높을수록 복잡)"""
+        score = 0
+        
+        # 쿼리 길이 (라인 수)
+        if metrics['query_lines'] > 3000:
+            score += 30
+        elif metrics['query_lines'] > 1000:
+            score += 20
+        elif metrics['query_lines'] > 500:
+            score += 10
+        
+        # 테이블 수
+        if metrics['table_count'] > 10:
+            score += 15
+        elif metrics['table_count'] > 5:
+            score += 10
+        elif metrics['table_count'] > 3:
+            score += 5
+        
+        # JOIN 수
+        if metrics['join_count'] > 10:
+            score += 15
+        elif metrics['join_count'] > 5:
+            score += 10
+        elif metrics['join_count'] > 3:
+            score += 5
+        
+        # 서브쿼리 수 및 깊이
+        if metrics['max_subquery_depth'] > 3:
+            score += 15
+        elif metrics['max_subquery_depth'] > 2:
+            score += 10
+        elif metrics['max_subquery_depth'] > 1:
+            score += 5
+        
+        if metrics['subquery_count'] > 10:
+            score += 10
+        elif metrics['subquery_count'] > 5:
+            score += 5
+        
+        # WHERE 조건 수
+        if metrics['where_clause_count'] > 10:
+            score += 5
+        
+        # UNION 수
+        if metrics['union_count'] > 3:
+            score += 5
+        
+        return min(100, score)
+    
+    def _get_complexity_level(self, score: int) -> str:
+        """복잡도 레벨 반환"""
+        if score >= 70:
+            return 'VERY_HIGH'
+        elif score >= 50:
+            return 'HIGH'
+        elif score >= 30:
+            return 'MEDIUM'
+        else:
+            return 'LOW'
+
+# ============================================
+# 보안 분석기 클래스
+# ============================================
+
+class SecurityAnalyzer:
+    """보안 분석 클래스"""
+    
+    def __init__(self, parser: SQLQueryParser, context: Optional[AnalysisContext] = None):
+        self.parser = parser
+        self.context = context or AnalysisContext.for_parser(parser)
+        self.query_text = parser.query_text
+        self.vulnerabilities = []
+    
+    def analyze(self) -> Dict[str, Any]:
+        """보안 분석 수행"""
+        self.vulnerabilities = []
+        
+        # SQL Injection 취약점 검사
+        self._check_sql_injection()
+        
+        # 권한 관련 이슈
+        self._check_permission_issues()
+        
+        # 데이터 노출 위험
+        self._check_data_exposure()
+        
+        # 인젝션 패턴 감지
+        self._check_injection_patterns()
+        
+        # 보안 점수 계산
+        score = self._calculate_security_score()
+        level = self._get_security_level(score)
+        
+        return {
+            'score': score,
+            'level': level,
+            'vulnerabilities': self.vulnerabilities
+        }
+    
+    def _check_sql_injection(self):
+        """SQL Injection 취약점 검사"""
+        # 문자열 연결 사용 감지
+        if self.context.search(r'\+\s*["\']|["\']\s*\+'):
+            self.vulnerabilities.append({
+                'type': 'STRING_CONCATENATION',
+                'severity': 'HIGH',
+                'message': '문자열 연결 연산자 사용 감지',
+                'impact': 'SQL Injection 취약점 가능성',
+                'recommendation': '파라미터화된 쿼리 사용',
+                'spans': self.parser.find_spans(r'\+\s*["\']|["\']\s*\+', 0)
+            })
+        
+        # 동적 쿼리 생성 감지 (간단한 패턴)
+        dynamic_patterns = [
+            r'EXEC\s*\(',
+            r'EXECUTE\s+IMMEDIATE',
+            r'PREPARE\s+\w+\s+FROM',
+        ]
+        for pattern in dynamic_patterns:
+            if self.context.search(pattern, re.IGNORECASE):
+                self.vulnerabilities.append({
+                    'type': 'DYNAMIC_QUERY',
+                    'severity': 'CRITICAL',
+                    'message': f'동적 쿼리 생성 패턴 감지: {pattern}',
+                    'impact': 'SQL Injection 취약점',
+                    'recommendation': '정적 쿼리 사용 또는 입력 검증 강화',
+                    'spans': self.parser.find_spans(pattern)
+                })
+        
+        # 사용자 입력 직접 사용 감지 (간단한 패턴)
+        # 주석 처리된 코드나 변수명 패턴
+        if self.context.search(r'\$\{?\w+\}?|%s|%d'):
+            self.vulnerabilities.append({
+                'type': 'DIRECT_INPUT',
+                'severity': 'HIGH',
+                'message': '변수 치환 패턴 감지',
+                'impact': 'SQL Injection 취약점 가능성',
+                'recommendation': '파라미터화된 쿼리 사용',
+                'spans': self.parser.find_spans(r'\$\{?\w+\}?|%s|%d', 0)
+            })
+    
+    def _check_permission_issues(self):
+        """권한 관련 이슈 검사"""
+        query_upper = self.context.upper_text
+        
+        # 과도한 권한 사용
+        if 'GRANT ALL' in query_upper:
+            self.vulnerabilities.append({
+                'type': 'EXCESSIVE_PERMISSION',
+                'severity': 'MEDIUM',
+                'message': 'GRANT ALL 사용 감지',
+                'impact': '과도한 권한 부여',
+                'recommendation': '최소 권한 원칙 적용',
+                'spans': self.parser.find_spans(r'GRANT ALL')
+            })
+    
+    def _check_data_exposure(self):
+        """데이터 노출 위험 검사"""
+        query_upper = self.context.upper_text
+        
+        # SELECT * 사용
+        if 'SELECT *' in query_upper:
+            count = query_upper.count('SELECT *')
+            if count > 2:
+                self.vulnerabilities.append({
+                    'type': 'SELECT_ALL',
+                    'severity': 'LOW',
+                    'message': f'SELECT * 다수 사용 ({count}회)',
+                    'impact': '불필요한 데이터 노출 가능성',
+                    'recommendation': '필요한 컬럼만 명시적으로 선택',
+                    'spans': self.parser.find_spans(r'SELECT \*')
+                })
+    
+    def _check_injection_patterns(self):
+        """인젝션 패턴 감지"""
+        query_upper = self.context.upper_text
+        
+        # UNION 기반 인젝션 패턴
+        if 'UNION' in query_upper and 'SELECT' in query_upper:
+            # 의심스러운 패턴
+            if self.context.search(r'UNION\s+SELECT\s+NULL', upper=True):
+                self.vulnerabilities.append({
+                    'type': 'UNION_INJECTION_PATTERN',
+                    'severity': 'MEDIUM',
+                    'message': 'UNION SELECT NULL 패턴 감지',
+                    'impact': '인젝션 시도 가능성',
+                    'recommendation': '입력 검증 및 화이트리스트 적용',
+                    'spans': self.parser.find_spans(r'UNION\s+SELECT\s+NULL')
+                })
+    
+    def _calculate_security_score(self) -> int:
+        """보안 점수 계산 (0-100, 높을수록 안전)"""
+        base_score = 100
+        
+        for vuln in self.vulnerabilities:
+            if vuln['severity'] == 'CRITICAL':
+                base_score -= 30
+            elif vuln['severity'] == 'HIGH':
+                base_score -= 20
+            elif vuln['severity'] == 'MEDIUM':
+                base_score -= 10
+            else:
+                base_score -= 5
+        
+        return max(0, min(100, base_score))
+    
+    def _get_security_level(self, score: int) -> str:
+        """보안 레벨 반환"""
+        if score >= 90:
+            return 'SAFE'
+        elif score >= 70:
+            return 'LOW'
+        elif score >= 50:
+            return 'MEDIUM'
+        elif score >= 30:
+            return 'HIGH'
+        else:
+            return 'CRITICAL'
+
+# ============================================
+# 데이터 리니지 분석기 클래스
+# ============================================
+
+# JOIN 조건의 컬럼 한정자 (alias.column 의 alias)
+_QUALIFIER_PATTERN = re.compile(r'("[^"]+"|`[^`]+`|\w+)\s*\.\s*(?:"|`|\w)')
+
+class ColumnLineageGraph:
+    """
+    컬럼 단위 리니지 그래프 (인접 리스트 + 역인덱스)
+    
+    노드는 (종류, 소유자, 컬럼) 튜플입니다.
+    - table: 기본 테이블 컬럼 (소유자: 테이블명, 컬럼을 알 수 없는 * 포함)
+    - cte: CTE 출력 컬럼 (같은 이름의 CTE가 여러 Statement에 있으면 소유자에 '#Statement 번호')
+    - subquery: 파생 테이블/스칼라 서브쿼리 출력 컬럼 (소유자: '별칭#서브쿼리 번호')
+    - output: Statement 최종 출력 컬럼 (소유자: output, Statement가 여럿이면 'output#번호')
+    간선은 원천 컬럼 -> 파생 컬럼 방향이며 downstream/upstream 양방향 인접 집합으로 보관합니다.
+    기본 테이블 컬럼 -> 최종 출력 역인덱스는 처음 조회할 때 한 번 만듭니다.
+    """
+    
+    def __init__(self):
+        # 노드 -> 식 텍스트 (출력 컬럼의 SELECT 항목, 기본 테이블 컬럼은 None)
+        self.nodes: Dict[Tuple[str, str, str], Optional[str]] = {}
+        self.downstream: Dict[Tuple[str, str, str], Set[Tuple[str, str, str]]] = defaultdict(set)
+        self.upstream: Dict[Tuple[str, str, str], Set[Tuple[str, str, str]]] = defaultdict(set)
+        # 출처를 해석하지 못한 컬럼 참조 (출력 노드, 참조 텍스트)
+        self.unresolved: List[Tuple[Tuple[str, str, str], str]] = []
+        self._base_columns = {}
+        self._outputs_by_base = None
+    
+    @staticmethod
+    def label(node: Tuple[str, str, str]) -> str:
+        """노드 표시 이름 (소유자.컬럼)"""
+        return f'{node[1]}.{node[2]}'
+    
+    def add_node(self, kind: str, owner: str, column: str, expression: Optional[str] = None) -> Tuple[str, str, str]:
+        node = (kind, owner, column)
+        if node not in self.nodes or expression is not None:
+            self.nodes[node] = expression
+        return node
+    
+    def add_edge(self, source: Tuple[str, str, str], target: Tuple[str, str, str]):
+        if source != target:
+            self.downstream[source].add(target)
+            self.upstream[target].add(source)
+    
+    def base_columns(self, node: Tuple[str, str, str]) -> Set[Tuple[str, str, str]]:
+        """노드가 (CTE/파생 테이블을 거쳐) 최종적으로 의존하는 기본 테이블 컬럼"""
+        if node in self._base_columns:
+            return self._base_columns[node]
+        result = set()
+        seen = {node}
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if current[0] == 'table':
+                result.add(current)
+                continue
+            if current is not node and current in self._base_columns:
+                result.update(self._base_columns[current])
+                continue
+            for source in self.upstream.get(current, ()):
+                if source not in seen:
+                    seen.add(source)
+                    stack.append(source)
+        self._base_columns[node] = result
+        return result
+    
+    def outputs(self) -> List[Tuple[str, str, str]]:
+        """최종 출력 컬럼 노드 (등록 순서)"""
+        return [node for node in self.nodes if node[0] == 'output']
+    
+    def dependent_outputs(self, table: str, column: str) -> List[Tuple[str, str, str]]:
+        """
+        기본 테이블 컬럼(table.column)에 의존하는 최종 출력 컬럼 (역인덱스 조회, 대소문자 무시)
+        
+        테이블의 *(컬럼을 알 수 없는 전체 선택)에 의존하는 출력도 포함합니다.
+        """
+        if self._outputs_by_base is None:
+            index = defaultdict(set)
+            for output in self.outputs():
+                for base in self.base_columns(output):
+                    index[(base[1].lower(), base[2].lower())].add(output)
+            self._outputs_by_base = index
+        table = table.lower()
+        found = self._outputs_by_base.get((table, column.lower()), set()) | self._outputs_by_base.get((table, '*'), set())
+        return sorted(found)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON 리포트용 변환 (노드 id: '종류:소유자.컬럼')"""
+        def node_id(node):
+            return f'{node[0]}:{self.label(node)}'
+        
+        return {
+            'nodes': [{'id': node_id(node), 'kind': node[0], 'owner': node[1], 'column': node[2],
+                       'expression': expression}
+                      for node, expression in self.nodes.items()],
+            'edges': [{'from': node_id(source), 'to': node_id(target)}
+                      for source in self.nodes for target in sorted(self.downstream.get(source, ()))],
+            'outputs': [{'output': self.label(node), 'expression': self.nodes[node],
+                         'base_columns': sorted(self.label(base) for base in self.base_columns(node))}
+                        for node in self.outputs()],
+            'unresolved': [{'output': self.label(node), 'reference': reference}
+                           for node, reference in self.unresolved]
+        }
+
+class ColumnLineageBuilder:
+    """
+    쿼리 트리에서 컬럼 리니지 그래프를 만드는 클래스
+    
+    각 쿼리 블록의 SELECT 항목을 출력 컬럼으로 보고, 항목 식의 컬럼 참조를 별칭 -> FROM/JOIN 항목으로
+    해석하여 기본 테이블, CTE 출력, 파생 테이블 출력 컬럼과 연결합니다.
+    CTE/파생 테이블은 처음 참조될 때 한 번만 처리하며, SELECT *는 원천의 알려진 출력 컬럼으로 펼치고
+    알 수 없으면 '*' 노드를 거쳐 참조 시점에 같은 이름의 원천 컬럼으로 연결합니다.
+    """
+    
+    def __init__(self, parser: SQLQueryParser):
+        self.parser = parser
+        self.graph = ColumnLineageGraph()
+        # 출력을 가진 쿼리 블록(CTE 본문, 서브쿼리, Statement 최상위) -> (트리, 종류, 소유자, CTE 컬럼 목록)
+        self._owners = {}
+        # 쿼리 블록 -> 출력 컬럼 이름(소문자) -> 노드
+        self._outputs = {}
+        # 쿼리 블록 -> *로 전체 선택한 원천 FROM/JOIN 항목 (출력 컬럼을 알 수 없는 원천)
+        self._stars = {}
+    
+    def build(self) -> ColumnLineageGraph:
+        trees = self.parser.get_query_trees()
+        cte_counts = Counter(cte.name.lower() for tree in trees for scope in tree.scopes for cte in scope.ctes)
+        subquery_index = 0
+        for number, tree in enumerate(trees, 1):
+            aliases = {ref.subquery: ref.alias for scope in tree.scopes for ref in scope.table_refs()
+                       if ref.subquery is not None}
+            output_owner = 'output' if len(trees) == 1 else f'output#{number}'
+            self._owners[tree.root] = (tree, 'output', output_owner, None)
+            for scope in tree.scopes:
+                for cte in scope.ctes:
+                    owner = cte.name if cte_counts[cte.name.lower()] == 1 else f'{cte.name}#{number}'
+                    self._owners[cte.query] = (tree, 'cte', owner, cte.columns)
+                if scope.kind == 'subquery':
+                    subquery_index += 1
+                    self._owners[scope] = (tree, 'subquery', f"{aliases.get(scope) or 'subquery'}#{subquery_index}", None)
+        
+        for tree in trees:
+            for scope in tree.scopes:
+                if scope in self._owners:
+                    self._scope_outputs(scope)
+        return self.graph
+    
+    # ----- 쿼리 블록 출력 -----
+    
+    def _scope_outputs(self, scope: QueryScope) -> Dict[str, Tuple[str, str, str]]:
+        """
+        쿼리 블록의 출력 컬럼 노드 (최초 호출 시 생성)
+        
+        생성 중에 다시 호출되면(재귀 CTE의 자기 참조) 그때까지 만든 첫 분기의 출력을 돌려줍니다.
+        """
+        if scope in self._outputs:
+            return self._outputs[scope]
+        tree, kind, owner, names = self._owners[scope]
+        outputs = {}
+        self._outputs[scope] = outputs
+        # 위치별 출력 노드 (집합 연산의 뒤쪽 분기는 같은 위치의 출력에 합침)
+        positions = []
+        
+        branches = [scope] + [branch for _, branch in scope.set_operations]
+        for branch_index, branch in enumerate(branches):
+            for position, (name, expression, sources, unresolved) in enumerate(self._branch_columns(tree, branch)):
+                if name == '*':
+                    # 출력 컬럼을 알 수 없는 원천 전체 선택 (sources: FROM/JOIN 항목)
+                    node = self.graph.add_node(kind, owner, '*')
+                    outputs['*'] = node
+                    self._stars.setdefault(scope, []).extend(sources)
+                    for ref in sources:
+                        source = self._ref_column(ref, '*')
+                        if source is not None:
+                            self.graph.add_edge(source, node)
+                    continue
+                if branch_index > 0 and position < len(positions):
+                    node = positions[position]
+                else:
+                    if names and position < len(names):
+                        name = names[position]
+                    node = outputs.get(name.lower()) or self.graph.add_node(kind, owner, name, expression)
+                    outputs.setdefault(name.lower(), node)
+                    positions.append(node)
+                for source in sources:
+                    self.graph.add_edge(source, node)
+                for reference in unresolved:
+                    self.graph.unresolved.append((node, reference))
+        
+        return outputs
+    
+    def _scope_column(self, scope: QueryScope, column: str) -> Optional[Tuple[str, str, str]]:
+        """CTE/파생 테이블의 출력 컬럼 노드 (* 출력이면 원천의 같은 이름 컬럼을 거쳐 생성)"""
+        outputs = self._scope_outputs(scope)
+        node = outputs.get(column.lower())
+        if node is not None or scope not in self._stars:
+            return node
+        _, kind, owner, _ = self._owners[scope]
+        node = self.graph.add_node(kind, owner, column)
+        outputs[column.lower()] = node
+        for ref in self._stars[scope]:
+            source = self._ref_column(ref, column)
+            if source is not None:
+                self.graph.add_edge(source, node)
+        return node
+    
+    def _ref_column(self, ref: TableRef, column: str) -> Optional[Tuple[str, str, str]]:
+        """FROM/JOIN 항목의 컬럼 노드"""
+        if ref.ref_type == 'table' and ref.name:
+            return self.graph.add_node('table', ref.name, column)
+        if ref.ref_type == 'cte' and ref.cte.query in self._owners:
+            return self._scope_column(ref.cte.query, column)
+        if ref.ref_type == 'subquery' and ref.subquery in self._owners:
+            return self._scope_column(ref.subquery, column)
+        return None
+    
+    def _ref_has_column(self, ref: TableRef, column: str) -> bool:
+        """CTE/파생 테이블 항목이 해당 출력 컬럼(또는 *)을 가지는지 여부"""
+        scope = ref.cte.query if ref.ref_type == 'cte' else ref.subquery
+        if scope not in self._owners:
+            return False
+        return column.lower() in self._scope_outputs(scope) or scope in self._stars
+    
+    # ----- SELECT 항목 -----
+    
+    def _branch_columns(self, tree: QueryTree, scope: QueryScope) -> Iterator[Tuple[str, Optional[str], List[Any], List[str]]]:
+        """
+        쿼리 블록의 SELECT 항목을 (출력 이름, 식 텍스트, 원천 노드, 해석하지 못한 참조) 순서로 생성
+        
+        SELECT *와 alias.*는 원천의 알려진 출력 컬럼으로 펼치고, 펼칠 수 없는 원천은
+        이름 '*'와 원천 FROM/JOIN 항목 목록으로 돌려줍니다.
+        """
+        for item in scope.columns:
+            significant = [pos for pos in range(item.first, item.last + 1) if not tree.tokens[pos].is_whitespace]
+            if tree.tokens[significant[-1]].value == '*' and all(
+                    tree.tokens[pos].value in ('.', '*') or tree.tokens[pos].ttype in T.Name
+                    or tree.tokens[pos].ttype is T.String.Symbol for pos in significant):
+                qualifier = tree.text(significant[0], significant[-3]) if len(significant) > 2 else None
+                yield from self._star_columns(scope, qualifier)
+                continue
+            
+            expression = tree.compact_text(item.first, item.last)
+            sources = []
+            unresolved = []
+            for qualifier, column in self._column_references(tree, scope, item):
+                source = self._resolve_reference(scope, qualifier, column)
+                if source is not None:
+                    sources.append(source)
+                else:
+                    unresolved.append(f'{qualifier}.{column}' if qualifier else column)
+            # 스칼라 서브쿼리 등 항목 안의 서브쿼리 출력
+            for sub in scope.subqueries:
+                if item.first <= sub.first <= item.last and sub in self._owners:
+                    sources.extend(node for node in self._scope_outputs(sub).values() if node[2] != '*')
+            yield item.name or expression, expression, sources, unresolved
+    
+    def _star_columns(self, scope: QueryScope, qualifier: Optional[str]) -> Iterator[Tuple[str, Optional[str], List[Any], List[str]]]:
+        """SELECT * / alias.* 펼치기"""
+        if qualifier:
+            ref = scope.resolve_qualifier(qualifier.strip('"`'))
+            refs = [ref] if ref is not None else []
+        else:
+            refs = [ref for ref in scope.table_refs() if ref is not scope.target]
+        unknown = []
+        for ref in refs:
+            target = ref.cte.query if ref.ref_type == 'cte' else ref.subquery
+            if target is not None and target in self._owners:
+                for node in list(self._scope_outputs(target).values()):
+                    if node[2] != '*':
+                        yield node[2], None, [node], []
+                if target in self._stars:
+                    unknown.append(ref)
+            elif ref.ref_type == 'table' and ref.name:
+                unknown.append(ref)
+        if unknown:
+            yield '*', None, unknown, []
+    
+    def _column_references(self, tree: QueryTree, scope: QueryScope, item: ClauseItem) -> List[Tuple[Optional[str], str]]:
+        """SELECT 항목 식의 컬럼 참조 (한정자, 컬럼) 목록 (함수명, 형 이름, 별칭, 중첩 서브쿼리 제외)"""
+        tokens = tree.tokens
+        last = item.last - 1 if item.alias else item.last
+        skip = []
+        for sub in scope.subqueries:
+            if item.first <= sub.first <= item.last:
+                end = sub.set_operations[-1][1].last if sub.set_operations else sub.last
+                skip.append((sub.first, end))
+        
+        references = []
+        previous = None
+        i = item.first
+        while i <= last:
+            token = tokens[i]
+            if token.is_whitespace:
+                i += 1
+                continue
+            inside = next((end for start, end in skip if start <= i <= end), None)
+            if inside is not None:
+                i = inside + 1
+                continue
+            ttype = token.ttype
+            if (ttype in T.Name or ttype is T.String.Symbol) and ttype is not T.Name.Builtin:
+                parts = [token.value]
+                j = i + 1
+                while j + 1 <= last and tokens[j].value == '.' and \
+                        (tokens[j + 1].ttype in T.Name or tokens[j + 1].ttype is T.String.Symbol):
+                    parts.append(tokens[j + 1].value)
+                    j += 2
+                following = j
+                while following <= last and tokens[following].is_whitespace:
+                    following += 1
+                is_call = following <= last and tokens[following].value == '('
+                is_type = previous is not None and (previous.value in ('::', '.') or
+                                                    (previous.ttype is T.Keyword and previous.value.upper() == 'AS'))
+                if not is_call and not is_type:
+                    names = [part.strip('"`') for part in parts]
+                    references.append(('.'.join(names[:-1]) or None, names[-1]))
+                previous = tokens[j - 1]
+                i = j
+                continue
+            previous = token
+            i += 1
+        return references
+    
+    def _resolve_reference(self, scope: QueryScope, qualifier: Optional[str], column: str) -> Optional[Tuple[str, str, str]]:
+        """컬럼 참조를 원천 컬럼 노드로 해석 (한정자 없으면 같은 블록부터 바깥 방향으로 후보 검색)"""
+        if qualifier:
+            ref = scope.resolve_qualifier(qualifier)
+            return self._ref_column(ref, column) if ref is not None else None
+        
+        # FROM 항목이 없는 서브쿼리(SELECT 목록의 상관 참조 등)는 바깥 블록에서 찾음
+        current = scope
+        while current.kind == 'subquery' and not current.table_refs() and current.parent is not None:
+            current = current.parent
+        refs = [ref for ref in current.table_refs() if ref is not current.target]
+        derived = [ref for ref in refs if ref.ref_type in ('cte', 'subquery') and self._ref_has_column(ref, column)]
+        tables = [ref for ref in refs if ref.ref_type == 'table']
+        if len(derived) == 1:
+            return self._ref_column(derived[0], column)
+        if not derived and len(tables) == 1:
+            return self._ref_column(tables[0], column)
+        if len(refs) == 1:
+            return self._ref_column(refs[0], column)
+        return None
+
+class LineageGraph:
+    """
+    테이블/CTE/서브쿼리/Statement 단위 리니지 그래프 (전이 도달 가능성 사전 계산)
+    
+    노드는 (종류, 키) 튜플입니다.
+    - table, cte: 키는 소문자 이름
+    - subquery: 키는 서브쿼리 번호 (structure['subqueries'] 순서, 1부터)
+    - statement: 키는 Statement 번호 (1부터)
+    간선은 데이터가 흐르는 방향(원천 -> 그것을 읽는 블록)입니다. compile()에서 모든 노드의
+    하류/상류 방향 BFS 결과(홉 수, 직전 노드)를 한 번 계산해 두므로, 조회는 사전 조회와
+    경로 복원만 합니다.
+    """
+    
+    def __init__(self):
+        self.downstream_edges: Dict[Tuple[str, Any], Set[Tuple[str, Any]]] = defaultdict(set)
+        self.upstream_edges: Dict[Tuple[str, Any], Set[Tuple[str, Any]]] = defaultdict(set)
+        # 노드 -> 표시 이름 (처음 등장한 원래 대소문자)
+        self.names: Dict[Tuple[str, Any], str] = {}
+        # 방향('downstream'/'upstream') -> 시작 노드 -> 도달 노드 -> (홉 수, 직전 노드)
+        self._reach = None
+    
+    def add_node(self, kind: str, name: Any) -> Tuple[str, Any]:
+        node = (kind, name.lower() if isinstance(name, str) else name)
+        self.names.setdefault(node, str(name))
+        return node
+    
+    def add_edge(self, source: Tuple[str, Any], target: Tuple[str, Any]):
+        if source != target:
+            self.downstream_edges[source].add(target)
+            self.upstream_edges[target].add(source)
+            self._reach = None
+    
+    def find(self, name: str, kinds: Sequence[str] = ('table', 'cte')) -> List[Tuple[str, Any]]:
+        """이름으로 노드 찾기 (대소문자 무시)"""
+        key = name.strip().lower()
+        return [(kind, key) for kind in kinds if (kind, key) in self.names]
+    
+    def compile(self) -> 'LineageGraph':
+        """모든 노드에서 하류/상류 방향 BFS를 한 번씩 수행하여 도달 가능성 표 작성"""
+        reach = {'downstream': {}, 'upstream': {}}
+        for direction, edges in (('downstream', self.downstream_edges), ('upstream', self.upstream_edges)):
+            for node in self.names:
+                visited = {node: (0, None)}
+                frontier = [node]
+                hops = 0
+                while frontier:
+                    hops += 1
+                    following = []
+                    # 같은 홉 안에서는 정렬 순서로 방문하여 경로(직전 노드)를 결정적으로 선택
+                    for current in frontier:
+                        for target in sorted(edges.get(current, ()), key=str):
+                            if target not in visited:
+                                visited[target] = (hops, current)
+                                following.append(target)
+                    frontier = following
+                del visited[node]
+                reach[direction][node] = visited
+        self._reach = reach
+        return self
+    
+    def downstream(self, node: Tuple[str, Any]) -> List[Dict[str, Any]]:
+        """node의 영향을 받는(node를 직간접으로 읽는) 모든 노드 (홉 수, 경로 포함)"""
+        return self._reachable('downstream', node)
+    
+    def upstream(self, node: Tuple[str, Any]) -> List[Dict[str, Any]]:
+        """node가 직간접으로 읽는 모든 원천 노드 (홉 수, 경로 포함)"""
+        return self._reachable('upstream', node)
+    
+    def _reachable(self, direction: str, node: Tuple[str, Any]) -> List[Dict[str, Any]]:
+        if self._reach is None:
+            self.compile()
+        visited = self._reach[direction].get(node, {})
+        results = []
+        for target, (hops, _) in visited.items():
+            path = [target]
+            previous = visited[target][1]
+            while previous != node:
+                path.append(previous)
+                previous = visited[previous][1]
+            path.append(node)
+            path.reverse()
+            results.append({
+                'kind': target[0],
+                'name': self.names[target],
+                'hops': hops,
+                'path': [self.describe(step) for step in path]
+            })
+        results.sort(key=lambda entry: (entry['hops'], entry['kind'], entry['name']))
+        return results
+    
+    def describe(self, node: Tuple[str, Any]) -> str:
+        """경로 표시용 노드 이름 (예: users, user_lifecycle (CTE), Subquery #3)"""
+        kind = node[0]
+        if kind == 'cte':
+            return f'{self.names[node]} (CTE)'
+        if kind == 'subquery':
+            return f'Subquery #{self.names[node]}'
+        if kind == 'statement':
+            return f'Statement #{self.names[node]}'
+        return self.names[node]
+
+class DataLineageAnalyzer:
+    """데이터 리니지(Data Lineage) 분석 클래스 - 테이블 간 관계 시각화"""
+    
+    def __init__(self, parser: SQLQueryParser, structure_analysis: Dict[str, Any],
+                 context: Optional[AnalysisContext] = None,
+                 fragment_cache: Optional[Dict[str, List[str]]] = None):
+        """
+        Args:
+            fragment_cache: 이전 버전 분석의 fragment_results (CTE/서브쿼리 본문 해시 -> 참조 테이블/CTE).
+                            본문이 바뀌지 않은 CTE/서브쿼리는 다시 계산하지 않고 재사용합니다.
+        """
+        self.parser = parser
+        self.context = context or AnalysisContext.for_parser(parser)
+        self.structure = self.context.structure
+        self.structure_analysis = structure_analysis
+        self.previous_fragments = fragment_cache or {}
+        # 이번 분석의 CTE/서브쿼리 본문 해시 -> 참조 테이블/CTE (다음 버전 분석에 fragment_cache로 전달)
+        self.fragment_results = {}
+        # CTE 이름 -> 이전 버전 결과 재사용 여부
+        self.cte_reuse = {}
+        # structure['ctes'] / structure['subqueries'] 항목과 같은 순서의 (쿼리 트리, 본문 쿼리 블록)
+        self._cte_scopes = []
+        self._subquery_scopes = []
+        for tree, scope in parser.iter_scopes():
+            self._cte_scopes.extend((tree, cte.query) for cte in scope.ctes)
+            if scope.kind == 'subquery':
+                self._subquery_scopes.append((tree, scope))
+        self.join_relationships = []
+        self.cte_dependencies = []
+        self.subquery_relationships = []
+        self.all_tables = set()
+        self.all_ctes = set()
+        # 컬럼 단위 리니지와 블록 단위 도달 가능성 그래프 (analyze()에서 생성)
+        self.column_lineage = ColumnLineageGraph()
+        self.reachability = LineageGraph()
+    
+    def analyze(self) -> Dict[str, Any]:
+        """리니지 분석 수행"""
+        # JOIN 관계 추출
+        self.join_relationships = self.extract_join_relationships()
+        
+        # CTE 의존성 추출
+        self.cte_dependencies = self.extract_cte_dependencies()
+        
+        # 서브쿼리 관계 추출
+        self.subquery_relationships = self.extract_subquery_relationships()
+        
+        # 모든 테이블 및 CTE 수집
+        self.all_tables = set(self.structure['tables'])
+        
+        # JOIN 관계에서 테이블 추가 (CTE 참조와 파생 테이블 별칭 제외)
+        for join_rel in self.join_relationships:
+            if join_rel.get('left_type') == 'table':
+                self.all_tables.add(join_rel['left_table'])
+            if join_rel.get('right_type') == 'table':
+                self.all_tables.add(join_rel['right_table'])
+        
+        # CTE 의존성에서 테이블 추가
+        for cte_dep in self.cte_dependencies:
+            referenced_tables = cte_dep.get('referenced_tables', [])
+            self.all_tables.update(referenced_tables)
+        
+        # 서브쿼리 관계에서 테이블 추가
+        for subq_rel in self.subquery_relationships:
+            referenced_tables = subq_rel.get('referenced_tables', [])
+            self.all_tables.update(referenced_tables)
+        
+        # CTE 처리
+        for cte, (tree, body) in zip(self.structure['ctes'], self._cte_scopes):
+            self.all_ctes.add(cte['name'])
+            # CTE가 참조하는 테이블도 추가
+            self.all_tables.update(self._fragment_references(tree, body)['tables'])
+        
+        # CTE 본문 단위로 보면 다른 CTE 참조가 테이블로 잡히므로 제외
+        self.all_tables -= self.all_ctes
+        
+        # 컬럼 단위 리니지 (출력 컬럼 -> CTE/파생 테이블 -> 기본 테이블 컬럼)
+        self.column_lineage = ColumnLineageBuilder(self.parser).build()
+        
+        # 테이블 -> CTE/서브쿼리 -> Statement 다단계 도달 가능성
+        self.reachability = self.build_lineage_graph()
+        
+        return {
+            'tables': sorted(list(self.all_tables)),
+            'ctes': sorted(list(self.all_ctes)),
+            'join_relationships': self.join_relationships,
+            'cte_dependencies': self.cte_dependencies,
+            'subquery_relationships': self.subquery_relationships,
+            'column_lineage': self.column_lineage.to_dict()
+        }
+    
+    def build_lineage_graph(self) -> LineageGraph:
+        """
+        쿼리 트리에서 블록 단위 리니지 그래프 생성
+        
+        각 쿼리 블록은 자신을 감싸는 가장 가까운 CTE 본문/서브쿼리/Statement 노드에 속하며,
+        그 블록의 FROM/JOIN 테이블과 CTE 참조가 소속 노드로 흐르는 간선이 됩니다.
+        서브쿼리 노드는 바깥 블록의 소속 노드로 흐릅니다.
+        """
+        graph = LineageGraph()
+        subquery_numbers = {scope: number for number, (_, scope) in enumerate(self._subquery_scopes, 1)}
+        
+        for statement_number, tree in enumerate(self.parser.get_query_trees(), 1):
+            cte_bodies = {cte.query: cte for scope in tree.scopes for cte in scope.ctes}
+            owners = {}
+            # 전위 순회 순서이므로 바깥 블록의 소속 노드가 먼저 정해짐
+            for scope in tree.scopes:
+                if scope in subquery_numbers:
+                    owner = graph.add_node('subquery', subquery_numbers[scope])
+                    graph.add_edge(owner, owners[scope.parent])
+                elif scope in cte_bodies:
+                    owner = graph.add_node('cte', cte_bodies[scope].name)
+                elif scope.parent is None:
+                    owner = graph.add_node('statement', statement_number)
+                else:
+                    owner = owners[scope.parent]
+                owners[scope] = owner
+                
+                for ref in scope.table_refs():
+                    if not ref.name:
+                        continue
+                    if ref.ref_type == 'table':
+                        graph.add_edge(graph.add_node('table', ref.name), owner)
+                    elif ref.ref_type == 'cte':
+                        graph.add_edge(graph.add_node('cte', ref.cte.name), owner)
+        
+        return graph.compile()
+    
+    def _fragment_references(self, tree: QueryTree, body: QueryScope) -> Dict[str, List[str]]:
+        """
+        CTE/서브쿼리 본문이 참조하는 테이블과 바깥 CTE
+        
+        본문을 다시 파싱하지 않고 메인 쿼리 트리의 해당 블록(하위 트리)에서 구합니다.
+        결과는 본문 텍스트(집합 연산 분기 포함) 해시로 보관하여, 같은 본문은 이번 분석과
+        이전 버전 분석 결과를 재사용합니다.
+        """
+        key = self._fragment_key(tree, body)
+        if key not in self.fragment_results:
+            references = self.previous_fragments.get(key)
+            self.fragment_results[key] = references or self._subtree_references(tree, body)
+        return self.fragment_results[key]
+    
+    @staticmethod
+    def _fragment_key(tree: QueryTree, body: QueryScope) -> str:
+        """CTE/서브쿼리 본문 텍스트 해시 (UNION 등 뒤쪽 분기까지 포함)"""
+        last = body.set_operations[-1][1].last if body.set_operations else body.last
+        return hashlib.sha1(tree.text(body.first, last).encode('utf-8')).hexdigest()
+    
+    @staticmethod
+    def _subtree_references(tree: QueryTree, body: QueryScope) -> Dict[str, List[str]]:
+        """
+        쿼리 블록과 그 하위 블록의 참조
+        
+        - tables: 참조 테이블. 본문만 따로 보았을 때와 같도록 블록 밖에서 정의된 다른 CTE 참조도 포함하고,
+                  블록 안의 WITH에서 정의된 CTE와 재귀 CTE의 자기 참조는 제외
+        - ctes: 참조하는 블록 밖 CTE 이름
+        """
+        tables = set()
+        outer_ctes = set()
+        local_ctes = set()
+        for scope in tree.subtree(body):
+            local_ctes.update(scope.ctes)
+            for ref in scope.table_refs():
+                if not ref.name:
+                    continue
+                if ref.ref_type == 'table':
+                    tables.add(ref.name)
+                elif ref.ref_type == 'cte' and ref.cte not in local_ctes and ref.cte.query is not body:
+                    tables.add(ref.name)
+                    outer_ctes.add(ref.cte.name)
+        return {'tables': sorted(tables), 'ctes': sorted(outer_ctes)}
+    
+    def extract_join_relationships(self) -> List[Dict[str, Any]]:
+        """
+        JOIN 관계 추출 (쿼리 트리 순회)
+        
+        왼쪽 테이블은 JOIN 조건의 한정자(별칭.컬럼) 중 조인 대상이 아닌 쪽을 같은 쿼리 블록
+        (또는 바깥 블록)의 FROM/JOIN 항목으로 해석하여 정하고, 없으면 직전 FROM/JOIN 항목을 사용합니다.
+        """
+        relationships = []
+        
+        for tree, scope in self.parser.iter_scopes():
+            previous = scope.from_items[0] if scope.from_items else None
+            
+            for join in scope.joins:
+                right = join.item
+                if right is None or not right.display_name:
+                    continue
+                
+                left = previous
+                condition = self.parser.join_condition_text(tree, join) or ''
+                for qualifier in _QUALIFIER_PATTERN.findall(condition):
+                    ref = scope.resolve_qualifier(qualifier.strip('"\'`'))
+                    if ref is not None and ref is not right:
+                        left = ref
+                        break
+                
+                relationships.append({
+                    'left_table': left.display_name if left is not None and left.display_name else 'unknown',
+                    'left_type': left.ref_type if left is not None else 'unknown',
+                    'right_table': right.display_name,
+                    'right_type': right.ref_type,
+                    'join_type': join.join_type,
+                    'condition': condition
+                })
+                
+                # 다음 JOIN의 기본 왼쪽 항목
+                previous = right
+        
+        return relationships
+    
+    def extract_cte_dependencies(self) -> List[Dict[str, Any]]:
+        """CTE 의존성 추출"""
+        dependencies = []
+        ctes = self.structure['ctes']
+        
+        for cte, (tree, body) in zip(ctes, self._cte_scopes):
+            cte_name = cte['name']
+            
+            # 메인 쿼리 트리의 CTE 본문 블록에서 참조 추출
+            try:
+                self.cte_reuse[cte_name] = self._fragment_key(tree, body) in self.previous_fragments
+                references = self._fragment_references(tree, body)
+                referenced_tables = list(references['tables'])
+                referenced_ctes = []
+                
+                # 다른 CTE 참조 확인 (FROM/JOIN에서 본문 밖의 CTE로 해석된 참조)
+                outer_ctes = {name.lower() for name in references['ctes']}
+                for other_cte in ctes:
+                    if other_cte['name'] != cte_name and other_cte['name'].lower() in outer_ctes:
+                        referenced_ctes.append(other_cte['name'])
+                
+                dependencies.append({
+                    'cte_name': cte_name,
                     'referenced_tables': referenced_tables,
                     'referenced_ctes': referenced_ctes
                 })
-            except Exception as e:
-                # 파싱 실패 시 기본 정보만 저장
-                dependencies.append({
+            except Exception as e:
+                # 파싱 실패 시 기본 정보만 저장
+                dependencies.append({
+                    'cte_name': cte_name,
+                    'referenced_tables': [],
+                    'referenced_ctes': [],
+                    'error': str(e)
+                })
+        
+        return dependencies
+    
+    def extract_subquery_relationships(self) -> List[Dict[str, Any]]:
+        """서브쿼리 관계 추출"""
+        relationships = []
+        subqueries = self.structure['subqueries']
+        
+        for idx, (subquery_info, (tree, body)) in enumerate(zip(subqueries, self._subquery_scopes)):
+            location = subquery_info.get('location', 'UNKNOWN')
+            depth = subquery_info.get('depth', 0)
+            
+            # 메인 쿼리 트리의 서브쿼리 블록에서 참조 테이블 추출
+            try:
+                referenced_tables = list(self._fragment_references(tree, body)['tables'])
+                
+                relationships.append({
+                    'subquery_index': idx + 1,
+                    'depth': depth,
+                    'location': location,
+                    'referenced_tables': referenced_tables
+                })
+            except Exception as e:
+                relationships.append({
+                    'subquery_index': idx + 1,
+                    'depth': depth,
+                    'location': location,
+                    'referenced_tables': [],
+                    'error': str(e)
+                })
+        
+        return relationships
+    
+    def generate_mermaid_diagram(self) -> str:
+        """Mermaid 다이어그램 생성"""
+        lines = ['graph TD']
+        
+        # 노드 정의
+        node_id_map = {}
+        node_counter = 1
+        
+        # 테이블 노드
+        for table in sorted(self.all_tables):
+            node_id = f'T{node_counter}'
+            node_id_map[table] = node_id
+            lines.append(f'    {node_id}["{table}"]')
+            node_counter += 1
+        
+        # CTE 노드
+        for cte in sorted(self.all_ctes):
+            node_id = f'C{node_counter}'
+            node_id_map[cte] = node_id
+            lines.append(f'    {node_id}["{cte}<br/>(CTE)"]')
+            node_counter += 1
+        
+        lines.append('')
+        
+        # JOIN 관계
+        for join_rel in self.join_relationships:
+            left = join_rel.get('left_table', 'unknown')
+            right = join_rel.get('right_table', 'unknown')
+            join_type = join_rel.get('join_type', 'JOIN')
+            
+            if left in node_id_map and right in node_id_map:
+                label = join_type.replace('JOIN', '').strip() or 'JOIN'
+                lines.append(f'    {node_id_map[left]} -->|"{label}"| {node_id_map[right]}')
+        
+        # CTE 의존성
+        for cte_dep in self.cte_dependencies:
+            cte_name = cte_dep.get('cte_name', '')
+            if cte_name not in node_id_map:
+                continue
+            
+            # CTE가 참조하는 테이블
+            for table in cte_dep.get('referenced_tables', []):
+                if table in node_id_map:
+                    lines.append(f'    {node_id_map[table]} -->|"CTE 참조"| {node_id_map[cte_name]}')
+            
+            # CTE가 참조하는 다른 CTE
+            for ref_cte in cte_dep.get('referenced_ctes', []):
+                if ref_cte in node_id_map:
+                    lines.append(f'    {node_id_map[ref_cte]} -->|"CTE 의존"| {node_id_map[cte_name]}')
+        
+        # 서브쿼리 관계 (간단히 표시)
+        for subq_rel in self.subquery_relationships:
+            location = subq_rel.get('location', 'UNKNOWN')
+            depth = subq_rel.get('depth', 0)
+            for table in subq_rel.get('referenced_tables', []):
+                if table in node_id_map:
+                    # 서브쿼리 노드는 생성하지 않고 주석으로 표시
+                    # 필요시 서브쿼리 노드도 추가 가능
+                    pass
+        
+        return '\n'.join(lines)
+    
+    def generate_lineage_json(self) -> Dict[str, Any]:
+        """JSON 형식 리니지 데이터 생성"""
+        return dict(self.iter_lineage_json_items())
+    
+    def iter_lineage_json_items(self) -> Iterator[Tuple[str, Any]]:
+        """리니지 JSON의 최상위 (키, 값)을 순서대로 생성 (컬럼 리니지는 마지막에 변환)"""
+        yield 'metadata', {
+            'total_tables': len(self.all_tables),
+            'total_ctes': len(self.all_ctes),
+            'total_joins': len(self.join_relationships),
+            'total_cte_dependencies': len(self.cte_dependencies),
+            'total_subqueries': len(self.subquery_relationships),
+            'total_column_edges': sum(len(targets) for targets in self.column_lineage.downstream.values())
+        }
+        yield 'tables', sorted(list(self.all_tables))
+        yield 'ctes', sorted(list(self.all_ctes))
+        yield 'relationships', {
+            'joins': self.join_relationships,
+            'cte_dependencies': self.cte_dependencies,
+            'subquery_relationships': self.subquery_relationships
+        }
+        yield 'column_lineage', self.column_lineage.to_dict()
+
+# ============================================
+# 영향도 분석기 클래스
+# ============================================
+
+# 식별자(단어) 패턴 - 다중 대상 영향도 스캔용
+_IDENTIFIER_PATTERN = re.compile(r'\w+')
+
+class ImpactAnalyzer:
+    """영향도 분석 클래스 - 특정 테이블/컬럼 이슈 발생 시 영향받는 쿼리 분석"""
+    
+    def __init__(self, parser: SQLQueryParser, lineage_analyzer: DataLineageAnalyzer, 
+                 structure_analyzer: QueryStructureAnalyzer, context: Optional[AnalysisContext] = None):
+        self.parser = parser
+        self.context = context or AnalysisContext.for_parser(parser)
+        self.lineage_analyzer = lineage_analyzer
+        self.structure_analyzer = structure_analyzer
+        self.structure = self.context.structure
+        self.lineage_data = lineage_analyzer.analyze()
+        self.query_text = parser.query_text
+    
+    @property
+    def query_lines(self) -> List[str]:
+        """쿼리 라인 리스트 (컨텍스트에서 공유)"""
+        return self.context.lines
+        
+    def analyze(self, target_table: str, target_column: Optional[str] = None) -> Dict[str, Any]:
+        """영향도 분석 수행"""
+        target_table = target_table.strip().lower()
+        target_column = target_column.strip().lower() if target_column else None
+        
+        hits = self._collect_direct_hits(target_table, target_column)
+        return self._analyze_target(target_table, target_column, hits)
+    
+    def analyze_batch(self, targets: Sequence[Tuple[str, Optional[str]]]) -> Dict[str, Any]:
+        """
+        여러 (테이블, 컬럼) 대상을 한 번에 영향도 분석
+        
+        쿼리 텍스트를 한 번만 스캔하여 모든 대상의 사용 위치를 찾고,
+        대상별 결과와 함께 대상 x 사용 유형 매트릭스를 반환합니다.
+        
+        Args:
+            targets: (테이블명, 컬럼명 또는 None) 리스트
+            
+        Returns:
+            Dict: {'targets': 대상별 analyze() 결과, 'matrix': 통합 매트릭스, 'summary': 요약}
+        """
+        normalized = []
+        for target_table, target_column in targets:
+            key = (target_table.strip().lower(), target_column.strip().lower() if target_column else None)
+            if key not in normalized:
+                normalized.append(key)
+        
+        hits_by_target = self._collect_batch_hits(normalized)
+        results = [
+            self._analyze_target(target_table, target_column, hits_by_target[(target_table, target_column)])
+            for target_table, target_column in normalized
+        ]
+        
+        affected_tables = set()
+        affected_ctes = set()
+        for result in results:
+            affected_tables.update(result['affected_tables'])
+            affected_ctes.update(result['affected_ctes'])
+        highest = max(results, key=lambda r: r['impact_score'], default=None)
+        
+        return {
+            'targets': results,
+            'matrix': self._build_impact_matrix(results),
+            'summary': {
+                'total_targets': len(results),
+                'max_impact_level': highest['impact_level'] if highest else 'LOW',
+                'max_impact_score': highest['impact_score'] if highest else 0,
+                'level_counts': dict(Counter(r['impact_level'] for r in results)),
+                'affected_tables': sorted(affected_tables),
+                'affected_ctes': sorted(affected_ctes)
+            }
+        }
+    
+    def _analyze_target(self, target_table: str, target_column: Optional[str],
+                        hits: Dict[str, List[Tuple[int, int]]]) -> Dict[str, Any]:
+        """수집된 사용 위치(hits)로 대상 하나의 영향도 결과 구성"""
+        # 직접 영향 분석
+        direct_impacts = self._analyze_direct_impacts(target_table, target_column, hits)
+        
+        # 간접 영향 분석
+        indirect_impacts = self._analyze_indirect_impacts(target_table, target_column)
+        
+        # 영향받는 테이블 및 CTE 추출
+        affected_tables = self._extract_affected_tables(target_table, direct_impacts, indirect_impacts)
+        affected_ctes = self._extract_affected_ctes(target_table, target_column, direct_impacts, indirect_impacts)
+        
+        # 영향도 점수 계산
+        impact_score = self._calculate_impact_score(direct_impacts, indirect_impacts)
+        impact_level = self._get_impact_level(impact_score)
+        
+        # 권장사항 생성
+        recommendations = self._generate_recommendations(target_table, target_column, 
+                                                         direct_impacts, indirect_impacts, impact_level)
+        
+        # 리니지 그래프 상의 하류(영향받는 CTE/서브쿼리/Statement)와 상류(대상이 CTE일 때의 원천)
+        graph = self.lineage_analyzer.reachability
+        downstream = sorted(self._reachable_from(target_table).values(),
+                            key=lambda entry: (entry['hops'], entry['kind'], entry['name']))
+        upstream = [entry for start in graph.find(target_table) for entry in graph.upstream(start)]
+        
+        return {
+            'target': {
+                'table': target_table,
+                'column': target_column
+            },
+            'impact_level': impact_level,
+            'impact_score': impact_score,
+            'direct_impacts': direct_impacts,
+            'indirect_impacts': indirect_impacts,
+            'affected_tables': sorted(list(affected_tables)),
+            'affected_ctes': sorted(list(affected_ctes)),
+            'statistics': {
+                'total_direct_impacts': len(direct_impacts),
+                'total_indirect_impacts': len(indirect_impacts),
+                'total_affected_tables': len(affected_tables),
+                'total_affected_ctes': len(affected_ctes)
+            },
+            'reachability': {
+                'downstream': downstream,
+                'upstream': upstream
+            },
+            'recommendations': recommendations
+        }
+    
+    # 테이블 사용 패턴 (결과 순서 유지를 위해 리스트로 관리)
+    TABLE_IMPACT_PATTERNS = [
+        ('FROM', r'FROM\s+{table}\b'),
+        ('JOIN', r'JOIN\s+{table}\b'),
+        ('UPDATE', r'UPDATE\s+{table}\b'),
+        ('INSERT', r'INSERT\s+INTO\s+{table}\b'),
+        ('DELETE', r'DELETE\s+FROM\s+{table}\b')
+    ]
+    COLUMN_IMPACT_PATTERNS = [
+        ('TABLE_COLUMN', r'\b{table}\.{column}\b'),
+        ('COLUMN', r'\b{column}\b')
+    ]
+    
+    @classmethod
+    @lru_cache(maxsize=256)
+    def _compile_impact_pattern(cls, target_table: str, target_column: Optional[str]):
+        """
+        테이블/컬럼 사용 패턴을 하나의 정규식으로 컴파일
+        
+        각 대안을 lookahead로 감싸 모든 위치에서 시도하므로, 패턴별로 따로
+        검색할 때처럼 겹치는 일치(예: DELETE FROM t 안의 FROM t)도 모두 찾습니다.
+        맨 앞의 첫 글자 문자 클래스로 일치 가능성이 없는 위치는 바로 건너뜁니다.
+        """
+        patterns = list(cls.TABLE_IMPACT_PATTERNS)
+        first_chars = {'F', 'J', 'U', 'I', 'D', target_table[:1]}
+        if target_column:
+            patterns += cls.COLUMN_IMPACT_PATTERNS
+            first_chars.add(target_column[:1])
+        alternatives = [
+            f'(?P<{name}>{pattern.format(table=re.escape(target_table), column=re.escape(target_column or ""))})'
+            for name, pattern in patterns
+        ]
+        guard = ''.join(sorted({re.escape(c) for ch in first_chars if ch for c in (ch.lower(), ch.upper())}))
+        return re.compile(f'(?=[{guard}])(?=' + '|'.join(alternatives) + ')', re.IGNORECASE)
+    
+    def _collect_direct_hits(self, target_table: str,
+                             target_column: Optional[str]) -> Dict[str, List[Tuple[int, int]]]:
+        """대상 하나의 사용 위치를 패턴 타입별로 수집 (모든 패턴을 한 번의 스캔으로 검색)"""
+        pattern = self._compile_impact_pattern(target_table, target_column)
+        
+        hits = defaultdict(list)
+        for match in pattern.finditer(self.query_text):
+            hit_type = match.lastgroup
+            hits[hit_type].append((match.start(hit_type), match.end(hit_type)))
+        return hits
+    
+    # 테이블 앞 키워드 -> 패턴 타입 (키워드와 테이블명 사이에는 공백만 허용)
+    _TABLE_PREFIX_TYPES = (('FROM', 'FROM'), ('JOIN', 'JOIN'), ('UPDATE', 'UPDATE'))
+    
+    def _collect_batch_hits(self, targets: List[Tuple[str, Optional[str]]]) -> Dict[Tuple, Dict[str, List]]:
+        """
+        여러 대상의 사용 위치를 한 번의 식별자 스캔으로 수집
+        
+        쿼리의 식별자(단어)를 순서대로 한 번 훑으면서 대상 테이블/컬럼 이름 사전에서
+        조회하고(다중 패턴 사전 매칭), 직전 단어로 FROM/JOIN/UPDATE/INSERT/DELETE를
+        판별합니다. 결과는 대상별 _collect_direct_hits()와 같습니다.
+        식별자 문자로만 이루어지지 않은 이름(예: schema.table)은 정규식 스캔으로 처리합니다.
+        """
+        hits_by_target = {target: defaultdict(list) for target in targets}
+        table_targets = defaultdict(list)
+        column_targets = defaultdict(list)
+        for target in targets:
+            target_table, target_column = target
+            if not _IDENTIFIER_PATTERN.fullmatch(target_table) or \
+                    (target_column and not _IDENTIFIER_PATTERN.fullmatch(target_column)):
+                hits_by_target[target] = self._collect_direct_hits(target_table, target_column)
+                continue
+            table_targets[target_table].append(target)
+            if target_column:
+                column_targets[target_column].append(target)
+        
+        if not table_targets and not column_targets:
+            return hits_by_target
+        
+        text = self.query_text
+        # 직전 두 단어 (시작, 끝, 대문자 값)
+        prev2 = prev1 = None
+        for match in _IDENTIFIER_PATTERN.finditer(text):
+            start, end = match.span()
+            word = match.group()
+            lower = word.lower()
+            
+            if lower in table_targets:
+                kinds = []
+                if prev1 and text[prev1[1]:start].isspace():
+                    for keyword, kind in self._TABLE_PREFIX_TYPES:
+                        if prev1[2].endswith(keyword):
+                            kinds.append((kind, prev1[1] - len(keyword)))
+                    if prev2 and text[prev2[1]:prev1[0]].isspace():
+                        if prev1[2] == 'INTO' and prev2[2].endswith('INSERT'):
+                            kinds.append(('INSERT', prev2[1] - len('INSERT')))
+                        if prev1[2] == 'FROM' and prev2[2].endswith('DELETE'):
+                            kinds.append(('DELETE', prev2[1] - len('DELETE')))
+                
+                # table.column 형태
+                column_match = None
+                if text[end:end + 1] == '.':
+                    column_match = _IDENTIFIER_PATTERN.match(text, end + 1)
+                
+                for target in table_targets[lower]:
+                    for kind, kind_start in kinds:
+                        hits_by_target[target][kind].append((kind_start, end))
+                    if column_match and target[1] == column_match.group().lower():
+                        hits_by_target[target]['TABLE_COLUMN'].append((start, column_match.end()))
+            
+            for target in column_targets.get(lower, ()):
+                hits_by_target[target]['COLUMN'].append((start, end))
+            
+            prev2, prev1 = prev1, (start, end, word.upper())
+        
+        return hits_by_target
+    
+    # 영향도 매트릭스의 열 (직접 영향 유형 + 간접 영향)
+    MATRIX_USAGE_TYPES = ['FROM', 'JOIN', 'UPDATE', 'INSERT', 'DELETE',
+                          'SELECT', 'WHERE', 'GROUP_BY', 'ORDER_BY', 'HAVING', 'OTHER', 'INDIRECT']
+    
+    def _build_impact_matrix(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """대상 x 사용 유형, 영향받는 테이블 x 대상 매트릭스 생성"""
+        rows = []
+        table_targets = defaultdict(list)
+        for result in results:
+            target = result['target']
+            label = f"{target['table']}.{target['column']}" if target['column'] else target['table']
+            counts = Counter(impact['type'] for impact in result['direct_impacts'])
+            counts['INDIRECT'] = len(result['indirect_impacts'])
+            rows.append({
+                'target': label,
+                'impact_level': result['impact_level'],
+                'impact_score': result['impact_score'],
+                'counts': {usage: counts.get(usage, 0) for usage in self.MATRIX_USAGE_TYPES}
+            })
+            for table in result['affected_tables']:
+                table_targets[table].append(label)
+        
+        return {
+            'usage_types': self.MATRIX_USAGE_TYPES,
+            'rows': rows,
+            'affected_tables': {table: labels for table, labels in sorted(table_targets.items())}
+        }
+    
+    def _analyze_direct_impacts(self, target_table: str, target_column: Optional[str],
+                                hits: Dict[str, List[Tuple[int, int]]]) -> List[Dict[str, Any]]:
+        """직접 영향 분석 (수집된 사용 위치를 패턴 타입 순서대로 결과로 변환)"""
+        impacts = []
+        
+        # 테이블 사용 위치
+        for impact_type, _ in self.TABLE_IMPACT_PATTERNS:
+            for start, end in hits.get(impact_type, []):
+                line_num = self._get_line_number(start)
+                snippet = self._get_snippet(start, end)
+                
+                impact_level = 'HIGH' if impact_type in ['FROM', 'JOIN'] else 'MEDIUM'
+                impacts.append({
+                    'type': impact_type,
+                    'location': f'line {line_num}',
+                    'line_number': line_num,
+                    'span': self.parser.get_span(start, end),
+                    'query_snippet': snippet,
+                    'impact_level': impact_level,
+                    'impact_type': 'direct'
+                })
+        
+        # 컬럼 사용 위치
+        if target_column:
+            for pattern_type, _ in self.COLUMN_IMPACT_PATTERNS:
+                for start, end in hits.get(pattern_type, []):
+                    line_num = self._get_line_number(start)
+                    snippet = self._get_snippet(start, end)
+                    
+                    # 컬럼이 사용된 위치 확인
+                    context = self._get_context(start)
+                    impact_type = self._determine_column_usage_type(context)
+                    
+                    if impact_type == 'SELECT':
+                        impact_level = 'CRITICAL'
+                    elif impact_type in ['WHERE', 'JOIN']:
+                        impact_level = 'HIGH'
+                    elif impact_type in ['GROUP_BY', 'ORDER_BY']:
+                        impact_level = 'MEDIUM'
+                    else:
+                        impact_level = 'LOW'
+                    
+                    impacts.append({
+                        'type': impact_type,
+                        'location': f'line {line_num}',
+                        'line_number': line_num,
+                        'span': self.parser.get_span(start, end),
+                        'query_snippet': snippet,
+                        'impact_level': impact_level,
+                        'impact_type': 'direct',
+                        'column': target_column
+                    })
+        
+        return impacts
+    
+    def _reachable_from(self, target_table: str) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """대상 테이블(또는 같은 이름의 CTE)에서 하류로 도달하는 노드 (종류, 소문자 이름) -> 최단 경로 항목"""
+        graph = self.lineage_analyzer.reachability
+        reached = {}
+        for start in graph.find(target_table):
+            for entry in graph.downstream(start):
+                key = (entry['kind'], entry['name'].lower())
+                if key not in reached or entry['hops'] < reached[key]['hops']:
+                    reached[key] = entry
+        return reached
+    
+    def _analyze_indirect_impacts(self, target_table: str, target_column: Optional[str]) -> List[Dict[str, Any]]:
+        """
+        간접 영향 분석
+        
+        JOIN은 한 단계 관계만 보고, CTE/서브쿼리는 리니지 그래프의 도달 가능성 표로
+        CTE 체인과 중첩 파생 테이블을 거쳐 전파되는 영향까지 찾습니다 (hops: 거친 단계 수).
+        """
+        impacts = []
+        reached = self._reachable_from(target_table)
+        
+        # JOIN 관계를 통한 간접 영향
+        for join_rel in self.lineage_data.get('join_relationships', []):
+            left_table = join_rel.get('left_table', '').lower()
+            right_table = join_rel.get('right_table', '').lower()
+            
+            if target_table in [left_table, right_table]:
+                # JOIN으로 연결된 다른 테이블 찾기
+                related_table = right_table if left_table == target_table else left_table
+                if related_table != target_table:
+                    impacts.append({
+                        'type': 'JOIN_RELATIONSHIP',
+                        'related_table': related_table,
+                        'join_type': join_rel.get('join_type', 'JOIN'),
+                        'condition': join_rel.get('condition', ''),
+                        'impact_level': 'MEDIUM',
+                        'impact_type': 'indirect',
+                        'hops': 1,
+                        'path': f'{target_table} -> {related_table} (JOIN)'
+                    })
+        
+        # CTE 의존성을 통한 간접 영향 (CTE 체인 포함)
+        for cte_dep in self.lineage_data.get('cte_dependencies', []):
+            cte_name = cte_dep.get('cte_name', '')
+            referenced_tables = [t.lower() for t in cte_dep.get('referenced_tables', [])]
+            entry = reached.get(('cte', cte_name.lower()))
+            
+            if entry is not None:
+                impacts.append({
+                    'type': 'CTE_DEPENDENCY',
                     'cte_name': cte_name,
-                    'referenced_tables': [],
-                    'referenced_ctes': [],
-                    'error': str(e)
+                    'referenced_tables': referenced_tables,
+                    'impact_level': 'LOW',
+                    'impact_type': 'indirect',
+                    'hops': entry['hops'],
+                    'path': ' -> '.join([target_table] + entry['path'][1:])
                 })
         
-        return dependencies
+        # 서브쿼리 관계를 통한 간접 영향 (중첩 파생 테이블, CTE를 거친 참조 포함)
+        for subq_rel in self.lineage_data.get('subquery_relationships', []):
+            referenced_tables = [t.lower() for t in subq_rel.get('referenced_tables', [])]
+            entry = reached.get(('subquery', str(subq_rel.get('subquery_index', 0))))
+            
+            if entry is not None:
+                impacts.append({
+                    'type': 'SUBQUERY_RELATIONSHIP',
+                    'subquery_index': subq_rel.get('subquery_index', 0),
+                    'depth': subq_rel.get('depth', 0),
+                    'location': subq_rel.get('location', 'UNKNOWN'),
+                    'referenced_tables': referenced_tables,
+                    'impact_level': 'LOW',
+                    'impact_type': 'indirect',
+                    'hops': entry['hops'],
+                    'path': ' -> '.join([target_table] + entry['path'][1:])
+                })
+        
+        return impacts
     
-    def extract_subquery_relationships(self) -> List[Dict[str, Any]]:
-        """서브쿼리 관계 추출"""
-        relationships = []
-        subqueries = self.structure['subqueries']
+    def _extract_affected_tables(self, target_table: str, direct_impacts: List[Dict], 
+                                  indirect_impacts: List[Dict]) -> Set[str]:
+        """영향받는 테이블 추출"""
+        affected_tables = set()
         
-        for idx, subquery_info in enumerate(subqueries):
-            subquery_query = subquery_info.get('query', '')
-            location = subquery_info.get('location', 'UNKNOWN')
-            depth = subquery_info.get('depth', 0)
+        # JOIN 관계에서 영향받는 테이블
+        for join_rel in self.lineage_data.get('join_relationships', []):
+            left_table = join_rel.get('left_table', '').lower()
+            right_table = join_rel.get('right_table', '').lower()
+            
+            if target_table in [left_table, right_table]:
+                affected_tables.add(left_table)
+                affected_tables.add(right_table)
+        
+        # 간접 영향에서 영향받는 테이블
+        for impact in indirect_impacts:
+            if 'related_table' in impact:
+                affected_tables.add(impact['related_table'])
+            if 'referenced_tables' in impact:
+                affected_tables.update([t.lower() for t in impact['referenced_tables']])
+        
+        # 타겟 테이블 제거
+        affected_tables.discard(target_table.lower())
+        
+        return affected_tables
+    
+    def _extract_affected_ctes(self, target_table: str, target_column: Optional[str],
+                               direct_impacts: List[Dict], indirect_impacts: List[Dict]) -> Set[str]:
+        """영향받는 CTE 추출"""
+        affected_ctes = set()
+        
+        # CTE 의존성에서 영향받는 CTE
+        for cte_dep in self.lineage_data.get('cte_dependencies', []):
+            referenced_tables = [t.lower() for t in cte_dep.get('referenced_tables', [])]
+            
+            if target_table in referenced_tables:
+                affected_ctes.add(cte_dep.get('cte_name', ''))
+        
+        # 간접 영향에서 영향받는 CTE
+        for impact in indirect_impacts:
+            if impact.get('type') == 'CTE_DEPENDENCY':
+                affected_ctes.add(impact.get('cte_name', ''))
+        
+        return affected_ctes
+    
+    def _calculate_impact_score(self, direct_impacts: List[Dict], indirect_impacts: List[Dict]) -> int:
+        """영향도 점수 계산 (0-100)"""
+        max_score = 0
+        
+        # 직접 영향 점수
+        for impact in direct_impacts:
+            level = impact.get('impact_level', 'LOW')
+            if level == 'CRITICAL':
+                score = 100
+            elif level == 'HIGH':
+                score = 80
+            elif level == 'MEDIUM':
+                score = 60
+            else:
+                score = 40
+            
+            max_score = max(max_score, score)
+        
+        # 간접 영향 점수
+        for impact in indirect_impacts:
+            level = impact.get('impact_level', 'LOW')
+            if level == 'MEDIUM':
+                score = 50
+            else:
+                score = 30
             
-            # 서브쿼리 파싱
-            try:
-                subquery_parser = SQLQueryParser(subquery_query)
-                referenced_tables = subquery_parser.extract_tables()
-                
-                relationships.append({
-                    'subquery_index': idx + 1,
-                    'depth': depth,
-                    'location': location,
-                    'referenced_tables': referenced_tables
-                })
-            except Exception as e:
-                relationships.append({
-                    'subquery_index': idx + 1,
-                    'depth': depth,
-                    'location': location,
-                    'referenced_tables': [],
-                    'error': str(e)
-                })
+            max_score = max(max_score, score)
         
-        return relationships
+        return max_score
     
-    def generate_mermaid_diagram(self) -> str:
-        """Mermaid 다이어그램 생성"""
-        lines = ['graph TD']
-        
-        # 노드 정의
-        node_id_map = {}
-        node_counter = 1
+    def _get_impact_level(self, score: int) -> str:
+        """영향도 수준 반환"""
+        if score >= 90:
+            return 'CRITICAL'
+        elif score >= 70:
+            return 'HIGH'
+        elif score >= 50:
+            return 'MEDIUM'
+        else:
+            return 'LOW'
+    
+    def _generate_recommendations(self, target_table: str, target_column: Optional[str],
+                                 direct_impacts: List[Dict], indirect_impacts: List[Dict],
+                                 impact_level: str) -> List[Dict[str, Any]]:
+        """권장사항 생성"""
+        recommendations = []
         
-        # 테이블 노드
-        for table in sorted(self.all_tables):
-            node_id = f'T{node_counter}'
-            node_id_map[table] = node_id
-            lines.append(f'    {node_id}["{table}"]')
-            node_counter += 1
+        if impact_level == 'CRITICAL':
+            recommendations.append({
+                'priority': 'CRITICAL',
+                'message': f'{target_table} 테이블 변경 시 모든 관련 쿼리를 반드시 검토해야 합니다.',
+                'action': '변경 전 모든 영향받는 쿼리 수정 필요'
+            })
+        elif impact_level == 'HIGH':
+            recommendations.append({
+                'priority': 'HIGH',
+                'message': f'{target_table} 테이블 변경 시 주요 쿼리들을 검토해야 합니다.',
+                'action': '변경 전 영향받는 쿼리 검토 및 수정 필요'
+            })
         
-        # CTE 노드
-        for cte in sorted(self.all_ctes):
-            node_id = f'C{node_counter}'
-            node_id_map[cte] = node_id
-            lines.append(f'    {node_id}["{cte}<br/>(CTE)"]')
-            node_counter += 1
+        if target_column:
+            direct_column_impacts = [i for i in direct_impacts if i.get('column') == target_column]
+            if direct_column_impacts:
+                select_impacts = [i for i in direct_column_impacts if i.get('type') == 'SELECT']
+                if select_impacts:
+                    recommendations.append({
+                        'priority': 'HIGH',
+                        'message': f'{target_column} 컬럼이 SELECT 절에서 사용되고 있습니다.',
+                        'action': '컬럼 삭제 시 쿼리 결과에 영향을 미칩니다.'
+                    })
         
-        lines.append('')
+        if len(direct_impacts) + len(indirect_impacts) > 10:
+            recommendations.append({
+                'priority': 'MEDIUM',
+                'message': f'영향받는 쿼리가 많습니다 ({len(direct_impacts) + len(indirect_impacts)}개).',
+                'action': '단계별로 변경을 진행하는 것을 권장합니다.'
+            })
         
-        # JOIN 관계
-        for join_rel in self.join_relationships:
-            left = join_rel.get('left_table', 'unknown')
-            right = join_rel.get('right_table', 'unknown')
-            join_type = join_rel.get('join_type', 'JOIN')
-            
-            if left in node_id_map and right in node_id_map:
-                label = join_type.replace('JOIN', '').strip() or 'JOIN'
-                lines.append(f'    {node_id_map[left]} -->|"{label}"| {node_id_map[right]}')
+        return recommendations
+    
+    def _get_line_number(self, position: int) -> int:
+        """문자 위치에서 라인 번호 반환 (파서의 라인 오프셋 테이블을 이진 탐색)"""
+        return self.parser.get_position(position)[0]
+    
+    def _get_snippet(self, start: int, end: int, context: int = 50) -> str:
+        """쿼리 스니펫 추출"""
+        snippet_start = max(0, start - context)
+        snippet_end = min(len(self.query_text), end + context)
+        snippet = self.query_text[snippet_start:snippet_end]
+        return snippet.strip()
+    
+    def _get_context(self, position: int, context: int = 100) -> str:
+        """컬럼 사용 컨텍스트 추출"""
+        context_start = max(0, position - context)
+        context_end = min(len(self.query_text), position + context)
+        return self.context.upper_slice(context_start, context_end)
+    
+    def _determine_column_usage_type(self, context: str) -> str:
+        """컬럼 사용 타입 결정"""
+        context_upper = context.upper()
         
-        # CTE 의존성
-        for cte_dep in self.cte_dependencies:
-            cte_name = cte_dep.get('cte_name', '')
-            if cte_name not in node_id_map:
-                continue
-            
-            # CTE가 참조하는 테이블
-            for table in cte_dep.get('referenced_tables', []):
-                if table in node_id_map:
-                    lines.append(f'    {node_id_map[table]} -->|"CTE 참조"| {node_id_map[cte_name]}')
-            
-            # CTE가 참조하는 다른 CTE
-            for ref_cte in cte_dep.get('referenced_ctes', []):
-                if ref_cte in node_id_map:
-                    lines.append(f'    {node_id_map[ref_cte]} -->|"CTE 의존"| {node_id_map[cte_name]}')
+        # SELECT 절 확인
+        if 'SELECT' in context_upper and 'FROM' in context_upper:
+            try:
+                select_pos = context_upper.index('SELECT')
+                from_pos = context_upper.index('FROM')
+                if select_pos < from_pos:
+                    return 'SELECT'
+            except ValueError:
+                pass
         
-        # 서브쿼리 관계 (간단히 표시)
-        for subq_rel in self.subquery_relationships:
-            location = subq_rel.get('location', 'UNKNOWN')
-            depth = subq_rel.get('depth', 0)
-            for table in subq_rel.get('referenced_tables', []):
-                if table in node_id_map:
-                    # 서브쿼리 노드는 생성하지 않고 주석으로 표시
-                    # 필요시 서브쿼리 노드도 추가 가능
-                    pass
+        # WHERE 절 확인
+        if 'WHERE' in context_upper:
+            return 'WHERE'
         
-        return '\n'.join(lines)
+        # JOIN 절 확인
+        if 'JOIN' in context_upper and 'ON' in context_upper:
+            return 'JOIN'
+        elif 'GROUP BY' in context_upper:
+            return 'GROUP_BY'
+        elif 'ORDER BY' in context_upper:
+            return 'ORDER_BY'
+        elif 'HAVING' in context_upper:
+            return 'HAVING'
+        else:
+            return 'OTHER'
+
+# ============================================
+# 분석 섹션 의존 그래프
+# ============================================
+
+# 분석 섹션 -> 먼저 계산해야 하는 섹션 (의존 섹션이 항상 앞에 오도록 정의)
+# 영향도 분석(mcp-impact-analyzer.py)은 lineage 섹션의 DataLineageAnalyzer를 입력으로 사용합니다.
+ANALYSIS_SECTION_DEPENDENCIES = {
+    'structure': (),
+    'performance': ('structure',),
+    'optimization': ('performance',),
+    'complexity': ('structure',),
+    'security': (),
+    'lineage': ('structure',)
+}
+ANALYSIS_SECTIONS = tuple(ANALYSIS_SECTION_DEPENDENCIES)
+
+def normalize_analysis_sections(sections: Optional[Iterable[str]]) -> Optional[List[str]]:
+    """
+    sections 인자 정규화 (None은 전체 섹션을 뜻하므로 그대로, 섹션 이름 하나만 준 문자열은 [이름])
     
-    def generate_lineage_json(self) -> Dict[str, Any]:
-        """JSON 형식 리니지 데이터 생성"""
-        return {
-            'metadata': {
-                'total_tables': len(self.all_tables),
-                'total_ctes': len(self.all_ctes),
-                'total_joins': len(self.join_relationships),
-                'total_cte_dependencies': len(self.cte_dependencies),
-                'total_subqueries': len(self.subquery_relationships)
-            },
-            'tables': sorted(list(self.all_tables)),
-            'ctes': sorted(list(self.all_ctes)),
-            'relationships': {
-                'joins': self.join_relationships,
-                'cte_dependencies': self.cte_dependencies,
-                'subquery_relationships': self.subquery_relationships
-            }
-        }
+    Raises:
+        ValueError: 빈 목록이거나 목록 항목이 문자열이 아닌 경우
+    """
+    if sections is None:
+        return None
+    if isinstance(sections, str):
+        sections = [sections]
+    sections = list(sections)
+    if not sections:
+        raise ValueError(f"분석 섹션을 하나 이상 지정하세요 (선택 가능: {', '.join(ANALYSIS_SECTIONS)})")
+    invalid = [repr(section) for section in sections if not isinstance(section, str)]
+    if invalid:
+        raise ValueError(f"분석 섹션 이름은 문자열이어야 합니다: {', '.join(invalid)}")
+    return sections
+
+def resolve_analysis_sections(sections: Optional[Iterable[str]] = None) -> List[str]:
+    """
+    요청한 섹션과 그 의존 섹션 전체를 계산 순서(의존 섹션 먼저)로 반환
+    
+    Args:
+        sections: 요청 섹션 이름 목록 또는 이름 하나 (None이면 전체 섹션)
+    
+    Raises:
+        ValueError: 빈 목록이거나 알 수 없는 섹션 이름이 있는 경우
+    """
+    sections = normalize_analysis_sections(sections)
+    if sections is None:
+        return list(ANALYSIS_SECTIONS)
+    requested = set(sections)
+    unknown = sorted(requested - set(ANALYSIS_SECTIONS))
+    if unknown:
+        raise ValueError(f"알 수 없는 분석 섹션: {', '.join(unknown)} (선택 가능: {', '.join(ANALYSIS_SECTIONS)})")
+    
+    needed = set()
+    pending = list(requested)
+    while pending:
+        section = pending.pop()
+        if section not in needed:
+            needed.add(section)
+            pending.extend(ANALYSIS_SECTION_DEPENDENCIES[section])
+    return [section for section in ANALYSIS_SECTIONS if section in needed]
+
+class AnalysisPlan:
+    """
+    섹션 단위 지연 분석 (ANALYSIS_SECTION_DEPENDENCIES를 따라 필요한 분석기만 생성/실행)
+    
+    대부분의 분석기는 생성자에서 쿼리 구조(쿼리 트리)를 바로 읽으므로, 분석기도 해당 섹션을
+    처음 요청할 때 만듭니다. 예를 들어 security만 요청하면 쿼리 트리 구성과 리니지 분석을 하지 않습니다.
+    """
+    
+    def __init__(self, parser: SQLQueryParser, context: Optional[AnalysisContext] = None,
+                 statistics: Optional[StatisticsCatalog] = None, catalog: Optional[SchemaCatalog] = None,
+                 fragment_cache: Optional[Dict[str, List[str]]] = None,
+                 analyzers: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            analyzers: 이미 만든 분석기 (섹션 이름 -> 분석기). 없는 섹션은 필요할 때 생성합니다.
+        """
+        self.parser = parser
+        self.context = context or AnalysisContext.for_parser(parser)
+        self.statistics = statistics
+        self.catalog = catalog
+        self.fragment_cache = fragment_cache
+        self.analyzers = dict(analyzers or {})
+        # 섹션 -> analyze() 결과 (계산한 섹션만)
+        self.results = {}
+    
+    def analyzer(self, section: str) -> Any:
+        """섹션의 분석기 반환 (없으면 의존 섹션을 먼저 계산한 뒤 생성)"""
+        if section not in self.analyzers:
+            for dependency in ANALYSIS_SECTION_DEPENDENCIES[section]:
+                self.result(dependency)
+            self.analyzers[section] = self._create_analyzer(section)
+        return self.analyzers[section]
+    
+    def result(self, section: str) -> Dict[str, Any]:
+        """섹션의 분석 결과 반환 (처음 요청할 때 계산, 계산 전 도구 호출 취소 여부 확인)"""
+        if section not in self.results:
+            analyzer = self.analyzer(section)
+            check_cancelled()
+            self.results[section] = analyzer.analyze()
+        return self.results[section]
+    
+    def _create_analyzer(self, section: str) -> Any:
+        if section == 'structure':
+            return QueryStructureAnalyzer(self.parser, self.context)
+        if section == 'performance':
+            return PerformanceAnalyzer(self.parser, context=self.context, statistics=self.statistics)
+        if section == 'optimization':
+            return OptimizationAdvisor(self.parser, self.analyzers['performance'], self.context, self.catalog)
+        if section == 'complexity':
+            return ComplexityAnalyzer(self.parser, self.context)
+        if section == 'security':
+            return SecurityAnalyzer(self.parser, self.context)
+        return DataLineageAnalyzer(self.parser, self.results['structure'], self.context, self.fragment_cache)
 
 # ============================================
-# 영향도 분석기 클래스
+# 리포트 생성기 클래스
 # ============================================
 
-class ImpactAnalyzer:
-    """영향도 분석 클래스 - 특정 테이블/컬럼 이슈 발생 시 영향받는 쿼리 분석"""
+# 리포트 스트리밍 저장 시 모아서 한 번에 쓰는 문자 수 (파일 버퍼 크기 수준)
+REPORT_CHUNK_SIZE = 8192
+
+def write_report_chunks(fp, pieces: Iterable[str], chunk_size: int = REPORT_CHUNK_SIZE) -> None:
+    """문자열 조각들을 chunk_size 문자 단위로 모아 파일에 쓰기 (전체 문자열을 만들지 않음)"""
+    buffer = []
+    size = 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            fp.write(''.join(buffer))
+            buffer = []
+            size = 0
+    if buffer:
+        fp.write(''.join(buffer))
+
+def write_report_lines(fp, lines: Iterable[str], chunk_size: int = REPORT_CHUNK_SIZE) -> None:
+    """라인 생성기를 '\n'.join(lines)와 같은 내용으로 파일에 스트리밍 저장"""
+    def pieces():
+        separator = ''
+        for line in lines:
+            yield separator
+            yield line
+            separator = '\n'
     
-    def __init__(self, parser: SQLQueryParser, lineage_analyzer: DataLineageAnalyzer, 
-                 structure_analyzer: QueryStructureAnalyzer):
+    write_report_chunks(fp, pieces(), chunk_size)
+
+def iter_json_object(items: Iterable[Tuple[str, Any]]) -> Iterator[str]:
+    """
+    (키, 값) 생성기를 json.dump(dict(items), ensure_ascii=False, indent=2)와 같은 문자열 조각으로 변환
+    
+    최상위 항목을 하나씩 받아 인코딩하므로 리포트 dict 전체를 미리 만들 필요가 없습니다.
+    값 안의 줄바꿈은 들여쓰기뿐이므로(문자열 속 줄바꿈은 \\n으로 이스케이프됨) 한 단계 들여써서 내보냅니다.
+    """
+    encoder = json.JSONEncoder(ensure_ascii=False, indent=2)
+    separator = '{\n  '
+    for key, value in items:
+        yield separator
+        yield encoder.encode(key)
+        yield ': '
+        for piece in encoder.iterencode(value):
+            yield piece.replace('\n', '\n  ')
+        separator = ',\n  '
+    yield '{}' if separator == '{\n  ' else '\n}'
+
+def write_report_json(fp, items: Iterable[Tuple[str, Any]]) -> None:
+    """JSON 리포트(들여쓰기 2칸)를 최상위 항목 단위로 인코딩하며 chunk 단위로 파일에 스트리밍 저장"""
+    write_report_chunks(fp, iter_json_object(items))
+
+class ReportGenerator:
+    """JSON 및 마크다운 리포트 생성 클래스"""
+    
+    def __init__(self, parser: SQLQueryParser, structure_analyzer: Optional[QueryStructureAnalyzer] = None,
+                 performance_analyzer: Optional[PerformanceAnalyzer] = None,
+                 optimization_advisor: Optional[OptimizationAdvisor] = None,
+                 complexity_analyzer: Optional[ComplexityAnalyzer] = None,
+                 security_analyzer: Optional[SecurityAnalyzer] = None,
+                 query_file: Optional[str] = None, lineage_analyzer: Optional[Any] = None,
+                 sections: Optional[Iterable[str]] = None, plan: Optional[AnalysisPlan] = None):
+        """
+        Args:
+            sections: 리포트에 포함할 섹션 (ANALYSIS_SECTIONS 중 선택). None이면 전달한 분석기의 섹션 전체
+                      (plan을 전달한 경우 ANALYSIS_SECTIONS 전체). 요청 섹션과 그 의존 섹션만 계산합니다.
+            plan: 분석기를 필요할 때 생성하는 AnalysisPlan (없으면 전달한 분석기로 구성)
+        """
+        analyzers = {
+            'structure': structure_analyzer,
+            'performance': performance_analyzer,
+            'optimization': optimization_advisor,
+            'complexity': complexity_analyzer,
+            'security': security_analyzer,
+            'lineage': lineage_analyzer
+        }
+        analyzers = {section: analyzer for section, analyzer in analyzers.items() if analyzer is not None}
+        if plan is None:
+            plan = AnalysisPlan(parser, analyzers=analyzers)
+            if sections is None:
+                sections = list(analyzers)
+        else:
+            plan.analyzers.update(analyzers)
+        requested = set(normalize_analysis_sections(sections) or ANALYSIS_SECTIONS)
+        
         self.parser = parser
-        self.lineage_analyzer = lineage_analyzer
-        self.structure_analyzer = structure_analyzer
-        self.structure = parser.get_parsed_structure()
-        self.lineage_data = lineage_analyzer.analyze()
-        self.query_text = parser.query_text
-        self.query_lines = self.query_text.split('\n')
+        self.query_file = query_file
+        self.plan = plan
+        # 리포트에 포함할 섹션 (ANALYSIS_SECTIONS 순서)
+        self.sections = [section for section in resolve_analysis_sections(requested) if section in requested]
+        
+        # 분석 결과 수집 (요청 섹션과 의존 섹션만, 섹션 사이에서 도구 호출 취소 여부 확인)
+        for section in resolve_analysis_sections(self.sections):
+            plan.result(section)
+        self.structure_result = plan.results.get('structure')
+        self.performance_result = plan.results.get('performance')
+        self.optimization_result = plan.results.get('optimization')
+        self.complexity_result = plan.results.get('complexity')
+        self.security_result = plan.results.get('security')
         
-    def analyze(self, target_table: str, target_column: Optional[str] = None) -> Dict[str, Any]:
-        """영향도 분석 수행"""
-        target_table = target_table.strip().lower()
-        target_column = target_column.strip().lower() if target_column else None
+        # 리니지 분석 결과 (선택사항)
+        self.lineage_analyzer = plan.analyzers.get('lineage') if 'lineage' in self.sections else None
+        self.lineage_result = plan.results.get('lineage') if 'lineage' in self.sections else None
+        
+        self.structure_analyzer = plan.analyzers.get('structure')
+        self.performance_analyzer = plan.analyzers.get('performance')
+        self.optimization_advisor = plan.analyzers.get('optimization')
+        self.complexity_analyzer = plan.analyzers.get('complexity')
+        self.security_analyzer = plan.analyzers.get('security')
+    
+    def generate_metadata(self) -> Dict[str, Any]:
+        """
+        리포트 메타데이터 생성
+        
+        structure 섹션을 계산하지 않은 경우 쿼리 트리를 만들지 않도록 쿼리 타입은
+        첫 Statement의 sqlparse 타입(WITH ... SELECT 는 SELECT)을 사용합니다.
+        """
+        if self.structure_result:
+            query_type = self.structure_result['query_type']
+        elif self.parser.parsed_statements:
+            query_type = self.parser.parsed_statements[0].get_type()
+        else:
+            query_type = 'UNKNOWN'
+        return {
+            'query_file': self.query_file or 'N/A',
+            'analyzed_at': datetime.now().isoformat(),
+            'query_length': len(self.parser.query_text),
+            'query_lines': self.parser.query_text.count('\n') + 1,
+            'query_type': query_type
+        }
+    
+    def generate_json(self) -> Dict[str, Any]:
+        """JSON 리포트 생성 (리포트에 포함한 섹션만)"""
+        return dict(self.iter_json_items())
+    
+    def iter_json_items(self) -> Iterator[Tuple[str, Any]]:
+        """JSON 리포트의 최상위 (키, 값)을 순서대로 생성"""
+        yield 'metadata', self.generate_metadata()
+        for section in ('structure', 'performance', 'complexity', 'security', 'optimization'):
+            if section in self.sections:
+                yield section, self.plan.results[section]
         
-        # 직접 영향 분석
-        direct_impacts = self._analyze_direct_impacts(target_table, target_column)
+        # 리니지 분석 결과 추가 (있는 경우)
+        if self.lineage_result:
+            yield 'lineage', self.lineage_result
+    
+    def write_json(self, fp) -> None:
+        """JSON 리포트를 섹션 단위로 인코딩하여 파일에 스트리밍 저장 (직렬화 문자열 전체를 만들지 않음)"""
+        write_report_json(fp, self.iter_json_items())
+    
+    def generate_lineage_markdown(self) -> str:
+        """리니지 전용 마크다운 리포트 생성"""
+        return '\n'.join(self.iter_lineage_markdown())
+    
+    def write_lineage_markdown(self, fp) -> None:
+        """리니지 전용 마크다운 리포트를 파일에 스트리밍 저장"""
+        write_report_lines(fp, self.iter_lineage_markdown())
+    
+    def iter_lineage_markdown(self) -> Iterator[str]:
+        """리니지 전용 마크다운 리포트를 라인 단위로 생성"""
+        if not self.lineage_result:
+            yield '# 데이터 리니지 분석'
+            yield ''
+            yield '리니지 분석 결과가 없습니다.'
+            yield ''
+            return
+        
+        yield '# 데이터 리니지 분석 리포트'
+        yield ''
+        yield f'**분석 일시**: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}'
+        yield f'**쿼리 파일**: {self.query_file or "직접 입력"}'
+        yield ''
         
-        # 간접 영향 분석
-        indirect_impacts = self._analyze_indirect_impacts(target_table, target_column)
+        # 요약 정보
+        yield '## 요약'
+        yield ''
+        yield f'- **총 테이블 수**: {len(self.lineage_result.get("tables", []))}개'
+        yield f'- **총 CTE 수**: {len(self.lineage_result.get("ctes", []))}개'
+        yield f'- **JOIN 관계 수**: {len(self.lineage_result.get("join_relationships", []))}개'
+        yield f'- **CTE 의존성 수**: {len(self.lineage_result.get("cte_dependencies", []))}개'
+        yield f'- **서브쿼리 수**: {len(self.lineage_result.get("subquery_relationships", []))}개'
+        yield ''
         
-        # 영향받는 테이블 및 CTE 추출
-        affected_tables = self._extract_affected_tables(target_table, direct_impacts, indirect_impacts)
-        affected_ctes = self._extract_affected_ctes(target_table, target_column, direct_impacts, indirect_impacts)
+        # Mermaid 다이어그램
+        if self.lineage_analyzer:
+            yield '## 테이블 관계 다이어그램'
+            yield ''
+            yield '```mermaid'
+            yield self.lineage_analyzer.generate_mermaid_diagram()
+            yield '```'
+            yield ''
+        
+        # 테이블 목록
+        if self.lineage_result.get('tables'):
+            yield '## 테이블 목록'
+            yield ''
+            for table in self.lineage_result['tables']:
+                yield f'- `{table}`'
+            yield ''
+        
+        # CTE 목록
+        if self.lineage_result.get('ctes'):
+            yield '## CTE 목록'
+            yield ''
+            for cte in self.lineage_result['ctes']:
+                yield f'- `{cte}`'
+            yield ''
         
-        # 영향도 점수 계산
-        impact_score = self._calculate_impact_score(direct_impacts, indirect_impacts)
-        impact_level = self._get_impact_level(impact_score)
+        # JOIN 관계 상세
+        if self.lineage_result.get('join_relationships'):
+            yield '## JOIN 관계'
+            yield ''
+            yield '| 왼쪽 테이블 | JOIN 타입 | 오른쪽 테이블 | 조건 |'
+            yield '|------------|----------|-------------|------|'
+            for join_rel in self.lineage_result['join_relationships']:
+                left = join_rel.get('left_table', 'unknown')
+                join_type = join_rel.get('join_type', 'JOIN')
+                right = join_rel.get('right_table', 'unknown')
+                condition = join_rel.get('condition', '')[:50]  # 최대 50자
+                yield f'| `{left}` | {join_type} | `{right}` | `{condition}` |'
+            yield ''
         
-        # 권장사항 생성
-        recommendations = self._generate_recommendations(target_table, target_column, 
-                                                         direct_impacts, indirect_impacts, impact_level)
+        # CTE 의존성 상세
+        if self.lineage_result.get('cte_dependencies'):
+            yield '## CTE 의존성'
+            yield ''
+            for cte_dep in self.lineage_result['cte_dependencies']:
+                cte_name = cte_dep.get('cte_name', '')
+                yield f'### CTE: `{cte_name}`'
+                yield ''
+                
+                ref_tables = cte_dep.get('referenced_tables', [])
+                if ref_tables:
+                    yield '**참조하는 테이블**:'
+                    for table in ref_tables:
+                        yield f'- `{table}`'
+                    yield ''
+                
+                ref_ctes = cte_dep.get('referenced_ctes', [])
+                if ref_ctes:
+                    yield '**참조하는 CTE**:'
+                    for cte in ref_ctes:
+                        yield f'- `{cte}`'
+                    yield ''
         
-        return {
-            'target': {
-                'table': target_table,
-                'column': target_column
-            },
-            'impact_level': impact_level,
-            'impact_score': impact_score,
-            'direct_impacts': direct_impacts,
-            'indirect_impacts': indirect_impacts,
-            'affected_tables': sorted(list(affected_tables)),
-            'affected_ctes': sorted(list(affected_ctes)),
-            'statistics': {
-                'total_direct_impacts': len(direct_impacts),
-                'total_indirect_impacts': len(indirect_impacts),
-                'total_affected_tables': len(affected_tables),
-                'total_affected_ctes': len(affected_ctes)
-            },
-            'recommendations': recommendations
-        }
+        # 서브쿼리 관계 상세
+        if self.lineage_result.get('subquery_relationships'):
+            yield '## 서브쿼리 관계'
+            yield ''
+            for subq_rel in self.lineage_result['subquery_relationships']:
+                idx = subq_rel.get('subquery_index', 0)
+                depth = subq_rel.get('depth', 0)
+                location = subq_rel.get('location', 'UNKNOWN')
+                ref_tables = subq_rel.get('referenced_tables', [])
+                
+                yield f'### 서브쿼리 #{idx}'
+                yield ''
+                yield f'- **위치**: {location}'
+                yield f'- **깊이**: {depth}'
+                if ref_tables:
+                    yield '**참조하는 테이블**:'
+                    for table in ref_tables:
+                        yield f'- `{table}`'
+                yield ''
+        
+        # 컬럼 리니지 (출력 컬럼별 원천 기본 테이블 컬럼)
+        column_lineage = self.lineage_result.get('column_lineage') or {}
+        if column_lineage.get('outputs'):
+            yield '## 컬럼 리니지'
+            yield ''
+            yield '| 출력 컬럼 | 식 | 원천 컬럼 |'
+            yield '|----------|----|----------|'
+            for output in column_lineage['outputs']:
+                expression = (output.get('expression') or '').replace('|', '\\|')[:50]  # 최대 50자
+                bases = ', '.join(f'`{base}`' for base in output['base_columns']) or '-'
+                yield f"| `{output['output']}` | `{expression}` | {bases} |"
+            yield ''
+            if column_lineage.get('unresolved'):
+                yield '**출처를 확인하지 못한 컬럼 참조**:'
+                for entry in column_lineage['unresolved']:
+                    yield f"- `{entry['output']}`: `{entry['reference']}`"
+                yield ''
     
-    def _analyze_direct_impacts(self, target_table: str, target_column: Optional[str]) -> List[Dict[str, Any]]:
-        """직접 영향 분석"""
-        impacts = []
-        query_upper = self.query_text.upper()
-        
-        # 테이블 사용 위치 찾기
-        table_patterns = [
-            (r'FROM\s+' + re.escape(target_table) + r'\b', 'FROM'),
-            (r'JOIN\s+' + re.escape(target_table) + r'\b', 'JOIN'),
-            (r'UPDATE\s+' + re.escape(target_table) + r'\b', 'UPDATE'),
-            (r'INSERT\s+INTO\s+' + re.escape(target_table) + r'\b', 'INSERT'),
-            (r'DELETE\s+FROM\s+' + re.escape(target_table) + r'\b', 'DELETE')
-        ]
+    def generate_lineage_json(self) -> Dict[str, Any]:
+        """리니지 JSON 리포트 생성"""
+        if not self.lineage_analyzer:
+            return {}
         
-        for pattern, impact_type in table_patterns:
-            matches = re.finditer(pattern, query_upper, re.IGNORECASE)
-            for match in matches:
-                line_num = self._get_line_number(match.start())
-                snippet = self._get_snippet(match.start(), match.end())
-                
-                impact_level = 'HIGH' if impact_type in ['FROM', 'JOIN'] else 'MEDIUM'
-                impacts.append({
-                    'type': impact_type,
-                    'location': f'line {line_num}',
-                    'line_number': line_num,
-                    'query_snippet': snippet,
-                    'impact_level': impact_level,
-                    'impact_type': 'direct'
-                })
+        return self.lineage_analyzer.generate_lineage_json()
+    
+    def write_lineage_json(self, fp) -> None:
+        """리니지 JSON 리포트를 최상위 항목 단위로 인코딩하여 파일에 스트리밍 저장"""
+        write_report_json(fp, self.lineage_analyzer.iter_lineage_json_items() if self.lineage_analyzer else ())
+    
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """
+        압축 출력 형식(JSONL/바이너리)용 레코드 생성
+        
+        메타데이터, 점수, 이슈/취약점/최적화 제안, 리니지 관계와 컬럼 리니지 간선을
+        항목 하나당 레코드 하나로 만듭니다 (종류: ANALYSIS_RECORD_KINDS).
+        """
+        yield analysis_record('metadata', self.generate_metadata(), analyzer_version=ANALYZER_VERSION)
+        for category in ('performance', 'complexity', 'security'):
+            if category in self.sections:
+                result = self.plan.results[category]
+                yield analysis_record('score', category=category, score=result['score'], level=result['level'])
+        
+        if 'performance' in self.sections:
+            for issue in self.performance_result['issues']:
+                yield analysis_record('performance_issue', issue)
+        if 'security' in self.sections:
+            for vulnerability in self.security_result['vulnerabilities']:
+                yield analysis_record('security_vulnerability', vulnerability)
+        if 'optimization' in self.sections:
+            for suggestion in self.optimization_result['suggestions']:
+                yield analysis_record('optimization_suggestion', suggestion)
         
-        # 컬럼 사용 위치 찾기
-        if target_column:
-            column_patterns = [
-                (r'\b' + re.escape(target_table) + r'\.' + re.escape(target_column) + r'\b', 'TABLE_COLUMN'),
-                (r'\b' + re.escape(target_column) + r'\b', 'COLUMN')
-            ]
-            
-            for pattern, pattern_type in column_patterns:
-                matches = re.finditer(pattern, query_upper, re.IGNORECASE)
-                for match in matches:
-                    line_num = self._get_line_number(match.start())
-                    snippet = self._get_snippet(match.start(), match.end())
-                    
-                    # 컬럼이 사용된 위치 확인
-                    context = self._get_context(match.start())
-                    impact_type = self._determine_column_usage_type(context)
-                    
-                    if impact_type == 'SELECT':
-                        impact_level = 'CRITICAL'
-                    elif impact_type in ['WHERE', 'JOIN']:
-                        impact_level = 'HIGH'
-                    elif impact_type in ['GROUP_BY', 'ORDER_BY']:
-                        impact_level = 'MEDIUM'
-                    else:
-                        impact_level = 'LOW'
-                    
-                    impacts.append({
-                        'type': impact_type,
-                        'location': f'line {line_num}',
-                        'line_number': line_num,
-                        'query_snippet': snippet,
-                        'impact_level': impact_level,
-                        'impact_type': 'direct',
-                        'column': target_column
-                    })
+        if not self.lineage_result:
+            return
+        for join_rel in self.lineage_result.get('join_relationships', []):
+            yield analysis_record('join', join_rel)
+        for cte_dep in self.lineage_result.get('cte_dependencies', []):
+            yield analysis_record('cte_dependency', cte_dep)
+        for subq_rel in self.lineage_result.get('subquery_relationships', []):
+            yield analysis_record('subquery', subq_rel)
+        column_lineage = self.lineage_result.get('column_lineage') or {}
+        for edge in column_lineage.get('edges', []):
+            yield analysis_record('column_edge', edge)
+        for output in column_lineage.get('outputs', []):
+            yield analysis_record('column_output', output)
+    
+    @staticmethod
+    def _format_spans(spans: List[Dict[str, int]], limit: int = 3) -> str:
+        """소스 범위 목록을 'line 라인:컬럼-라인:컬럼' 형식으로 변환"""
+        parts = [f'line {sp["start_line"]}:{sp["start_column"]}-{sp["end_line"]}:{sp["end_column"]}'
+                 for sp in spans[:limit]]
+        if len(spans) > limit:
+            parts.append(f'외 {len(spans) - limit}곳')
+        return ', '.join(parts)
+    
+    def generate_markdown(self) -> str:
+        """마크다운 리포트 생성"""
+        return '\n'.join(self.iter_markdown())
+    
+    def write_markdown(self, fp) -> None:
+        """마크다운 리포트를 파일에 스트리밍 저장 (리포트 전체 문자열을 만들지 않음)"""
+        write_report_lines(fp, self.iter_markdown())
+    
+    def iter_markdown(self) -> Iterator[str]:
+        """마크다운 리포트를 라인 단위로 생성"""
+        # 제목 및 메타 정보
+        yield '# SQL 쿼리 분석 리포트'
+        yield ''
+        yield f'**분석 일시**: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}'
+        yield f'**쿼리 파일**: {self.query_file or "직접 입력"}'
+        metadata = self.generate_metadata()
+        yield f'**쿼리 타입**: {metadata["query_type"]}'
+        yield f'**쿼리 길이**: {metadata["query_length"]} 문자, {metadata["query_lines"]} 라인'
+        yield ''
+        
+        # 실행 요약 (점수가 있는 섹션만)
+        scores = [(label, self.plan.results[section])
+                  for section, label in (('performance', '성능'), ('complexity', '복잡도'), ('security', '보안'))
+                  if section in self.sections]
+        if scores:
+            yield '## 실행 요약 (Executive Summary)'
+            yield ''
+            yield '| 항목 | 점수 | 레벨 |'
+            yield '|------|------|------|'
+            for label, result in scores:
+                yield f'| {label} | {result["score"]}/100 | {result["level"]} |'
+            yield ''
+        
+        if 'structure' in self.sections:
+            yield from self._iter_structure_markdown()
+        
+        if 'performance' in self.sections:
+            yield from self._iter_performance_markdown()
+        
+        if 'complexity' in self.sections:
+            yield from self._iter_complexity_markdown()
+        
+        if 'security' in self.sections:
+            yield from self._iter_security_markdown()
+        
+        if 'optimization' in self.sections:
+            yield from self._iter_optimization_markdown()
         
-        return impacts
+        # 부록
+        yield '## 부록'
+        yield ''
+        yield '### 원본 쿼리'
+        yield ''
+        yield '```sql'
+        # 쿼리가 너무 길면 일부만 표시
+        query_preview = self.parser.query_text[:2000] + ('\n... (쿼리가 길어 일부만 표시)' if len(self.parser.query_text) > 2000 else '')
+        yield query_preview
+        yield '```'
+        yield ''
     
-    def _analyze_indirect_impacts(self, target_table: str, target_column: Optional[str]) -> List[Dict[str, Any]]:
-        """간접 영향 분석"""
-        impacts = []
+    def _iter_structure_markdown(self) -> Iterator[str]:
+        """쿼리 구조 분석 섹션 마크다운 라인 생성"""
+        yield '## 1. 쿼리 구조 분석'
+        yield ''
+        yield '### 기본 정보'
+        yield ''
+        yield f'- **테이블 수**: {self.structure_result["table_count"]}개'
+        yield f'- **컬럼 수**: {self.structure_result["column_count"]}개'
+        yield f'- **JOIN 수**: {self.structure_result["join_count"]}개'
+        yield f'- **서브쿼리 수**: {self.structure_result["subquery_count"]}개'
+        yield f'- **최대 서브쿼리 깊이**: {self.structure_result["max_subquery_depth"]}'
+        yield f'- **CTE 수**: {self.structure_result["cte_count"]}개'
+        yield ''
         
-        # JOIN 관계를 통한 간접 영향
-        for join_rel in self.lineage_data.get('join_relationships', []):
-            left_table = join_rel.get('left_table', '').lower()
-            right_table = join_rel.get('right_table', '').lower()
-            
-            if target_table in [left_table, right_table]:
-                # JOIN으로 연결된 다른 테이블 찾기
-                related_table = right_table if left_table == target_table else left_table
-                if related_table != target_table:
-                    impacts.append({
-                        'type': 'JOIN_RELATIONSHIP',
-                        'related_table': related_table,
-                        'join_type': join_rel.get('join_type', 'JOIN'),
-                        'condition': join_rel.get('condition', ''),
-                        'impact_level': 'MEDIUM',
-                        'impact_type': 'indirect',
-                        'path': f'{target_table} -> {related_table} (JOIN)'
-                    })
+        if self.structure_result['tables']:
+            yield '### 테이블 목록'
+            yield ''
+            for table in self.structure_result['tables']:
+                yield f'- `{table}`'
+            yield ''
         
-        # CTE 의존성을 통한 간접 영향
-        for cte_dep in self.lineage_data.get('cte_dependencies', []):
-            cte_name = cte_dep.get('cte_name', '')
-            referenced_tables = [t.lower() for t in cte_dep.get('referenced_tables', [])]
-            
-            if target_table in referenced_tables:
-                impacts.append({
-                    'type': 'CTE_DEPENDENCY',
-                    'cte_name': cte_name,
-                    'referenced_tables': referenced_tables,
-                    'impact_level': 'LOW',
-                    'impact_type': 'indirect',
-                    'path': f'{target_table} -> {cte_name} (CTE)'
-                })
+        if self.structure_result['join_types']:
+            yield '### JOIN 타입'
+            yield ''
+            for join_type in self.structure_result['join_types']:
+                yield f'- {join_type}'
+            yield ''
+    
+    def _iter_performance_markdown(self) -> Iterator[str]:
+        """성능 분석 섹션 마크다운 라인 생성"""
+        yield '## 2. 성능 분석'
+        yield ''
+        yield f'**성능 점수**: {self.performance_result["score"]}/100'
+        yield f'**성능 레벨**: {self.performance_result["level"]}'
+        yield ''
+        
+        cost_estimate = self.performance_result.get('cost_estimate')
+        if cost_estimate:
+            statistics_info = cost_estimate['statistics']
+            yield (f'**예상 비용**: {cost_estimate["total_cost"]:,} '
+                   f'(예상 결과 행 수 {cost_estimate["estimated_rows"]:,}, '
+                   f'통계: {statistics_info["source"]}, 테이블 {statistics_info["table_count"]}개)')
+            if cost_estimate['missing_statistics']:
+                yield (f'- 통계가 없는 테이블 (기본 {CostEstimator.DEFAULT_ROWS}행 가정): '
+                       f'{", ".join(cost_estimate["missing_statistics"][:10])}')
+            yield ''
+            yield '| 쿼리 블록 | 위치 | 예상 행 수 | 반복 | 누적 비용 |'
+            yield '|----------|------|-----------|------|----------|'
+            top_blocks = sorted(cost_estimate['blocks'], key=lambda b: -b['total_cost'])[:10]
+            for block in top_blocks:
+                where = f'line {block["span"]["start_line"]}' if block['span'] else f'#{block["statement"]}'
+                yield (f'| {block["kind"]} ({block["location"]}) | {where} | {block["rows"]:,} | '
+                       f'{block["loops"]:,} | {block["total_cost"]:,} |')
+            yield ''
         
-        # 서브쿼리 관계를 통한 간접 영향
-        for subq_rel in self.lineage_data.get('subquery_relationships', []):
-            referenced_tables = [t.lower() for t in subq_rel.get('referenced_tables', [])]
-            
-            if target_table in referenced_tables:
-                impacts.append({
-                    'type': 'SUBQUERY_RELATIONSHIP',
-                    'subquery_index': subq_rel.get('subquery_index', 0),
-                    'depth': subq_rel.get('depth', 0),
-                    'location': subq_rel.get('location', 'UNKNOWN'),
-                    'referenced_tables': referenced_tables,
-                    'impact_level': 'LOW',
-                    'impact_type': 'indirect',
-                    'path': f'{target_table} -> Subquery #{subq_rel.get("subquery_index", 0)}'
-                })
+        if self.performance_result['issues']:
+            yield '### 성능 이슈'
+            yield ''
+            for i, issue in enumerate(self.performance_result['issues'], 1):
+                yield f'#### {i}. {issue["type"]} ({issue["severity"]})'
+                yield ''
+                yield f'- **메시지**: {issue["message"]}'
+                yield f'- **영향**: {issue["impact"]}'
+                if 'estimated_cost' in issue:
+                    yield f'- **예상 비용**: {issue["estimated_cost"]:,} (전체의 {issue["cost_share"] * 100:.1f}%)'
+                if issue.get('spans'):
+                    yield f'- **위치**: {self._format_spans(issue["spans"])}'
+                yield ''
+    
+    def _iter_complexity_markdown(self) -> Iterator[str]:
+        """복잡도 분석 섹션 마크다운 라인 생성"""
+        yield '## 3. 복잡도 분석'
+        yield ''
+        yield f'**복잡도 점수**: {self.complexity_result["score"]}/100'
+        yield f'**복잡도 레벨**: {self.complexity_result["level"]}'
+        yield ''
+        yield '### 복잡도 지표'
+        yield ''
+        metrics = self.complexity_result['metrics']
+        yield f'- 쿼리 길이: {metrics["query_length"]} 문자, {metrics["query_lines"]} 라인'
+        yield f'- 테이블 수: {metrics["table_count"]}개'
+        yield f'- JOIN 수: {metrics["join_count"]}개'
+        yield f'- 서브쿼리 수: {metrics["subquery_count"]}개'
+        yield f'- 최대 서브쿼리 깊이: {metrics["max_subquery_depth"]}'
+        yield f'- WHERE 조건 수: {metrics["where_clause_count"]}개'
+        yield f'- UNION 수: {metrics["union_count"]}개'
+        yield ''
+    
+    def _iter_security_markdown(self) -> Iterator[str]:
+        """보안 분석 섹션 마크다운 라인 생성"""
+        yield '## 4. 보안 분석'
+        yield ''
+        yield f'**보안 점수**: {self.security_result["score"]}/100'
+        yield f'**보안 레벨**: {self.security_result["level"]}'
+        yield ''
         
-        return impacts
+        if self.security_result['vulnerabilities']:
+            yield '### 보안 취약점'
+            yield ''
+            for i, vuln in enumerate(self.security_result['vulnerabilities'], 1):
+                yield f'#### {i}. {vuln["type"]} ({vuln["severity"]})'
+                yield ''
+                yield f'- **메시지**: {vuln["message"]}'
+                yield f'- **영향**: {vuln["impact"]}'
+                yield f'- **권장사항**: {vuln["recommendation"]}'
+                if vuln.get('spans'):
+                    yield f'- **위치**: {self._format_spans(vuln["spans"])}'
+                yield ''
+        else:
+            yield '보안 취약점이 발견되지 않았습니다.'
+            yield ''
     
-    def _extract_affected_tables(self, target_table: str, direct_impacts: List[Dict], 
-                                  indirect_impacts: List[Dict]) -> Set[str]:
-        """영향받는 테이블 추출"""
-        affected_tables = set()
+    def _iter_optimization_markdown(self) -> Iterator[str]:
+        """최적화 제안 및 우선순위별 액션 플랜 섹션 마크다운 라인 생성"""
+        yield '## 5. 최적화 제안'
+        yield ''
+        yield f'**총 제안 수**: {self.optimization_result["total_count"]}개'
+        yield f'- HIGH 우선순위: {self.optimization_result["high_priority_count"]}개'
+        yield f'- MEDIUM 우선순위: {self.optimization_result["medium_priority_count"]}개'
+        yield f'- LOW 우선순위: {self.optimization_result["low_priority_count"]}개'
+        yield ''
+        
+        schema_advice = self.optimization_result.get('schema_index_advice')
+        if schema_advice:
+            catalog_info = schema_advice['catalog']
+            yield (f'**스키마 카탈로그**: {catalog_info["source"]} '
+                   f'(테이블 {catalog_info["table_count"]}개, 인덱스 {catalog_info["index_count"]}개)')
+            if schema_advice['usable_indexes']:
+                usable = [f'{i["index"]}({", ".join(i["matched_columns"])})' for i in schema_advice['usable_indexes']]
+                yield f'- 사용 가능한 기존 인덱스: {", ".join(usable)}'
+            if schema_advice['unknown_tables']:
+                yield f'- 카탈로그에 없는 테이블: {", ".join(schema_advice["unknown_tables"][:10])}'
+            yield ''
+        
+        # 우선순위별 그룹화 (액션 플랜에서도 사용하므로 제안이 없어도 정의)
+        high_priority = [s for s in self.optimization_result['suggestions'] if s['priority'] == 'HIGH']
+        medium_priority = [s for s in self.optimization_result['suggestions'] if s['priority'] == 'MEDIUM']
+        low_priority = [s for s in self.optimization_result['suggestions'] if s['priority'] == 'LOW']
         
-        # JOIN 관계에서 영향받는 테이블
-        for join_rel in self.lineage_data.get('join_relationships', []):
-            left_table = join_rel.get('left_table', '').lower()
-            right_table = join_rel.get('right_table', '').lower()
+        if self.optimization_result['suggestions']:
+            if high_priority:
+                yield '### HIGH 우선순위'
+                yield ''
+                for i, suggestion in enumerate(high_priority, 1):
+                    yield f'#### {i}. {suggestion["type"]}'
+                    yield ''
+                    yield f'- **제안**: {suggestion["message"]}'
+                    if 'example' in suggestion:
+                        yield f'- **예시**: {suggestion["example"]}'
+                    if 'expected_improvement' in suggestion:
+                        yield f'- **예상 개선율**: {suggestion["expected_improvement"]}'
+                    if suggestion.get('spans'):
+                        yield f'- **위치**: {self._format_spans(suggestion["spans"])}'
+                    yield ''
             
-            if target_table in [left_table, right_table]:
-                affected_tables.add(left_table)
-                affected_tables.add(right_table)
+            if medium_priority:
+                yield '### MEDIUM 우선순위'
+                yield ''
+                for i, suggestion in enumerate(medium_priority, 1):
+                    yield f'#### {i}. {suggestion["type"]}'
+                    yield ''
+                    yield f'- **제안**: {suggestion["message"]}'
+                    if 'example' in suggestion:
+                        yield f'- **예시**: {suggestion["example"]}'
+                    if 'expected_improvement' in suggestion:
+                        yield f'- **예상 개선율**: {suggestion["expected_improvement"]}'
+                    if suggestion.get('spans'):
+                        yield f'- **위치**: {self._format_spans(suggestion["spans"])}'
+                    yield ''
+            
+            if low_priority:
+                yield '### LOW 우선순위'
+                yield ''
+                for i, suggestion in enumerate(low_priority[:5], 1):  # 최대 5개만
+                    yield f'#### {i}. {suggestion["type"]}'
+                    yield ''
+                    yield f'- **제안**: {suggestion["message"]}'
+                    if 'example' in suggestion:
+                        yield f'- **예시**: {suggestion["example"]}'
+                    if 'expected_improvement' in suggestion:
+                        yield f'- **예상 개선율**: {suggestion["expected_improvement"]}'
+                    if suggestion.get('spans'):
+                        yield f'- **위치**: {self._format_spans(suggestion["spans"])}'
+                    yield ''
         
-        # 간접 영향에서 영향받는 테이블
-        for impact in indirect_impacts:
-            if 'related_table' in impact:
-                affected_tables.add(impact['related_table'])
-            if 'referenced_tables' in impact:
-                affected_tables.update([t.lower() for t in impact['referenced_tables']])
+        # 우선순위별 액션 플랜
+        yield '## 6. 우선순위별 액션 플랜'
+        yield ''
         
-        # 타겟 테이블 제거
-        affected_tables.discard(target_table.lower())
+        if high_priority:
+            yield '### 즉시 조치 (HIGH 우선순위)'
+            yield ''
+            for i, suggestion in enumerate(high_priority[:3], 1):
+                yield f'{i}. {suggestion["message"]}'
+            yield ''
         
-        return affected_tables
+        if medium_priority:
+            yield '### 단기 조치 (MEDIUM 우선순위)'
+            yield ''
+            for i, suggestion in enumerate(medium_priority[:3], 1):
+                yield f'{i}. {suggestion["message"]}'
+            yield ''
+
+# ============================================
+# 압축 출력 형식 (JSONL / 길이 접두 바이너리)
+# ============================================
+
+# 레코드 종류 (바이너리 형식에서는 목록 내 위치를 종류 번호로 기록하므로 새 종류는 끝에만 추가)
+ANALYSIS_RECORD_KINDS = (
+    'metadata', 'score', 'performance_issue', 'security_vulnerability', 'optimization_suggestion',
+    'join', 'cte_dependency', 'subquery', 'column_edge', 'column_output', 'worst_statement'
+)
+_RECORD_KIND_CODES = {kind: code for code, kind in enumerate(ANALYSIS_RECORD_KINDS)}
+
+# 바이너리 형식: 매직 헤더 + 레코드 반복 (종류 번호 1바이트, 본문 길이 4바이트 little-endian, 본문)
+# 본문은 'kind'를 뺀 공백 없는 JSON(UTF-8)이며, 읽을 때 필요 없는 종류는 본문을 디코딩하지 않고 건너뜁니다.
+PACKED_RECORDS_MAGIC = b'SQLAREC1'
+_PACKED_FRAME = struct.Struct('<BI')
+
+# 읽을 때 레코드 본문을 모아 한 번의 json.loads로 디코딩하는 단위 (바이트)
+RECORD_DECODE_BATCH = 1 << 20
+
+# output_format -> 레코드 산출물 이름
+RECORD_OUTPUT_FORMATS = {'jsonl': 'analysis.jsonl', 'binary': 'analysis.sqlrec'}
+
+def analysis_record(kind: str, fields: Optional[Dict[str, Any]] = None, **extra) -> Dict[str, Any]:
+    """레코드 생성 ('kind'가 항상 첫 키가 되도록 구성)"""
+    record = {'kind': kind}
+    if fields:
+        record.update((key, value) for key, value in fields.items() if key != 'kind')
+    record.update(extra)
+    return record
+
+def _encode_record(record: Dict[str, Any]) -> str:
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':'), default=str)
+
+def write_records_jsonl(fp, records: Iterable[Dict[str, Any]]) -> int:
+    """레코드를 한 줄에 하나씩 공백 없는 JSON으로 저장 (텍스트 파일). 저장한 레코드 수 반환"""
+    count = 0
     
-    def _extract_affected_ctes(self, target_table: str, target_column: Optional[str],
-                               direct_impacts: List[Dict], indirect_impacts: List[Dict]) -> Set[str]:
-        """영향받는 CTE 추출"""
-        affected_ctes = set()
-        
-        # CTE 의존성에서 영향받는 CTE
-        for cte_dep in self.lineage_data.get('cte_dependencies', []):
-            referenced_tables = [t.lower() for t in cte_dep.get('referenced_tables', [])]
-            
-            if target_table in referenced_tables:
-                affected_ctes.add(cte_dep.get('cte_name', ''))
-        
-        # 간접 영향에서 영향받는 CTE
-        for impact in indirect_impacts:
-            if impact.get('type') == 'CTE_DEPENDENCY':
-                affected_ctes.add(impact.get('cte_name', ''))
+    def lines():
+        nonlocal count
+        for record in records:
+            count += 1
+            yield _encode_record(record) + '\n'
+    
+    write_report_chunks(fp, lines())
+    return count
+
+def write_records_packed(fp, records: Iterable[Dict[str, Any]]) -> int:
+    """레코드를 길이 접두 바이너리 형식으로 저장 (바이너리 파일). 저장한 레코드 수 반환"""
+    fp.write(PACKED_RECORDS_MAGIC)
+    count = 0
+    for record in records:
+        payload = _encode_record({key: value for key, value in record.items() if key != 'kind'}).encode('utf-8')
+        fp.write(_PACKED_FRAME.pack(_RECORD_KIND_CODES[record['kind']], len(payload)))
+        fp.write(payload)
+        count += 1
+    return count
+
+def write_analysis_records(path: str, records: Iterable[Dict[str, Any]], output_format: str) -> int:
+    """output_format('jsonl' 또는 'binary')에 맞게 레코드 파일 저장"""
+    if output_format == 'binary':
+        with open(path, 'wb') as f:
+            return write_records_packed(f, records)
+    with open(path, 'w', encoding='utf-8') as f:
+        return write_records_jsonl(f, records)
+
+def read_analysis_records(path: str, kinds: Optional[Iterable[str]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    JSONL 또는 바이너리 레코드 파일 읽기 (형식은 매직 헤더로 판별)
+    
+    레코드 본문은 RECORD_DECODE_BATCH 바이트씩 JSON 배열로 묶어 한 번에 디코딩하므로,
+    레코드마다 json.loads를 호출하는 것보다 빠르고 메모리는 묶음 크기로 제한됩니다.
+    
+    Args:
+        path: write_analysis_records()로 저장한 파일
+        kinds: 읽을 레코드 종류 (None이면 전체). 나머지는 JSON 디코딩 없이 건너뜁니다.
         
-        return affected_ctes
+    Yields:
+        Dict: 레코드 ('kind' 키에 종류)
+    """
+    wanted = set(kinds) if kinds is not None else None
+    with open(path, 'rb') as f:
+        if f.read(len(PACKED_RECORDS_MAGIC)) == PACKED_RECORDS_MAGIC:
+            yield from _read_packed_records(f, wanted)
+            return
+        
+        f.seek(0)
+        # 'kind'가 항상 첫 키이므로 줄 앞부분만 보고 필요 없는 종류를 건너뜀
+        prefixes = tuple(f'{{"kind":"{kind}"'.encode('utf-8') for kind in wanted) if wanted is not None else None
+        batch = []
+        size = 0
+        for line in f:
+            line = line.rstrip()
+            if not line or (prefixes is not None and not line.startswith(prefixes)):
+                continue
+            batch.append(line)
+            size += len(line)
+            if size >= RECORD_DECODE_BATCH:
+                yield from json.loads(b'[' + b','.join(batch) + b']')
+                batch = []
+                size = 0
+        if batch:
+            yield from json.loads(b'[' + b','.join(batch) + b']')
+
+def _read_packed_records(f, wanted: Optional[Set[str]]) -> Iterator[Dict[str, Any]]:
+    """바이너리 레코드 파일 본문 읽기 (매직 헤더 다음부터, RECORD_DECODE_BATCH 단위로 읽어 메모리에서 분할)"""
+    header_size = _PACKED_FRAME.size
+    # 종류 번호 -> 본문 앞에 붙일 '{"kind":"종류"' (본문에서 뺀 kind를 디코딩 전에 다시 넣음)
+    prefixes = [f'{{"kind":{json.dumps(kind)}'.encode('utf-8') for kind in ANALYSIS_RECORD_KINDS]
+    buffer = b''
+    offset = 0
+    batch = []
+    size = 0
+    while True:
+        if len(buffer) - offset < header_size:
+            buffer = buffer[offset:] + f.read(RECORD_DECODE_BATCH)
+            offset = 0
+            if len(buffer) < header_size:
+                break
+        code, length = _PACKED_FRAME.unpack_from(buffer, offset)
+        offset += header_size
+        kind = ANALYSIS_RECORD_KINDS[code] if code < len(ANALYSIS_RECORD_KINDS) else None
+        if kind is None or (wanted is not None and kind not in wanted):
+            skip = offset + length - len(buffer)
+            if skip > 0:
+                f.seek(skip, os.SEEK_CUR)
+                buffer = b''
+                offset = 0
+            else:
+                offset += length
+            continue
+        if len(buffer) - offset < length:
+            buffer = buffer[offset:] + f.read(max(length - (len(buffer) - offset), RECORD_DECODE_BATCH))
+            offset = 0
+        payload = buffer[offset:offset + length]
+        offset += length
+        batch.append(prefixes[code] + (b'}' if payload == b'{}' else b',' + payload[1:]))
+        size += length
+        if size >= RECORD_DECODE_BATCH:
+            yield from json.loads(b'[' + b','.join(batch) + b']')
+            batch = []
+            size = 0
+    if batch:
+        yield from json.loads(b'[' + b','.join(batch) + b']')
+
+# ============================================
+# 스트리밍 스크립트 분석기 클래스
+# ============================================
+
+# Statement 경계 탐색에 필요한 토큰 (주석, 문자열, 달러 인용, 세미콜론)
+_STATEMENT_SCAN_PATTERN = re.compile(r"--|/\*|\*/|;|'|\"|\$[A-Za-z_]*\$")
+_BLOCK_COMMENT_PATTERN = re.compile(r"/\*|\*/")
+# PostgreSQL 이스케이프 문자열(E'...') 안의 백슬래시 이스케이프 또는 닫는 따옴표
+_ESCAPE_STRING_PATTERN = re.compile(r"\\.|'", re.DOTALL)
+
+def _is_escape_string_prefix(line: str, quote_pos: int) -> bool:
+    """따옴표 바로 앞이 이스케이프 문자열 접두사 E인지 (식별자 끝의 E, 예: name'...'은 제외)"""
+    if quote_pos == 0 or line[quote_pos - 1] not in 'Ee':
+        return False
+    return quote_pos == 1 or not (line[quote_pos - 2].isalnum() or line[quote_pos - 2] in '_$')
+
+def iter_sql_statements(lines: Iterable[str]) -> Iterator[Tuple[int, str]]:
+    """
+    SQL 스크립트를 줄 단위로 읽으며 Statement를 하나씩 반환
+    
+    전체 텍스트를 메모리에 올리지 않고, 현재 Statement 하나만 버퍼에 유지합니다.
+    문자열('...', "...", 백슬래시 이스케이프를 쓰는 E'...'), 주석(--, 중첩 /* */),
+    PostgreSQL 달러 인용($tag$...$tag$) 안의 세미콜론은 Statement 경계로 취급하지 않습니다.
     
-    def _calculate_impact_score(self, direct_impacts: List[Dict], indirect_impacts: List[Dict]) -> int:
-        """영향도 점수 계산 (0-100)"""
-        max_score = 0
+    Args:
+        lines: 줄 단위 반복 가능한 객체 (열린 파일 객체 또는 줄 리스트)
         
-        # 직접 영향 점수
-        for impact in direct_impacts:
-            level = impact.get('impact_level', 'LOW')
-            if level == 'CRITICAL':
-                score = 100
-            elif level == 'HIGH':
-                score = 80
-            elif level == 'MEDIUM':
-                score = 60
+    Yields:
+        Tuple[int, str]: (Statement 시작 라인 번호(1부터), Statement 텍스트)
+    """
+    buffer = []
+    start_line = None
+    state = None  # None, "'", "E'", '"', '/*', 또는 달러 인용 태그
+    comment_depth = 0
+    
+    for line_no, line in enumerate(lines, 1):
+        pos = 0
+        segment_start = 0
+        while pos < len(line):
+            if state is None:
+                match = _STATEMENT_SCAN_PATTERN.search(line, pos)
+                # 시작 라인은 주석/공백이 아닌 첫 토큰이 있는 줄 (Statement 앞의 주석 줄은 제외)
+                if start_line is None and (
+                        line[pos:match.start() if match else len(line)].strip()
+                        or (match and match.group() not in ('--', '/*', ';'))):
+                    start_line = line_no
+                if not match:
+                    break
+                token = match.group()
+                pos = match.end()
+                if token == '--':
+                    break
+                elif token == '/*':
+                    state = '/*'
+                    comment_depth = 1
+                elif token == ';':
+                    buffer.append(line[segment_start:pos])
+                    text = ''.join(buffer)
+                    if text.strip(' \t\r\n;'):
+                        yield (start_line or line_no), text
+                    buffer = []
+                    start_line = None
+                    segment_start = pos
+                elif token == "'" and _is_escape_string_prefix(line, match.start()):
+                    state = "E'"
+                elif token != '*/':
+                    state = token
+            elif state == "E'":
+                match = _ESCAPE_STRING_PATTERN.search(line, pos)
+                if not match:
+                    break
+                pos = match.end()
+                if match.group() == "'":
+                    state = None
+            elif state == '/*':
+                match = _BLOCK_COMMENT_PATTERN.search(line, pos)
+                if not match:
+                    break
+                pos = match.end()
+                comment_depth += 1 if match.group() == '/*' else -1
+                if comment_depth == 0:
+                    state = None
             else:
-                score = 40
-            
-            max_score = max(max_score, score)
+                end = line.find(state, pos)
+                if end < 0:
+                    break
+                pos = end + len(state)
+                state = None
+        
+        remainder = line[segment_start:]
+        if remainder:
+            buffer.append(remainder)
+    
+    text = ''.join(buffer)
+    if text.strip():
+        yield (start_line or 1), text
+
+class StreamingScriptAnalyzer:
+    """
+    대용량 다중 Statement 스크립트(마이그레이션 덤프 등) 스트리밍 분석 클래스
+    
+    Statement를 하나씩 파싱/분석한 뒤 결과를 집계에 반영하고 버리므로,
+    메모리 사용량은 Statement 수가 아니라 가장 큰 Statement 크기에 비례합니다.
+    """
+    
+    def __init__(self, max_samples: int = 5, max_worst_statements: int = 10, parse_mode: str = 'fast'):
+        self.parse_mode = parse_mode
+        self.max_samples = max_samples
+        self.max_worst_statements = max_worst_statements
+        self.statement_count = 0
+        self.total_lines = 0
+        self.query_types = Counter()
+        self.table_usage = Counter()
+        self.score_totals = {'performance': 0, 'complexity': 0, 'security': 0}
+        self.score_extremes = {}
+        self.issue_summary = {}
+        self.vulnerability_summary = {}
+        # 성능 점수가 낮은 Statement 상위 N개 (점수 역순 힙)
+        self._worst_heap = []
+    
+    def analyze_stream(self, lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        """
+        스크립트를 스트리밍으로 분석
         
-        # 간접 영향 점수
-        for impact in indirect_impacts:
-            level = impact.get('impact_level', 'LOW')
-            if level == 'MEDIUM':
-                score = 50
-            else:
-                score = 30
+        Args:
+            lines: 줄 단위 반복 가능한 객체
             
-            max_score = max(max_score, score)
-        
-        return max_score
+        Yields:
+            Dict: Statement별 분석 요약 (집계에는 자동 반영됨)
+        """
+        for start_line, statement_text in iter_sql_statements(lines):
+            check_cancelled()
+            result = self.analyze_statement(statement_text, start_line)
+            if result:
+                yield result
     
-    def _get_impact_level(self, score: int) -> str:
-        """영향도 수준 반환"""
-        if score >= 90:
-            return 'CRITICAL'
-        elif score >= 70:
-            return 'HIGH'
-        elif score >= 50:
-            return 'MEDIUM'
+    def analyze_statement(self, statement_text: str, start_line: int = 1) -> Optional[Dict[str, Any]]:
+        """Statement 하나를 분석하고 집계에 반영"""
+        parser = SQLQueryParser(statement_text, self.parse_mode)
+        if not parser.parsed_statements:
+            # 주석만 있는 Statement
+            return None
+        
+        context = AnalysisContext.for_parser(parser)
+        structure = QueryStructureAnalyzer(parser, context).analyze()
+        performance = PerformanceAnalyzer(parser, context=context).analyze()
+        complexity = ComplexityAnalyzer(parser, context).analyze()
+        security = SecurityAnalyzer(parser, context).analyze()
+        
+        self.statement_count += 1
+        result = {
+            'statement_index': self.statement_count,
+            'start_line': start_line,
+            'query_type': structure['query_type'],
+            'query_lines': structure['query_lines'],
+            'tables': structure['tables'],
+            'performance_score': performance['score'],
+            'complexity_score': complexity['score'],
+            'security_score': security['score'],
+            'issues': performance['issues'],
+            'vulnerabilities': security['vulnerabilities']
+        }
+        self._accumulate(result)
+        return result
+    
+    def _accumulate(self, result: Dict[str, Any]):
+        """Statement 결과를 집계에 반영"""
+        self.total_lines += result['query_lines']
+        self.query_types[result['query_type']] += 1
+        self.table_usage.update(result['tables'])
+        
+        for name in self.score_totals:
+            score = result[f'{name}_score']
+            self.score_totals[name] += score
+            low, high = self.score_extremes.get(name, (score, score))
+            self.score_extremes[name] = (min(low, score), max(high, score))
+        
+        for issue in result['issues']:
+            self._add_finding(self.issue_summary, issue, result)
+        for vuln in result['vulnerabilities']:
+            self._add_finding(self.vulnerability_summary, vuln, result)
+        
+        entry = (-result['performance_score'], -result['statement_index'], {
+            'statement_index': result['statement_index'],
+            'start_line': result['start_line'],
+            'query_type': result['query_type'],
+            'performance_score': result['performance_score'],
+            'issue_count': len(result['issues'])
+        })
+        if len(self._worst_heap) < self.max_worst_statements:
+            heapq.heappush(self._worst_heap, entry)
         else:
-            return 'LOW'
+            heapq.heappushpop(self._worst_heap, entry)
     
-    def _generate_recommendations(self, target_table: str, target_column: Optional[str],
-                                 direct_impacts: List[Dict], indirect_impacts: List[Dict],
-                                 impact_level: str) -> List[Dict[str, Any]]:
-        """권장사항 생성"""
-        recommendations = []
-        
-        if impact_level == 'CRITICAL':
-            recommendations.append({
-                'priority': 'CRITICAL',
-                'message': f'{target_table} 테이블 변경 시 모든 관련 쿼리를 반드시 검토해야 합니다.',
-                'action': '변경 전 모든 영향받는 쿼리 수정 필요'
-            })
-        elif impact_level == 'HIGH':
-            recommendations.append({
-                'priority': 'HIGH',
-                'message': f'{target_table} 테이블 변경 시 주요 쿼리들을 검토해야 합니다.',
-                'action': '변경 전 영향받는 쿼리 검토 및 수정 필요'
+    def _add_finding(self, summary: Dict[str, Dict], finding: Dict[str, Any], result: Dict[str, Any]):
+        """이슈/취약점을 타입별로 집계 (샘플은 max_samples개까지만 보관)"""
+        item = summary.setdefault(finding['type'], {
+            'type': finding['type'],
+            'severity': finding['severity'],
+            'count': 0,
+            'samples': []
+        })
+        item['count'] += 1
+        if len(item['samples']) < self.max_samples:
+            item['samples'].append({
+                'statement_index': result['statement_index'],
+                'start_line': result['start_line'],
+                'message': finding['message']
             })
+    
+    def get_report(self, query_file: Optional[str] = None) -> Dict[str, Any]:
+        """집계된 스크립트 분석 리포트 반환"""
+        return dict(self.iter_report_items(query_file))
+    
+    def iter_report_items(self, query_file: Optional[str] = None) -> Iterator[Tuple[str, Any]]:
+        """집계된 스크립트 분석 리포트의 최상위 (키, 값)을 순서대로 생성 (write_report_json용)"""
+        count = self.statement_count
+        scores = {}
+        for name, total in self.score_totals.items():
+            low, high = self.score_extremes.get(name, (0, 0))
+            scores[name] = {
+                'average': round(total / count, 1) if count else 0,
+                'min': low,
+                'max': high
+            }
         
-        if target_column:
-            direct_column_impacts = [i for i in direct_impacts if i.get('column') == target_column]
-            if direct_column_impacts:
-                select_impacts = [i for i in direct_column_impacts if i.get('type') == 'SELECT']
-                if select_impacts:
-                    recommendations.append({
-                        'priority': 'HIGH',
-                        'message': f'{target_column} 컬럼이 SELECT 절에서 사용되고 있습니다.',
-                        'action': '컬럼 삭제 시 쿼리 결과에 영향을 미칩니다.'
-                    })
-        
-        if len(direct_impacts) + len(indirect_impacts) > 10:
-            recommendations.append({
-                'priority': 'MEDIUM',
-                'message': f'영향받는 쿼리가 많습니다 ({len(direct_impacts) + len(indirect_impacts)}개).',
-                'action': '단계별로 변경을 진행하는 것을 권장합니다.'
-            })
+        severity_order = {'CRITICAL': 4, 'HIGH': 3, 'MEDIUM': 2, 'LOW': 1}
+        sort_key = lambda item: (-severity_order.get(item['severity'], 0), -item['count'])
         
-        return recommendations
+        yield 'metadata', {
+            'query_file': query_file or 'N/A',
+            'analyzed_at': datetime.now().isoformat(),
+            'mode': 'streaming',
+            'statement_count': count,
+            'total_lines': self.total_lines
+        }
+        yield 'query_types', dict(self.query_types.most_common())
+        yield 'scores', scores
+        yield 'tables', dict(self.table_usage.most_common())
+        yield 'issues', sorted(self.issue_summary.values(), key=sort_key)
+        yield 'vulnerabilities', sorted(self.vulnerability_summary.values(), key=sort_key)
+        yield 'worst_statements', [entry[2] for entry in sorted(self._worst_heap, reverse=True)]
     
-    def _get_line_number(self, position: int) -> int:
-        """문자 위치에서 라인 번호 반환"""
-        return self.query_text[:position].count('\n') + 1
+    def generate_markdown(self, report: Dict[str, Any]) -> str:
+        """스크립트 분석 리포트를 마크다운으로 변환"""
+        return '\n'.join(self.iter_markdown(report))
     
-    def _get_snippet(self, start: int, end: int, context: int = 50) -> str:
-        """쿼리 스니펫 추출"""
-        snippet_start = max(0, start - context)
-        snippet_end = min(len(self.query_text), end + context)
-        snippet = self.query_text[snippet_start:snippet_end]
-        return snippet.strip()
+    def write_markdown(self, fp, report: Dict[str, Any]) -> None:
+        """스크립트 분석 마크다운 리포트를 파일에 스트리밍 저장"""
+        write_report_lines(fp, self.iter_markdown(report))
     
-    def _get_context(self, position: int, context: int = 100) -> str:
-        """컬럼 사용 컨텍스트 추출"""
-        context_start = max(0, position - context)
-        context_end = min(len(self.query_text), position + context)
-        return self.query_text[context_start:context_end].upper()
+    def iter_markdown(self, report: Dict[str, Any]) -> Iterator[str]:
+        """스크립트 분석 리포트를 마크다운 라인 단위로 생성"""
+        metadata = report['metadata']
+        yield '# SQL 스크립트 분석 리포트 (스트리밍)'
+        yield ''
+        yield f'**분석 일시**: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}'
+        yield f'**쿼리 파일**: {metadata["query_file"]}'
+        yield f'**Statement 수**: {metadata["statement_count"]}개, {metadata["total_lines"]} 라인'
+        yield ''
+        
+        yield '## 점수 요약'
+        yield ''
+        yield '| 항목 | 평균 | 최소 | 최대 |'
+        yield '|------|------|------|------|'
+        for name, label in (('performance', '성능'), ('complexity', '복잡도'), ('security', '보안')):
+            score = report['scores'][name]
+            yield f'| {label} | {score["average"]} | {score["min"]} | {score["max"]} |'
+        yield ''
+        
+        if report['query_types']:
+            yield '## 쿼리 타입'
+            yield ''
+            for query_type, type_count in report['query_types'].items():
+                yield f'- {query_type}: {type_count}개'
+            yield ''
+        
+        for title, findings in (('성능 이슈', report['issues']), ('보안 취약점', report['vulnerabilities'])):
+            if not findings:
+                continue
+            yield f'## {title}'
+            yield ''
+            yield '| 타입 | 심각도 | 발생 수 | 예시 위치 |'
+            yield '|------|--------|---------|-----------|'
+            for item in findings:
+                locations = ', '.join(f'#{sample["statement_index"]} (line {sample["start_line"]})'
+                                      for sample in item['samples'])
+                yield f'| {item["type"]} | {item["severity"]} | {item["count"]} | {locations} |'
+            yield ''
+        
+        if report['worst_statements']:
+            yield '## 성능 점수가 낮은 Statement'
+            yield ''
+            for stmt in report['worst_statements']:
+                yield (f'- #{stmt["statement_index"]} (line {stmt["start_line"]}, {stmt["query_type"]}): '
+                       f'{stmt["performance_score"]}/100, 이슈 {stmt["issue_count"]}개')
+            yield ''
     
-    def _determine_column_usage_type(self, context: str) -> str:
-        """컬럼 사용 타입 결정"""
-        context_upper = context.upper()
+    def iter_records(self, report: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """스크립트 분석 리포트를 압축 출력 형식(JSONL/바이너리)용 레코드로 변환"""
+        yield analysis_record('metadata', report['metadata'], analyzer_version=ANALYZER_VERSION)
+        for category, score in report['scores'].items():
+            yield analysis_record('score', score, category=category)
+        for issue in report['issues']:
+            yield analysis_record('performance_issue', issue)
+        for vulnerability in report['vulnerabilities']:
+            yield analysis_record('security_vulnerability', vulnerability)
+        for stmt in report['worst_statements']:
+            yield analysis_record('worst_statement', stmt)
+
+def run_streaming_analysis(lines: Iterable[str], query_file_path: Optional[str],
+                           output_dir: str, output_format: str, parse_mode: str = 'fast') -> str:
+    """
+    스트리밍 모드로 스크립트를 분석하고 리포트 파일을 저장
+    
+    Returns:
+        str: 도구 응답용 요약 텍스트
+    """
+    analyzer = StreamingScriptAnalyzer(parse_mode=parse_mode)
+    for _ in analyzer.analyze_stream(lines):
+        pass
+    report = analyzer.get_report(query_file_path)
+    
+    os.makedirs(output_dir, exist_ok=True)
+    base_name = os.path.splitext(os.path.basename(query_file_path))[0] if query_file_path else "query"
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    
+    result_parts = []
+    if output_format in ["both", "json"]:
+        json_file = os.path.join(output_dir, f"{base_name}_script_analysis_{timestamp}.json")
+        with open(json_file, 'w', encoding='utf-8') as f:
+            write_report_json(f, report.items())
+        result_parts.append(f"JSON 리포트 저장: {json_file}")
+    if output_format in ["both", "markdown"]:
+        md_file = os.path.join(output_dir, f"{base_name}_script_analysis_{timestamp}.md")
+        with open(md_file, 'w', encoding='utf-8') as f:
+            analyzer.write_markdown(f, report)
+        result_parts.append(f"마크다운 리포트 저장: {md_file}")
+    if output_format in RECORD_OUTPUT_FORMATS:
+        extension = os.path.splitext(RECORD_OUTPUT_FORMATS[output_format])[1]
+        record_file = os.path.join(output_dir, f"{base_name}_script_analysis_{timestamp}{extension}")
+        record_count = write_analysis_records(record_file, analyzer.iter_records(report), output_format)
+        result_parts.append(f"레코드 저장 ({output_format}): {record_file} ({record_count}개)")
+    
+    scores = report['scores']
+    return f"""SQL 스크립트 스트리밍 분석 완료
+
+스크립트 정보:
+- Statement 수: {report['metadata']['statement_count']}개
+- 총 라인 수: {report['metadata']['total_lines']} 라인
+- 테이블 수: {len(report['tables'])}개
+
+분석 결과 (평균 / 최소):
+- 성능 점수: {scores['performance']['average']} / {scores['performance']['min']}
+- 복잡도 점수: {scores['complexity']['average']} / {scores['complexity']['min']}
+- 보안 점수: {scores['security']['average']} / {scores['security']['min']}
+- 성능 이슈 타입: {len(report['issues'])}개, 보안 취약점 타입: {len(report['vulnerabilities'])}개
+
+출력 파일:
+{chr(10).join(result_parts)}
+"""
+
+# ============================================
+# 분석 결과 캐시 클래스
+# ============================================
+
+# 분석 로직이 바뀌어 결과가 달라지면 올려서 기존 캐시를 무효화합니다
+ANALYZER_VERSION = "1.6.1"
+
+class AnalysisResultCache:
+    """
+    analyze_sql_query 결과 파일(JSON/마크다운/리니지)의 디스크 캐시
+    
+    - 키: 쿼리 텍스트(원문 그대로) + ANALYZER_VERSION 의 SHA-256 해시
+      (앞쪽 빈 줄/공백이 달라도 이슈 위치(spans)와 라인 수가 달라지므로 정규화하지 않음)
+    - 항목: 캐시 디렉토리 아래 키 이름의 디렉토리 (산출물 파일 + meta.json)
+      (내용이 같은 여러 파일이 공유하므로 산출물에는 원본 파일 경로를 남기지 않음)
+    - 용량 제한을 넘으면 가장 오래 사용되지 않은(LRU) 항목부터 삭제
+      (최근 사용 시각은 meta.json의 수정 시각으로 관리)
+    - 여러 프로세스/스레드가 같은 캐시 디렉토리를 공유할 수 있음 (임시 파일은 mkstemp로 고유하게 생성)
+    """
+    
+    META_FILE = 'meta.json'
+    
+    def __init__(self, cache_dir: str, max_bytes: int = 200 * 1024 * 1024, max_entries: int = 500,
+                 evict_every: int = 1):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        # 용량 정리(디렉토리 전체 스캔)를 store N회마다 수행 (대량 저장 시 스캔 비용 절감)
+        self.evict_every = max(1, evict_every)
+        self._stores_since_evict = 0
+        self.stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+        # 도구 호출이 스레드 풀에서 실행되므로 통계/정리 주기 카운터는 잠금 아래에서 갱신
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+    
+    @staticmethod
+    def make_key(query_text: str, variant: str = '') -> str:
+        """쿼리 텍스트와 분석기 버전(및 파싱 모드 등 변형)으로 캐시 키 생성"""
+        digest = hashlib.sha256()
+        digest.update(ANALYZER_VERSION.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(variant.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(query_text.encode('utf-8'))
+        return digest.hexdigest()
+    
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+    
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self.stats[name] += amount
+    
+    def lookup(self, key: str, artifacts: List[str]) -> Optional[Dict[str, Any]]:
+        """
+        캐시 항목 조회
         
-        # SELECT 절 확인
-        if 'SELECT' in context_upper and 'FROM' in context_upper:
+        Args:
+            key: 캐시 키
+            artifacts: 필요한 산출물 이름 목록 (하나라도 없으면 미스로 처리)
+            
+        Returns:
+            Optional[Dict]: {'meta': meta.json 내용, 'files': 산출물 이름 -> 캐시 파일 경로}
+        """
+        entry_dir = self._entry_dir(key)
+        meta_path = os.path.join(entry_dir, self.META_FILE)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            self._count('misses')
+            return None
+        
+        files = {name: os.path.join(entry_dir, name) for name in artifacts}
+        if not all(os.path.isfile(path) for path in files.values()):
+            self._count('misses')
+            return None
+        
+        # LRU 갱신
+        try:
+            os.utime(meta_path, None)
+        except OSError:
+            pass
+        
+        self._count('hits')
+        return {'meta': meta, 'files': files}
+    
+    def store(self, key: str, files: Dict[str, str], meta: Dict[str, Any]):
+        """
+        산출물 파일을 캐시에 저장
+        
+        Args:
+            key: 캐시 키
+            files: 산출물 이름 -> 원본 파일 경로
+            meta: 요약 정보 등 함께 보관할 메타데이터
+        """
+        entry_dir = self._entry_dir(key)
+        os.makedirs(entry_dir, exist_ok=True)
+        
+        # 임시 파일에 쓴 뒤 교체하여 동시 실행 시에도 깨진 항목이 남지 않도록 함
+        stored_at = datetime.now()
+        for name, src_path in files.items():
+            fd, tmp_path = tempfile.mkstemp(prefix=f'.{name}.', suffix='.tmp', dir=entry_dir)
+            os.close(fd)
+            copy_report_artifact(name, src_path, tmp_path, None, stored_at)
+            os.replace(tmp_path, os.path.join(entry_dir, name))
+        
+        fd, meta_tmp = tempfile.mkstemp(prefix=f'.{self.META_FILE}.', suffix='.tmp', dir=entry_dir)
+        with open(fd, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(meta_tmp, os.path.join(entry_dir, self.META_FILE))
+        
+        with self._lock:
+            self.stats['stores'] += 1
+            self._stores_since_evict += 1
+            evict = self._stores_since_evict >= self.evict_every
+            if evict:
+                self._stores_since_evict = 0
+        if evict:
+            self._evict()
+    
+    def _evict(self):
+        """용량/개수 제한을 넘으면 LRU 순서로 항목 삭제"""
+        entries = []
+        total_bytes = 0
+        for name in os.listdir(self.cache_dir):
+            entry_dir = os.path.join(self.cache_dir, name)
+            if not os.path.isdir(entry_dir):
+                continue
+            size = 0
             try:
-                select_pos = context_upper.index('SELECT')
-                from_pos = context_upper.index('FROM')
-                if select_pos < from_pos:
-                    return 'SELECT'
-            except ValueError:
-                pass
-        
-        # WHERE 절 확인
-        if 'WHERE' in context_upper:
-            return 'WHERE'
+                file_names = os.listdir(entry_dir)
+            except OSError:
+                # 다른 프로세스가 방금 삭제한 항목
+                continue
+            for file_name in file_names:
+                try:
+                    size += os.path.getsize(os.path.join(entry_dir, file_name))
+                except OSError:
+                    pass
+            try:
+                last_used = os.path.getmtime(os.path.join(entry_dir, self.META_FILE))
+            except OSError:
+                last_used = 0
+            entries.append((last_used, size, entry_dir))
+            total_bytes += size
+        
+        entries.sort()
+        while entries and (total_bytes > self.max_bytes or len(entries) > self.max_entries):
+            _, size, entry_dir = entries.pop(0)
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total_bytes -= size
+            self._count('evictions')
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """캐시 적중/미스 통계 반환"""
+        with self._lock:
+            stats = dict(self.stats)
+        lookups = stats['hits'] + stats['misses']
+        return {
+            **stats,
+            'hit_rate': round(stats['hits'] / lookups * 100, 1) if lookups else 0.0
+        }
+
+# 캐시 디렉토리별 인스턴스 (서버 프로세스 동안 통계 유지)
+_result_caches: Dict[str, AnalysisResultCache] = {}
+_result_caches_lock = threading.Lock()
+
+def get_result_cache(cache_dir: str) -> AnalysisResultCache:
+    """캐시 디렉토리에 해당하는 AnalysisResultCache 반환"""
+    cache_dir = os.path.abspath(cache_dir)
+    with _result_caches_lock:
+        if cache_dir not in _result_caches:
+            _result_caches[cache_dir] = AnalysisResultCache(cache_dir)
+        return _result_caches[cache_dir]
+
+# 캐시 적중 시 다시 기록하는 리포트 머리말 (원본 파일 경로/분석 일시는 요청마다 다름)
+_STAMP_HEADER_LINES = 8
+
+def copy_report_artifact(name: str, src_path: str, dst_path: str, query_file: Optional[str],
+                         analyzed_at: datetime) -> None:
+    """
+    리포트 산출물을 복사하며 메타데이터의 쿼리 파일/분석 일시를 다시 기록
+    
+    캐시 키는 쿼리 내용만으로 정해지므로 같은 내용의 다른 파일도 같은 항목을 씁니다. 캐시에 저장할 때는
+    원본 경로를 지우고(query_file=None), 적중한 항목을 출력할 때 요청한 파일 경로로 다시 기록합니다.
+    머리말(JSON metadata, 마크다운 헤더, 첫 레코드)만 고치고 나머지는 그대로 복사합니다.
+    """
+    json_values = {'query_file': query_file or 'N/A', 'analyzed_at': analyzed_at.isoformat()}
+    markdown_values = {'**분석 일시**: ': analyzed_at.strftime("%Y-%m-%d %H:%M:%S"),
+                       '**쿼리 파일**: ': query_file or "직접 입력"}
+    
+    if name.endswith('.sqlrec'):
+        with open(src_path, 'rb') as src, open(dst_path, 'wb') as dst:
+            dst.write(src.read(len(PACKED_RECORDS_MAGIC)))
+            header = src.read(_PACKED_FRAME.size)
+            if len(header) == _PACKED_FRAME.size:
+                code, length = _PACKED_FRAME.unpack(header)
+                payload = src.read(length)
+                if ANALYSIS_RECORD_KINDS[code] == 'metadata':
+                    record = json.loads(payload)
+                    record.update(json_values)
+                    payload = _encode_record(record).encode('utf-8')
+                dst.write(_PACKED_FRAME.pack(code, len(payload)))
+                dst.write(payload)
+            shutil.copyfileobj(src, dst)
+        return
+    
+    with open(src_path, 'r', encoding='utf-8', newline='') as src, \
+            open(dst_path, 'w', encoding='utf-8', newline='') as dst:
+        for _ in range(_STAMP_HEADER_LINES):
+            line = src.readline()
+            if not line:
+                break
+            if name.endswith('.jsonl'):
+                record = json.loads(line)
+                if record.get('kind') == 'metadata':
+                    record.update(json_values)
+                    line = _encode_record(record) + '\n'
+                dst.write(line)
+                break
+            if name.endswith('.json'):
+                # write_report_json(indent=2)의 metadata 항목: '    "키": 값,'
+                for key, value in json_values.items():
+                    prefix = f'    "{key}": '
+                    if line.startswith(prefix):
+                        comma = ',' if line.rstrip('\r\n').endswith(',') else ''
+                        line = prefix + json.dumps(value, ensure_ascii=False) + comma + line[len(line.rstrip('\r\n')):]
+            else:
+                for prefix, value in markdown_values.items():
+                    if line.startswith(prefix):
+                        line = prefix + value + line[len(line.rstrip('\r\n')):]
+            dst.write(line)
+        shutil.copyfileobj(src, dst)
+
+# ============================================
+# 증분 분석 (수정된 쿼리 재분석)
+# ============================================
+
+class QueryRevisionStore:
+    """
+    문서별 직전 분석 버전 보관 (서버 프로세스 메모리)
+    
+    같은 문서(쿼리 파일 경로 또는 document_id)를 수정한 뒤 다시 분석하면 직전 버전의
+    파싱된 Statement와 CTE/서브쿼리 분석 결과를 넘겨주어, 텍스트가 바뀐 Statement만 다시 파싱하고
+    본문이 바뀐 CTE/서브쿼리만 다시 분석합니다.
+    쿼리 트리 구성과 규칙 검사/점수 계산은 비용이 작으므로 전체 트리를 대상으로 다시 수행합니다.
+    """
+    
+    def __init__(self, max_documents: int = 16):
+        self.max_documents = max_documents
+        # 문서 키 -> 직전 버전 (삽입 순서 = 최근 사용 순서)
+        self._revisions: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, document: str, parse_mode: str) -> Optional[Dict[str, Any]]:
+        """문서의 직전 버전 반환 (없거나 파싱 모드가 다르면 None)"""
+        with self._lock:
+            revision = self._revisions.pop(document, None)
+            if revision is None:
+                return None
+            self._revisions[document] = revision
+            return revision if revision['parse_mode'] == parse_mode else None
+    
+    def put(self, document: str, parser: SQLQueryParser, lineage_analyzer: Optional['DataLineageAnalyzer']):
+        """
+        분석을 마친 버전을 문서의 직전 버전으로 저장 (문서 수가 많으면 가장 오래 사용하지 않은 문서부터 제거)
+        
+        lineage 섹션을 계산하지 않은 경우(lineage_analyzer가 None) CTE/서브쿼리 결과는 직전 버전의 것을 유지합니다.
+        (본문 해시로 찾으므로 본문이 같은 CTE/서브쿼리에만 재사용됩니다.)
+        """
+        revision = {
+            'parse_mode': parser.parse_mode,
+            'statements': parser.statement_map(),
+            'fragments': lineage_analyzer.fragment_results if lineage_analyzer else {}
+        }
+        with self._lock:
+            previous = self._revisions.pop(document, None)
+            if lineage_analyzer is None and previous and previous['parse_mode'] == parser.parse_mode:
+                revision['fragments'] = previous['fragments']
+            self._revisions[document] = revision
+            while len(self._revisions) > self.max_documents:
+                del self._revisions[next(iter(self._revisions))]
+
+# 서버 프로세스 동안 유지되는 문서별 직전 분석 버전
+query_revisions = QueryRevisionStore()
+
+def describe_incremental_reuse(parser: SQLQueryParser, lineage_analyzer: Optional['DataLineageAnalyzer'],
+                               previous: Optional[Dict[str, Any]]) -> List[str]:
+    """증분 분석에서 재사용한 부분과 다시 분석한 부분 설명 (도구 응답용)"""
+    if previous is None:
+        return ["- 이전 버전: 없음 (전체 분석)"]
+    
+    total = len(parser.parsed_statements)
+    changed = []
+    for index, reused in enumerate(parser.reused_statements):
+        if reused:
+            continue
+        label = f"{index + 1}번"
+        if parser.preserves_offsets:
+            text = parser.statement_texts[index]
+            start = parser.statement_offsets[index] + len(text) - len(text.lstrip())
+            end = parser.statement_offsets[index] + len(text.rstrip()) - 1
+            label += f"({parser.get_position(start)[0]}-{parser.get_position(max(start, end))[0]}라인)"
+        changed.append(label)
+    lines = [f"- Statement: {total}개 중 {total - len(changed)}개 재사용, {len(changed)}개 다시 파싱"
+             + (f" (변경: {', '.join(changed[:10])}{' 외' if len(changed) > 10 else ''})" if changed else '')]
+    
+    if lineage_analyzer is None:
+        return lines
+    
+    reused_ctes = [name for name, reused in lineage_analyzer.cte_reuse.items() if reused]
+    changed_ctes = [name for name, reused in lineage_analyzer.cte_reuse.items() if not reused]
+    if lineage_analyzer.cte_reuse:
+        lines.append(f"- CTE: {len(lineage_analyzer.cte_reuse)}개 중 {len(reused_ctes)}개 재사용, "
+                     f"{len(changed_ctes)}개 다시 분석"
+                     + (f" ({', '.join(changed_ctes[:10])}{' 외' if len(changed_ctes) > 10 else ''})"
+                        if changed_ctes else ''))
+    return lines
+
+def build_analysis_summary(structure_result: Optional[Dict[str, Any]],
+                           report_generator: 'ReportGenerator') -> Dict[str, Any]:
+    """캐시 메타데이터/도구 응답에 쓰는 분석 요약 정보 생성 (계산하지 않은 섹션의 항목은 생략)"""
+    metadata = report_generator.generate_metadata()
+    summary = {
+        'query_type': metadata['query_type'],
+        'query_length': metadata['query_length'],
+        'query_lines': metadata['query_lines'],
+        'sections': list(report_generator.sections)
+    }
+    if structure_result:
+        summary['table_count'] = structure_result['table_count']
+    for section in ('performance', 'complexity', 'security'):
+        if section in report_generator.sections:
+            summary[section] = {k: report_generator.plan.results[section][k] for k in ('score', 'level')}
+    if 'optimization' in report_generator.sections:
+        summary['optimization_count'] = report_generator.optimization_result['total_count']
+    cost_estimate = report_generator.performance_result.get('cost_estimate') if 'performance' in summary else None
+    if cost_estimate:
+        summary['performance']['estimated_cost'] = cost_estimate['total_cost']
+    return summary
+
+# ============================================
+# 쿼리 조회 인덱스 (inspect_sql_query 도구)
+# ============================================
+
+# 프로세스 메모리에 보관하는 파싱 인덱스 수
+QUERY_INDEX_CACHE_SIZE = int(os.environ.get('MCP_QUERY_INDEX_CACHE_SIZE', '32'))
+# 질문별 응답 항목 수 기본 상한
+INSPECT_DEFAULT_LIMIT = 200
+# 조건 속 한정된 컬럼 참조 (한정자.컬럼, 스키마.테이블.컬럼은 제외)
+_QUALIFIED_COLUMN_PATTERN = re.compile(
+    r'(?<![\w."\':])(?P<qualifier>"[^"]+"|[A-Za-z_]\w*)\s*\.\s*(?P<column>"[^"]+"|[A-Za-z_]\w*)(?![\w."(])'
+)
+
+def table_name_matches(name: Optional[str], table: str) -> bool:
+    """테이블 이름이 정규화된 테이블 이름(table)과 같은지 여부 (스키마 한정자 없이 지정해도 일치)"""
+    if not name:
+        return False
+    name = normalize_identifier(name)
+    return name == table or name.rsplit('.', 1)[-1] == table
+
+class QueryIntrospectionIndex:
+    """
+    경량 질의용 파싱 인덱스
+    
+    쿼리 트리를 한 번 순회하여 테이블 참조, JOIN, CTE 의존 관계, 조건(WHERE/HAVING/ON의 AND 항목)을
+    모으고 컬럼 질문용 컬럼 리니지 그래프를 만들어 둡니다. 질문별 응답은 처음 요청할 때 만들어 메모이제이션합니다.
+    """
+    
+    QUESTIONS = ('tables', 'columns', 'joins', 'cte_graph', 'predicates')
+    
+    def __init__(self, parser: SQLQueryParser):
+        self.parser = parser
+        # 테이블 소문자 이름 -> {'name', 'aliases', 'references', 'statements', 'first_line'}
+        self.tables = {}
+        self.joins = []
+        # CTE 의존 간선 (소유자, 참조 대상, 참조 유형) / CTE 정의
+        self.cte_edges = []
+        self.ctes = []
+        self.predicates = []
+        self._answers = {}
+        
+        trees = parser.get_query_trees()
+        self.statement_count = len(trees)
+        for number, tree in enumerate(trees, 1):
+            self._index_tree(number, tree)
+        self.column_graph = ColumnLineageBuilder(parser).build()
+    
+    # ----- 인덱스 구성 -----
+    
+    def _index_tree(self, number: int, tree: QueryTree):
+        # 쿼리 블록 -> 블록을 포함하는 가장 안쪽 CTE 이름 (전위 순회이므로 안쪽 CTE가 나중에 덮어씀)
+        owners = {}
+        for scope in tree.scopes:
+            for cte in scope.ctes:
+                for member in tree.subtree(cte.query):
+                    owners[member] = cte.name
+                self.ctes.append({'name': cte.name, 'statement': number, 'columns': cte.columns,
+                                  'line': self.line(tree, cte.first)})
+        
+        main = 'main' if self.statement_count == 1 else f'main#{number}'
+        for scope in tree.scopes:
+            owner = owners.get(scope, main)
+            for ref in scope.table_refs():
+                if ref.ref_type == 'table' and ref.name:
+                    entry = self.tables.setdefault(ref.name.lower(), {
+                        'name': ref.name, 'aliases': [], 'references': 0, 'statements': [],
+                        'first_line': self.line(tree, ref.first)})
+                    entry['references'] += 1
+                    if ref.alias and ref.alias not in entry['aliases']:
+                        entry['aliases'].append(ref.alias)
+                    if number not in entry['statements']:
+                        entry['statements'].append(number)
+                if ref.ref_type in ('table', 'cte') and ref.name:
+                    edge = (owner, ref.name, ref.ref_type)
+                    if edge not in self.cte_edges:
+                        self.cte_edges.append(edge)
+            self._index_scope(number, tree, scope)
+    
+    def _index_scope(self, number: int, tree: QueryTree, scope: QueryScope):
+        preceding = list(scope.from_items)
+        for join in scope.joins:
+            if join.item is None or not join.item.display_name:
+                continue
+            condition = self.parser.join_condition_text(tree, join)
+            if join.condition is not None and join.condition.clause == 'USING':
+                involved = [ref.display_name for ref in preceding if ref.display_name]
+            else:
+                involved = self._condition_tables(scope, condition or '')
+            self.joins.append({
+                'statement': number,
+                'type': join.join_type,
+                'table': join.item.display_name,
+                'ref_type': join.item.ref_type,
+                'alias': join.item.alias,
+                'condition': condition,
+                'tables': list(dict.fromkeys([join.item.display_name] + involved)),
+                'line': self.line(tree, join.keyword)
+            })
+            preceding.append(join.item)
         
-        # JOIN 절 확인
-        if 'JOIN' in context_upper and 'ON' in context_upper:
-            return 'JOIN'
-        elif 'GROUP BY' in context_upper:
-            return 'GROUP_BY'
-        elif 'ORDER BY' in context_upper:
-            return 'ORDER_BY'
-        elif 'HAVING' in context_upper:
-            return 'HAVING'
-        else:
-            return 'OTHER'
+        conditions = [scope.where, scope.having]
+        conditions.extend(join.condition for join in scope.joins if join.condition is not None)
+        for predicate in conditions:
+            if predicate is None or predicate.clause == 'USING':
+                continue
+            for first, last in self._conjuncts(tree, predicate):
+                text = tree.compact_text(first, last)
+                self.predicates.append({
+                    'statement': number,
+                    'clause': predicate.clause,
+                    'predicate': text,
+                    'tables': self._condition_tables(scope, text),
+                    'columns': self._condition_columns(scope, text),
+                    'line': self.line(tree, first)
+                })
+    
+    @staticmethod
+    def _conjuncts(tree: QueryTree, predicate: Predicate) -> Iterator[Tuple[int, int]]:
+        """조건을 괄호 깊이 0의 AND로 나눈 항목별 토큰 범위 (BETWEEN ... AND ...의 AND는 제외)"""
+        tokens = tree.tokens
+        depth = 0
+        between = False
+        start = predicate.first
+        for i in range(predicate.first, predicate.last + 1):
+            token = tokens[i]
+            if token.ttype in T.Punctuation:
+                if token.value == '(':
+                    depth += 1
+                elif token.value == ')':
+                    depth -= 1
+            elif depth == 0 and token.ttype is T.Keyword:
+                word = token.value.upper()
+                if word == 'BETWEEN':
+                    between = True
+                elif word == 'AND':
+                    if between:
+                        between = False
+                    else:
+                        yield from QueryIntrospectionIndex._trimmed(tokens, start, i - 1)
+                        start = i + 1
+        yield from QueryIntrospectionIndex._trimmed(tokens, start, predicate.last)
+    
+    @staticmethod
+    def _trimmed(tokens: List[Any], first: int, last: int) -> Iterator[Tuple[int, int]]:
+        """토큰 범위 앞뒤 공백 제외 (공백뿐이면 생략)"""
+        while first <= last and tokens[first].is_whitespace:
+            first += 1
+        while last >= first and tokens[last].is_whitespace:
+            last -= 1
+        if first <= last:
+            yield first, last
+    
+    @staticmethod
+    def _condition_tables(scope: QueryScope, text: str) -> List[str]:
+        """조건이 참조하는 FROM/JOIN 항목 이름 (한정자가 없으면 블록의 유일한 항목으로 간주)"""
+        names = []
+        for qualifier in _QUALIFIER_PATTERN.findall(text):
+            ref = scope.resolve_qualifier(qualifier.strip('"`'))
+            if ref is not None and ref.display_name:
+                names.append(ref.display_name)
+        if not names:
+            refs = scope.table_refs()
+            if len(refs) == 1 and refs[0].display_name:
+                names.append(refs[0].display_name)
+        return list(dict.fromkeys(names))
+    
+    @staticmethod
+    def _condition_columns(scope: QueryScope, text: str) -> List[str]:
+        """조건이 참조하는 실제 테이블 컬럼 (테이블.컬럼, 한정자가 없으면 블록의 유일한 테이블 기준)"""
+        columns = []
+        for match in _QUALIFIED_COLUMN_PATTERN.finditer(text):
+            ref = scope.resolve_qualifier(normalize_identifier(match.group('qualifier')))
+            if ref is not None and ref.ref_type == 'table':
+                columns.append(f"{ref.name}.{normalize_identifier(match.group('column'))}")
+        refs = scope.table_refs()
+        if len(refs) == 1 and refs[0].ref_type == 'table':
+            for match in _INDEX_PREDICATE_PATTERN.finditer(text):
+                column = match.group('column')
+                if not match.group('qualifier') and column.upper() not in _PREDICATE_NON_COLUMNS:
+                    columns.append(f"{refs[0].name}.{normalize_identifier(column)}")
+        return list(dict.fromkeys(columns))
+    
+    def line(self, tree: QueryTree, index: int) -> Optional[int]:
+        """토큰의 원본 소스 라인 (오프셋 미보존 시 None)"""
+        span = self.parser.node_span(tree, index, index)
+        return span['start_line'] if span else None
+    
+    # ----- 질문 응답 -----
+    
+    def answer(self, question: str, table: Optional[str] = None) -> Dict[str, Any]:
+        """
+        질문 응답 (질문/테이블별로 메모이제이션, 반환값을 수정하지 마세요)
+        
+        Args:
+            question: QUESTIONS 중 하나
+            table: 결과를 이 테이블에 관련된 항목으로 제한 (선택사항)
+        """
+        if question not in self.QUESTIONS:
+            raise ValueError(f"지원하지 않는 질문입니다: {question} (선택 가능: {', '.join(self.QUESTIONS)})")
+        key = (question, normalize_identifier(table) if table else None)
+        if key not in self._answers:
+            self._answers[key] = getattr(self, f'_answer_{question}')(key[1])
+        return self._answers[key]
+    
+    def _answer_tables(self, table: Optional[str]) -> Dict[str, Any]:
+        tables = [entry for entry in self.tables.values() if table is None or table_name_matches(entry['name'], table)]
+        return {'tables': sorted(tables, key=lambda entry: entry['name'].lower()),
+                'ctes': sorted({cte['name'] for cte in self.ctes}, key=str.lower)}
+    
+    def _answer_columns(self, table: Optional[str]) -> Dict[str, Any]:
+        graph = self.column_graph
+        referenced = defaultdict(list)
+        for node in graph.nodes:
+            if node[0] == 'table' and (table is None or table_name_matches(node[1], table)):
+                referenced[node[1]].append(node[2])
+        outputs = []
+        for node in graph.outputs():
+            bases = sorted(graph.label(base) for base in graph.base_columns(node)
+                           if table is None or table_name_matches(base[1], table))
+            if table is None or bases:
+                outputs.append({'output': graph.label(node), 'base_columns': bases})
+        return {'referenced': {name: sorted(columns) for name, columns in sorted(referenced.items())},
+                'outputs': outputs}
+    
+    def _answer_joins(self, table: Optional[str]) -> Dict[str, Any]:
+        return {'joins': [join for join in self.joins
+                          if table is None or any(table_name_matches(name, table) for name in join['tables'])]}
+    
+    def _answer_cte_graph(self, table: Optional[str]) -> Dict[str, Any]:
+        edges = [{'from': owner, 'to': target, 'to_type': ref_type} for owner, target, ref_type in self.cte_edges]
+        if table is not None:
+            # 테이블에서 출발해 의존 관계를 거꾸로 따라가며 영향을 받는 CTE/메인 쿼리만 남김
+            reached = {edge['to'] for edge in edges if edge['to_type'] == 'table' and table_name_matches(edge['to'], table)}
+            changed = True
+            while changed:
+                changed = False
+                for edge in edges:
+                    if edge['to'] in reached and edge['from'] not in reached:
+                        reached.add(edge['from'])
+                        changed = True
+            edges = [edge for edge in edges if edge['to'] in reached]
+        return {'ctes': self.ctes, 'edges': edges}
+    
+    def _answer_predicates(self, table: Optional[str]) -> Dict[str, Any]:
+        return {'predicates': [predicate for predicate in self.predicates
+                               if table is None or any(table_name_matches(name, table) for name in predicate['tables'])]}
+
+class QueryIndexCache:
+    """
+    inspect_sql_query용 파싱 인덱스 캐시 (서버 프로세스 메모리, LRU)
+    
+    파일은 (절대 경로, 수정 시각, 크기, 파싱 모드)로 찾으므로 적중 시 파일을 읽지 않습니다.
+    직접 입력한 쿼리는 (텍스트, 파싱 모드)의 해시로 찾습니다. (라인 번호가 바뀌지 않도록 정규화하지 않음)
+    """
+    
+    def __init__(self, max_entries: int = QUERY_INDEX_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: Dict[str, QueryIntrospectionIndex] = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+    
+    @staticmethod
+    def file_key(path: str, parse_mode: str) -> str:
+        stat = os.stat(path)
+        return f'file:{os.path.abspath(path)}:{stat.st_mtime_ns}:{stat.st_size}:{parse_mode}'
+    
+    @staticmethod
+    def text_key(query_text: str, parse_mode: str) -> str:
+        return 'text:' + hashlib.sha256(f'{parse_mode}\0{query_text}'.encode('utf-8')).hexdigest()
+    
+    def get(self, key: str, build: Callable[[], QueryIntrospectionIndex]) -> Tuple[QueryIntrospectionIndex, bool]:
+        """키의 인덱스 반환 (없으면 build()로 만들어 저장) -> (인덱스, 적중 여부)"""
+        with self._lock:
+            index = self._entries.pop(key, None)
+            if index is not None:
+                self._entries[key] = index
+                self.stats['hits'] += 1
+                return index, True
+            self.stats['misses'] += 1
+        
+        # 파싱은 잠금 밖에서 수행 (같은 키를 동시에 만들면 나중 것이 남음)
+        index = build()
+        with self._lock:
+            self._entries[key] = index
+            while len(self._entries) > self.max_entries:
+                del self._entries[next(iter(self._entries))]
+        return index, False
+
+# 서버 프로세스 동안 유지되는 파싱 인덱스 캐시
+query_index_cache = QueryIndexCache()
+
+def run_inspection(arguments: dict) -> Dict[str, Any]:
+    """
+    inspect_sql_query 도구 실행 (파일을 쓰지 않고 작은 JSON 응답 생성)
+    
+    Raises:
+        ValueError: 인자가 잘못된 경우
+    """
+    started = time.perf_counter()
+    question = arguments.get("question", "tables")
+    table = arguments.get("table")
+    parse_mode = arguments.get("parse_mode", "fast")
+    limit = int(arguments.get("limit", INSPECT_DEFAULT_LIMIT))
+    if question not in QueryIntrospectionIndex.QUESTIONS:
+        raise ValueError(f"지원하지 않는 질문입니다: {question} "
+                         f"(선택 가능: {', '.join(QueryIntrospectionIndex.QUESTIONS)})")
+    if parse_mode not in SQLQueryParser.PARSE_MODES:
+        raise ValueError(f"지원하지 않는 parse_mode입니다: {parse_mode} (fast, reindent 중 선택)")
+    
+    query_text = arguments.get("query_text")
+    query_file = arguments.get("query_file")
+    if query_text:
+        key = QueryIndexCache.text_key(query_text, parse_mode)
+    elif query_file:
+        if not os.path.exists(query_file):
+            raise ValueError(f"SQL 파일을 찾을 수 없습니다: {query_file}")
+        key = QueryIndexCache.file_key(query_file, parse_mode)
+    else:
+        raise ValueError("query_file 또는 query_text 중 하나를 지정하세요.")
+    
+    def build() -> QueryIntrospectionIndex:
+        text = query_text
+        if not text:
+            with open(query_file, 'r', encoding='utf-8', errors='ignore') as f:
+                text = f.read()
+        return QueryIntrospectionIndex(SQLQueryParser(text, parse_mode))
+    
+    index, hit = query_index_cache.get(key, build)
+    answer = index.answer(question, table)
+    
+    # 목록 항목은 limit개까지만 반환
+    result = {'question': question, 'table': table, 'statements': index.statement_count}
+    truncated = False
+    for name, value in answer.items():
+        if isinstance(value, list) and len(value) > limit:
+            value = value[:limit]
+            truncated = True
+        result[name] = value
+    result['truncated'] = truncated
+    result['cache'] = 'hit' if hit else 'miss'
+    result['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 3)
+    return result
 
 # ============================================
-# 리포트 생성기 클래스
+# 워크스페이스 SQL 카탈로그 (SQLite)
 # ============================================
 
-class ReportGenerator:
-    """JSON 및 마크다운 리포트 생성 클래스"""
+# 카탈로그 DB 디렉토리 (워크스페이스마다 별도 파일, 원본 소스 트리에는 쓰지 않음)
+# MCP_SQL_CATALOG_DIR로 디렉토리를, MCP_SQL_CATALOG_PATH로 DB 파일 하나를 직접 지정할 수 있음
+SQL_CATALOG_DIR = os.path.join('logs', '.cache', 'sql_catalog')
+# 카탈로그 스캔에서 제외할 디렉토리
+SQL_CATALOG_EXCLUDED_DIRS = {'node_modules', '.git', '__pycache__', '.vscode', 'dist', 'build', '.next',
+                             'venv', 'env', '.venv'}
+
+_SQL_CATALOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS catalog_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sql_files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    statement_count INTEGER NOT NULL,
+    error TEXT,
+    indexed_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sql_statements (
+    file_id INTEGER NOT NULL REFERENCES sql_files(id) ON DELETE CASCADE,
+    statement INTEGER NOT NULL,
+    query_type TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    line INTEGER
+);
+CREATE TABLE IF NOT EXISTS sql_tables (
+    file_id INTEGER NOT NULL REFERENCES sql_files(id) ON DELETE CASCADE,
+    table_name TEXT NOT NULL,
+    table_key TEXT NOT NULL,
+    aliases TEXT NOT NULL,
+    reference_count INTEGER NOT NULL,
+    first_line INTEGER
+);
+CREATE TABLE IF NOT EXISTS sql_columns (
+    file_id INTEGER NOT NULL REFERENCES sql_files(id) ON DELETE CASCADE,
+    table_name TEXT NOT NULL,
+    table_key TEXT NOT NULL,
+    column_name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sql_joins (
+    file_id INTEGER NOT NULL REFERENCES sql_files(id) ON DELETE CASCADE,
+    statement INTEGER NOT NULL,
+    join_type TEXT NOT NULL,
+    table_name TEXT NOT NULL,
+    condition TEXT,
+    tables TEXT NOT NULL,
+    line INTEGER
+);
+CREATE TABLE IF NOT EXISTS sql_ctes (
+    file_id INTEGER NOT NULL REFERENCES sql_files(id) ON DELETE CASCADE,
+    statement INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    depends_on TEXT NOT NULL,
+    line INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_sql_statements_fingerprint ON sql_statements (fingerprint);
+CREATE INDEX IF NOT EXISTS idx_sql_tables_key ON sql_tables (table_key);
+CREATE INDEX IF NOT EXISTS idx_sql_columns_key ON sql_columns (table_key);
+CREATE INDEX IF NOT EXISTS idx_sql_statements_file ON sql_statements (file_id);
+CREATE INDEX IF NOT EXISTS idx_sql_tables_file ON sql_tables (file_id);
+CREATE INDEX IF NOT EXISTS idx_sql_columns_file ON sql_columns (file_id);
+CREATE INDEX IF NOT EXISTS idx_sql_joins_file ON sql_joins (file_id);
+CREATE INDEX IF NOT EXISTS idx_sql_ctes_file ON sql_ctes (file_id);
+"""
+
+def statement_fingerprint(tree: QueryTree) -> str:
+    """
+    Statement 구조 지문 (리터럴/바인드 변수를 ?로 바꾸고 공백/대소문자 차이를 무시한 토큰 열의 해시)
+    
+    값만 다른 같은 쿼리는 같은 지문을 가지므로 파일 간 중복 쿼리를 찾는 데 사용합니다.
+    """
+    digest = hashlib.sha256()
+    for token in tree.tokens:
+        if token.is_whitespace:
+            continue
+        if token.ttype in T.Literal or token.ttype in T.Name.Placeholder:
+            digest.update(b'?')
+        else:
+            digest.update(token.value.lower().encode('utf-8'))
+        digest.update(b'\x1f')
+    return digest.hexdigest()[:16]
+
+class WorkspaceSQLCatalog:
+    """
+    워크스페이스 SQL 카탈로그 (SQLite)
+    
+    워크스페이스의 모든 .sql 파일을 파싱하여 파일별 Statement 지문, 참조 테이블/컬럼, JOIN, CTE를
+    SQLite DB에 저장합니다. 파일은 (경로, 수정 시각, 크기)로 비교하여 바뀐 파일만 다시 파싱하고,
+    사라진 파일은 삭제합니다. ANALYZER_VERSION, 파싱 모드, 워크스페이스 루트가 바뀌면 전체를 다시 만듭니다
+    (같은 DB 파일을 다른 워크스페이스에 쓰면 상대 경로가 같은 파일이 섞이지 않도록).
+    DB는 기본적으로 SQL_CATALOG_DIR 아래에 워크스페이스 경로의 해시로 만든 파일을 사용합니다.
+    조회 메서드는 파일 경로를 워크스페이스 기준 상대 경로(/ 구분)로 반환합니다.
+    """
     
-    def __init__(self, parser: SQLQueryParser, structure_analyzer: QueryStructureAnalyzer,
-                 performance_analyzer: PerformanceAnalyzer, optimization_advisor: OptimizationAdvisor,
-                 complexity_analyzer: ComplexityAnalyzer, security_analyzer: SecurityAnalyzer,
-                 query_file: Optional[str] = None, lineage_analyzer: Optional[Any] = None):
-        self.parser = parser
-        self.structure_analyzer = structure_analyzer
-        self.performance_analyzer = performance_analyzer
-        self.optimization_advisor = optimization_advisor
-        self.complexity_analyzer = complexity_analyzer
-        self.security_analyzer = security_analyzer
-        self.query_file = query_file
-        self.lineage_analyzer = lineage_analyzer
-        
-        # 분석 결과 수집
-        self.structure_result = structure_analyzer.analyze()
-        self.performance_result = performance_analyzer.analyze()
-        self.optimization_result = optimization_advisor.analyze()
-        self.complexity_result = complexity_analyzer.analyze()
-        self.security_result = security_analyzer.analyze()
-        
-        # 리니지 분석 결과 (선택사항)
-        self.lineage_result = None
-        if self.lineage_analyzer:
-            self.lineage_result = self.lineage_analyzer.analyze()
+    # 같은 DB 파일의 refresh()를 프로세스 안에서 직렬화 (DB 경로 -> 잠금)
+    _refresh_locks: Dict[str, threading.Lock] = {}
+    _refresh_locks_guard = threading.Lock()
     
-    def generate_json(self) -> Dict[str, Any]:
-        """JSON 리포트 생성"""
-        result = {
-            'metadata': {
-                'query_file': self.query_file or 'N/A',
-                'analyzed_at': datetime.now().isoformat(),
-                'query_length': self.structure_result['query_length'],
-                'query_lines': self.structure_result['query_lines'],
-                'query_type': self.structure_result['query_type']
-            },
-            'structure': self.structure_result,
-            'performance': self.performance_result,
-            'complexity': self.complexity_result,
-            'security': self.security_result,
-            'optimization': self.optimization_result
-        }
-        
-        # 리니지 분석 결과 추가 (있는 경우)
-        if self.lineage_result:
-            result['lineage'] = self.lineage_result
-        
-        return result
+    def __init__(self, workspace_path: str, db_path: Optional[str] = None, parse_mode: str = 'fast',
+                 cancel_check: Optional[Callable[[], None]] = None):
+        self.workspace_path = os.path.abspath(workspace_path)
+        # 파일 단위 반복 사이에 호출할 취소 확인 함수 (다른 서버가 자신의 check_cancelled를 넘김)
+        self.cancel_check = cancel_check or check_cancelled
+        self.db_path = db_path or os.environ.get('MCP_SQL_CATALOG_PATH') or self.default_db_path(self.workspace_path)
+        self.parse_mode = parse_mode
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SQL_CATALOG_SCHEMA)
+            meta = {'version': f'{ANALYZER_VERSION}:{parse_mode}', 'workspace': self.workspace_path}
+            stored = {row['key']: row['value'] for row in conn.execute("SELECT key, value FROM catalog_meta")}
+            if any(stored.get(key) != value for key, value in meta.items()):
+                conn.execute("DELETE FROM sql_files")
+                conn.executemany("INSERT OR REPLACE INTO catalog_meta (key, value) VALUES (?, ?)", meta.items())
     
-    def generate_lineage_markdown(self) -> str:
-        """리니지 전용 마크다운 리포트 생성"""
-        if not self.lineage_result:
-            return "# 데이터 리니지 분석\n\n리니지 분석 결과가 없습니다.\n"
-        
-        md_lines = []
-        md_lines.append('# 데이터 리니지 분석 리포트')
-        md_lines.append('')
-        md_lines.append(f'**분석 일시**: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}')
-        md_lines.append(f'**쿼리 파일**: {self.query_file or "직접 입력"}')
-        md_lines.append('')
-        
-        # 요약 정보
-        md_lines.append('## 요약')
-        md_lines.append('')
-        md_lines.append(f'- **총 테이블 수**: {len(self.lineage_result.get("tables", []))}개')
-        md_lines.append(f'- **총 CTE 수**: {len(self.lineage_result.get("ctes", []))}개')
-        md_lines.append(f'- **JOIN 관계 수**: {len(self.lineage_result.get("join_relationships", []))}개')
-        md_lines.append(f'- **CTE 의존성 수**: {len(self.lineage_result.get("cte_dependencies", []))}개')
-        md_lines.append(f'- **서브쿼리 수**: {len(self.lineage_result.get("subquery_relationships", []))}개')
-        md_lines.append('')
-        
-        # Mermaid 다이어그램
-        if self.lineage_analyzer:
-            md_lines.append('## 테이블 관계 다이어그램')
-            md_lines.append('')
-            md_lines.append('```mermaid')
-            md_lines.append(self.lineage_analyzer.generate_mermaid_diagram())
-            md_lines.append('```')
-            md_lines.append('')
-        
-        # 테이블 목록
-        if self.lineage_result.get('tables'):
-            md_lines.append('## 테이블 목록')
-            md_lines.append('')
-            for table in self.lineage_result['tables']:
-                md_lines.append(f'- `{table}`')
-            md_lines.append('')
-        
-        # CTE 목록
-        if self.lineage_result.get('ctes'):
-            md_lines.append('## CTE 목록')
-            md_lines.append('')
-            for cte in self.lineage_result['ctes']:
-                md_lines.append(f'- `{cte}`')
-            md_lines.append('')
-        
-        # JOIN 관계 상세
-        if self.lineage_result.get('join_relationships'):
-            md_lines.append('## JOIN 관계')
-            md_lines.append('')
-            md_lines.append('| 왼쪽 테이블 | JOIN 타입 | 오른쪽 테이블 | 조건 |')
-            md_lines.append('|------------|----------|-------------|------|')
-            for join_rel in self.lineage_result['join_relationships']:
-                left = join_rel.get('left_table', 'unknown')
-                join_type = join_rel.get('join_type', 'JOIN')
-                right = join_rel.get('right_table', 'unknown')
-                condition = join_rel.get('condition', '')[:50]  # 최대 50자
-                md_lines.append(f'| `{left}` | {join_type} | `{right}` | `{condition}` |')
-            md_lines.append('')
-        
-        # CTE 의존성 상세
-        if self.lineage_result.get('cte_dependencies'):
-            md_lines.append('## CTE 의존성')
-            md_lines.append('')
-            for cte_dep in self.lineage_result['cte_dependencies']:
-                cte_name = cte_dep.get('cte_name', '')
-                md_lines.append(f'### CTE: `{cte_name}`')
-                md_lines.append('')
-                
-                ref_tables = cte_dep.get('referenced_tables', [])
-                if ref_tables:
-                    md_lines.append('**참조하는 테이블**:')
-                    for table in ref_tables:
-                        md_lines.append(f'- `{table}`')
-                    md_lines.append('')
-                
-                ref_ctes = cte_dep.get('referenced_ctes', [])
-                if ref_ctes:
-                    md_lines.append('**참조하는 CTE**:')
-                    for cte in ref_ctes:
-                        md_lines.append(f'- `{cte}`')
-                    md_lines.append('')
-        
-        # 서브쿼리 관계 상세
-        if self.lineage_result.get('subquery_relationships'):
-            md_lines.append('## 서브쿼리 관계')
-            md_lines.append('')
-            for subq_rel in self.lineage_result['subquery_relationships']:
-                idx = subq_rel.get('subquery_index', 0)
-                depth = subq_rel.get('depth', 0)
-                location = subq_rel.get('location', 'UNKNOWN')
-                ref_tables = subq_rel.get('referenced_tables', [])
-                
-                md_lines.append(f'### 서브쿼리 #{idx}')
-                md_lines.append('')
-                md_lines.append(f'- **위치**: {location}')
-                md_lines.append(f'- **깊이**: {depth}')
-                if ref_tables:
-                    md_lines.append('**참조하는 테이블**:')
-                    for table in ref_tables:
-                        md_lines.append(f'- `{table}`')
-                md_lines.append('')
-        
-        return '\n'.join(md_lines)
+    @staticmethod
+    def default_db_path(workspace_path: str) -> str:
+        """워크스페이스별 기본 DB 경로 (MCP_SQL_CATALOG_DIR 또는 SQL_CATALOG_DIR 아래, 이름 + 경로 해시)"""
+        workspace_path = os.path.abspath(workspace_path)
+        digest = hashlib.sha256(workspace_path.encode('utf-8')).hexdigest()[:16]
+        name = re.sub(r'[^\w.-]', '_', os.path.basename(workspace_path)) or 'root'
+        return os.path.join(os.environ.get('MCP_SQL_CATALOG_DIR') or SQL_CATALOG_DIR, f'{name}-{digest}.sqlite3')
     
-    def generate_lineage_json(self) -> Dict[str, Any]:
-        """리니지 JSON 리포트 생성"""
-        if not self.lineage_analyzer:
-            return {}
-        
-        return self.lineage_analyzer.generate_lineage_json()
+    @contextlib.contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """트랜잭션 단위 연결 (정상 종료 시 커밋, 예외 시 롤백 후 닫음)"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA foreign_keys = ON")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
     
-    def generate_markdown(self) -> str:
-        """마크다운 리포트 생성"""
-        md_lines = []
-        
-        # 제목 및 메타 정보
-        md_lines.append('# SQL 쿼리 분석 리포트')
-        md_lines.append('')
-        md_lines.append(f'**분석 일시**: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}')
-        md_lines.append(f'**쿼리 파일**: {self.query_file or "직접 입력"}')
-        md_lines.append(f'**쿼리 타입**: {self.structure_result["query_type"]}')
-        md_lines.append(f'**쿼리 길이**: {self.structure_result["query_length"]} 문자, {self.structure_result["query_lines"]} 라인')
-        md_lines.append('')
-        
-        # 실행 요약
-        md_lines.append('## 실행 요약 (Executive Summary)')
-        md_lines.append('')
-        md_lines.append('| 항목 | 점수 | 레벨 |')
-        md_lines.append('|------|------|------|')
-        md_lines.append(f'| 성능 | {self.performance_result["score"]}/100 | {self.performance_result["level"]} |')
-        md_lines.append(f'| 복잡도 | {self.complexity_result["score"]}/100 | {self.complexity_result["level"]} |')
-        md_lines.append(f'| 보안 | {self.security_result["score"]}/100 | {self.security_result["level"]} |')
-        md_lines.append('')
-        
-        # 쿼리 구조 분석
-        md_lines.append('## 1. 쿼리 구조 분석')
-        md_lines.append('')
-        md_lines.append('### 기본 정보')
-        md_lines.append('')
-        md_lines.append(f'- **테이블 수**: {self.structure_result["table_count"]}개')
-        md_lines.append(f'- **컬럼 수**: {self.structure_result["column_count"]}개')
-        md_lines.append(f'- **JOIN 수**: {self.structure_result["join_count"]}개')
-        md_lines.append(f'- **서브쿼리 수**: {self.structure_result["subquery_count"]}개')
-        md_lines.append(f'- **최대 서브쿼리 깊이**: {self.structure_result["max_subquery_depth"]}')
-        md_lines.append(f'- **CTE 수**: {self.structure_result["cte_count"]}개')
-        md_lines.append('')
-        
-        if self.structure_result['tables']:
-            md_lines.append('### 테이블 목록')
-            md_lines.append('')
-            for table in self.structure_result['tables']:
-                md_lines.append(f'- `{table}`')
-            md_lines.append('')
-        
-        if self.structure_result['join_types']:
-            md_lines.append('### JOIN 타입')
-            md_lines.append('')
-            for join_type in self.structure_result['join_types']:
-                md_lines.append(f'- {join_type}')
-            md_lines.append('')
-        
-        # 성능 분석
-        md_lines.append('## 2. 성능 분석')
-        md_lines.append('')
-        md_lines.append(f'**성능 점수**: {self.performance_result["score"]}/100')
-        md_lines.append(f'**성능 레벨**: {self.performance_result["level"]}')
-        md_lines.append('')
-        
-        if self.performance_result['issues']:
-            md_lines.append('### 성능 이슈')
-            md_lines.append('')
-            for i, issue in enumerate(self.performance_result['issues'], 1):
-                md_lines.append(f'#### {i}. {issue["type"]} ({issue["severity"]})')
-                md_lines.append('')
-                md_lines.append(f'- **메시지**: {issue["message"]}')
-                md_lines.append(f'- **영향**: {issue["impact"]}')
-                md_lines.append('')
-        
-        # 복잡도 분석
-        md_lines.append('## 3. 복잡도 분석')
-        md_lines.append('')
-        md_lines.append(f'**복잡도 점수**: {self.complexity_result["score"]}/100')
-        md_lines.append(f'**복잡도 레벨**: {self.complexity_result["level"]}')
-        md_lines.append('')
-        md_lines.append('### 복잡도 지표')
-        md_lines.append('')
-        metrics = self.complexity_result['metrics']
-        md_lines.append(f'- 쿼리 길이: {metrics["query_length"]} 문자, {metrics["query_lines"]} 라인')
-        md_lines.append(f'- 테이블 수: {metrics["table_count"]}개')
-        md_lines.append(f'- JOIN 수: {metrics["join_count"]}개')
-        md_lines.append(f'- 서브쿼리 수: {metrics["subquery_count"]}개')
-        md_lines.append(f'- 최대 서브쿼리 깊이: {metrics["max_subquery_depth"]}')
-        md_lines.append(f'- WHERE 조건 수: {metrics["where_clause_count"]}개')
-        md_lines.append(f'- UNION 수: {metrics["union_count"]}개')
-        md_lines.append('')
-        
-        # 보안 분석
-        md_lines.append('## 4. 보안 분석')
-        md_lines.append('')
-        md_lines.append(f'**보안 점수**: {self.security_result["score"]}/100')
-        md_lines.append(f'**보안 레벨**: {self.security_result["level"]}')
-        md_lines.append('')
-        
-        if self.security_result['vulnerabilities']:
-            md_lines.append('### 보안 취약점')
-            md_lines.append('')
-            for i, vuln in enumerate(self.security_result['vulnerabilities'], 1):
-                md_lines.append(f'#### {i}. {vuln["type"]} ({vuln["severity"]})')
-                md_lines.append('')
-                md_lines.append(f'- **메시지**: {vuln["message"]}')
-                md_lines.append(f'- **영향**: {vuln["impact"]}')
-                md_lines.append(f'- **권장사항**: {vuln["recommendation"]}')
-                md_lines.append('')
-        else:
-            md_lines.append('보안 취약점이 발견되지 않았습니다.')
-            md_lines.append('')
-        
-        # 최적화 제안
-        md_lines.append('## 5. 최적화 제안')
-        md_lines.append('')
-        md_lines.append(f'**총 제안 수**: {self.optimization_result["total_count"]}개')
-        md_lines.append(f'- HIGH 우선순위: {self.optimization_result["high_priority_count"]}개')
-        md_lines.append(f'- MEDIUM 우선순위: {self.optimization_result["medium_priority_count"]}개')
-        md_lines.append(f'- LOW 우선순위: {self.optimization_result["low_priority_count"]}개')
-        md_lines.append('')
-        
-        if self.optimization_result['suggestions']:
-            # 우선순위별 그룹화
-            high_priority = [s for s in self.optimization_result['suggestions'] if s['priority'] == 'HIGH']
-            medium_priority = [s for s in self.optimization_result['suggestions'] if s['priority'] == 'MEDIUM']
-            low_priority = [s for s in self.optimization_result['suggestions'] if s['priority'] == 'LOW']
-            
-            if high_priority:
-                md_lines.append('### HIGH 우선순위')
-                md_lines.append('')
-                for i, suggestion in enumerate(high_priority, 1):
-                    md_lines.append(f'#### {i}. {suggestion["type"]}')
-                    md_lines.append('')
-                    md_lines.append(f'- **제안**: {suggestion["message"]}')
-                    if 'example' in suggestion:
-                        md_lines.append(f'- **예시**: {suggestion["example"]}')
-                    if 'expected_improvement' in suggestion:
-                        md_lines.append(f'- **예상 개선율**: {suggestion["expected_improvement"]}')
-                    md_lines.append('')
-            
-            if medium_priority:
-                md_lines.append('### MEDIUM 우선순위')
-                md_lines.append('')
-                for i, suggestion in enumerate(medium_priority, 1):
-                    md_lines.append(f'#### {i}. {suggestion["type"]}')
-                    md_lines.append('')
-                    md_lines.append(f'- **제안**: {suggestion["message"]}')
-                    if 'example' in suggestion:
-                        md_lines.append(f'- **예시**: {suggestion["example"]}')
-                    if 'expected_improvement' in suggestion:
-                        md_lines.append(f'- **예상 개선율**: {suggestion["expected_improvement"]}')
-                    md_lines.append('')
+    # ----- 스캔 / 갱신 -----
+    
+    def scan_files(self) -> Dict[str, os.stat_result]:
+        """워크스페이스의 .sql 파일 (상대 경로 -> stat)"""
+        files = {}
+        for root, dirs, names in os.walk(self.workspace_path):
+            self.cancel_check()
+            dirs[:] = sorted(d for d in dirs if d not in SQL_CATALOG_EXCLUDED_DIRS)
+            for name in names:
+                if name.lower().endswith('.sql'):
+                    path = os.path.join(root, name)
+                    files[os.path.relpath(path, self.workspace_path).replace(os.sep, '/')] = os.stat(path)
+        return files
+    
+    def refresh(self) -> Dict[str, int]:
+        """
+        카탈로그 갱신 (새 파일/바뀐 파일만 파싱, 사라진 파일 삭제)
+        
+        Returns:
+            Dict: {'files': 전체 파일 수, 'parsed': 다시 파싱한 수, 'unchanged': 재사용 수,
+                   'removed': 삭제 수, 'failed': 파싱 실패 수}
+        """
+        with self._refresh_locks_guard:
+            lock = self._refresh_locks.setdefault(os.path.abspath(self.db_path), threading.Lock())
+        with lock:
+            files = self.scan_files()
+            with self._connect() as conn:
+                known = {row['path']: (row['mtime_ns'], row['size'])
+                         for row in conn.execute("SELECT path, mtime_ns, size FROM sql_files")}
+                removed = [path for path in known if path not in files]
+                conn.executemany("DELETE FROM sql_files WHERE path = ?", [(path,) for path in removed])
             
-            if low_priority:
-                md_lines.append('### LOW 우선순위')
-                md_lines.append('')
-                for i, suggestion in enumerate(low_priority[:5], 1):  # 최대 5개만
-                    md_lines.append(f'#### {i}. {suggestion["type"]}')
-                    md_lines.append('')
-                    md_lines.append(f'- **제안**: {suggestion["message"]}')
-                    if 'example' in suggestion:
-                        md_lines.append(f'- **예시**: {suggestion["example"]}')
-                    if 'expected_improvement' in suggestion:
-                        md_lines.append(f'- **예상 개선율**: {suggestion["expected_improvement"]}')
-                    md_lines.append('')
-        
-        # 우선순위별 액션 플랜
-        md_lines.append('## 6. 우선순위별 액션 플랜')
-        md_lines.append('')
-        
-        if high_priority:
-            md_lines.append('### 즉시 조치 (HIGH 우선순위)')
-            md_lines.append('')
-            for i, suggestion in enumerate(high_priority[:3], 1):
-                md_lines.append(f'{i}. {suggestion["message"]}')
-            md_lines.append('')
-        
-        if medium_priority:
-            md_lines.append('### 단기 조치 (MEDIUM 우선순위)')
-            md_lines.append('')
-            for i, suggestion in enumerate(medium_priority[:3], 1):
-                md_lines.append(f'{i}. {suggestion["message"]}')
-            md_lines.append('')
-        
-        # 부록
-        md_lines.append('## 부록')
-        md_lines.append('')
-        md_lines.append('### 원본 쿼리')
-        md_lines.append('')
-        md_lines.append('```sql')
-        # 쿼리가 너무 길면 일부만 표시
-        query_preview = self.parser.query_text[:2000] + ('\n... (쿼리가 길어 일부만 표시)' if len(self.parser.query_text) > 2000 else '')
-        md_lines.append(query_preview)
-        md_lines.append('```')
-        md_lines.append('')
-        
-        return '\n'.join(md_lines)
+            stats = {'files': len(files), 'parsed': 0, 'unchanged': 0, 'removed': len(removed), 'failed': 0}
+            for path, stat in sorted(files.items()):
+                if known.get(path) == (stat.st_mtime_ns, stat.st_size):
+                    stats['unchanged'] += 1
+                    continue
+                self.cancel_check()
+                if not self._index_file(path, stat):
+                    stats['failed'] += 1
+                stats['parsed'] += 1
+            return stats
+    
+    def _index_file(self, path: str, stat: os.stat_result) -> bool:
+        """파일 하나를 파싱하여 저장 (파일 단위 트랜잭션, 파싱 실패는 오류 메시지만 기록) -> 성공 여부"""
+        with open(os.path.join(self.workspace_path, path), 'r', encoding='utf-8', errors='ignore') as f:
+            content = f.read()
+        error = None
+        index = None
+        try:
+            index = QueryIntrospectionIndex(SQLQueryParser(content, self.parse_mode))
+        except Exception as e:
+            error = f'{type(e).__name__}: {e}'
+        
+        with self._connect() as conn:
+            conn.execute("DELETE FROM sql_files WHERE path = ?", (path,))
+            file_id = conn.execute(
+                "INSERT INTO sql_files (path, mtime_ns, size, content_hash, statement_count, error, indexed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (path, stat.st_mtime_ns, stat.st_size, hashlib.sha256(content.encode('utf-8')).hexdigest()[:16],
+                 index.statement_count if index else 0, error, datetime.now().isoformat())
+            ).lastrowid
+            if index is not None:
+                self._store_index(conn, file_id, index)
+        return error is None
+    
+    @staticmethod
+    def _store_index(conn: sqlite3.Connection, file_id: int, index: QueryIntrospectionIndex):
+        """QueryIntrospectionIndex 내용을 카탈로그 테이블에 저장"""
+        statements = []
+        for number, tree in enumerate(index.parser.get_query_trees(), 1):
+            first = next((i for i, token in enumerate(tree.tokens) if not token.is_whitespace), 0)
+            statements.append((file_id, number, tree.statement_type, statement_fingerprint(tree),
+                               index.line(tree, first)))
+        conn.executemany(
+            "INSERT INTO sql_statements (file_id, statement, query_type, fingerprint, line) VALUES (?, ?, ?, ?, ?)",
+            statements
+        )
+        conn.executemany(
+            "INSERT INTO sql_tables (file_id, table_name, table_key, aliases, reference_count, first_line) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(file_id, entry['name'], normalize_identifier(entry['name']), ','.join(entry['aliases']),
+              entry['references'], entry['first_line']) for entry in index.tables.values()]
+        )
+        # 출력 컬럼의 원천 컬럼 + WHERE/HAVING/ON 조건에서 참조한 컬럼
+        columns = {(node[1], node[2]) for node in index.column_graph.nodes if node[0] == 'table'}
+        columns.update(tuple(label.rsplit('.', 1)) for predicate in index.predicates
+                       for label in predicate['columns'])
+        conn.executemany(
+            "INSERT INTO sql_columns (file_id, table_name, table_key, column_name) VALUES (?, ?, ?, ?)",
+            [(file_id, table, normalize_identifier(table), column) for table, column in sorted(columns)]
+        )
+        conn.executemany(
+            "INSERT INTO sql_joins (file_id, statement, join_type, table_name, condition, tables, line) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(file_id, join['statement'], join['type'], join['table'], join['condition'],
+              json.dumps(join['tables'], ensure_ascii=False), join['line']) for join in index.joins]
+        )
+        depends_on = defaultdict(list)
+        for owner, target, _ in index.cte_edges:
+            depends_on[owner].append(target)
+        conn.executemany(
+            "INSERT INTO sql_ctes (file_id, statement, name, depends_on, line) VALUES (?, ?, ?, ?, ?)",
+            [(file_id, cte['statement'], cte['name'], json.dumps(depends_on.get(cte['name'], []), ensure_ascii=False),
+              cte['line']) for cte in index.ctes]
+        )
+    
+    # ----- 조회 -----
+    
+    @staticmethod
+    def _table_filter(column: str, table: str) -> Tuple[str, Tuple[str, str]]:
+        """테이블 키 조건 (스키마 한정자 없이 지정해도 일치)"""
+        key = normalize_identifier(table)
+        return f"({column} = ? OR {column} LIKE ?)", (key, f'%.{key}')
+    
+    def _query(self, sql: str, params: Sequence[Any] = ()) -> List[Dict[str, Any]]:
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(sql, params)]
+    
+    def files(self) -> List[Dict[str, Any]]:
+        """카탈로그의 SQL 파일 목록 (경로 순)"""
+        return self._query("SELECT path, size, content_hash, statement_count, error, indexed_at "
+                           "FROM sql_files ORDER BY path")
+    
+    def tables(self, table: Optional[str] = None) -> List[Dict[str, Any]]:
+        """테이블별 사용 파일 (table 지정 시 해당 테이블의 파일별 참조, 없으면 테이블별 집계)"""
+        if table is None:
+            return self._query(
+                "SELECT table_key AS table_name, COUNT(DISTINCT file_id) AS file_count, "
+                "SUM(reference_count) AS reference_count FROM sql_tables GROUP BY table_key "
+                "ORDER BY file_count DESC, table_key")
+        condition, params = self._table_filter('t.table_key', table)
+        return self._query(
+            "SELECT f.path AS file, t.table_name, t.aliases, t.reference_count, t.first_line "
+            f"FROM sql_tables t JOIN sql_files f ON f.id = t.file_id WHERE {condition} ORDER BY f.path", params)
+    
+    def columns(self, table: Optional[str] = None) -> List[Dict[str, Any]]:
+        """테이블 컬럼별 참조 파일 수 (컬럼을 알 수 없는 전체 선택은 '*')"""
+        condition, params = self._table_filter('table_key', table) if table else ('1 = 1', ())
+        return self._query(
+            "SELECT table_key AS table_name, column_name, COUNT(DISTINCT file_id) AS file_count "
+            f"FROM sql_columns WHERE {condition} GROUP BY table_key, column_name "
+            "ORDER BY table_key, column_name", params)
+    
+    def column_files(self, table: str, column: str) -> List[str]:
+        """테이블 컬럼(또는 테이블 전체 선택 *)을 참조하는 파일 경로"""
+        condition, params = self._table_filter('c.table_key', table)
+        return [row['path'] for row in self._query(
+            "SELECT DISTINCT f.path FROM sql_columns c JOIN sql_files f ON f.id = c.file_id "
+            f"WHERE {condition} AND (LOWER(c.column_name) = ? OR c.column_name = '*') ORDER BY f.path",
+            params + (column.lower(),))]
+    
+    def joins(self, table: Optional[str] = None) -> List[Dict[str, Any]]:
+        """JOIN 목록 (table 지정 시 조인 대상 또는 조건에 해당 테이블이 있는 JOIN)"""
+        rows = self._query(
+            "SELECT f.path AS file, j.statement, j.join_type, j.table_name, j.condition, j.tables, j.line "
+            "FROM sql_joins j JOIN sql_files f ON f.id = j.file_id "
+            + ("WHERE LOWER(j.tables) LIKE ? " if table else "") + "ORDER BY f.path, j.statement, j.line",
+            (f'%{table.lower()}%',) if table else ())
+        for row in rows:
+            row['tables'] = json.loads(row['tables'])
+        if table:
+            key = normalize_identifier(table)
+            rows = [row for row in rows if any(table_name_matches(name, key) for name in row['tables'])]
+        return rows
+    
+    def ctes(self, name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """CTE 정의와 의존 대상 (name 지정 시 같은 이름의 CTE, 대소문자 무시)"""
+        rows = self._query(
+            "SELECT f.path AS file, c.statement, c.name, c.depends_on, c.line "
+            "FROM sql_ctes c JOIN sql_files f ON f.id = c.file_id "
+            + ("WHERE LOWER(c.name) = ? " if name else "") + "ORDER BY f.path, c.line",
+            (name.lower(),) if name else ())
+        for row in rows:
+            row['depends_on'] = json.loads(row['depends_on'])
+        return rows
+    
+    def duplicates(self) -> List[Dict[str, Any]]:
+        """지문이 같은 Statement가 두 곳 이상 있는 쿼리 (값만 다른 중복 쿼리)"""
+        groups = defaultdict(list)
+        for row in self._query(
+                "SELECT s.fingerprint, s.query_type, f.path AS file, s.statement, s.line "
+                "FROM sql_statements s JOIN sql_files f ON f.id = s.file_id "
+                "WHERE s.fingerprint IN (SELECT fingerprint FROM sql_statements GROUP BY fingerprint "
+                "HAVING COUNT(*) > 1) ORDER BY f.path, s.statement"):
+            groups[(row.pop('fingerprint'), row.pop('query_type'))].append(row)
+        return [{'fingerprint': fingerprint, 'query_type': query_type, 'occurrences': rows}
+                for (fingerprint, query_type), rows in sorted(groups.items(), key=lambda item: -len(item[1]))]
+
+# 카탈로그 질문 -> (메서드, table 인자를 받는지 여부)
+SQL_CATALOG_QUESTIONS = {
+    'files': ('files', False),
+    'tables': ('tables', True),
+    'columns': ('columns', True),
+    'joins': ('joins', True),
+    'ctes': ('ctes', True),
+    'duplicates': ('duplicates', False)
+}
+
+def run_catalog_query(arguments: dict) -> Dict[str, Any]:
+    """
+    query_sql_catalog 도구 실행 (카탈로그 갱신 후 조회, 작은 JSON 응답 생성)
+    
+    Raises:
+        ValueError: 인자가 잘못된 경우
+    """
+    question = arguments.get("question", "tables")
+    if question not in SQL_CATALOG_QUESTIONS:
+        raise ValueError(f"지원하지 않는 질문입니다: {question} (선택 가능: {', '.join(SQL_CATALOG_QUESTIONS)})")
+    workspace_path = arguments.get("workspace_path", os.getcwd())
+    if not os.path.isdir(workspace_path):
+        raise ValueError(f"워크스페이스 디렉토리를 찾을 수 없습니다: {workspace_path}")
+    table = arguments.get("table")
+    limit = int(arguments.get("limit", INSPECT_DEFAULT_LIMIT))
+    
+    catalog = WorkspaceSQLCatalog(workspace_path, arguments.get("catalog_path"))
+    refresh = catalog.refresh() if arguments.get("refresh", True) else None
+    method, takes_table = SQL_CATALOG_QUESTIONS[question]
+    rows = getattr(catalog, method)(table) if takes_table else getattr(catalog, method)()
+    return {
+        'question': question,
+        'table': table if takes_table else None,
+        'catalog': catalog.db_path,
+        'refresh': refresh,
+        'results': rows[:limit],
+        'truncated': len(rows) > limit
+    }
 
 # ============================================
-# MCP 서버 생성
+# 도구 실행기 (분석을 이벤트 루프 밖에서 실행)
 # ============================================
 
-server = Server("sql-query-analyzer")
+# 도구 실행기와 취소 확인은 분석 서버들이 공유 (mcp-tool-executor.py, 프로세스당 한 번 로드)
+if 'mcp_tool_executor' not in sys.modules:
+    _spec = importlib.util.spec_from_file_location(
+        'mcp_tool_executor', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mcp-tool-executor.py'))
+    sys.modules['mcp_tool_executor'] = importlib.util.module_from_spec(_spec)
+    _spec.loader.exec_module(sys.modules['mcp_tool_executor'])
+_tool_executor_module = sys.modules['mcp_tool_executor']
+ANALYSIS_TIMEOUT = _tool_executor_module.ANALYSIS_TIMEOUT
+AnalysisCancelled = _tool_executor_module.AnalysisCancelled
+ToolExecutor = _tool_executor_module.ToolExecutor
+check_cancelled = _tool_executor_module.check_cancelled
+parse_timeout_seconds = _tool_executor_module.parse_timeout_seconds
+
+# 도구 호출 실행기 (첫 도구 호출 때 생성: 다른 서버가 카탈로그/분석기만 쓰려고 import해도 만들지 않음)
+tool_executor: Optional[ToolExecutor] = None
+
+def get_tool_executor() -> ToolExecutor:
+    """도구 호출 실행기 반환 (없으면 생성)"""
+    global tool_executor
+    if tool_executor is None:
+        tool_executor = ToolExecutor()
+    return tool_executor
 
 # ============================================
 # 도구 목록 제공
 # ============================================
 
-@server.list_tools()
 async def list_tools() -> list[Tool]:
     """
     사용 가능한 도구 목록을 반환합니다.
@@ -2097,13 +7318,153 @@ async def list_tools() -> list[Tool]:
                     },
                     "output_format": {
                         "type": "string",
-                        "description": "출력 형식: 'both' (JSON + 마크다운), 'json', 'markdown' (기본값: 'both')",
-                        "enum": ["both", "json", "markdown"],
+                        "description": "출력 형식: 'both' (JSON + 마크다운), 'json', 'markdown', "
+                                       "'jsonl' (항목당 한 줄 JSON), 'binary' (길이 접두 레코드) (기본값: 'both'). "
+                                       "jsonl/binary는 read_analysis_records()로 읽습니다.",
+                        "enum": ["both", "json", "markdown", "jsonl", "binary"],
                         "default": "both"
                     },
+                    "lineage_report": {
+                        "type": "boolean",
+                        "description": "리니지 리포트(<이름>_lineage_*.md/.json) 생성 여부 (lineage 섹션 포함 시, "
+                                       "기본값: jsonl/binary는 false(리니지 간선이 레코드에 포함됨), 그 외 true)"
+                    },
+                    "sections": {
+                        "type": "array",
+                        "items": {"type": "string", "enum": list(ANALYSIS_SECTIONS)},
+                        "minItems": 1,
+                        "description": "리포트에 포함할 분석 섹션 (기본값: 전체, 섹션 하나는 문자열로도 지정 가능). 요청 섹션과 그 의존 섹션만 계산합니다 "
+                                       "(performance/complexity/lineage는 structure, optimization은 performance에 의존). "
+                                       "리니지 리포트는 'lineage'를 포함한 경우에만 생성합니다."
+                    },
                     "output_dir": {
                         "type": "string",
                         "description": "출력 디렉토리 (기본값: 'logs')"
+                    },
+                    "use_cache": {
+                        "type": "boolean",
+                        "description": "동일한 쿼리의 이전 분석 결과 재사용 여부 (기본값: true)",
+                        "default": True
+                    },
+                    "cache_dir": {
+                        "type": "string",
+                        "description": "분석 결과 캐시 디렉토리 (기본값: '<output_dir>/.cache')"
+                    },
+                    "streaming": {
+                        "type": "boolean",
+                        "description": "대용량 다중 쿼리 스크립트를 Statement 단위로 스트리밍 분석 (기본값: false, 리니지/캐시 미사용)",
+                        "default": False
+                    },
+                    "incremental": {
+                        "type": "boolean",
+                        "description": "같은 문서의 직전 분석 버전과 비교하여 바뀐 Statement/CTE만 다시 파싱/분석 (기본값: true)",
+                        "default": True
+                    },
+                    "document_id": {
+                        "type": "string",
+                        "description": "증분 분석에서 직전 버전을 찾을 문서 식별자 (기본값: query_file 경로, query_text는 직전 query_text)"
+                    },
+                    "parse_mode": {
+                        "type": "string",
+                        "description": "파싱 모드: 'fast' (원본 위치 보존, 결과에 소스 범위 포함), 'reindent' (전체 재정렬 후 파싱, 이전 방식) (기본값: 'fast')",
+                        "enum": ["fast", "reindent"],
+                        "default": "fast"
+                    },
+                    "timeout_seconds": {
+                        "type": "number",
+                        "exclusiveMinimum": 0,
+                        "description": f"분석 타임아웃(초) (기본값: {ANALYSIS_TIMEOUT:g})"
+                    },
+                    "schema_path": {
+                        "type": "string",
+                        "description": "스키마 카탈로그 경로: DDL(.sql) 파일, JSON 카탈로그(.json) 또는 디렉토리 "
+                                       "(기본값: 워크스페이스의 schema.json, schema.sql, schema/, db/schema.sql, ddl/ 중 처음 찾은 것). "
+                                       "지정하면 기존 인덱스를 고려한 복합/커버링 인덱스를 제안"
+                    },
+                    "stats_path": {
+                        "type": "string",
+                        "description": "테이블 통계 경로: pg_class/pg_stats를 내보낸 CSV, JSON 파일 또는 디렉토리 "
+                                       "(기본값: 워크스페이스의 pg_stats.json, pg_stats.csv, table_stats.json, table_stats.csv, pg_stats/ 중 처음 찾은 것). "
+                                       "지정하면 쿼리 블록별 예상 행 수/비용을 추정하고 성능 이슈를 예상 비용 순으로 정렬"
+                    }
+                }
+            }
+        ),
+        Tool(
+            name="inspect_sql_query",
+            description="쿼리가 사용하는 테이블, 컬럼, JOIN, CTE 의존 관계, 테이블별 조건을 캐시된 파싱 인덱스에서 "
+                        "조회하여 작은 JSON으로 반환합니다. 파일을 만들지 않으며 전체 분석을 수행하지 않습니다.",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "query_file": {
+                        "type": "string",
+                        "description": "조회할 SQL 파일 경로 (query_text와 둘 중 하나 필수)"
+                    },
+                    "query_text": {
+                        "type": "string",
+                        "description": "직접 입력한 쿼리 텍스트"
+                    },
+                    "question": {
+                        "type": "string",
+                        "description": "질문: 'tables' (참조 테이블과 별칭), 'columns' (테이블별 참조 컬럼과 출력 컬럼의 원천), "
+                                       "'joins' (JOIN 목록), 'cte_graph' (CTE/메인 쿼리 -> 테이블/CTE 의존 간선), "
+                                       "'predicates' (WHERE/HAVING/ON 조건의 AND 항목) (기본값: 'tables')",
+                        "enum": ["tables", "columns", "joins", "cte_graph", "predicates"],
+                        "default": "tables"
+                    },
+                    "table": {
+                        "type": "string",
+                        "description": "결과를 이 테이블에 관련된 항목으로 제한 (대소문자 무시, 스키마 생략 가능)"
+                    },
+                    "parse_mode": {
+                        "type": "string",
+                        "description": "파싱 모드: 'fast', 'reindent' (기본값: 'fast')",
+                        "enum": ["fast", "reindent"],
+                        "default": "fast"
+                    },
+                    "limit": {
+                        "type": "integer",
+                        "description": f"목록 항목 최대 개수 (기본값: {INSPECT_DEFAULT_LIMIT}, 넘으면 truncated=true)"
+                    }
+                }
+            }
+        ),
+        Tool(
+            name="query_sql_catalog",
+            description="워크스페이스의 모든 SQL 파일을 파싱해 둔 SQLite 카탈로그(테이블, 컬럼, JOIN, CTE, 쿼리 지문)를 "
+                        "조회합니다. 호출 시 바뀐 파일만 다시 파싱하며 파일 간 질문(테이블을 쓰는 파일, 중복 쿼리 등)에 사용합니다.",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "workspace_path": {
+                        "type": "string",
+                        "description": "워크스페이스 경로 (기본값: 현재 디렉토리)"
+                    },
+                    "question": {
+                        "type": "string",
+                        "description": "질문: 'files' (SQL 파일 목록), 'tables' (테이블별 사용 파일), "
+                                       "'columns' (테이블 컬럼별 참조 파일 수), 'joins' (JOIN 목록), "
+                                       "'ctes' (CTE 정의와 의존 대상), 'duplicates' (값만 다른 중복 쿼리) (기본값: 'tables')",
+                        "enum": ["files", "tables", "columns", "joins", "ctes", "duplicates"],
+                        "default": "tables"
+                    },
+                    "table": {
+                        "type": "string",
+                        "description": "결과를 이 테이블로 제한 (ctes 질문에서는 CTE 이름)"
+                    },
+                    "refresh": {
+                        "type": "boolean",
+                        "description": "조회 전에 바뀐 파일을 다시 파싱할지 여부 (기본값: true)",
+                        "default": True
+                    },
+                    "catalog_path": {
+                        "type": "string",
+                        "description": f"카탈로그 DB 경로 (기본값: {SQL_CATALOG_DIR} 아래 워크스페이스별 파일)"
+                    },
+                    "limit": {
+                        "type": "integer",
+                        "description": f"결과 항목 최대 개수 (기본값: {INSPECT_DEFAULT_LIMIT}, 넘으면 truncated=true)"
                     }
                 }
             }
@@ -2114,11 +7475,13 @@ async def list_tools() -> list[Tool]:
 # 도구 실행 핸들러
 # ============================================
 
-@server.call_tool()
 async def call_tool(name: str, arguments: dict) -> Sequence[TextContent]:
     """
     도구 실행 핸들러
     
+    분석은 tool_executor의 스레드에서 실행되므로, 분석 중에도 이벤트 루프가
+    다른 요청(list_tools, 다른 도구 호출, 취소 알림)을 처리할 수 있습니다.
+    
     Args:
         name: 도구 이름
         arguments: 도구 인자
@@ -2126,6 +7489,23 @@ async def call_tool(name: str, arguments: dict) -> Sequence[TextContent]:
     Returns:
         Sequence[TextContent]: 실행 결과
     """
+    try:
+        timeout = parse_timeout_seconds(arguments.get("timeout_seconds"))
+    except ValueError as e:
+        return [TextContent(type="text", text=f"오류: {e}")]
+    
+    executor = get_tool_executor()
+    try:
+        return await executor.run(run_tool, name, arguments, timeout=timeout)
+    except asyncio.TimeoutError:
+        return [TextContent(
+            type="text",
+            text=f"오류: 분석 타임아웃 ({timeout if timeout is not None else executor.timeout:g}초 초과). "
+                 f"쿼리를 나누거나 streaming 모드 또는 timeout_seconds 값을 늘려 다시 시도하세요."
+        )]
+
+def run_tool(name: str, arguments: dict) -> Sequence[TextContent]:
+    """도구 실행 (동기, tool_executor 스레드에서 실행)"""
     try:
         if name == "analyze_sql_query":
             query_file = arguments.get("query_file")
@@ -2133,6 +7513,48 @@ async def call_tool(name: str, arguments: dict) -> Sequence[TextContent]:
             workspace_path = arguments.get("workspace_path", os.getcwd())
             output_format = arguments.get("output_format", "both")
             output_dir = arguments.get("output_dir", "logs")
+            use_cache = arguments.get("use_cache", True)
+            cache_dir = arguments.get("cache_dir") or os.path.join(output_dir, ".cache")
+            streaming = arguments.get("streaming", False)
+            incremental = arguments.get("incremental", True)
+            parse_mode = arguments.get("parse_mode", "fast")
+            if parse_mode not in SQLQueryParser.PARSE_MODES:
+                return [TextContent(
+                    type="text",
+                    text=f"오류: 지원하지 않는 parse_mode입니다: {parse_mode} (fast, reindent 중 선택)"
+                )]
+            
+            # 분석 섹션 (요청 섹션과 그 의존 섹션만 계산)
+            try:
+                sections = normalize_analysis_sections(arguments.get("sections"))
+                resolve_analysis_sections(sections)
+            except ValueError as e:
+                return [TextContent(type="text", text=f"오류: {e}")]
+            sections = [section for section in ANALYSIS_SECTIONS if sections is None or section in sections]
+            
+            # 스키마 카탈로그 (기존 인덱스를 고려한 인덱스 제안용)
+            schema_path = arguments.get("schema_path") or find_workspace_schema(workspace_path)
+            catalog = None
+            if schema_path:
+                try:
+                    catalog = load_schema_catalog(schema_path)
+                except Exception as e:
+                    return [TextContent(
+                        type="text",
+                        text=f"오류: 스키마 카탈로그를 불러올 수 없습니다: {schema_path} ({e})"
+                    )]
+            
+            # 테이블 통계 (오프라인 비용/카디널리티 추정용)
+            stats_path = arguments.get("stats_path") or find_workspace_statistics(workspace_path)
+            statistics = None
+            if stats_path:
+                try:
+                    statistics = load_statistics_catalog(stats_path)
+                except Exception as e:
+                    return [TextContent(
+                        type="text",
+                        text=f"오류: 테이블 통계를 불러올 수 없습니다: {stats_path} ({e})"
+                    )]
             
             # 쿼리 텍스트 가져오기
             if query_text:
@@ -2144,9 +7566,9 @@ async def call_tool(name: str, arguments: dict) -> Sequence[TextContent]:
                         type="text",
                         text=f"오류: SQL 파일을 찾을 수 없습니다: {query_file}"
                     )]
-                with open(query_file, 'r', encoding='utf-8', errors='ignore') as f:
-                    sql_content = f.read()
                 query_file_path = query_file
+                # 스트리밍 모드에서는 파일을 한 번에 읽지 않음
+                sql_content = None
             else:
                 # 워크스페이스에서 SQL 파일 찾기
                 sql_files = list(Path(workspace_path).glob("*.sql"))
@@ -2158,6 +7580,24 @@ async def call_tool(name: str, arguments: dict) -> Sequence[TextContent]:
                     )]
                 # 첫 번째 SQL 파일 사용
                 query_file_path = str(sql_files[0])
+                sql_content = None
+            
+            # 스트리밍 분석 (Statement 단위)
+            if streaming:
+                try:
+                    if sql_content is not None:
+                        summary = run_streaming_analysis(sql_content.splitlines(keepends=True),
+                                                         query_file_path, output_dir, output_format, parse_mode)
+                    else:
+                        with open(query_file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                            summary = run_streaming_analysis(f, query_file_path, output_dir, output_format, parse_mode)
+                    return [TextContent(type="text", text=summary)]
+                except Exception as e:
+                    import traceback
+                    error_msg = f"스크립트 스트리밍 분석 중 오류 발생: {str(e)}\n\n{traceback.format_exc()}"
+                    return [TextContent(type="text", text=error_msg)]
+            
+            if sql_content is None:
                 with open(query_file_path, 'r', encoding='utf-8', errors='ignore') as f:
                     sql_content = f.read()
             
@@ -2169,23 +7609,6 @@ async def call_tool(name: str, arguments: dict) -> Sequence[TextContent]:
             
             # 쿼리 분석 수행
             try:
-                parser = SQLQueryParser(sql_content)
-                structure_analyzer = QueryStructureAnalyzer(parser)
-                structure_result = structure_analyzer.analyze()
-                performance_analyzer = PerformanceAnalyzer(parser)
-                optimization_advisor = OptimizationAdvisor(parser, performance_analyzer)
-                complexity_analyzer = ComplexityAnalyzer(parser)
-                security_analyzer = SecurityAnalyzer(parser)
-                
-                # 리니지 분석 추가
-                lineage_analyzer = DataLineageAnalyzer(parser, structure_result)
-                
-                report_generator = ReportGenerator(
-                    parser, structure_analyzer, performance_analyzer,
-                    optimization_advisor, complexity_analyzer, security_analyzer,
-                    query_file_path, lineage_analyzer
-                )
-                
                 # 출력 디렉토리 생성
                 os.makedirs(output_dir, exist_ok=True)
                 
@@ -2193,50 +7616,157 @@ async def call_tool(name: str, arguments: dict) -> Sequence[TextContent]:
                 base_name = os.path.splitext(os.path.basename(query_file_path))[0] if query_file_path else "query"
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 
-                result_parts = []
-                
-                # JSON 리포트 생성
+                # 생성할 산출물 (캐시 내 이름 -> 출력 파일 경로)
+                artifacts = {}
                 if output_format in ["both", "json"]:
-                    json_report = report_generator.generate_json()
-                    json_file = os.path.join(output_dir, f"{base_name}_analysis_{timestamp}.json")
-                    with open(json_file, 'w', encoding='utf-8') as f:
-                        json.dump(json_report, f, ensure_ascii=False, indent=2)
-                    result_parts.append(f"JSON 리포트 저장: {json_file}")
-                
-                # 마크다운 리포트 생성
+                    artifacts['analysis.json'] = os.path.join(output_dir, f"{base_name}_analysis_{timestamp}.json")
                 if output_format in ["both", "markdown"]:
-                    md_report = report_generator.generate_markdown()
-                    md_file = os.path.join(output_dir, f"{base_name}_analysis_{timestamp}.md")
-                    with open(md_file, 'w', encoding='utf-8') as f:
-                        f.write(md_report)
-                    result_parts.append(f"마크다운 리포트 저장: {md_file}")
+                    artifacts['analysis.md'] = os.path.join(output_dir, f"{base_name}_analysis_{timestamp}.md")
+                if output_format in RECORD_OUTPUT_FORMATS:
+                    record_artifact = RECORD_OUTPUT_FORMATS[output_format]
+                    artifacts[record_artifact] = os.path.join(
+                        output_dir, f"{base_name}_analysis_{timestamp}{os.path.splitext(record_artifact)[1]}")
+                # 리니지 리포트 (lineage 섹션을 요청한 경우, 레코드 형식은 간선이 레코드에 들어가므로 요청 시에만)
+                lineage_report = arguments.get("lineage_report")
+                if lineage_report is None:
+                    lineage_report = output_format not in RECORD_OUTPUT_FORMATS
+                if 'lineage' in sections and lineage_report:
+                    artifacts['lineage.md'] = os.path.join(output_dir, f"{base_name}_lineage_{timestamp}.md")
+                    artifacts['lineage.json'] = os.path.join(output_dir, f"{base_name}_lineage_{timestamp}.json")
+                
+                # 캐시 조회
+                cache = get_result_cache(cache_dir) if use_cache else None
+                cache_variant = f"{parse_mode}:schema={catalog.fingerprint}" if catalog else parse_mode
+                if statistics:
+                    cache_variant += f":stats={statistics.fingerprint}"
+                if len(sections) < len(ANALYSIS_SECTIONS):
+                    cache_variant += f":sections={','.join(sections)}"
+                cache_key = AnalysisResultCache.make_key(sql_content, cache_variant) if cache else None
+                cached = cache.lookup(cache_key, list(artifacts)) if cache else None
+                
+                # 증분 분석: 같은 문서의 직전 버전과 텍스트가 같은 Statement/CTE 결과 재사용
+                document_key = arguments.get("document_id") or (
+                    os.path.abspath(query_file_path) if query_file_path else "<query_text>")
+                incremental_lines = ["- 사용 안 함"]
+                
+                if cached:
+                    # 캐시 적중: 파싱 없이 저장된 산출물을 복사 (쿼리 파일/분석 일시는 이번 요청 기준)
+                    analyzed_at = datetime.now()
+                    for artifact_name, output_path in artifacts.items():
+                        copy_report_artifact(artifact_name, cached['files'][artifact_name], output_path,
+                                             query_file_path, analyzed_at)
+                    summary_info = cached['meta']['summary']
+                    cache_status = f"적중 ({cached['meta'].get('analyzed_at', 'N/A')} 분석 결과 재사용)"
+                    incremental_lines = ["- 캐시 적중으로 분석 생략"]
+                else:
+                    previous = query_revisions.get(document_key, parse_mode) if incremental else None
+                    parser = SQLQueryParser(sql_content, parse_mode,
+                                            previous['statements'] if previous else None)
+                    check_cancelled()
+                    # 모든 분석기가 공유하는 파생 데이터 (대문자 텍스트, 토큰 인덱스, 구조 등)
+                    context = AnalysisContext.for_parser(parser)
+                    # 요청 섹션에 필요한 분석기만 생성/실행 (리니지는 lineage 섹션을 요청한 경우에만)
+                    plan = AnalysisPlan(parser, context, statistics, catalog,
+                                        previous['fragments'] if previous else None)
+                    report_generator = ReportGenerator(parser, query_file=query_file_path,
+                                                       sections=sections, plan=plan)
+                    structure_result = report_generator.structure_result
+                    lineage_analyzer = report_generator.lineage_analyzer
+                    
+                    if incremental:
+                        incremental_lines = describe_incremental_reuse(parser, lineage_analyzer, previous)
+                        query_revisions.put(document_key, parser, lineage_analyzer)
+                    
+                    # JSON 리포트 생성
+                    if 'analysis.json' in artifacts:
+                        check_cancelled()
+                        with open(artifacts['analysis.json'], 'w', encoding='utf-8') as f:
+                            report_generator.write_json(f)
+                    
+                    # 마크다운 리포트 생성
+                    if 'analysis.md' in artifacts:
+                        check_cancelled()
+                        with open(artifacts['analysis.md'], 'w', encoding='utf-8') as f:
+                            report_generator.write_markdown(f)
+                    
+                    # 압축 레코드 파일 생성 (JSONL / 바이너리)
+                    if output_format in RECORD_OUTPUT_FORMATS:
+                        check_cancelled()
+                        write_analysis_records(artifacts[RECORD_OUTPUT_FORMATS[output_format]],
+                                               report_generator.iter_records(), output_format)
+                    
+                    # 리니지 리포트 생성
+                    if 'lineage.md' in artifacts:
+                        check_cancelled()
+                        with open(artifacts['lineage.md'], 'w', encoding='utf-8') as f:
+                            report_generator.write_lineage_markdown(f)
+                        
+                        with open(artifacts['lineage.json'], 'w', encoding='utf-8') as f:
+                            report_generator.write_lineage_json(f)
+                    
+                    summary_info = build_analysis_summary(structure_result, report_generator)
+                    
+                    if cache:
+                        cache.store(cache_key, artifacts, {
+                            'analyzer_version': ANALYZER_VERSION,
+                            'analyzed_at': datetime.now().isoformat(),
+                            'summary': summary_info
+                        })
+                        cache_status = "미스 (새로 분석 후 캐시에 저장)"
+                    else:
+                        cache_status = "사용 안 함"
                 
-                # 리니지 리포트 생성 (항상 생성)
-                lineage_md_report = report_generator.generate_lineage_markdown()
-                lineage_md_file = os.path.join(output_dir, f"{base_name}_lineage_{timestamp}.md")
-                with open(lineage_md_file, 'w', encoding='utf-8') as f:
-                    f.write(lineage_md_report)
-                result_parts.append(f"리니지 마크다운 리포트 저장: {lineage_md_file}")
+                artifact_labels = {
+                    'analysis.json': "JSON 리포트 저장",
+                    'analysis.md': "마크다운 리포트 저장",
+                    'analysis.jsonl': "JSONL 레코드 저장",
+                    'analysis.sqlrec': "바이너리 레코드 저장",
+                    'lineage.md': "리니지 마크다운 리포트 저장",
+                    'lineage.json': "리니지 JSON 리포트 저장"
+                }
+                result_parts = [f"{artifact_labels[name]}: {path}" for name, path in artifacts.items()]
+                
+                cache_lines = [f"- 상태: {cache_status}"]
+                if cache:
+                    cache_stats = cache.get_stats()
+                    cache_lines.append(
+                        f"- 누적: 적중 {cache_stats['hits']}회 / 미스 {cache_stats['misses']}회 "
+                        f"(적중률 {cache_stats['hit_rate']}%), 제거 {cache_stats['evictions']}개"
+                    )
                 
-                lineage_json_report = report_generator.generate_lineage_json()
-                lineage_json_file = os.path.join(output_dir, f"{base_name}_lineage_{timestamp}.json")
-                with open(lineage_json_file, 'w', encoding='utf-8') as f:
-                    json.dump(lineage_json_report, f, ensure_ascii=False, indent=2)
-                result_parts.append(f"리니지 JSON 리포트 저장: {lineage_json_file}")
+                # 요약 정보 반환 (요청하지 않은 섹션의 항목은 생략)
+                query_info_lines = [
+                    f"- 타입: {summary_info['query_type']}",
+                    f"- 길이: {summary_info['query_length']} 문자, {summary_info['query_lines']} 라인"
+                ]
+                if 'table_count' in summary_info:
+                    query_info_lines.append(f"- 테이블 수: {summary_info['table_count']}개")
+                result_lines = [f"- 분석 섹션: {', '.join(summary_info.get('sections', ANALYSIS_SECTIONS))}"]
+                for section, label in (('performance', '성능'), ('complexity', '복잡도'), ('security', '보안')):
+                    if section in summary_info:
+                        result_lines.append(f"- {label} 점수: {summary_info[section]['score']}/100 "
+                                            f"({summary_info[section]['level']})")
+                if 'optimization_count' in summary_info:
+                    result_lines.append(f"- 최적화 제안: {summary_info['optimization_count']}개")
+                result_lines.append(
+                    f"- 스키마 카탈로그: {f'{catalog.source} (테이블 {len(catalog.tables)}개, 인덱스 {len(catalog.indexes)}개)' if catalog else '없음'}")
+                estimated_cost = summary_info.get('performance', {}).get('estimated_cost', 'N/A')
+                result_lines.append(
+                    f"- 테이블 통계: {f'{statistics.source} (테이블 {len(statistics.tables)}개, 예상 비용 {estimated_cost})' if statistics else '없음'}")
                 
-                # 요약 정보 반환
                 summary = f"""SQL 쿼리 분석 완료
 
 쿼리 정보:
-- 타입: {structure_analyzer.structure['query_type']}
-- 길이: {structure_analyzer.structure['query_length']} 문자, {structure_analyzer.structure['query_lines']} 라인
-- 테이블 수: {len(structure_analyzer.structure['tables'])}개
+{chr(10).join(query_info_lines)}
 
 분석 결과:
-- 성능 점수: {performance_analyzer.performance_result['score']}/100 ({performance_analyzer.performance_result['level']})
-- 복잡도 점수: {complexity_analyzer.complexity_result['score']}/100 ({complexity_analyzer.complexity_result['level']})
-- 보안 점수: {security_analyzer.security_result['score']}/100 ({security_analyzer.security_result['level']})
-- 최적화 제안: {optimization_advisor.optimization_result['total_count']}개
+{chr(10).join(result_lines)}
+
+캐시:
+{chr(10).join(cache_lines)}
+
+증분 분석:
+{chr(10).join(incremental_lines)}
 
 출력 파일:
 {chr(10).join(result_parts)}
@@ -2249,6 +7779,20 @@ async def call_tool(name: str, arguments: dict) -> Sequence[TextContent]:
                 error_msg = f"쿼리 분석 중 오류 발생: {str(e)}\n\n{traceback.format_exc()}"
                 return [TextContent(type="text", text=error_msg)]
         
+        elif name == "inspect_sql_query":
+            try:
+                result = run_inspection(arguments)
+            except (ValueError, OSError) as e:
+                return [TextContent(type="text", text=f"오류: {e}")]
+            return [TextContent(type="text", text=json.dumps(result, ensure_ascii=False))]
+        
+        elif name == "query_sql_catalog":
+            try:
+                result = run_catalog_query(arguments)
+            except (ValueError, OSError, sqlite3.Error) as e:
+                return [TextContent(type="text", text=f"오류: {e}")]
+            return [TextContent(type="text", text=json.dumps(result, ensure_ascii=False))]
+        
         else:
             return [TextContent(
                 type="text",
@@ -2263,11 +7807,24 @@ async def call_tool(name: str, arguments: dict) -> Sequence[TextContent]:
         )]
 
 # ============================================
-# 서버 실행
+# MCP 서버 생성 및 실행
 # ============================================
 
+def create_server() -> Server:
+    """
+    MCP 서버 생성 및 도구 핸들러 등록
+    
+    모듈 import 시에는 서버를 만들지 않으므로, 다른 서버(mcp-impact-analyzer.py 등)가
+    WorkspaceSQLCatalog나 분석기 클래스만 쓰려고 이 파일을 로드해도 부수 효과가 없습니다.
+    """
+    server = Server("sql-query-analyzer")
+    server.list_tools()(list_tools)
+    server.call_tool()(call_tool)
+    return server
+
 async def main():
     """서버 실행"""
+    server = create_server()
     async with stdio_server() as (read_stream, write_stream):
         await server.run(read_stream, write_stream, server.create_initialization_options())
 
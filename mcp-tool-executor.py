@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MCP 분석 서버 공용 도구 실행기
+
+역할:
+- 분석 작업을 이벤트 루프 밖의 제한된 스레드 풀에서 실행 (ToolExecutor)
+- 타임아웃/취소된 도구 호출의 분석을 중단시키는 취소 이벤트 (check_cancelled)
+- 도구 인자 timeout_seconds 검증 (parse_timeout_seconds)
+- 같은 디렉토리의 하이픈 파일명 모듈 로드 (load_local_module)
+
+사용하는 서버:
+  mcp-sql-query-analyzer.py, mcp-impact-analyzer.py, mcp-error-log-analyzer.py
+
+참고:
+- 파일명에 하이픈이 있어 import 문으로 불러올 수 없으므로, 각 서버가 경로로 로드하여
+  sys.modules['mcp_tool_executor']에 등록합니다 (이미 등록되어 있으면 그대로 사용). 한 프로세스에서 여러 서버 모듈을 로드해도
+  이 모듈(취소 이벤트 포함)은 하나만 존재합니다.
+- import 시 스레드를 만들지 않습니다 (ThreadPoolExecutor는 첫 작업 제출 시 스레드 생성).
+"""
+
+import asyncio
+import contextvars
+import importlib.util
+import math
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+# 동시에 실행할 분석 작업 수 / 도구 호출별 기본 타임아웃(초)
+ANALYSIS_MAX_WORKERS = int(os.environ.get('MCP_ANALYSIS_MAX_WORKERS', '2'))
+ANALYSIS_TIMEOUT = float(os.environ.get('MCP_ANALYSIS_TIMEOUT', '300'))
+
+class AnalysisCancelled(BaseException):
+    """
+    도구 호출이 취소되었거나 타임아웃되어 분석을 중단함
+    
+    분석 코드의 `except Exception` 처리에 잡혀 작업이 계속되지 않도록 BaseException을 상속합니다.
+    """
+
+# 현재 스레드에서 실행 중인 분석 작업의 취소 이벤트
+_cancel_event: contextvars.ContextVar = contextvars.ContextVar('analysis_cancel_event', default=None)
+
+def check_cancelled():
+    """현재 분석 작업이 취소되었으면 AnalysisCancelled 발생 (파일/Statement 단위 반복 등 긴 작업의 단계 사이에서 호출)"""
+    event = _cancel_event.get()
+    if event is not None and event.is_set():
+        raise AnalysisCancelled()
+
+def parse_timeout_seconds(value) -> Optional[float]:
+    """
+    도구 인자 timeout_seconds 검증 (None이면 기본 타임아웃 사용)
+    
+    Raises:
+        ValueError: 숫자가 아니거나 0 이하/무한대/NaN인 경우 (곧바로 타임아웃되므로 거부)
+    """
+    if value is None:
+        return None
+    try:
+        if isinstance(value, bool):
+            raise TypeError
+        timeout = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"timeout_seconds는 숫자여야 합니다: {value}") from None
+    if not (math.isfinite(timeout) and timeout > 0):
+        raise ValueError(f"timeout_seconds는 0보다 큰 숫자여야 합니다: {value}")
+    return timeout
+
+def load_local_module(name: str, file_name: str):
+    """이 파일과 같은 디렉토리의 하이픈 파일명 모듈을 경로로 로드 (sys.modules에 등록하여 프로세스당 하나만 유지)"""
+    module = sys.modules.get(name)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(
+            name, os.path.join(os.path.dirname(os.path.abspath(__file__)), file_name))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            # 로드에 실패한 모듈이 남아 다음 호출에서 반쯤 초기화된 채 쓰이지 않도록 제거
+            del sys.modules[name]
+            raise
+    return module
+
+class ToolExecutor:
+    """
+    오래 걸리는 도구 작업을 제한된 스레드 풀에서 실행
+    
+    - 이벤트 루프는 분석 중에도 list_tools, 취소 알림 등 다른 요청을 처리
+    - 동시 실행 수는 스레드 수로 제한되며, 초과 호출은 대기열에서 기다림
+    - 타임아웃/취소 시 취소 이벤트를 설정하여 작업이 다음 check_cancelled() 지점에서 중단됨
+      (대기열에 있던 작업은 시작하자마자 중단)
+    """
+    
+    def __init__(self, max_workers: int = ANALYSIS_MAX_WORKERS, timeout: float = ANALYSIS_TIMEOUT):
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='analysis')
+    
+    @staticmethod
+    def _run_with_cancel(cancel_event: threading.Event, func: Callable, args: tuple):
+        _cancel_event.set(cancel_event)
+        check_cancelled()
+        return func(*args)
+    
+    async def run(self, func: Callable, *args, timeout: Optional[float] = None):
+        """
+        func(*args)를 스레드 풀에서 실행하고 결과 반환
+        
+        Raises:
+            asyncio.TimeoutError: 타임아웃 초과
+            asyncio.CancelledError: 도구 호출 취소
+        """
+        timeout = self.timeout if timeout is None else timeout
+        cancel_event = threading.Event()
+        context = contextvars.copy_context()
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, context.run, self._run_with_cancel, cancel_event, func, args)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except BaseException:
+            cancel_event.set()
+            raise
@@ -0,0 +1,24 @@
+-- 스트리밍 모드(streaming=true) 확인용 다중 Statement 스크립트
+-- 문자열/주석/달러 인용 안의 세미콜론은 Statement 경계가 아니어야 합니다 (Statement 6개)
+
+CREATE TABLE notes (
+    id SERIAL PRIMARY KEY,
+    body TEXT NOT NULL
+);
+
+-- 이스케이프 문자열: \' 는 문자열을 닫지 않음
+INSERT INTO notes (body) VALUES (E'it\'s; here'), (E'back\\slash; ok');
+
+INSERT INTO notes (body) VALUES ('it''s; quoted');
+
+/* 블록 주석 안의 세미콜론; /* 중첩 */ 도 무시 */
+DO $$
+BEGIN
+    UPDATE notes SET body = body || ';';
+END $$;
+
+SELECT n.id, n.body
+FROM notes n
+WHERE n.body LIKE '%;%'; -- 줄 끝 주석;
+
+DELETE FROM notes WHERE id > 100;
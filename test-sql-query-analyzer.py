@@ -9,6 +9,15 @@ SQL 쿼리 분석 독립 실행 스크립트
 예시:
   python test-sql-query-analyzer.py queries/complex_query.sql
   python test-sql-query-analyzer.py  # 워크스페이스에서 .sql 파일 자동 찾기
+
+코퍼스(대량) 분석 모드:
+  python test-sql-query-analyzer.py --corpus <디렉토리> [--workers N] [--output 결과.jsonl]
+                                    [--top N] [--parse-mode fast|reindent] [--no-cache] [--cache-dir 경로]
+  - 파일을 프로세스 풀에 분배하고, 끝나는 순서대로 파일별 결과를 JSONL로 기록
+  - 변경되지 않은 파일은 코퍼스 결과 캐시(기본값: logs/sql_analysis/.cache)에서 재사용
+  - 파일별 JSON 리포트는 <결과 파일>_reports/ 아래에 코퍼스 기준 상대 경로로 저장
+    (캐시 항목은 용량 제한으로 삭제될 수 있으므로 JSONL에는 이 복사본 경로를 기록)
+  - 성능 점수(낮은 순)와 복잡도 점수(높은 순) 순위 요약을 함께 저장
 """
 
 import sys
@@ -16,6 +25,8 @@ import os
 from pathlib import Path
 from datetime import datetime
 import json
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 # Windows 콘솔 인코딩 설정
 if sys.platform == 'win32':
@@ -32,6 +43,7 @@ try:
     spec.loader.exec_module(mcp_module)
     
     SQLQueryParser = mcp_module.SQLQueryParser
+    AnalysisContext = mcp_module.AnalysisContext
     QueryStructureAnalyzer = mcp_module.QueryStructureAnalyzer
     PerformanceAnalyzer = mcp_module.PerformanceAnalyzer
     OptimizationAdvisor = mcp_module.OptimizationAdvisor
@@ -40,6 +52,9 @@ try:
     DataLineageAnalyzer = mcp_module.DataLineageAnalyzer
     ImpactAnalyzer = mcp_module.ImpactAnalyzer
     ReportGenerator = mcp_module.ReportGenerator
+    AnalysisResultCache = mcp_module.AnalysisResultCache
+    copy_report_artifact = mcp_module.copy_report_artifact
+    build_analysis_summary = mcp_module.build_analysis_summary
 except Exception as e:
     print(f"[오류] MCP 서버 모듈을 불러올 수 없습니다: {e}")
     print("mcp-sql-query-analyzer.py 파일이 같은 디렉토리에 있는지 확인하세요.")
@@ -265,31 +280,27 @@ def main():
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 
                 # JSON 리포트 저장
-                json_report = report_generator.generate_json()
                 json_file = os.path.join(output_dir, f"{base_name}_analysis_{timestamp}.json")
                 with open(json_file, 'w', encoding='utf-8') as f:
-                    json.dump(json_report, f, ensure_ascii=False, indent=2)
+                    report_generator.write_json(f)
                 print(f"[JSON 리포트 저장] {json_file}")
                 
                 # 마크다운 리포트 저장
-                md_report = report_generator.generate_markdown()
                 md_file = os.path.join(output_dir, f"{base_name}_analysis_{timestamp}.md")
                 with open(md_file, 'w', encoding='utf-8') as f:
-                    f.write(md_report)
+                    report_generator.write_markdown(f)
                 print(f"[마크다운 리포트 저장] {md_file}")
                 
                 # 리니지 마크다운 리포트 저장
-                lineage_md_report = report_generator.generate_lineage_markdown()
                 lineage_md_file = os.path.join(output_dir, f"{base_name}_lineage_{timestamp}.md")
                 with open(lineage_md_file, 'w', encoding='utf-8') as f:
-                    f.write(lineage_md_report)
+                    report_generator.write_lineage_markdown(f)
                 print(f"[리니지 마크다운 리포트 저장] {lineage_md_file}")
                 
                 # 리니지 JSON 리포트 저장
-                lineage_json_report = report_generator.generate_lineage_json()
                 lineage_json_file = os.path.join(output_dir, f"{base_name}_lineage_{timestamp}.json")
                 with open(lineage_json_file, 'w', encoding='utf-8') as f:
-                    json.dump(lineage_json_report, f, ensure_ascii=False, indent=2)
+                    report_generator.write_lineage_json(f)
                 print(f"[리니지 JSON 리포트 저장] {lineage_json_file}")
                 print()
                 print()
@@ -308,6 +319,245 @@ def main():
             if output_file:
                 print(f"\n[완료] 분석 결과가 저장되었습니다: {output_file}")
 
+# ============================================
+# 코퍼스(대량) 분석 모드
+# ============================================
+
+# 워커 프로세스별 결과 캐시 (프로세스 풀 initializer에서 생성)
+_corpus_cache = None
+_corpus_parse_mode = 'fast'
+# 코퍼스 디렉토리와 파일별 리포트 디렉토리
+_corpus_root = None
+_corpus_report_dir = None
+
+def _init_corpus_worker(corpus_dir: str, report_dir: str, cache_dir: str, max_entries: int, parse_mode: str):
+    """코퍼스 분석 워커 초기화 (프로세스당 한 번)"""
+    global _corpus_cache, _corpus_parse_mode, _corpus_root, _corpus_report_dir
+    _corpus_parse_mode = parse_mode
+    _corpus_root = os.path.abspath(corpus_dir)
+    _corpus_report_dir = report_dir
+    if cache_dir:
+        # 대량 저장 중 캐시 디렉토리 전체 스캔을 줄이기 위해 용량 정리는 50회마다 수행
+        _corpus_cache = AnalysisResultCache(cache_dir, max_entries=max_entries, evict_every=50)
+
+def analyze_corpus_file(sql_file_path: str) -> dict:
+    """
+    코퍼스의 SQL 파일 하나 분석 (워커 프로세스에서 실행)
+    
+    Returns:
+        dict: JSONL 한 줄로 기록할 파일별 결과
+    """
+    started = time.perf_counter()
+    record = {'file': sql_file_path, 'success': False}
+    # 리포트 경로: <리포트 디렉토리>/<코퍼스 기준 상대 경로>.json
+    report_path = os.path.join(_corpus_report_dir,
+                               os.path.relpath(os.path.abspath(sql_file_path), _corpus_root) + '.json')
+    try:
+        with open(sql_file_path, 'r', encoding='utf-8', errors='ignore') as f:
+            sql_content = f.read()
+        
+        if not sql_content.strip():
+            record['error'] = 'SQL 파일이 비어있습니다.'
+            return record
+        
+        cache_key = AnalysisResultCache.make_key(sql_content, _corpus_parse_mode) if _corpus_cache else None
+        cached = _corpus_cache.lookup(cache_key, ['analysis.json']) if _corpus_cache else None
+        
+        os.makedirs(os.path.dirname(report_path), exist_ok=True)
+        if cached:
+            # 캐시 항목에는 원본 경로가 없으므로 이 파일의 경로와 분석 일시를 기록하며 복사
+            copy_report_artifact('analysis.json', cached['files']['analysis.json'], report_path,
+                                 sql_file_path, datetime.now())
+            record['cache'] = 'hit'
+            record['summary'] = cached['meta']['summary']
+        else:
+            parser = SQLQueryParser(sql_content, _corpus_parse_mode)
+            structure_analyzer = QueryStructureAnalyzer(parser)
+            structure_result = structure_analyzer.analyze()
+            performance_analyzer = PerformanceAnalyzer(parser)
+            optimization_advisor = OptimizationAdvisor(parser, performance_analyzer)
+            complexity_analyzer = ComplexityAnalyzer(parser)
+            security_analyzer = SecurityAnalyzer(parser)
+            lineage_analyzer = DataLineageAnalyzer(parser, structure_result)
+            
+            report_generator = ReportGenerator(
+                parser, structure_analyzer, performance_analyzer,
+                optimization_advisor, complexity_analyzer, security_analyzer,
+                sql_file_path, lineage_analyzer
+            )
+            record['summary'] = build_analysis_summary(structure_result, report_generator)
+            with open(report_path, 'w', encoding='utf-8') as f:
+                report_generator.write_json(f)
+            
+            if _corpus_cache:
+                # 캐시 항목은 내용이 같은 파일들이 공유하므로 파일별 정보(경로)는 메타데이터에 남기지 않음
+                _corpus_cache.store(cache_key, {'analysis.json': report_path}, {
+                    'analyzer_version': mcp_module.ANALYZER_VERSION,
+                    'analyzed_at': datetime.now().isoformat(),
+                    'summary': record['summary']
+                })
+                record['cache'] = 'miss'
+            else:
+                record['cache'] = 'off'
+        
+        record['report'] = report_path
+        record['success'] = True
+    except Exception as e:
+        record['error'] = str(e)
+    finally:
+        record['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    return record
+
+def build_corpus_summary(records: list, top_n: int = 20) -> dict:
+    """파일별 결과로 코퍼스 요약 생성 (성능 점수 낮은 순 / 복잡도 점수 높은 순 순위)"""
+    succeeded = [r for r in records if r['success']]
+    failed = [r for r in records if not r['success']]
+    
+    def rank_entry(record):
+        summary = record['summary']
+        return {
+            'file': record['file'],
+            'performance_score': summary['performance']['score'],
+            'performance_level': summary['performance']['level'],
+            'complexity_score': summary['complexity']['score'],
+            'complexity_level': summary['complexity']['level'],
+            'security_score': summary['security']['score'],
+            'query_lines': summary['query_lines']
+        }
+    
+    worst_performance = sorted(
+        succeeded, key=lambda r: (r['summary']['performance']['score'], -r['summary']['complexity']['score'], r['file'])
+    )
+    most_complex = sorted(
+        succeeded, key=lambda r: (-r['summary']['complexity']['score'], r['summary']['performance']['score'], r['file'])
+    )
+    
+    cache_counts = {}
+    for record in succeeded:
+        cache_counts[record.get('cache', 'off')] = cache_counts.get(record.get('cache', 'off'), 0) + 1
+    
+    return {
+        'analyzer_version': mcp_module.ANALYZER_VERSION,
+        'generated_at': datetime.now().isoformat(),
+        'total_files': len(records),
+        'succeeded': len(succeeded),
+        'failed': len(failed),
+        'cache': cache_counts,
+        'total_elapsed_ms': round(sum(r['elapsed_ms'] for r in records), 1),
+        'worst_performance': [rank_entry(r) for r in worst_performance[:top_n]],
+        'most_complex': [rank_entry(r) for r in most_complex[:top_n]],
+        'errors': [{'file': r['file'], 'error': r.get('error')} for r in failed]
+    }
+
+def run_corpus_analysis(corpus_dir: str, workers: int = None, output_path: str = None, top_n: int = 20,
+                        parse_mode: str = 'fast', use_cache: bool = True, cache_dir: str = None,
+                        cache_max_entries: int = 10000) -> dict:
+    """
+    디렉토리의 SQL 파일 전체를 프로세스 풀로 병렬 분석
+    
+    파일별 결과는 끝나는 순서대로 JSONL 파일에 한 줄씩 기록하고(중간에 중단되어도 결과 보존),
+    모든 파일이 끝나면 순위 요약을 <출력 파일>_summary.json 으로 저장합니다.
+    파일별 JSON 리포트는 <출력 파일>_reports/ 아래에 저장합니다 (캐시 적중 시 캐시에서 복사).
+    
+    Returns:
+        dict: 코퍼스 요약 (output/summary_file 경로 포함)
+    """
+    sql_files = sorted(find_sql_files(corpus_dir))
+    
+    workspace_root = os.path.dirname(os.path.abspath(__file__))
+    if not output_path:
+        output_dir = os.path.join(workspace_root, 'logs', 'sql_analysis')
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_path = os.path.join(output_dir, f"corpus_{timestamp}.jsonl")
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    report_dir = os.path.abspath(os.path.splitext(output_path)[0] + '_reports')
+    
+    if use_cache:
+        cache_dir = os.path.abspath(cache_dir or os.path.join(workspace_root, 'logs', 'sql_analysis', '.cache'))
+        os.makedirs(cache_dir, exist_ok=True)
+    else:
+        cache_dir = None
+    
+    workers = workers or os.cpu_count() or 1
+    records = []
+    
+    print(f"[코퍼스 분석] {corpus_dir}: SQL 파일 {len(sql_files)}개, 워커 {workers}개", file=sys.stderr)
+    
+    with open(output_path, 'w', encoding='utf-8') as out, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_corpus_worker,
+                                initargs=(corpus_dir, report_dir, cache_dir, cache_max_entries, parse_mode)) as executor:
+        futures = [executor.submit(analyze_corpus_file, sql_file) for sql_file in sql_files]
+        for done_count, future in enumerate(as_completed(futures), 1):
+            record = future.result()
+            records.append(record)
+            out.write(json.dumps(record, ensure_ascii=False) + '\n')
+            out.flush()
+            
+            status = f"캐시 {record['cache']}" if record['success'] else f"오류: {record.get('error')}"
+            print(f"  [{done_count}/{len(sql_files)}] {record['file']} ({record['elapsed_ms']}ms, {status})",
+                  file=sys.stderr)
+    
+    summary = build_corpus_summary(records, top_n)
+    summary_path = os.path.splitext(output_path)[0] + '_summary.json'
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    
+    summary['output'] = output_path
+    summary['summary_file'] = summary_path
+    summary['report_dir'] = report_dir
+    return summary
+
+def print_corpus_summary(summary: dict, top_n: int = 10):
+    """코퍼스 요약 출력"""
+    print("=" * 120)
+    print(f"[코퍼스 분석 완료] 파일 {summary['total_files']}개 (성공 {summary['succeeded']}, 실패 {summary['failed']})")
+    print(f"- 캐시: {summary['cache']}")
+    print(f"- 파일별 결과(JSONL): {summary['output']}")
+    print(f"- 요약: {summary['summary_file']}")
+    print(f"- 파일별 리포트: {summary['report_dir']}")
+    print()
+    
+    print(f"### 성능 점수 하위 {top_n}개")
+    for i, entry in enumerate(summary['worst_performance'][:top_n], 1):
+        print(f"{i}. {entry['performance_score']}/100 ({entry['performance_level']}), "
+              f"복잡도 {entry['complexity_score']}/100 - {entry['file']}")
+    print()
+    
+    print(f"### 복잡도 점수 상위 {top_n}개")
+    for i, entry in enumerate(summary['most_complex'][:top_n], 1):
+        print(f"{i}. {entry['complexity_score']}/100 ({entry['complexity_level']}), "
+              f"성능 {entry['performance_score']}/100 - {entry['file']}")
+    
+    if summary['errors']:
+        print()
+        print("### 분석 실패")
+        for entry in summary['errors']:
+            print(f"- {entry['file']}: {entry['error']}")
+
+def parse_corpus_args(argv: list) -> dict:
+    """--corpus 모드 명령줄 인자 파싱"""
+    import argparse
+    arg_parser = argparse.ArgumentParser(prog='test-sql-query-analyzer.py --corpus')
+    arg_parser.add_argument('corpus_dir')
+    arg_parser.add_argument('--workers', type=int, default=None)
+    arg_parser.add_argument('--output', default=None)
+    arg_parser.add_argument('--top', type=int, default=20)
+    arg_parser.add_argument('--parse-mode', choices=['fast', 'reindent'], default='fast')
+    arg_parser.add_argument('--no-cache', action='store_true')
+    arg_parser.add_argument('--cache-dir', default=None)
+    arg_parser.add_argument('--cache-max-entries', type=int, default=10000)
+    args = arg_parser.parse_args(argv)
+    return {
+        'corpus_dir': args.corpus_dir,
+        'workers': args.workers,
+        'output_path': args.output,
+        'top_n': args.top,
+        'parse_mode': args.parse_mode,
+        'use_cache': not args.no_cache,
+        'cache_dir': args.cache_dir,
+        'cache_max_entries': args.cache_max_entries
+    }
+
 def analyze_impact(sql_file_path: str, target_table: str, target_column: str = None) -> dict:
     """영향도 분석 함수 (API에서 호출용)"""
     try:
@@ -337,6 +587,38 @@ def analyze_impact(sql_file_path: str, target_table: str, target_column: str = N
             'error': str(e)
         }
 
+def parse_impact_target(spec: str) -> tuple:
+    """영향도 분석 대상 문자열 파싱 ('table' 또는 'table:column')"""
+    table, _, column = spec.partition(':')
+    return table.strip(), (column.strip() or None)
+
+def analyze_impact_batch(sql_file_path: str, targets: list) -> dict:
+    """다중 대상 영향도 분석 함수 (한 번의 파싱/스캔으로 모든 대상 분석)"""
+    try:
+        with open(sql_file_path, 'r', encoding='utf-8', errors='ignore') as f:
+            sql_content = f.read()
+        
+        if not sql_content.strip():
+            return {'success': False, 'error': 'SQL 파일이 비어있습니다.'}
+        
+        parser = SQLQueryParser(sql_content)
+        structure_analyzer = QueryStructureAnalyzer(parser)
+        structure_result = structure_analyzer.analyze()
+        lineage_analyzer = DataLineageAnalyzer(parser, structure_result)
+        
+        impact_analyzer = ImpactAnalyzer(parser, lineage_analyzer, structure_analyzer)
+        batch_result = impact_analyzer.analyze_batch(targets)
+        
+        return {
+            'success': True,
+            'batch_impact_analysis': batch_result
+        }
+    except Exception as e:
+        return {
+            'success': False,
+            'error': str(e)
+        }
+
 if __name__ == "__main__":
     # 영향도 분석 모드 확인 (환경 변수 또는 명령줄 인자)
     if len(sys.argv) >= 3 and sys.argv[1] == '--impact':
@@ -351,6 +633,22 @@ if __name__ == "__main__":
         
         result = analyze_impact(sql_file, target_table, target_column)
         print(json.dumps(result, ensure_ascii=False, indent=2))
+    elif len(sys.argv) >= 3 and sys.argv[1] == '--impact-batch':
+        # 다중 대상 영향도 분석 모드: --impact-batch <sql_file> <table[:column]> ...
+        sql_file = sys.argv[2]
+        targets = [parse_impact_target(spec) for spec in sys.argv[3:] if spec.strip()]
+        
+        if not targets or not all(table for table, _ in targets):
+            print('{"success": false, "error": "테이블명이 필요합니다."}')
+            sys.exit(1)
+        
+        result = analyze_impact_batch(sql_file, targets)
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    elif len(sys.argv) >= 3 and sys.argv[1] == '--corpus':
+        # 코퍼스(대량) 병렬 분석 모드
+        corpus_options = parse_corpus_args(sys.argv[2:])
+        corpus_summary = run_corpus_analysis(**corpus_options)
+        print_corpus_summary(corpus_summary, min(corpus_options['top_n'], 10))
     else:
         # 일반 분석 모드
         main()